@@ -0,0 +1,34 @@
+"""Allow CANCELLED screener runs.
+
+Revision ID: 0082
+Revises: 0080
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0082"
+down_revision = "0080"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("screener_runs") as batch_op:
+        batch_op.drop_constraint("ck_screener_runs_status", type_="check")
+        batch_op.create_check_constraint(
+            "ck_screener_runs_status",
+            "status IN ('RUNNING', 'DONE', 'ERROR', 'CANCELLED')",
+        )
+
+
+def downgrade() -> None:
+    op.execute("UPDATE screener_runs SET status = 'ERROR' WHERE status = 'CANCELLED'")
+    with op.batch_alter_table("screener_runs") as batch_op:
+        batch_op.drop_constraint("ck_screener_runs_status", type_="check")
+        batch_op.create_check_constraint(
+            "ck_screener_runs_status",
+            "status IN ('RUNNING', 'DONE', 'ERROR')",
+        )
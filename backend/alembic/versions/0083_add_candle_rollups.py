@@ -0,0 +1,60 @@
+"""Add materialized candle rollups for derived timeframes.
+
+Revision ID: 0083
+Revises: 0082
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0083"
+down_revision = "0082"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "candle_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("symbol", sa.String(length=128), nullable=False),
+        sa.Column("exchange", sa.String(length=32), nullable=False),
+        sa.Column("timeframe", sa.String(length=8), nullable=False),
+        sa.Column("ts", sa.DateTime(), nullable=False),
+        sa.Column("first_ts", sa.DateTime(), nullable=False),
+        sa.Column("bar_count", sa.Integer(), nullable=False),
+        sa.Column("open", sa.Float(), nullable=False),
+        sa.Column("high", sa.Float(), nullable=False),
+        sa.Column("low", sa.Float(), nullable=False),
+        sa.Column("close", sa.Float(), nullable=False),
+        sa.Column("volume", sa.Float(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "symbol",
+            "exchange",
+            "timeframe",
+            "ts",
+            name="ux_candle_rollups_symbol_exchange_tf_ts",
+        ),
+    )
+    op.create_table(
+        "candle_rollup_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("symbol", sa.String(length=128), nullable=False),
+        sa.Column("exchange", sa.String(length=32), nullable=False),
+        sa.Column("base_timeframe", sa.String(length=8), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            "symbol",
+            "exchange",
+            "base_timeframe",
+            name="ux_candle_rollup_state_symbol_exchange_tf",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("candle_rollup_state")
+    op.drop_table("candle_rollups")
@@ -0,0 +1,38 @@
+"""Add persisted running P&L state for pre-trade risk checks.
+
+Revision ID: 0084
+Revises: 0083
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0084"
+down_revision = "0083"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "risk_pnl_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("scope", sa.String(length=32), nullable=False),
+        sa.Column("trade_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cumulative_pnl", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("peak_cumulative_pnl", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("loss_streak", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_trade_id", sa.Integer(), nullable=True),
+        sa.Column("last_closed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_day", sa.Date(), nullable=True),
+        sa.Column("last_day_pnl", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("scope", name="ux_risk_pnl_state_scope"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("risk_pnl_state")
@@ -0,0 +1,25 @@
+"""Add packed covariance blob to risk_covariance_cache.
+
+Revision ID: 0085
+Revises: 0084
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0085"
+down_revision = "0084"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("risk_covariance_cache", sa.Column("cov_blob", sa.LargeBinary()))
+
+
+def downgrade() -> None:
+    op.drop_column("risk_covariance_cache", "cov_blob")
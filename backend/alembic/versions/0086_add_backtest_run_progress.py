@@ -0,0 +1,25 @@
+"""Add job progress to backtest_runs.
+
+Revision ID: 0086
+Revises: 0085
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0086"
+down_revision = "0085"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("backtest_runs", sa.Column("progress", sa.Float()))
+
+
+def downgrade() -> None:
+    op.drop_column("backtest_runs", "progress")
@@ -0,0 +1,25 @@
+"""Add execution trace to orders.
+
+Revision ID: 0087
+Revises: 0086
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0087"
+down_revision = "0086"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("orders", sa.Column("execution_trace_json", sa.Text()))
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "execution_trace_json")
@@ -0,0 +1,40 @@
+"""Add config_versions for cross-process config cache invalidation.
+
+Revision ID: 0088
+Revises: 0087
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0088"
+down_revision = "0087"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        "config_versions",
+        sa.Column("family", sa.String(length=32), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    now = datetime.now(UTC)
+    op.bulk_insert(
+        table,
+        [
+            {"family": family, "version": 0, "updated_at": now}
+            for family in ("risk", "webhook", "ai", "broker")
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("config_versions")
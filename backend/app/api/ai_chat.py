@@ -139,6 +139,7 @@ async def ai_chat(
                 duration_ms=t.duration_ms,
                 result_preview=t.result_preview,
                 error=t.error,
+                phase_ms=t.phase_ms,
             )
             for t in result.tool_calls
         ],
@@ -202,6 +203,7 @@ async def ai_chat_resume(
                     duration_ms=t.duration_ms,
                     result_preview=t.result_preview,
                     error=t.error,
+                    phase_ms=t.phase_ms,
                 )
                 for t in result.tool_calls
             ],
@@ -239,6 +241,7 @@ async def ai_chat_resume(
                 duration_ms=t.duration_ms,
                 result_preview=t.result_preview,
                 error=t.error,
+                phase_ms=t.phase_ms,
             )
             for t in result.tool_calls
         ],
@@ -26,7 +26,7 @@ from app.services.ai_trading_manager.ai_settings_config import (
     set_ai_settings,
     should_allow_execution_enable,
 )
-from app.services.system_events import record_system_event
+from app.services.system_events import flush_audit_events, record_system_event
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -181,6 +181,7 @@ def list_ai_audit_events(
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
 ) -> AiAuditResponse:
+    flush_audit_events()
     cats = {"AI_SETTINGS", "KITE_MCP"}
     if category is not None:
         # Allow filtering to one of the AI categories.
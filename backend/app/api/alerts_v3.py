@@ -36,6 +36,7 @@ from app.schemas.alerts_v3 import (
     CustomIndicatorUpdate,
 )
 from app.schemas.positions import HoldingRead
+from app.services.alerts_v3 import get_alerts_v3_cycle_stats
 from app.services.alerts_v3_compiler import (
     compile_alert_definition,
     compile_alert_expression,
@@ -837,6 +838,13 @@ def list_alert_events(
     return out
 
 
+@router.get("/cycle-stats", response_model=dict)
+def alerts_cycle_stats() -> dict:
+    """Return counters from the latest background evaluation cycle."""
+
+    return get_alerts_v3_cycle_stats()
+
+
 @router.post("/test", response_model=AlertV3TestResponse)
 def test_alert_expression_api(
     payload: AlertV3TestRequest,
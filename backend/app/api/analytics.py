@@ -5,7 +5,7 @@ from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlalchemy import and_, func, tuple_
+from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
 from app.api.auth import get_current_user_optional
@@ -44,8 +44,12 @@ from app.services.analytics import compute_strategy_analytics, rebuild_trades
 from app.services.market_data import (
     Timeframe,
     ensure_history,
+    ensure_history_many,
     ensure_history_window,
+    history_extend_segments,
     load_series,
+    load_series_columns_many,
+    load_ts_bounds_many,
 )
 from app.services.risk_sizing import compute_risk_position_size
 
@@ -409,35 +413,8 @@ def _normalize_symbol_exchange(symbol: str, exchange: str | None) -> tuple[str,
     return sym, exch
 
 
-def _load_global_min_ts_by_symbol(
-    db: Session,
-    *,
-    timeframe: str,
-    pairs: list[tuple[str, str]],
-) -> dict[tuple[str, str], datetime]:
-    """Return earliest known candle per symbol+exchange for a timeframe.
-
-    Used to distinguish "true missing history" from "late entrant" symbols
-    whose earliest available candle itself is after the requested window start.
-    """
-
-    if not pairs:
-        return {}
-    rows = (
-        db.query(Candle.symbol, Candle.exchange, func.min(Candle.ts))
-        .filter(
-            Candle.timeframe == timeframe,
-            tuple_(Candle.symbol, Candle.exchange).in_(pairs),
-        )
-        .group_by(Candle.symbol, Candle.exchange)
-        .all()
-    )
-    out: dict[tuple[str, str], datetime] = {}
-    for sym, exch, ts in rows:
-        if ts is None:
-            continue
-        out[(sym, exch)] = ts
-    return out
+# Sentinel for `_maybe_hydrate_tail_gap`: look up the latest candle itself.
+_QUERY_MAX_TS: Any = object()
 
 
 def _maybe_hydrate_tail_gap(
@@ -450,19 +427,25 @@ def _maybe_hydrate_tail_gap(
     start: datetime,
     end: datetime,
     max_days: int,
+    existing_max: datetime | None = _QUERY_MAX_TS,
 ) -> bool:
-    """Auto-hydrate small tail gaps (last N days) to keep data fresh."""
+    """Auto-hydrate small tail gaps (last N days) to keep data fresh.
 
-    existing_max: datetime | None = (
-        db.query(func.max(Candle.ts))
-        .filter(
-            Candle.symbol == symbol,
-            Candle.exchange == exchange,
-            Candle.timeframe == timeframe,
-            and_(Candle.ts >= start, Candle.ts <= end),
+    `existing_max` is the latest candle inside [start, end] (None if there is
+    none); it is queried here unless the caller already loaded it.
+    """
+
+    if existing_max is _QUERY_MAX_TS:
+        existing_max = (
+            db.query(func.max(Candle.ts))
+            .filter(
+                Candle.symbol == symbol,
+                Candle.exchange == exchange,
+                Candle.timeframe == timeframe,
+                and_(Candle.ts >= start, Candle.ts <= end),
+            )
+            .scalar()
         )
-        .scalar()
-    )
     if existing_max is None:
         return False
     gap = _gap_days(existing_max, end)
@@ -576,21 +559,29 @@ def basket_indices(
         for sym, exch in members:
             uniq.setdefault((sym, exch), {})
 
-    global_min_map = _load_global_min_ts_by_symbol(
-        db,
-        timeframe="1d",
-        pairs=sorted(uniq.keys()),
-    )
+    pairs = sorted(uniq.keys())
+    global_bounds = load_ts_bounds_many(db, pairs=pairs, timeframe="1d")
+    global_min_map = {pair: lo for pair, (lo, _hi) in global_bounds.items()}
 
     # Data freshness policy on Refresh:
     # - For holdings symbols: ensure requested window is present (min/max extension).
     #   This should prevent "hydrate needed" surprises for holdings.
     # - For group symbols: auto-fill small recent tail gaps; big gaps remain explicit.
+    # Coverage for every symbol comes from the two bulk bounds queries, so only
+    # symbols that actually need a fetch touch the DB (and broker) one by one.
     holding_set = set(holdings_members)
     allow_full_fetch = requested_days <= 60
-    for sym, exch in uniq.keys():
+    window_bounds = load_ts_bounds_many(
+        db, pairs=pairs, timeframe="1d", start=start, end=end
+    )
+    now_fetch = _now_ist_naive()
+    for sym, exch in pairs:
         try:
             if allow_full_fetch or (sym, exch) in holding_set:
+                if not history_extend_segments(
+                    global_bounds.get((sym, exch)), start=start, end=end, now=now_fetch
+                ):
+                    continue
                 ensure_history(
                     db,
                     settings,
@@ -601,6 +592,7 @@ def basket_indices(
                     end=end,
                 )
             else:
+                window = window_bounds.get((sym, exch))
                 _maybe_hydrate_tail_gap(
                     db,
                     settings,
@@ -610,24 +602,24 @@ def basket_indices(
                     start=start,
                     end=end,
                     max_days=60,
+                    existing_max=window[1] if window else None,
                 )
         except Exception:
             # If a symbol cannot be hydrated (e.g. missing instrument token),
             # keep dashboard responsive and let "Hydrate universe" surface details.
             pass
 
-    for sym, exch in uniq.keys():
-        candles = load_series(
-            db,
-            settings,
-            symbol=sym,
-            exchange=exch,
-            timeframe="1d",  # type: ignore[arg-type]
-            start=start,
-            end=end,
-            allow_fetch=False,
-        )
-        uniq[(sym, exch)] = {c["ts"]: float(c["close"]) for c in candles if c.get("ts")}
+    series = load_series_columns_many(
+        db,
+        settings,
+        pairs=pairs,
+        timeframe="1d",
+        start=start,
+        end=end,
+        allow_fetch=False,
+    )
+    for pair, cols in series.items():
+        uniq[pair] = dict(zip(cols.datetimes(), cols.close, strict=True))
 
     # Build per-universe indices.
     out_series: List[BasketIndexSeries] = []
@@ -771,22 +763,16 @@ def hydrate_history(
                 members.append((sym, exch))
 
     uniq: list[tuple[str, str]] = sorted(set(members))
-    hydrated = 0
-    errors: list[str] = []
-    for sym, exch in uniq:
-        try:
-            ensure_history_window(
-                db,
-                settings,
-                symbol=sym,
-                exchange=exch,
-                base_timeframe=tf,
-                start=start,
-                end=end,
-            )
-            hydrated += 1
-        except Exception as exc:  # pragma: no cover - network/provider
-            errors.append(f"{exch}:{sym}: {exc}")
+    # Symbols hydrate in parallel on the history fetch pool (own session per
+    # worker, shared broker rate limit).
+    hydrated, errors = ensure_history_many(
+        settings,
+        uniq,
+        base_timeframe=tf,
+        start=start,
+        end=end,
+        full_window=True,
+    )
 
     return HydrateUniverseResponse(
         hydrated=hydrated,
@@ -1263,19 +1249,18 @@ def holdings_correlation(
     returns_by_symbol: Dict[str, Dict[datetime, float]] = {}
     date_sets: List[set[datetime]] = []
 
+    series_by_pair = load_series_columns_many(
+        db,
+        settings,
+        pairs=[(s, symbol_exchange.get(s, "NSE")) for s in included_symbols],
+        timeframe=timeframe,
+        start=start,
+        end=end,
+    )
     for symbol in included_symbols:
-        exchange = symbol_exchange.get(symbol, "NSE")
-        rows = load_series(
-            db,
-            settings,
-            symbol=symbol,
-            exchange=exchange,
-            timeframe=timeframe,
-            start=start,
-            end=end,
-        )
-        closes: List[float] = [float(r["close"]) for r in rows]
-        ts_list: List[datetime] = [r["ts"] for r in rows]
+        cols = series_by_pair[(symbol, symbol_exchange.get(symbol, "NSE"))]
+        closes: List[float] = list(cols.close)
+        ts_list: List[datetime] = cols.datetimes()
         if len(closes) < 2:
             continue
 
@@ -13,6 +13,11 @@ from app.core.config import Settings, get_settings
 from app.core.crypto import decrypt_token, encrypt_token
 from app.db.session import get_db
 from app.models import BrokerConnection, User
+from app.services.broker_clients import (
+    BrokerClientError,
+    get_broker_client_registry,
+    http_error_from_client_error,
+)
 from app.services.broker_instruments import resolve_broker_symbol_and_token
 from app.services.broker_secrets import get_broker_secret
 from app.services.instruments_sync import sync_smartapi_instrument_master
@@ -38,59 +43,10 @@ def _get_angelone_client(
     *,
     user: User,
 ) -> AngelOneClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "angelone",
-            BrokerConnection.user_id == user.id,
-        )
-        .one_or_none()
-    )
-    if conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="AngelOne is not connected.",
-        )
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="angelone",
-        key="api_key",
-        user_id=user.id,
-    )
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=(
-                "SmartAPI API key is not configured. "
-                "Please add api_key in broker settings."
-            ),
-        )
-
-    raw = decrypt_token(settings, conn.access_token_encrypted)
     try:
-        parsed = json.loads(raw) if raw else {}
-    except Exception as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"AngelOne session is invalid: {exc}",
-        ) from exc
-
-    jwt = str(parsed.get("jwt_token") or "")
-    if not jwt:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="AngelOne session is missing jwt_token. Please reconnect.",
-        )
-
-    session = AngelOneSession(
-        jwt_token=jwt,
-        refresh_token=str(parsed.get("refresh_token") or "") or None,
-        feed_token=str(parsed.get("feed_token") or "") or None,
-        client_code=str(parsed.get("client_code") or "") or None,
-    )
-    return AngelOneClient(api_key=api_key, session=session)
+        return get_broker_client_registry().angelone(db, settings, user_id=user.id)
+    except BrokerClientError as exc:
+        raise http_error_from_client_error(exc) from exc
 
 
 @router.post("/connect")
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import json
-from datetime import UTC, datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -25,12 +24,15 @@ from app.schemas.backtests_portfolio import PortfolioBacktestConfigIn
 from app.schemas.backtests_portfolio_strategy import PortfolioStrategyBacktestConfigIn
 from app.schemas.backtests_signal import SignalBacktestConfigIn
 from app.schemas.backtests_strategy import StrategyBacktestConfigIn
+from app.schemas.backtests_sweep import SweepBacktestConfigIn
+from app.services.backtest_jobs import (
+    add_backtest_run,
+    cancel_backtest_run,
+    get_backtest_job_queue,
+)
 from app.services.backtests_data import _norm_symbol_ref, load_eod_close_matrix
-from app.services.backtests_execution import run_execution_backtest
-from app.services.backtests_portfolio import run_portfolio_backtest
-from app.services.backtests_portfolio_strategy import run_portfolio_strategy_backtest
-from app.services.backtests_signal import SignalBacktestConfig, run_signal_backtest
-from app.services.backtests_strategy import run_strategy_backtest
+from app.services.backtests_sweep import build_sweep_configs
+from app.services.indicator_alerts import IndicatorAlertError
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -51,12 +53,13 @@ def create_backtest_run(
         "EXECUTION",
         "STRATEGY",
         "PORTFOLIO_STRATEGY",
+        "SWEEP",
     }:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
                 "kind must be SIGNAL, PORTFOLIO, EXECUTION, STRATEGY, "
-                "or PORTFOLIO_STRATEGY."
+                "PORTFOLIO_STRATEGY, or SWEEP."
             ),
         )
     title = payload.title.strip() if payload.title and payload.title.strip() else None
@@ -65,6 +68,7 @@ def create_backtest_run(
     pf_cfg_in: PortfolioBacktestConfigIn | None = None
     st_cfg_in: StrategyBacktestConfigIn | None = None
     pf_st_cfg_in: PortfolioStrategyBacktestConfigIn | None = None
+    sweep_cfg_in: SweepBacktestConfigIn | None = None
     exec_cfg_in = None
     if kind == "SIGNAL":
         try:
@@ -159,6 +163,39 @@ def create_backtest_run(
                     "backtests."
                 ),
             )
+    elif kind == "SWEEP":
+        try:
+            sweep_cfg_in = (
+                SweepBacktestConfigIn.model_validate(payload.config)
+                if PYDANTIC_V2
+                else SweepBacktestConfigIn.parse_obj(payload.config)
+            )
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid SWEEP backtest config: {exc}",
+            ) from exc
+        n_symbols = len(payload.universe.symbols)
+        if sweep_cfg_in.base_kind == "STRATEGY" and n_symbols != 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="STRATEGY sweeps require exactly one universe.symbols entry.",
+            )
+        if sweep_cfg_in.base_kind == "PORTFOLIO_STRATEGY" and n_symbols < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    "PORTFOLIO_STRATEGY sweeps require at least one "
+                    "universe.symbols entry."
+                ),
+            )
+        try:
+            build_sweep_configs(sweep_cfg_in)
+        except (ValueError, IndicatorAlertError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid SWEEP backtest config: {exc}",
+            ) from exc
     else:
         from app.schemas.backtests_execution import ExecutionBacktestConfigIn
 
@@ -209,108 +246,22 @@ def create_backtest_run(
         "universe": model_to_dict(payload.universe),
         "config": payload.config,
     }
-    now = datetime.now(UTC)
-    status_val = "RUNNING"
     run = BacktestRun(
         owner_id=user.id if user is not None else None,
         kind=kind,
-        status=status_val,
+        status="QUEUED",
         title=title,
         config_json=json.dumps(config, ensure_ascii=False),
         result_json=None,
         error_message=None,
-        started_at=now,
+        progress=0.0,
+        started_at=None,
         finished_at=None,
     )
-    db.add(run)
-    db.commit()
+    add_backtest_run(db, settings, run)
     db.refresh(run)
 
-    try:
-        result: dict | None = None
-        if kind == "SIGNAL":
-            assert cfg_in is not None
-            sym_refs = [
-                _norm_symbol_ref(s.exchange, s.symbol) for s in payload.universe.symbols
-            ]
-            cfg = SignalBacktestConfig(
-                mode=cfg_in.mode,
-                start_date=cfg_in.start_date,
-                end_date=cfg_in.end_date,
-                forward_windows=cfg_in.forward_windows,
-                dsl=cfg_in.dsl,
-                ranking_metric=cfg_in.ranking_metric,
-                ranking_window=cfg_in.ranking_window,
-                top_n=cfg_in.top_n,
-                cadence=cfg_in.cadence,
-            )
-            result = run_signal_backtest(
-                db,
-                settings,
-                symbols=sym_refs,
-                config=cfg,
-                allow_fetch=True,
-            )
-        elif kind == "PORTFOLIO":
-            assert pf_cfg_in is not None
-            group_id = int(payload.universe.group_id)
-            result = run_portfolio_backtest(
-                db,
-                settings,
-                group_id=group_id,
-                config=pf_cfg_in,
-                allow_fetch=True,
-            )
-        elif kind == "EXECUTION":
-            assert exec_cfg_in is not None
-            base_run = db.get(BacktestRun, int(exec_cfg_in.base_run_id))
-            assert base_run is not None
-            result = run_execution_backtest(
-                db,
-                settings,
-                base_run=base_run,
-                config=exec_cfg_in,
-                allow_fetch=True,
-            )
-        elif kind == "STRATEGY":
-            assert st_cfg_in is not None
-            sym = payload.universe.symbols[0]
-            sym_ref = _norm_symbol_ref(sym.exchange, sym.symbol)
-            result = run_strategy_backtest(
-                db,
-                settings,
-                symbol=sym_ref,
-                config=payload.config,
-                allow_fetch=True,
-            )
-        elif kind == "PORTFOLIO_STRATEGY":
-            assert pf_st_cfg_in is not None
-            sym_refs = [
-                _norm_symbol_ref(s.exchange, s.symbol)
-                for s in (payload.universe.symbols or [])
-            ]
-            result = run_portfolio_strategy_backtest(
-                db,
-                settings,
-                symbols=sym_refs,
-                config=pf_st_cfg_in,
-                allow_fetch=True,
-            )
-
-        run.status = "COMPLETED"
-        run.finished_at = datetime.now(UTC)
-        run.result_json = json.dumps(result, ensure_ascii=False) if result else None
-        db.add(run)
-        db.commit()
-        db.refresh(run)
-    except Exception as exc:
-        run.status = "FAILED"
-        run.finished_at = datetime.now(UTC)
-        run.error_message = str(exc)
-        db.add(run)
-        db.commit()
-        db.refresh(run)
-
+    get_backtest_job_queue().submit(run.id)
     return BacktestRunRead.from_model(run)
 
 
@@ -356,6 +307,34 @@ def get_backtest_run(
     return BacktestRunRead.from_model(run)
 
 
+@router.post("/runs/{run_id}/cancel", response_model=BacktestRunRead)
+def cancel_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    user: User | None = Depends(get_current_user_optional),
+) -> BacktestRunRead:
+    run = db.get(BacktestRun, run_id)
+    owner_ok = run is not None and (
+        run.owner_id is None if user is None else run.owner_id in (None, user.id)
+    )
+    if run is None or not owner_ok:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not cancel_backtest_run(db, run):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Run is not queued or running.",
+        )
+    db.refresh(run)
+    return BacktestRunRead.from_model(run)
+
+
+@router.get("/queue", response_model=dict)
+def backtest_queue_stats() -> dict:
+    """Return backtest worker pool settings and job counters."""
+
+    return get_backtest_job_queue().stats()
+
+
 @router.post("/candles/eod", response_model=EodCandleLoadResponse)
 def load_eod_candles(
     payload: EodCandleLoadRequest,
@@ -41,13 +41,14 @@ from app.services.deployment_exposure import (
     compute_deployment_exposure,
     detect_direction_mismatch,
 )
-from app.services.deployment_jobs import enqueue_job
+from app.services.deployment_jobs import count_runnable_jobs, enqueue_job
 from app.services.deployment_scheduler import (
     DEFAULT_LATE_TOLERANCE_SECONDS,
     ist_naive_to_utc,
     latest_closed_bar_end_ist,
     now_ist_naive,
 )
+from app.services.deployment_worker import get_deployment_worker_stats
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -479,6 +480,9 @@ def deployments_metrics(
         "job_counts": by_status,
         "oldest_pending_created_at": oldest_pending,
         "latest_failed_updated_at": latest_error,
+        # Runtime-wide (all owners): due PENDING jobs and in-process workers.
+        "queue_depth": count_runnable_jobs(db),
+        "workers": get_deployment_worker_stats(),
     }
 
 
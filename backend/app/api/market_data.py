@@ -13,13 +13,26 @@ from app.core.market_hours import IST_OFFSET, is_market_open_now
 from app.db.session import get_db
 from app.models import Listing
 from app.schemas.market_data import CandlePoint, MarketSymbol
-from app.services.market_quotes import get_bulk_quotes
+from app.services.broker_clients import get_broker_client_registry
+from app.services.candle_ingest import get_ingest_stats
+from app.services.candle_rollups import (
+    check_rollups,
+    get_rollup_stats,
+    rebuild_rollups,
+    rollup_instruments,
+)
+from app.services.candle_store import get_candle_store
+from app.services.history_fetch import get_history_fetch_scheduler
+from app.services.holdings_snapshot import get_holdings_snapshot_cache
+from app.services.indicator_state import get_indicator_state_store
 from app.services.market_data import (
     MarketDataError,
     Timeframe,
     _get_kite_client,
     load_series,
 )
+from app.services.market_quotes import get_bulk_quotes
+from app.services.quote_hub import get_quote_hub
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -64,6 +77,102 @@ def market_data_status(
         }
 
 
+@router.get("/broker-clients", response_model=dict)
+def broker_client_stats() -> dict:
+    """Return pooled broker clients with per-client HTTP latency counters."""
+
+    return get_broker_client_registry().stats()
+
+
+@router.get("/candle-store", response_model=dict)
+def candle_store_stats() -> dict:
+    """Return hit/miss counters and memory usage of the shared candle store."""
+
+    return get_candle_store().stats()
+
+
+@router.get("/indicator-state", response_model=dict)
+def indicator_state_stats() -> dict:
+    """Return counters for streaming (incremental) alert indicator state."""
+
+    return get_indicator_state_store().stats()
+
+
+@router.get("/history-fetch", response_model=dict)
+def history_fetch_stats() -> dict:
+    """Return history fetch scheduler, rate limiter and ingestion counters."""
+
+    stats = get_history_fetch_scheduler().stats()
+    stats["ingest"] = get_ingest_stats()
+    return stats
+
+
+@router.get("/quote-hub", response_model=dict)
+def quote_hub_stats() -> dict:
+    """Return subscriber and broker-call counters for the live quote hub."""
+
+    return get_quote_hub().stats()
+
+
+@router.get("/holdings-snapshots", response_model=dict)
+def holdings_snapshot_stats() -> dict:
+    """Return hit/miss, coalescing and rate-limit counters for holdings snapshots."""
+
+    return get_holdings_snapshot_cache().stats()
+
+
+@router.get("/rollups", response_model=dict)
+def candle_rollup_stats() -> dict:
+    """Return read and maintenance counters for materialized candle rollups."""
+
+    return get_rollup_stats()
+
+
+@router.get("/rollups/check", response_model=dict)
+def check_candle_rollups(
+    symbol: Optional[str] = Query(None),
+    exchange: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Compare stored rollups against base candles for matching instruments."""
+
+    results = [
+        check_rollups(db, symbol=sym, exchange=exch, base_timeframe=base_tf)
+        for sym, exch, base_tf in rollup_instruments(
+            db, symbol=symbol, exchange=exchange
+        )
+    ]
+    return {
+        "checked": len(results),
+        "inconsistent": sum(1 for r in results if not r["consistent"]),
+        "results": results,
+    }
+
+
+@router.post("/rollups/rebuild", response_model=dict)
+def rebuild_candle_rollups(
+    symbol: Optional[str] = Query(None),
+    exchange: Optional[str] = Query(None),
+    only_inconsistent: bool = Query(True),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Rebuild rollups for matching instruments (by default only stale ones)."""
+
+    rebuilt = 0
+    rows_written = 0
+    for sym, exch, base_tf in rollup_instruments(db, symbol=symbol, exchange=exchange):
+        if only_inconsistent and check_rollups(
+            db, symbol=sym, exchange=exch, base_timeframe=base_tf
+        )["consistent"]:
+            continue
+        rows_written += rebuild_rollups(
+            db, symbol=sym, exchange=exch, base_timeframe=base_tf
+        )
+        db.commit()
+        rebuilt += 1
+    return {"rebuilt": rebuilt, "rows_written": rows_written}
+
+
 @router.get("/history", response_model=List[CandlePoint])
 def get_market_history(
     symbol: str = Query(..., min_length=1),
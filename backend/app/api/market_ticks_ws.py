@@ -4,22 +4,20 @@ import asyncio
 import base64
 import os
 from datetime import UTC, datetime
-from typing import Any, TypeVar
+from typing import Any
 
 from fastapi import APIRouter, WebSocket
 from sqlalchemy.orm import Session
 
 from app.core.auth import SESSION_COOKIE_NAME, decode_session_token
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.db.session import SessionLocal
-from app.models import BrokerConnection, User
-from app.services.broker_secrets import get_broker_secret
+from app.models import User
+from app.services.broker_clients import get_broker_client_registry
+from app.services.quote_hub import get_quote_hub
 
 router = APIRouter()
 
-T = TypeVar("T")
-
 
 def _now_ist_iso() -> str:
     try:
@@ -74,39 +72,7 @@ def _require_ws_admin_user(websocket: WebSocket, *, db: Session, settings: Setti
 
 
 def _build_zerodha_client_for_user(db: Session, settings: Settings, *, user: User):
-    try:
-        from kiteconnect import KiteConnect  # type: ignore[import]
-    except ImportError as exc:  # pragma: no cover - defensive
-        raise RuntimeError("kiteconnect library is not installed in the backend environment.") from exc
-
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "zerodha",
-            BrokerConnection.user_id == int(user.id),
-        )
-        .one_or_none()
-    )
-    if conn is None:
-        raise RuntimeError("Zerodha is not connected.")
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="zerodha",
-        key="api_key",
-        user_id=int(user.id),
-    )
-    if not api_key:
-        raise RuntimeError("Zerodha API key is not configured.")
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-
-    from app.clients.zerodha import ZerodhaClient
-
-    return ZerodhaClient(kite)
+    return get_broker_client_registry().zerodha(db, settings, user_id=int(user.id))
 
 
 def _normalize_subscription(payload: Any) -> list[tuple[str, str]]:
@@ -137,16 +103,14 @@ def _normalize_subscription(payload: Any) -> list[tuple[str, str]]:
     return uniq[:300]
 
 
-def _chunked(items: list[T], *, size: int) -> list[list[T]]:
-    if size <= 0:
-        return [items]
-    return [items[i : i + size] for i in range(0, len(items), size)]
-
-
 @router.websocket("/ws/market/ticks")
 async def market_ticks_ws(websocket: WebSocket) -> None:
     """Best-effort 1s quote stream for holdings live prices.
 
+    Quotes come from the process-wide quote hub, which polls the broker once
+    per interval for each user's connected sockets (with that user's broker
+    session) and sends only changed symbols.
+
     Protocol:
       - client sends: {"type":"subscribe","symbols":[{"exchange":"NSE","symbol":"INFY"},...]}
       - server sends: {"type":"ticks","ts":"...","data":[{"exchange":"NSE","symbol":"INFY","ltp":1850.1,"prevClose":1834.0},...]}
@@ -164,156 +128,49 @@ async def market_ticks_ws(websocket: WebSocket) -> None:
             await websocket.close(code=1008)
             return
 
-    lock = asyncio.Lock()
-    subscribed: list[tuple[str, str]] = []
-
-    async def _call_blocking(fn, *args, timeout_sec: float = 2.5, **kwargs):
-        """Run a blocking broker call in a worker thread with a timeout."""
-
-        return await asyncio.wait_for(
-            asyncio.to_thread(fn, *args, **kwargs), timeout=timeout_sec
-        )
+    hub = get_quote_hub()
+    subscription = hub.subscribe(
+        client=client, loop=asyncio.get_running_loop(), owner=user.id
+    )
 
     async def _recv_loop() -> None:
-        nonlocal subscribed
         while True:
             msg = await websocket.receive_json()
-            sub = _normalize_subscription(msg)
-            if not sub:
+            keys = _normalize_subscription(msg)
+            if not keys:
                 continue
-            async with lock:
-                subscribed = sub
+            hub.set_symbols(subscription, keys)
 
     async def _send_loop() -> None:
-        last_error_sent_at: float | None = None
-        consecutive_failures = 0
         loop = asyncio.get_running_loop()
-        poll_interval_sec = 1.0
+        last_error_sent_at: float | None = None
         while True:
-            start_mono = loop.time()
-            async with lock:
-                keys = list(subscribed)
-            if not keys:
-                # Still yield periodically so the task can be cancelled promptly.
-                await asyncio.sleep(poll_interval_sec)
-                continue
-            # Quote API expects broker tradingsymbols; map app symbols when configured.
-            rows: list[dict[str, Any]] = []
-            try:
-                from app.services.market_data import _map_app_symbol_to_zerodha_symbol
-
-                mapped: list[tuple[str, str]] = []
-                back: dict[tuple[str, str], tuple[str, str]] = {}
-                for exch, sym in keys:
-                    broker_sym = _map_app_symbol_to_zerodha_symbol(exch, sym)
-                    mapped_key = (exch, broker_sym)
-                    mapped.append(mapped_key)
-                    back[mapped_key] = (exch, sym)
-
-                quotes: dict[tuple[str, str], dict[str, float | None]] = {}
-                errors: list[str] = []
-
-                # Fetch quotes in batches so that a single bad instrument does not
-                # prevent all holdings from getting updates.
-                for batch in _chunked(mapped, size=50):
-                    try:
-                        quotes.update(await _call_blocking(client.get_quote_bulk, batch))
-                    except Exception as exc:
-                        # Fall back to LTP for the batch. If that also fails, do
-                        # per-instrument to keep partial progress.
-                        errors.append(str(exc))
-                        try:
-                            quotes.update(await _call_blocking(client.get_ltp_bulk, batch))
-                        except Exception as exc2:
-                            errors.append(str(exc2))
-                            for exch, broker_sym in batch:
-                                try:
-                                    ltp = await _call_blocking(
-                                        client.get_ltp, exchange=exch, tradingsymbol=broker_sym
-                                    )
-                                except Exception:
-                                    continue
-                                quotes[(exch, broker_sym)] = {
-                                    "last_price": float(ltp),
-                                    "prev_close": None,
-                                }
-                for mapped_key, q in quotes.items():
-                    orig = back.get(mapped_key)
-                    if orig is None:
-                        continue
-                    ltp = q.get("last_price")
-                    if ltp is None:
-                        continue
-                    try:
-                        ltp_f = float(ltp)
-                    except Exception:
-                        continue
-                    prev = q.get("prev_close")
-                    prev_f: float | None
-                    try:
-                        prev_f = float(prev) if prev is not None else None
-                    except Exception:
-                        prev_f = None
-                    rows.append(
-                        {
-                            "exchange": orig[0],
-                            "symbol": orig[1],
-                            "ltp": ltp_f,
-                            "prevClose": prev_f,
-                        }
-                    )
-                consecutive_failures = 0
-                if errors:
-                    # Best-effort signal that some instruments could not be quoted.
-                    # Throttle to avoid spamming the UI.
-                    now = loop.time()
-                    if last_error_sent_at is None or now - last_error_sent_at > 10.0:
-                        last_error_sent_at = now
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "error": "Some live quotes failed; showing partial updates.",
-                            }
-                        )
-            except Exception as exc:
-                # Avoid killing the socket on transient broker errors, but
-                # surface persistent failures to the UI.
-                consecutive_failures += 1
+            rows, error = await subscription.next_update()
+            if error:
+                # Throttle to avoid spamming the UI.
                 now = loop.time()
-                if consecutive_failures >= 3 and (
-                    last_error_sent_at is None or now - last_error_sent_at > 10.0
-                ):
+                if last_error_sent_at is None or now - last_error_sent_at > 10.0:
                     last_error_sent_at = now
-                    try:
-                        await websocket.send_json({"type": "error", "error": str(exc)})
-                    except Exception:
-                        return
-                rows = []
-
+                    await websocket.send_json({"type": "error", "error": error})
             if rows:
-                try:
-                    await websocket.send_json(
-                        {
-                            "type": "ticks",
-                            "ts": _now_ist_iso(),
-                            "data": rows,
-                        }
-                    )
-                except Exception:
-                    return
-
-            elapsed = loop.time() - start_mono
-            sleep_for = poll_interval_sec - elapsed
-            if sleep_for > 0:
-                await asyncio.sleep(sleep_for)
+                await websocket.send_json(
+                    {
+                        "type": "ticks",
+                        "ts": _now_ist_iso(),
+                        "data": rows,
+                    }
+                )
 
     recv_task = asyncio.create_task(_recv_loop())
     send_task = asyncio.create_task(_send_loop())
-    done, pending = await asyncio.wait(
-        {recv_task, send_task},
-        return_when=asyncio.FIRST_EXCEPTION,
-    )
-    for task in pending:
-        task.cancel()
-    for task in done:
-        _ = task.exception()
+    try:
+        done, pending = await asyncio.wait(
+            {recv_task, send_task},
+            return_when=asyncio.FIRST_EXCEPTION,
+        )
+        for task in pending:
+            task.cancel()
+        for task in done:
+            _ = task.exception()
+    finally:
+        hub.unsubscribe(subscription)
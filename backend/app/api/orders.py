@@ -9,16 +9,18 @@ from datetime import UTC, date, datetime, time as dt_time, timedelta
 from typing import Annotated, Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from app.api.auth import get_current_user, get_current_user_optional
-from app.clients import AngelOneClient, AngelOneSession, ZerodhaClient
+from app.clients import AngelOneClient, ZerodhaClient
 from app.config_files import load_app_config
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.core.market_hours import is_market_open_now
 from app.db.session import SessionLocal, get_db
-from app.models import Alert, AlertDecisionLog, BrokerConnection, Group, Order, Position, Strategy, User
+from app.models import Alert, AlertDecisionLog, Group, Order, Position, Strategy, User
 from app.schemas.orders import (
     ManualOrderCreate,
     OrderRead,
@@ -32,8 +34,12 @@ from app.schemas.orders_insights import (
     OrdersInsightsSummaryRead,
     OrdersInsightsSymbolRead,
 )
+from app.services.broker_clients import (
+    BrokerClientError,
+    get_broker_client_registry,
+    http_error_from_client_error,
+)
 from app.services.broker_instruments import resolve_broker_symbol_and_token
-from app.services.broker_secrets import get_broker_secret
 from app.services.execution_policy_state import (
     ExecutionPolicyParams,
     apply_post_trade_updates_on_execution_unified,
@@ -44,6 +50,11 @@ from app.services.execution_policy_state import (
     DEFAULT_INFLIGHT_TTL_SECONDS,
 )
 from app.services.instruments_sync import sync_smartapi_instrument_master
+from app.services.order_execution_trace import (
+    OrderExecutionTrace,
+    get_order_execution_stats,
+    record_order_execution_trace,
+)
 from app.services.paper_trading import submit_paper_order
 from app.services.positions_autosync import schedule_positions_autosync
 from app.services.price_ticks import (
@@ -52,7 +63,7 @@ from app.services.price_ticks import (
     round_price_to_tick_mode,
 )
 from app.services.risk_unified_store import read_unified_risk_global
-from app.services.system_events import record_system_event
+from app.services.system_events import flush_audit_events, record_system_event
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -91,48 +102,17 @@ def _get_zerodha_client(
     settings: Settings,
     user_id: int | None = None,
 ) -> ZerodhaClient:
-    """Construct a ZerodhaClient from stored broker connection.
+    """Return a ZerodhaClient backed by the pooled broker client registry.
 
     This function is defined separately to make it easy to monkeypatch in tests.
+    The client exposes `broker_user_id` so that callers (e.g. order execution)
+    can stamp the broker-side account id onto orders.
     """
 
-    q = db.query(BrokerConnection).filter(BrokerConnection.broker_name == "zerodha")
-    if user_id is not None:
-        q = q.filter(BrokerConnection.user_id == user_id)
-    conn = q.order_by(BrokerConnection.updated_at.desc()).first()
-    if conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Zerodha is not connected.",
-        )
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="zerodha",
-        key="api_key",
-        user_id=conn.user_id,
-    )
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Zerodha API key is not configured. "
-            "Please configure it in the broker settings.",
-        )
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-
-    # Import lazily to keep tests independent of the real library.
-    from kiteconnect import KiteConnect  # type: ignore[import]
-
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-
-    client = ZerodhaClient(kite)
-    # Expose broker-side account id on the client when available so that
-    # callers (e.g. order execution) can stamp it onto orders.
-    client.broker_user_id = getattr(conn, "broker_user_id", None)  # type: ignore[attr-defined]
-    return client
+    try:
+        return get_broker_client_registry().zerodha(db, settings, user_id=user_id)
+    except BrokerClientError as exc:
+        raise http_error_from_client_error(exc) from exc
 
 
 def _get_angelone_client(
@@ -140,55 +120,10 @@ def _get_angelone_client(
     settings: Settings,
     user_id: int | None = None,
 ) -> AngelOneClient:
-    q = db.query(BrokerConnection).filter(BrokerConnection.broker_name == "angelone")
-    if user_id is not None:
-        q = q.filter(BrokerConnection.user_id == user_id)
-    conn = q.order_by(BrokerConnection.updated_at.desc()).first()
-    if conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="AngelOne is not connected.",
-        )
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="angelone",
-        key="api_key",
-        user_id=conn.user_id,
-    )
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="SmartAPI API key is not configured. "
-            "Please configure it in the broker settings.",
-        )
-
-    raw = decrypt_token(settings, conn.access_token_encrypted)
     try:
-        parsed = json.loads(raw) if raw else {}
-    except Exception as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"AngelOne session is invalid: {exc}",
-        ) from exc
-
-    jwt = str(parsed.get("jwt_token") or "")
-    if not jwt:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="AngelOne session is missing jwt_token. Please reconnect.",
-        )
-
-    session = AngelOneSession(
-        jwt_token=jwt,
-        refresh_token=str(parsed.get("refresh_token") or "") or None,
-        feed_token=str(parsed.get("feed_token") or "") or None,
-        client_code=str(parsed.get("client_code") or "") or None,
-    )
-    client = AngelOneClient(api_key=api_key, session=session)
-    client.broker_user_id = getattr(conn, "broker_user_id", None)  # type: ignore[attr-defined]
-    return client
+        return get_broker_client_registry().angelone(db, settings, user_id=user_id)
+    except BrokerClientError as exc:
+        raise http_error_from_client_error(exc) from exc
 
 
 def _get_broker_client(
@@ -279,6 +214,8 @@ def orders_insights(
     orders created/executed via SigmaTrader), not full broker-ledger accounting.
     """
 
+    flush_audit_events()
+
     def _ist_tz():
         try:
             from zoneinfo import ZoneInfo
@@ -760,6 +697,29 @@ def list_manual_queue(
     return query.order_by(Order.created_at.desc()).all()
 
 
+@router.get("/execution-stats", response_model=dict)
+def order_execution_stats() -> dict[str, Any]:
+    """Recent execute-path latency percentiles (webhook-to-broker, per stage)."""
+
+    return get_order_execution_stats()
+
+
+@router.get("/{order_id}/execution-trace", response_model=dict)
+def get_order_execution_trace(order_id: int, db: Session = Depends(get_db)) -> dict[str, Any]:
+    """Stage timings recorded by the order's last execute attempt."""
+
+    order = db.get(Order, order_id)
+    if order is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    raw = getattr(order, "execution_trace_json", None)
+    if not raw:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No execution trace recorded for this order.",
+        )
+    return json.loads(raw)
+
+
 @router.get("/{order_id}", response_model=OrderRead)
 def get_order(order_id: int, db: Session = Depends(get_db)) -> Order:
     order = db.get(Order, order_id)
@@ -986,16 +946,75 @@ def execute_order_internal(
     correlation_id: str | None = None,
     auto_dispatch: bool = False,
 ) -> Order:
+    trace = OrderExecutionTrace(int(order_id), correlation_id=correlation_id)
+    outcome = "error"
     try:
-        return _execute_order_internal_impl(
+        order = _execute_order_internal_impl(
             order_id,
             db=db,
             settings=settings,
             correlation_id=correlation_id,
             auto_dispatch=auto_dispatch,
+            trace=trace,
         )
+        outcome = str(order.status or "").strip().upper() or "unknown"
+        return order
+    except HTTPException as exc:
+        outcome = f"http_{exc.status_code}"
+        raise
     finally:
         _best_effort_release_execution_policy_inflight_reservation(int(order_id))
+        trace.finish(outcome)
+        _best_effort_store_execution_trace(db, trace)
+
+
+_PENDING_TRACES_KEY = "pending_execution_traces"
+
+
+def _best_effort_store_execution_trace(db: Session, trace: OrderExecutionTrace) -> None:
+    """Persist the stage trace on the order and feed the latency stats.
+
+    The trace is written through a short-lived session so a failed execute
+    still records where its time went. If the caller's session is still in a
+    transaction it may hold uncommitted writes (and row locks) on the same
+    order, so the write waits until that transaction commits or rolls back.
+    """
+
+    try:
+        record_order_execution_trace(trace)
+        payload = trace.to_json()
+        if db.in_transaction():
+            db.info.setdefault(_PENDING_TRACES_KEY, {})[trace.order_id] = payload
+            return
+        _write_execution_trace(db, trace.order_id, payload)
+    except Exception:
+        logger.debug("Failed to store execution trace", exc_info=True)
+
+
+def _write_execution_trace(db: Session, order_id: int, payload: str) -> None:
+    with SessionLocal() as trace_db:
+        trace_db.query(Order).filter(Order.id == order_id).update(
+            # Keep updated_at untouched: the trace is metadata, not an edit.
+            {Order.execution_trace_json: payload, Order.updated_at: Order.updated_at},
+            synchronize_session=False,
+        )
+        trace_db.commit()
+    loaded = db.identity_map.get(identity_key(Order, order_id))
+    if loaded is not None:
+        # Update the caller's instance without marking it dirty.
+        set_committed_value(loaded, "execution_trace_json", payload)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _write_deferred_execution_traces(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is not None:
+        return
+    pending = session.info.pop(_PENDING_TRACES_KEY, None)
+    for order_id, payload in (pending or {}).items():
+        try:
+            _write_execution_trace(session, order_id, payload)
+        except Exception:
+            logger.debug("Failed to store execution trace", exc_info=True)
 
 
 def _execute_order_internal_impl(
@@ -1005,6 +1024,7 @@ def _execute_order_internal_impl(
     settings: Settings,
     correlation_id: str | None = None,
     auto_dispatch: bool = False,
+    trace: OrderExecutionTrace,
 ) -> Order:
     """Send a manual queue order to its configured broker for execution.
 
@@ -1012,11 +1032,23 @@ def _execute_order_internal_impl(
     - Requires the order to be in WAITING/MANUAL mode and not simulated.
     - On success sets status to SENT and stores Zerodha order id.
     - On failure sets status to FAILED and records the error message.
+
+    Pre-trade checks read the unified risk config once (`risk_global`) and
+    stage their order edits (risk sizing, tick rounding, margin clamps,
+    trigger_percent) on the session; they are committed together right
+    before the broker call. Audit writes on the way (`record_decision_log`,
+    `record_system_event`, e.g. on the margin-clamp path) commit the session
+    when it has pending writes, so edits staged before them may be committed
+    earlier. Each stage is timed on `trace`.
     """
 
     order = db.get(Order, order_id)
     if order is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if order.alert is not None and (
+        auto_dispatch or str(order.mode or "").strip().upper() == "AUTO"
+    ):
+        trace.origin_at = order.alert.received_at
 
     now_utc = _now_utc()
     risk_global = read_unified_risk_global(db)
@@ -1060,6 +1092,7 @@ def _execute_order_internal_impl(
     execution_policy_apply = bool(
         bool(risk_global.enabled) and not bool(is_synthetic_gtt_arm or is_broker_gtt)
     )
+    trace.begin("policy")
     if execution_policy_apply:
         key = scope_key_for_order(order)
         interval_hint, interval_hint_source = resolve_interval_for_order(order, None)
@@ -1258,10 +1291,11 @@ def _execute_order_internal_impl(
         except Exception:
             pass
 
+        # Staged: committed with the risk checks' writes below rather than on its own.
         db.add(state)
-        db.commit()
         execution_policy_key = key
         execution_policy_interval_min = int(interval_min)
+    trace.end("policy")
 
     # Apply risk checks before contacting the broker (covers manual executes,
     # webhook AUTO, and other internal flows). When manual_override_enabled is ON,
@@ -1270,6 +1304,7 @@ def _execute_order_internal_impl(
     # This is the single enforcement choke-point: legacy RiskPolicy enforcement is not
     # consulted at execute-time (settings UI is unified around globals + profiles +
     # source overrides).
+    trace.begin("risk")
     if bool(risk_global.enabled):
         try:
             from app.services.risk_engine import evaluate_order_risk, record_decision_log
@@ -1331,6 +1366,7 @@ def _execute_order_internal_impl(
                     compile_risk_policy(
                         db,
                         settings,
+                        risk_global=risk_global,
                         user=user_obj,
                         product=str(decision.resolved_product).strip().upper(),
                         category=str(decision.risk_category).strip().upper(),
@@ -1356,8 +1392,6 @@ def _execute_order_internal_impl(
                     note = f"Manual override enabled: {reason}"
                     order.error_message = f"{order.error_message}; {note}" if order.error_message else note
                     db.add(order)
-                    db.commit()
-                    db.refresh(order)
                 else:
                     order.status = "REJECTED_RISK"
                     order.error_message = reason
@@ -1394,8 +1428,6 @@ def _execute_order_internal_impl(
                     changed = True
             if changed:
                 db.add(order)
-                db.commit()
-                db.refresh(order)
         except HTTPException:
             raise
         except Exception as exc:
@@ -1444,14 +1476,15 @@ def _execute_order_internal_impl(
 
     # Enforce tick-size rounding on all persisted orders (defensive for legacy
     # rows created before rounding was introduced).
+    trace.end("risk")
+    trace.begin("sizing")
     rounded_price = round_price_to_tick(order.price)
     rounded_trigger_price = round_price_to_tick(order.trigger_price)
     if rounded_price != order.price or rounded_trigger_price != order.trigger_price:
         order.price = rounded_price
         order.trigger_price = rounded_trigger_price
         db.add(order)
-        db.commit()
-        db.refresh(order)
+    trace.end("sizing")
 
     # NO_TRADE windows (global): when an AUTO dispatch tries to execute during a
     # blocked window, defer broker execution until the window ends. We keep the
@@ -1574,12 +1607,15 @@ def _execute_order_internal_impl(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Market is closed; paper order rejected.",
             )
-        order = submit_paper_order(
-            db,
-            settings,
-            order,
-            correlation_id=correlation_id,
-        )
+        with trace.span("broker_place"):
+            order = submit_paper_order(
+                db,
+                settings,
+                order,
+                correlation_id=correlation_id,
+            )
+        trace.mark_broker_ack()
+        trace.begin("persistence")
         if execution_policy_apply and execution_policy_key is not None:
             key = execution_policy_key
             interval_min = int(
@@ -1633,10 +1669,9 @@ def _execute_order_internal_impl(
     if order.broker_name != broker_name:
         order.broker_name = broker_name
         db.add(order)
-        db.commit()
-        db.refresh(order)
 
-    client = _get_broker_client(db, settings, broker_name, user_id=order.user_id)
+    with trace.span("broker_client"):
+        client = _get_broker_client(db, settings, broker_name, user_id=order.user_id)
     broker_account_id = getattr(client, "broker_user_id", None)
     if broker_account_id:
         order.broker_account_id = broker_account_id
@@ -1764,6 +1799,7 @@ def _execute_order_internal_impl(
     #
     # IMPORTANT: manual override (manual orders only) bypasses all risk enforcement,
     # including broker-aware guards. Structural validation still applies.
+    trace.begin("guards")
     if (
         risk_profile_id is not None
         and bool(risk_global.enabled)
@@ -1919,7 +1955,8 @@ def _execute_order_internal_impl(
                         preview_order["price"] = order_price
                     if getattr(order, "trigger_price", None) is not None and float(order.trigger_price or 0.0) > 0:
                         preview_order["trigger_price"] = float(order.trigger_price)
-                    preview_list = client.order_margins([preview_order])  # type: ignore[call-arg]
+                    with trace.span("margin_preview"):
+                        preview_list = client.order_margins([preview_order])  # type: ignore[call-arg]
                     if not preview_list:
                         _reject_guard("Broker did not return margin preview.")
                     entry = preview_list[0]
@@ -1946,8 +1983,6 @@ def _execute_order_internal_impl(
                         )
                     order.qty = float(new_qty)
                     db.add(order)
-                    db.commit()
-                    db.refresh(order)
                     record_system_event(
                         db,
                         level="INFO",
@@ -1962,6 +1997,7 @@ def _execute_order_internal_impl(
                             "cap_portfolio": cap_portfolio,
                         },
                     )
+    trace.end("guards")
 
     # Handle broker-native GTT orders by creating a Zerodha GTT instead of a
     # regular/AMO order. We currently support single-leg LIMIT GTTs
@@ -2011,6 +2047,7 @@ def _execute_order_internal_impl(
                 detail=f"Failed to fetch LTP for GTT placement: {exc}",
             ) from exc
 
+        trace.begin("broker_place")
         try:
             gtt_result = client.place_gtt_single(
                 tradingsymbol=tradingsymbol,
@@ -2044,6 +2081,9 @@ def _execute_order_internal_impl(
                 detail=f"Zerodha GTT placement failed: {message}",
             ) from exc
 
+        trace.end("broker_place")
+        trace.mark_broker_ack()
+        trace.begin("persistence")
         trigger_id = str(gtt_result.get("trigger_id") or gtt_result.get("id") or "")
         if trigger_id:
             order.broker_order_id = trigger_id
@@ -2144,8 +2184,13 @@ def _execute_order_internal_impl(
             )
 
         db.add(order)
-        db.commit()
-        db.refresh(order)
+
+    # Single pre-trade commit: persist every staged edit (sizing, rounding,
+    # clamps, trigger_percent) so the stored order matches what the broker gets.
+    if db.new or db.dirty or db.deleted:
+        with trace.span("persistence"):
+            db.commit()
+            db.refresh(order)
 
     if broker_name == "angelone":
         ordertype_map = {
@@ -2180,17 +2225,18 @@ def _execute_order_internal_impl(
         try:
             if angelone_token is None:
                 raise RuntimeError("Missing AngelOne symbol token.")
-            result = client.place_order(  # type: ignore[call-arg]
-                exchange=exchange_u,
-                tradingsymbol=broker_tradingsymbol,
-                symboltoken=angelone_token,
-                transactiontype=order.side,
-                quantity=int(order.qty),
-                ordertype=smart_order_type,
-                producttype=producttype,
-                price=price,
-                triggerprice=trigger_price,
-            )
+            with trace.span("broker_place"):
+                result = client.place_order(  # type: ignore[call-arg]
+                    exchange=exchange_u,
+                    tradingsymbol=broker_tradingsymbol,
+                    symboltoken=angelone_token,
+                    transactiontype=order.side,
+                    quantity=int(order.qty),
+                    ordertype=smart_order_type,
+                    producttype=producttype,
+                    price=price,
+                    triggerprice=trigger_price,
+                )
         except Exception as exc:
             message = str(exc)
             order.status = "FAILED"
@@ -2217,6 +2263,8 @@ def _execute_order_internal_impl(
                 detail=f"AngelOne order placement failed: {message}",
             ) from exc
 
+        trace.mark_broker_ack()
+        trace.begin("persistence")
         order.broker_order_id = result.order_id
         order.status = "SENT"
         order.sent_at = now_utc
@@ -2400,7 +2448,8 @@ def _execute_order_internal_impl(
     variety = "regular"
     while True:
         try:
-            result = _place(variety=variety)
+            with trace.span("broker_place"):
+                result = _place(variety=variety)
             break
         except Exception as exc:  # pragma: no cover - defensive
             message = str(exc)
@@ -2498,6 +2547,8 @@ def _execute_order_internal_impl(
             detail="Zerodha order placement failed.",
         )
 
+    trace.mark_broker_ack()
+    trace.begin("persistence")
     order.broker_order_id = result.order_id
     if broker_name == "zerodha":
         order.zerodha_order_id = result.order_id
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import inspect
-import json
 from datetime import UTC, date, datetime
 from typing import Annotated, List, Optional
 
@@ -13,16 +12,13 @@ from app.clients import (
     AngelOneAuthError,
     AngelOneClient,
     AngelOneHttpError,
-    AngelOneSession,
     ZerodhaClient,
 )
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.core.market_hours import is_preopen_now
 from app.db.session import get_db
 from app.models import (
     AnalyticsTrade,
-    BrokerConnection,
     Order,
     Position,
     PositionSnapshot,
@@ -37,11 +33,16 @@ from app.schemas.positions_analysis import (
     SymbolPnlRead,
 )
 from app.services.analytics import rebuild_trades
+from app.services.broker_clients import (
+    BrokerClientError,
+    get_broker_client_registry,
+    http_error_from_client_error,
+)
 from app.services.broker_instruments import (
     resolve_broker_symbol_and_token,
     resolve_listing_for_broker_symbol,
 )
-from app.services.broker_secrets import get_broker_secret
+from app.services.holdings_snapshot import get_holdings_snapshot_cache
 from app.services.market_data import ensure_instrument_from_holding_entry
 from app.services.positions_sync import (
     sync_positions_from_angelone,
@@ -73,43 +74,10 @@ def _get_zerodha_client_for_positions(
     recently updated one so that the last-connected account is used.
     """
 
-    q = db.query(BrokerConnection).filter(BrokerConnection.broker_name == "zerodha")
-    if user_id is not None:
-        q = q.filter(BrokerConnection.user_id == user_id)
-    conn = q.order_by(BrokerConnection.updated_at.desc()).first()
-    if conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Zerodha is not connected.",
-        )
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="zerodha",
-        key="api_key",
-        user_id=conn.user_id,
-    )
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Zerodha API key is not configured. "
-            "Please configure it in the broker settings.",
-        )
-
     try:
-        from kiteconnect import KiteConnect  # type: ignore[import]
-    except ImportError as exc:  # pragma: no cover - defensive
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="kiteconnect library is not installed in the backend environment.",
-        ) from exc
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-
-    return ZerodhaClient(kite)
+        return get_broker_client_registry().zerodha(db, settings, user_id=user_id)
+    except BrokerClientError as exc:
+        raise http_error_from_client_error(exc) from exc
 
 
 def _get_angelone_client(
@@ -118,56 +86,10 @@ def _get_angelone_client(
     *,
     user_id: int | None = None,
 ) -> AngelOneClient:
-    q = db.query(BrokerConnection).filter(BrokerConnection.broker_name == "angelone")
-    if user_id is not None:
-        q = q.filter(BrokerConnection.user_id == user_id)
-    conn = q.order_by(BrokerConnection.updated_at.desc()).first()
-    if conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="AngelOne is not connected.",
-        )
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="angelone",
-        key="api_key",
-        user_id=conn.user_id,
-    )
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="SmartAPI API key is not configured. "
-            "Please configure it in the broker settings.",
-        )
-
-    raw = decrypt_token(settings, conn.access_token_encrypted)
     try:
-        parsed = json.loads(raw) if raw else {}
-    except Exception as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"AngelOne session is invalid: {exc}",
-        ) from exc
-
-    jwt = str(parsed.get("jwt_token") or "")
-    if not jwt:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="AngelOne session is missing jwt_token. Please reconnect.",
-        )
-
-    session = AngelOneSession(
-        jwt_token=jwt,
-        refresh_token=str(parsed.get("refresh_token") or "") or None,
-        feed_token=str(parsed.get("feed_token") or "") or None,
-        client_code=str(parsed.get("client_code") or "") or None,
-    )
-
-    client = AngelOneClient(api_key=api_key, session=session)
-    client.broker_user_id = getattr(conn, "broker_user_id", None)  # type: ignore[attr-defined]
-    return client
+        return get_broker_client_registry().angelone(db, settings, user_id=user_id)
+    except BrokerClientError as exc:
+        raise http_error_from_client_error(exc) from exc
 
 
 @router.post("/sync", response_model=dict)
@@ -867,18 +789,42 @@ def positions_analysis(
 @router.get("/holdings", response_model=List[HoldingRead])
 def list_holdings(
     broker_name: Annotated[str, Query(min_length=1)] = "zerodha",
+    refresh: Annotated[bool, Query()] = False,
     db: Session = Depends(get_db),
     settings: Settings = Depends(get_settings),
     user: User = Depends(get_current_user),
 ) -> List[HoldingRead]:
     """Return live holdings from a broker for the current user.
 
-    For now holdings are not cached in DB; they are fetched on-demand
-    from Zerodha and projected into a simple schema that includes
-    quantity, average_price, last_price, and derived P&L when possible.
+    Holdings are not stored in DB; they are fetched from the broker and
+    projected into a simple schema that includes quantity, average_price,
+    last_price, and derived P&L when possible. Fetches go through the
+    short-TTL snapshot cache shared with alerts, screener and rebalance;
+    `refresh` skips the TTL but not the per-minute broker fetch budget.
     """
 
     broker = (broker_name or "").strip().lower()
+    if broker not in {"zerodha", "angelone"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Holdings not implemented for broker: {broker}",
+        )
+
+    snapshot = get_holdings_snapshot_cache().get(
+        (int(user.id), broker),
+        lambda: _fetch_holdings(broker, db=db, settings=settings, user=user),
+        force=refresh,
+    )
+    return list(snapshot)
+
+
+def _fetch_holdings(
+    broker: str,
+    *,
+    db: Session,
+    settings: Settings,
+    user: User,
+) -> List[HoldingRead]:
     if broker == "angelone":
         client = _get_angelone_client(db, settings, user_id=user.id)
         try:
@@ -1034,52 +980,10 @@ def list_holdings(
 
         return holdings
 
-    if broker != "zerodha":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Holdings not implemented for broker: {broker}",
-        )
-
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == broker,
-            BrokerConnection.user_id == user.id,
-        )
-        .one_or_none()
-    )
-    if conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Zerodha is not connected.",
-        )
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="zerodha",
-        key="api_key",
-        user_id=user.id,
-    )
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Zerodha API key is not configured. "
-            "Please configure it in the broker settings.",
-        )
-
     try:
-        from kiteconnect import KiteConnect  # type: ignore[import]
-    except ImportError as exc:  # pragma: no cover - defensive
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="kiteconnect library is not installed in the backend environment.",
-        ) from exc
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-    client = ZerodhaClient(kite)
+        client = get_broker_client_registry().zerodha(db, settings, user_id=user.id)
+    except BrokerClientError as exc:
+        raise http_error_from_client_error(exc) from exc
 
     raw = client.list_holdings()
 
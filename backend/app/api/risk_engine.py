@@ -25,6 +25,12 @@ from app.schemas.risk_engine import (
     SymbolRiskCategoryRead,
     SymbolRiskCategoryUpsert,
 )
+from app.services.risk_pnl_state import (
+    check_pnl_state,
+    get_pnl_state_stats,
+    rebuild_pnl_state,
+)
+from app.services.system_events import flush_audit_events
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -306,6 +312,8 @@ def list_alert_decision_log(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> list[AlertDecisionLogRead]:
+    flush_audit_events()
+
     def _parse_iso_dt(raw: str | None) -> datetime | None:
         s = (raw or "").strip()
         if not s:
@@ -347,4 +355,37 @@ def list_alert_decision_log(
     return [AlertDecisionLogRead(**_model_to_dict(r)) for r in rows]
 
 
+@router.get("/pnl-state", response_model=dict)
+def check_risk_pnl_state(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Compare the stored running P&L state with a full trade replay."""
+
+    result = check_pnl_state(db, user_id=int(user.id))
+    result["stats"] = get_pnl_state_stats()
+    return result
+
+
+@router.post("/pnl-state/rebuild", response_model=dict)
+def rebuild_risk_pnl_state(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Rebuild the caller's stored P&L state from full history.
+
+    Only the caller's scope is rewritten; other users' states are untouched.
+    """
+
+    row = rebuild_pnl_state(db, user_id=int(user.id))
+    db.commit()
+    return {
+        "scope": row.scope,
+        "trade_count": int(row.trade_count or 0),
+        "cumulative_pnl": float(row.cumulative_pnl or 0.0),
+        "peak_cumulative_pnl": float(row.peak_cumulative_pnl or 0.0),
+        "loss_streak": int(row.loss_streak or 0),
+    }
+
+
 __all__ = ["router"]
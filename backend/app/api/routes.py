@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends
 
 from ..core.config import Settings, get_settings
 from ..core.security import require_admin
+from ..services.config_cache import get_config_cache_stats
+from ..services.scheduler import get_scheduler_stats
 from . import (
     ai_chat,
     ai_files,
@@ -77,6 +79,20 @@ def health_check(settings: Settings = Depends(get_settings)) -> dict[str, str]:
     }
 
 
+@router.get("/health/config-cache", tags=["system"])
+def config_cache_stats() -> dict:
+    """Hit/miss/invalidation counters for the in-process config cache."""
+
+    return get_config_cache_stats()
+
+
+@router.get("/system/scheduler", tags=["system"])
+def scheduler_stats() -> dict:
+    """Per-task run counts, errors, last duration and lag of the scheduler."""
+
+    return get_scheduler_stats()
+
+
 router.include_router(
     strategies.router,
     prefix="/api/strategies",
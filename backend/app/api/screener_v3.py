@@ -29,6 +29,7 @@ from app.schemas.screener_v3 import (
 )
 from app.services.indicator_alerts import IndicatorAlertError
 from app.services.screener_v3 import (
+    cancel_screener_run,
     create_screener_run,
     evaluate_screener_v3,
     resolve_screener_targets,
@@ -278,6 +279,44 @@ def get_screener_run(
     return _run_to_read(run, include_rows=include_rows)
 
 
+@router.get("/runs/{run_id}/rows", response_model=list[ScreenerRow])
+def list_screener_run_rows(
+    run_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=5000),
+    matched_only: bool = Query(False),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> list[ScreenerRow]:
+    """Page through a run's rows; RUNNING runs expose the batches stored so far."""
+
+    run = db.get(ScreenerRun, run_id)
+    if run is None or run.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    rows = _rows_from_json(run.results_json)
+    if matched_only:
+        rows = [r for r in rows if r.matched]
+    return rows[offset : offset + limit]
+
+
+@router.post("/runs/{run_id}/cancel", response_model=ScreenerRunRead)
+def cancel_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> ScreenerRunRead:
+    run = db.get(ScreenerRun, run_id)
+    if run is None or run.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not cancel_screener_run(db, run):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Run is not in progress.",
+        )
+    db.refresh(run)
+    return _run_to_read(run, include_rows=False)
+
+
 @router.post("/runs/{run_id}/create-group", response_model=GroupRead)
 def create_group_from_run(
     run_id: int,
@@ -13,6 +13,7 @@ from app.schemas.system_events import (
     SystemEventsCleanupRequest,
     SystemEventsCleanupResponse,
 )
+from app.services.system_events import flush_audit_events, get_audit_event_sink_stats
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -28,6 +29,7 @@ def list_system_events(
 ) -> List[SystemEvent]:
     """Return recent system events, most recent first."""
 
+    flush_audit_events()
     query = db.query(SystemEvent)
     if level is not None:
         query = query.filter(SystemEvent.level == level.upper())
@@ -41,6 +43,13 @@ def list_system_events(
     )
 
 
+@router.get("/buffer", response_model=dict)
+def system_events_buffer_stats() -> dict:
+    """Return counters for the buffered audit-event writer."""
+
+    return get_audit_event_sink_stats()
+
+
 @router.post("/cleanup", response_model=SystemEventsCleanupResponse)
 def cleanup_system_events(
     payload: SystemEventsCleanupRequest,
@@ -48,6 +57,7 @@ def cleanup_system_events(
 ) -> SystemEventsCleanupResponse:
     """Delete system events older than max_days."""
 
+    flush_audit_events()
     if payload.max_days <= 0:
         remaining = db.query(SystemEvent).count()
         return SystemEventsCleanupResponse(deleted=0, remaining=remaining)
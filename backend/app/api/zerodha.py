@@ -27,7 +27,7 @@ from app.services.managed_risk import (
 from app.services.order_sync import sync_order_statuses
 from app.services.portfolio_allocations import apply_portfolio_allocation_for_executed_order
 from app.services.positions_sync import sync_positions_from_zerodha
-from app.services.system_events import record_system_event
+from app.services.system_events import flush_audit_events, record_system_event
 
 # ruff: noqa: B008  # FastAPI dependency injection pattern
 
@@ -800,6 +800,7 @@ def list_zerodha_postback_events(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> list[ZerodhaPostbackEventRead]:
+    flush_audit_events()
     corr_id = _postback_corr_id(user_id=int(user.id))
     cats: list[str] = []
     if include_ok:
@@ -47,14 +47,18 @@ class AngelOneClient:
         session: AngelOneSession,
         base_url: str = "https://apiconnect.angelone.in",
         timeout_seconds: int = 30,
+        http_client: httpx.Client | None = None,
     ) -> None:
         self.api_key = api_key
         self.session = session
         self.base_url = base_url.rstrip("/")
-        self._client = httpx.Client(timeout=timeout_seconds)
+        # A shared (pooled) http_client is owned by the caller and left open.
+        self._owns_client = http_client is None
+        self._client = http_client or httpx.Client(timeout=timeout_seconds)
 
     def close(self) -> None:
-        self._client.close()
+        if self._owns_client:
+            self._client.close()
 
     def _headers(self) -> dict[str, str]:
         # SmartAPI requires several headers. We use conservative defaults.
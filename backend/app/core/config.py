@@ -51,7 +51,94 @@ class Settings(BaseSettings):
     admin_password: str | None = None
     enable_legacy_alerts: bool = False
     screener_sync_limit: int = 1000
+    # Screener universes are split into batches evaluated on a thread pool;
+    # each finished batch is persisted so partial rows are visible early.
+    screener_workers: int = 4
+    screener_batch_size: int = 50
     canonical_market_data_broker: str = "zerodha"
+    # Broker history fetches: concurrent fetch slots/bulk-hydration workers and
+    # a token bucket matching Kite's historical API limit (3 requests/sec).
+    history_fetch_workers: int = 4
+    history_fetch_rate_per_sec: float = 3.0
+    history_fetch_burst: int = 3
+    # Process-wide quote hub behind /ws/market/ticks: one broker poll per
+    # interval per user, for the union of that user's socket subscriptions.
+    # A poll that exceeds the timeout is abandoned for that interval.
+    quote_hub_poll_interval_sec: float = 1.0
+    quote_hub_batch_size: int = 50
+    quote_hub_fetch_timeout_sec: float = 2.5
+    # Synthetic GTT engine: pending orders are priced with one bulk LTP call
+    # per batch of instruments and updated in a single transaction per cycle.
+    synthetic_gtt_max_per_cycle: int = 5000
+    synthetic_gtt_ltp_batch_size: int = 500
+    # Risk-parity previews keep the most recently used covariance matrices in
+    # process, in front of the risk_covariance_cache table.
+    risk_covariance_lru_entries: int = 32
+    # Holdings snapshots shared by alerts, screener, rebalance and the UI:
+    # served from memory for ttl_sec, with broker fetches bounded per
+    # (user, broker) per minute.
+    holdings_snapshot_ttl_sec: float = 10.0
+    holdings_snapshot_max_fetches_per_min: int = 6
+    # Backtest job queue: runs execute on a pool of `backtest_workers`
+    # ("process" for CPU-bound runs on multiple cores, or "thread"), with at
+    # most `backtest_max_active_per_user` queued/running jobs per owner.
+    backtest_executor: str = "process"
+    backtest_workers: int = 2
+    backtest_max_active_per_user: int = 2
+    # Parameter sweeps evaluate variants on their own spawned process pool;
+    # 0 uses the CPU cores divided by `backtest_workers` (a sweep already holds
+    # one job slot), 1 runs variants inline. Larger values are capped at that
+    # share.
+    backtest_sweep_workers: int = 0
+    # Audit writes (system events, alert decision logs) are queued in a bounded
+    # buffer and batch-inserted by a background writer every
+    # `audit_flush_interval_sec`. ERROR/critical events, and writes that find
+    # the buffer full, are still committed synchronously.
+    audit_buffer_enabled: bool = True
+    audit_buffer_max_queue: int = 10000
+    audit_flush_interval_sec: float = 0.5
+    audit_flush_batch_size: int = 500
+    # Risk, webhook, AI and broker-secret settings are served from an
+    # in-process cache; writes in this process invalidate it on commit and
+    # other processes pick them up by polling `config_versions` every
+    # `config_cache_poll_sec`.
+    config_cache_enabled: bool = True
+    config_cache_poll_sec: float = 1.0
+    # Periodic background work (alerts, synthetic GTT, managed risk, holdings
+    # exit, syncs, snapshots, AI TM loops) runs on one scheduler thread that
+    # hands due tasks to `scheduler_max_workers` workers. Market-hours tasks
+    # sleep until the next `scheduler_market_exchange` session opens; the rest
+    # slow down to `scheduler_off_hours_interval_sec` outside the session.
+    # Runs are spread by up to `scheduler_jitter_sec` of random delay.
+    scheduler_max_workers: int = 4
+    scheduler_market_exchange: str = "NSE"
+    scheduler_off_hours_interval_sec: float = 300.0
+    scheduler_jitter_sec: float = 0.5
+    # Deployment job workers: `deployment_workers` loops ("thread" or
+    # "process") each claim up to `deployment_worker_batch_size` due jobs at a
+    # time. With sharding, worker i only takes deployments whose id % N == i,
+    # which keeps each deployment on one worker. Idle workers wake on enqueue
+    # and otherwise re-poll every `deployment_worker_idle_poll_sec`.
+    deployment_workers: int = 4
+    deployment_worker_executor: str = "thread"
+    deployment_worker_batch_size: int = 4
+    deployment_worker_shard_by_deployment: bool = True
+    deployment_worker_idle_poll_sec: float = 2.0
+    # Pooled broker clients, one per (user, broker): HTTP connection pool
+    # size and request timeout for the shared transports.
+    broker_client_pool_size: int = 10
+    broker_client_timeout_sec: float = 30.0
+    # Shared in-memory candle store used by alerts/screener evaluation. Entries
+    # are re-checked against the DB for new bars at most every refresh_sec.
+    candle_store_max_mb: int = 256
+    candle_store_refresh_sec: float = 5.0
+    # Streaming EMA/RSI/ATR/Supertrend state for alert evaluation; when off,
+    # every evaluation recomputes the indicator over the loaded history.
+    alerts_v3_incremental_indicators: bool = True
+    indicator_state_max_entries: int = 50000
+    # Share identical indicator sub-expressions between all alerts evaluated
+    # in one alerts_v3 cycle (per symbol).
+    alerts_v3_share_subexpressions: bool = True
     instrument_master_sync_interval_hours: int = 24
     smartapi_instrument_master_url: str = (
         "https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json"
@@ -96,6 +183,10 @@ class Settings(BaseSettings):
     backend_base_url: str | None = None
     # Salt used for hashing broker identifiers (order ids, etc.) for LLM-safe summaries.
     hash_salt: str | None = None
+    # AI chat orchestrator: worker threads for blocking settings/key/audit DB
+    # work, and the per-call timeout for fanned-out broker MCP reads.
+    ai_blocking_workers: int = 4
+    ai_tool_fanout_timeout_sec: float = 25.0
 
     # --- Remote LLM optional capabilities (default off; env-controlled) ---
     # Enables OpenAI Responses API web_search tool for the REMOTE reasoner only.
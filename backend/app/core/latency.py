@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque
+
+
+class LatencyWindow:
+    """Recent latency samples (ms) with nearest-rank percentiles.
+
+    Percentiles cover the last `window` samples; `count` and `max_ms` cover
+    every sample recorded. Not thread-safe: owners guard it with their lock.
+    """
+
+    __slots__ = ("_recent", "count", "max_ms")
+
+    def __init__(self, window: int = 512) -> None:
+        self._recent: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        ms = float(ms)
+        self._recent.append(ms)
+        self.count += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self, quantiles: tuple[float, ...] = (0.5, 0.95)) -> dict[str, float]:
+        """Return `count`, `p<NN>_ms` for each quantile and `max_ms`."""
+
+        recent = sorted(self._recent)
+        out: dict[str, float] = {"count": self.count}
+        for q in quantiles:
+            value = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+            out[f"p{round(q * 100)}_ms"] = round(value, 2)
+        out["max_ms"] = round(self.max_ms, 2)
+        return out
+
+
+__all__ = ["LatencyWindow"]
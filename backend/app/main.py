@@ -15,6 +15,7 @@ from .core.logging import RequestContextMiddleware, configure_logging
 from .db.base import Base
 from .db.session import SessionLocal
 from .services.alerts_v3 import schedule_alerts_v3
+from .services.backtest_jobs import get_backtest_job_queue, recover_backtest_jobs
 from .services.deployment_runtime import start_deployments_runtime
 from .services.instruments_sync import schedule_instrument_master_sync
 from .services.holdings_exit_engine import schedule_holdings_exit
@@ -24,7 +25,9 @@ from .services.holdings_summary_daily_snapshots import (
 from .services.managed_risk import schedule_managed_risk
 from .services.market_data import schedule_market_data_sync
 from .services.no_trade_deferred_dispatch import schedule_no_trade_deferred_dispatch
+from .services.scheduler import start_scheduler, stop_scheduler
 from .services.synthetic_gtt import schedule_synthetic_gtt
+from .services.system_events import start_audit_event_sink, stop_audit_event_sink
 from .services.users import ensure_default_admin
 from .services.risk_unified_migration import migrate_legacy_risk_policy_v1_to_unified
 from .services.ai_trading_manager.monitoring.scheduler import (
@@ -160,8 +163,12 @@ async def _lifespan(_app: FastAPI):
                 "Failed to migrate legacy risk policy into unified settings.",
             )
 
-    # Startup: begin background market data sync when not under pytest.
+    # Startup: register periodic background tasks and start the shared
+    # scheduler when not under pytest.
     if not is_pytest:
+        # Buffer system events / decision logs off the request path; tests keep
+        # synchronous writes so assertions see rows immediately.
+        start_audit_event_sink()
         schedule_market_data_sync()
         schedule_instrument_master_sync()
         if settings.enable_legacy_alerts:
@@ -187,6 +194,12 @@ async def _lifespan(_app: FastAPI):
         schedule_ai_tm_monitoring()
         # AI Trading Manager automation loop (Phase 2+) is also feature-flagged.
         schedule_ai_tm_automation()
+        start_scheduler()
+        # Backtests queued before a restart are resubmitted; RUNNING ones failed.
+        try:
+            recover_backtest_jobs()
+        except Exception:
+            logger.exception("Failed to recover queued backtest jobs.")
 
     enable_deployments = (
         (os.getenv("ST_ENABLE_DEPLOYMENTS_RUNTIME") or "").strip().lower()
@@ -201,7 +214,11 @@ async def _lifespan(_app: FastAPI):
     ):
         start_deployments_runtime(mode=deployments_mode)
     yield
-    # Shutdown: nothing special yet (thread is daemonised).
+    # Shutdown: stop the task scheduler and backtest worker pool, then write out
+    # any buffered audit rows.
+    stop_scheduler()
+    get_backtest_job_queue().shutdown()
+    stop_audit_event_sink()
 
 
 app = FastAPI(
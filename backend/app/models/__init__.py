@@ -1,6 +1,7 @@
 from .alerts_v3 import AlertDefinition, AlertEvent, CustomIndicator
 from .backtests import BacktestRun
 from .broker import BrokerConnection, BrokerSecret
+from .config_version import ConfigVersion
 from .deployment_runtime import (
     StrategyDeploymentAction,
     StrategyDeploymentBarCursor,
@@ -17,7 +18,7 @@ from .holdings_exit import HoldingExitEvent, HoldingExitSubscription
 from .holdings_summary import HoldingsSummarySnapshot
 from .instruments import BrokerInstrument, Listing, Security
 from .market_calendar import MarketCalendar
-from .market_data import Candle, MarketInstrument
+from .market_data import Candle, CandleRollup, CandleRollupState, MarketInstrument
 from .rebalance import (
     RebalancePolicy,
     RebalanceRun,
@@ -28,6 +29,7 @@ from .risk_engine import (
     AlertDecisionLog,
     DrawdownThreshold,
     EquitySnapshot,
+    RiskPnlState,
     RiskProfile,
     SymbolRiskCategory,
 )
@@ -94,6 +96,7 @@ __all__ = [
     "Strategy",
     "BrokerConnection",
     "SystemEvent",
+    "ConfigVersion",
     "BrokerSecret",
     "User",
     "Security",
@@ -102,6 +105,8 @@ __all__ = [
     "MarketInstrument",
     "MarketCalendar",
     "Candle",
+    "CandleRollup",
+    "CandleRollupState",
     "RiskCovarianceCache",
     "IndicatorRule",
     "ExecutionPolicyState",
@@ -123,6 +128,7 @@ __all__ = [
     "SignalStrategy",
     "SignalStrategyVersion",
     "TradingViewAlertPayloadTemplate",
+    "RiskPnlState",
     "RiskProfile",
     "SymbolRiskCategory",
     "RiskGlobalConfig",
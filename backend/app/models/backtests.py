@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import UTC, datetime
 from typing import Optional
 
-from sqlalchemy import ForeignKey, Index, Integer, String, Text
+from sqlalchemy import Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -36,6 +36,8 @@ class BacktestRun(Base):
     config_json: Mapped[str] = mapped_column(Text(), nullable=False)
     result_json: Mapped[Optional[str]] = mapped_column(Text())
     error_message: Mapped[Optional[str]] = mapped_column(Text())
+    # 0-100 while a queued job runs; None for runs created before job queueing.
+    progress: Mapped[Optional[float]] = mapped_column(Float)
 
     started_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime())
     finished_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime())
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import UTCDateTime
+
+
+class ConfigVersion(Base):
+    """Monotonic version per cached setting family (see services/config_cache).
+
+    Writers bump the row in the same transaction as the config change so other
+    processes can drop their in-memory copies by polling this small table.
+    """
+
+    __tablename__ = "config_versions"
+
+    family: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime(), nullable=False, default=lambda: datetime.now(UTC)
+    )
+
+
+__all__ = ["ConfigVersion"]
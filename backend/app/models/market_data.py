@@ -67,4 +67,58 @@ class Candle(Base):
     volume: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
 
 
-__all__ = ["MarketInstrument", "Candle"]
+class CandleRollup(Base):
+    """Materialized bar of a derived timeframe (5m..1h from 1m, 1mo/1y from 1d).
+
+    `ts` is the bucket start; `first_ts` is the first base bar in the bucket
+    and `bar_count` the number of base bars aggregated into it.
+    """
+
+    __tablename__ = "candle_rollups"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "symbol",
+            "exchange",
+            "timeframe",
+            "ts",
+            name="ux_candle_rollups_symbol_exchange_tf_ts",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(128), nullable=False)
+    exchange: Mapped[str] = mapped_column(String(32), nullable=False)
+    timeframe: Mapped[str] = mapped_column(String(8), nullable=False)
+    ts: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    first_ts: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    bar_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    volume: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class CandleRollupState(Base):
+    """Marks the rollups of one instrument/base timeframe as complete."""
+
+    __tablename__ = "candle_rollup_state"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "symbol",
+            "exchange",
+            "base_timeframe",
+            name="ux_candle_rollup_state_symbol_exchange_tf",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(128), nullable=False)
+    exchange: Mapped[str] = mapped_column(String(32), nullable=False)
+    base_timeframe: Mapped[str] = mapped_column(String(8), nullable=False)
+    built_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+__all__ = ["MarketInstrument", "Candle", "CandleRollup", "CandleRollupState"]
@@ -2,7 +2,15 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    DateTime,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -12,7 +20,10 @@ from app.db.types import UTCDateTime
 class RiskCovarianceCache(Base):
     """Cached covariance matrices for risk-based rebalancing.
 
-    We store matrices as JSON so we can reuse them across previews.
+    New rows store the covariance as a packed float64 upper triangle in
+    `cov_blob` (see `portfolio_math.encode_symmetric_matrix`); volatilities
+    and correlations are derived from it on read. Older rows only have the
+    JSON columns, which are still read as a fallback.
     Keyed by (universe_hash, timeframe, window_days, as_of_ts).
     """
 
@@ -46,6 +57,7 @@ class RiskCovarianceCache(Base):
     cov_json: Mapped[str] = mapped_column(Text, nullable=False, default="[]")
     vol_json: Mapped[str] = mapped_column(Text, nullable=False, default="[]")
     corr_json: Mapped[str] = mapped_column(Text, nullable=False, default="[]")
+    cov_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
 
     observations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
@@ -268,10 +268,43 @@ class AlertDecisionLog(Base):
     )
 
 
+class RiskPnlState(Base):
+    """Running realized-P&L state over `analytics_trades` for one scope.
+
+    `scope` is "all" (every trade) or "user:<id>" (trades whose entry order
+    belongs to that user or to no user), mirroring the filter used by the
+    pre-trade drawdown check. `last_day`/`last_day_pnl` hold the IST date of
+    the latest trade and the P&L realized on that date.
+    """
+
+    __tablename__ = "risk_pnl_state"
+
+    __table_args__ = (UniqueConstraint("scope", name="ux_risk_pnl_state_scope"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    scope: Mapped[str] = mapped_column(String(32), nullable=False)
+    trade_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cumulative_pnl: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    peak_cumulative_pnl: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    loss_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_trade_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_closed_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime(), nullable=True)
+    last_day: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    last_day_pnl: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime(),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+
+
 __all__ = [
     "AlertDecisionLog",
     "DrawdownThreshold",
     "EquitySnapshot",
+    "RiskPnlState",
     "RiskProfile",
     "SymbolRiskCategory",
 ]
@@ -22,7 +22,7 @@ class ScreenerRun(Base):
 
     __table_args__ = (
         CheckConstraint(
-            "status IN ('RUNNING', 'DONE', 'ERROR')",
+            "status IN ('RUNNING', 'DONE', 'ERROR', 'CANCELLED')",
             name="ck_screener_runs_status",
         ),
         Index("ix_screener_runs_user_created", "user_id", "created_at"),
@@ -235,6 +235,8 @@ class Order(Base):
     risk_spec_json: Mapped[Optional[str]] = mapped_column(Text())
     # Marks an order created as a managed exit (skip risk policy blocks, etc.).
     is_exit: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Stage timings of the last execute attempt (see services/order_execution_trace).
+    execution_trace_json: Mapped[Optional[str]] = mapped_column(Text())
 
     created_at: Mapped[datetime] = mapped_column(
         UTCDateTime(), nullable=False, default=lambda: datetime.now(UTC)
@@ -34,6 +34,8 @@ class AiToolCallRow(BaseModel):
     duration_ms: int
     result_preview: str
     error: Optional[str] = None
+    # LLM/tool/DB milliseconds accrued since the previous tool call.
+    phase_ms: Optional[Dict[str, int]] = None
 
 
 class AiChatResponse(BaseModel):
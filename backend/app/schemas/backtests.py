@@ -12,8 +12,11 @@ BacktestKind = Literal[
     "EXECUTION",
     "STRATEGY",
     "PORTFOLIO_STRATEGY",
+    "SWEEP",
+]
+BacktestStatus = Literal[
+    "PENDING", "QUEUED", "RUNNING", "COMPLETED", "FAILED", "CANCELLED"
 ]
-BacktestStatus = Literal["PENDING", "RUNNING", "COMPLETED", "FAILED"]
 
 
 class UniverseSymbol(BaseModel):
@@ -44,6 +47,7 @@ class BacktestRunRead(BaseModel):
     config: dict[str, Any]
     result: Optional[dict[str, Any]] = None
     error_message: Optional[str] = None
+    progress: Optional[float] = None
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     created_at: datetime
@@ -72,6 +76,7 @@ class BacktestRunRead(BaseModel):
             config=config,
             result=result,
             error_message=obj.error_message,
+            progress=obj.progress,
             started_at=obj.started_at,
             finished_at=obj.finished_at,
             created_at=obj.created_at,
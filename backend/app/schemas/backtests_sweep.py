@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+SweepBaseKind = Literal["STRATEGY", "PORTFOLIO_STRATEGY"]
+SweepMode = Literal["GRID", "RANDOM"]
+SweepRankMetric = Literal[
+    "total_return_pct",
+    "cagr_pct",
+    "max_drawdown_pct",
+    "turnover_pct_total",
+    "total_charges",
+    "trades",
+    "win_rate_pct",
+]
+
+
+class SweepBacktestConfigIn(BaseModel):
+    """Parameter sweep over a STRATEGY or PORTFOLIO_STRATEGY backtest.
+
+    Each `params` key is either a field of the base config (e.g.
+    `stop_loss_pct`, `max_open_positions`) or a `{name}` placeholder used in
+    `entry_dsl`/`exit_dsl` (e.g. `RSI(14) < {rsi_lo}`). GRID evaluates the
+    full cartesian product; RANDOM draws `samples` distinct combinations.
+    """
+
+    base_kind: SweepBaseKind
+    base_config: dict[str, Any]
+    params: dict[str, list[Any]] = Field(min_length=1)
+
+    mode: SweepMode = "GRID"
+    samples: int = Field(default=50, ge=1, le=1000)
+    seed: Optional[int] = None
+
+    rank_by: SweepRankMetric = "total_return_pct"
+    rank_order: Literal["DESC", "ASC"] = "DESC"
+
+
+__all__ = [
+    "SweepBacktestConfigIn",
+    "SweepBaseKind",
+    "SweepMode",
+    "SweepRankMetric",
+]
@@ -32,6 +32,11 @@ class RebalanceRiskConfig(BaseModel):
     max_iter: int = Field(2000, ge=10, le=20000)
     tol: float = Field(1e-8, gt=0.0, lt=1.0)
 
+    # Covariance shrinkage applied before solving. For "ledoit_wolf" an unset
+    # intensity is estimated from the returns; "diagonal" defaults to 0.1.
+    shrinkage: Literal["none", "ledoit_wolf", "diagonal"] = "none"
+    shrinkage_intensity: Optional[float] = Field(None, ge=0.0, le=1.0)
+
     @model_validator(mode="before")
     def _validate_bounds(cls, values):  # type: ignore[no-untyped-def]
         if not isinstance(values, dict):
@@ -6,7 +6,7 @@ import asyncio
 import hashlib
 from datetime import UTC, datetime
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any, Awaitable, Callable, Dict, List
 from uuid import uuid4
 
@@ -54,6 +54,7 @@ from app.services.system_events import record_system_event
 from app.models.ai_trading_manager import AiTmPositionShadow
 
 from .mcp_tools import hash_tool_definitions, mcp_tools_to_openai_tools, tool_result_preview
+from .phase_timing import ChatPhaseTimer, gather_with_timeouts
 from .openai_toolcaller import (
     OpenAiChatError,
     openai_chat_plain,
@@ -93,6 +94,8 @@ class ToolCallLog:
     duration_ms: int
     result_preview: str
     error: str | None = None
+    # Per-phase ms (llm/tools/db) accrued since the previous tool call.
+    phase_ms: Dict[str, int] | None = None
 
 
 @dataclass(frozen=True)
@@ -478,18 +481,20 @@ async def run_chat(
     event_cb: Callable[[dict[str, object]], Awaitable[None]] | None = None,
     stream_assistant: bool = False,
 ) -> ChatResult:
-    require_ai_assistant_enabled(db, settings)
+    phases = ChatPhaseTimer()
+    fanout_timeout_sec = float(getattr(settings, "ai_tool_fanout_timeout_sec", 25.0) or 25.0)
+    await phases.run_blocking(require_ai_assistant_enabled, db, settings)
     corr = correlation_id or _corr()
     direct_req = _parse_direct_portfolio_request(user_message)
 
-    tm_cfg, _tm_src = get_ai_settings_with_source(db, settings)
+    tm_cfg, _tm_src = await phases.run_blocking(get_ai_settings_with_source, db, settings)
     # Legacy settings container (back-compat): used for digest-prefetch and remote posture toggles.
     hy_cfg = getattr(tm_cfg, "hybrid_llm", None)
     # Single assistant runtime: one configured model/provider (default slot).
     # Note: legacy settings still exist for backwards compatibility of policy
     # toggles (remote portfolio detail posture, etc.), but SigmaTrader runs ONE
     # assistant model per request.
-    default_cfg, _src = get_active_config(db, settings, slot="default")
+    default_cfg, _src = await phases.run_blocking(get_active_config, db, settings, slot="default")
     ai_cfg = default_cfg
     ai_cfg_slot = "default"
 
@@ -531,16 +536,16 @@ async def run_chat(
     if bool(getattr(prov, "requires_api_key", False)):
         if ai_cfg.active_key_id is None:
             raise HTTPException(status_code=400, detail=f"No {prov.label} key selected. Add/select a key in Settings → AI.")
-        key_row = get_key(db, key_id=int(ai_cfg.active_key_id), user_id=None)
+        key_row = await phases.run_blocking(get_key, db, key_id=int(ai_cfg.active_key_id), user_id=None)
         if key_row is None:
             raise HTTPException(status_code=400, detail=f"Selected {prov.label} key not found.")
-        toolcall_api_key = decrypt_key_value(settings, key_row)
+        toolcall_api_key = await phases.run_blocking(decrypt_key_value, settings, key_row)
     else:
         # Optional key (some local gateways can still require auth).
         if ai_cfg.active_key_id is not None:
-            key_row = get_key(db, key_id=int(ai_cfg.active_key_id), user_id=None)
+            key_row = await phases.run_blocking(get_key, db, key_id=int(ai_cfg.active_key_id), user_id=None)
             if key_row is not None:
-                toolcall_api_key = decrypt_key_value(settings, key_row)
+                toolcall_api_key = await phases.run_blocking(decrypt_key_value, settings, key_row)
 
     # Broker MCP (Kite) is optional: allow "search-only" / external-tools usage even when
     # broker is not configured or not authorized.
@@ -554,7 +559,7 @@ async def run_chat(
     cached, refreshed = empty_cached, False
     if bool(tm_cfg.feature_flags.kite_mcp_enabled) and bool(getattr(tm_cfg.kite_mcp, "server_url", "")):
         try:
-            auth_sid = get_auth_session_id(db, settings)
+            auth_sid = await phases.run_blocking(get_auth_session_id, db, settings)
             kite_session = await kite_mcp_sessions.get_session(
                 server_url=tm_cfg.kite_mcp.server_url,
                 auth_session_id=auth_sid,
@@ -569,7 +574,8 @@ async def run_chat(
         except Exception as exc:
             kite_session = None
             cached, refreshed = empty_cached, False
-            record_system_event(
+            await phases.run_blocking(
+                record_system_event,
                 db,
                 level="WARNING",
                 category="AI_ORCH",
@@ -579,7 +585,7 @@ async def run_chat(
             )
 
     # Optional: external MCP servers (e.g., Tavily) that can be exposed as tools to the LLM.
-    mcp_cfg, _mcp_src = get_mcp_settings_with_source(db, settings)
+    mcp_cfg, _mcp_src = await phases.run_blocking(get_mcp_settings_with_source, db, settings)
     tavily_cfg = (getattr(mcp_cfg, "servers", None) or {}).get("tavily") if mcp_cfg is not None else None
     tavily_session = None
     tavily_cached = None
@@ -689,7 +695,8 @@ async def run_chat(
     tools_by_name = tool_lookup_map(all_mcp_tools)
 
     if refreshed:
-        record_system_event(
+        await phases.run_blocking(
+            record_system_event,
             db,
             level="INFO",
             category="AI_ORCH",
@@ -703,7 +710,8 @@ async def run_chat(
             },
         )
     if tavily_refreshed:
-        record_system_event(
+        await phases.run_blocking(
+            record_system_event,
             db,
             level="INFO",
             category="AI_ORCH",
@@ -717,7 +725,8 @@ async def run_chat(
             },
         )
 
-    record_system_event(
+    await phases.run_blocking(
+        record_system_event,
         db,
         level="INFO",
         category="AI_ORCH",
@@ -881,7 +890,17 @@ async def run_chat(
         except Exception:
             pass
 
-    thread_state = get_or_create_thread_state(db, account_id=account_id, thread_id=thread_id, user_id=None)
+    def _log_tool(log: ToolCallLog) -> None:
+        tool_logs.append(replace(log, phase_ms=phases.since_last_mark()))
+
+    async def _persist_trace() -> None:
+        outcome = trace.final_outcome if isinstance(trace.final_outcome, dict) else {}
+        trace.final_outcome = {**outcome, "phase_ms": phases.totals_ms()}
+        await phases.run_blocking(audit_store.persist_decision_trace, db, trace, user_id=None)
+
+    thread_state = await phases.run_blocking(
+        get_or_create_thread_state, db, account_id=account_id, thread_id=thread_id, user_id=None
+    )
 
     def _patch_thread_state(patch: dict[str, Any]) -> dict[str, Any]:
         nonlocal thread_state
@@ -1037,7 +1056,8 @@ async def run_chat(
             return args
 
         args["instrument_token"] = int(token)
-        record_system_event(
+        await phases.run_blocking(
+            record_system_event,
             db,
             level="INFO",
             category="AI_ORCH",
@@ -1073,7 +1093,8 @@ async def run_chat(
             detail_raw = getattr(getattr(tm_cfg, "hybrid_llm", None), "remote_portfolio_detail_level", None)
             detail = str(getattr(detail_raw, "value", None) or detail_raw or "DIGEST_ONLY").upper()
             if detail == "OFF":
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="WARNING",
                     category="AI_ORCH",
@@ -1094,7 +1115,8 @@ async def run_chat(
                     )
                 )
             if portfolio_detail_requires_approval(state=thread_state):
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="INFO",
                     category="AI_ORCH",
@@ -1155,7 +1177,8 @@ async def run_chat(
                         max_calls_per_session=max_calls,
                     )
                     if dec == "approval_required":
-                        record_system_event(
+                        await phases.run_blocking(
+                            record_system_event,
                             db,
                             level="WARNING",
                             category="AI_ORCH",
@@ -1180,7 +1203,8 @@ async def run_chat(
                             )
                         )
                     if dec == "warn":
-                        record_system_event(
+                        await phases.run_blocking(
+                            record_system_event,
                             db,
                             level="INFO",
                             category="AI_ORCH",
@@ -1213,7 +1237,8 @@ async def run_chat(
                     max_calls_per_session=max_calls,
                 )
                 if dec == "approval_required":
-                    record_system_event(
+                    await phases.run_blocking(
+                        record_system_event,
                         db,
                         level="WARNING",
                         category="AI_ORCH",
@@ -1238,7 +1263,8 @@ async def run_chat(
                         )
                     )
                 if dec == "warn":
-                    record_system_event(
+                    await phases.run_blocking(
+                        record_system_event,
                         db,
                         level="INFO",
                         category="AI_ORCH",
@@ -1301,7 +1327,8 @@ async def run_chat(
                 )
                 if cached is not None:
                     tavily_meta["cache_hit"] = True
-                    record_system_event(
+                    await phases.run_blocking(
+                        record_system_event,
                         db,
                         level="INFO",
                         category="AI_ORCH",
@@ -1328,7 +1355,9 @@ async def run_chat(
                     pass
             return payload
 
-        ex = await lsg_execute(
+        ex = await phases.timed(
+            "tools",
+            lsg_execute,
             lsg_ctx,
             request=req,
             tool_input_schema=_tool_schema(tool_name),
@@ -1344,7 +1373,8 @@ async def run_chat(
             if max_calls > 0 and calls > max_calls and extra > 0:
                 extra = max(0, extra - 1)
             _patch_thread_state({"tavily_calls_session": calls, "tavily_extra_calls_allowed": extra})
-            record_system_event(
+            await phases.run_blocking(
+                record_system_event,
                 db,
                 level="INFO",
                 category="AI_ORCH",
@@ -1381,7 +1411,8 @@ async def run_chat(
             "authorization_message_id": authorization_message_id,
         }
         try:
-            record_system_event(
+            await phases.run_blocking(
+                record_system_event,
                 db,
                 level="INFO",
                 category="AI_ORCH",
@@ -1402,7 +1433,7 @@ async def run_chat(
             "tool_calls": [t.__dict__ for t in tool_logs],
         }
         trace.explanations = []
-        audit_store.persist_decision_trace(db, trace, user_id=None)
+        await _persist_trace()
         return ChatResult(
             assistant_message="",
             decision_id=trace.decision_id,
@@ -1411,20 +1442,30 @@ async def run_chat(
         )
 
     if direct_req is not None:
-        async def _call_json(name: str) -> Any:
-            tool_call_id = uuid4().hex
-            ex = await _lsg_call_mcp_payload(
-                tool_name=name,
-                arguments={},
-                request_id=tool_call_id,
-                source="system",
-                mode="DIRECT_PORTFOLIO",
-            )
+        def _direct_fetch(name: str) -> Callable[[], Awaitable[LsgExecution]]:
+            async def _run() -> LsgExecution:
+                return await _lsg_call_mcp_payload(
+                    tool_name=name,
+                    arguments={},
+                    request_id=uuid4().hex,
+                    source="system",
+                    mode="DIRECT_PORTFOLIO",
+                )
+
+            return _run
+
+        async def _record_json(name: str, ex: LsgExecution | BaseException) -> Any:
+            if isinstance(ex, asyncio.TimeoutError):
+                raise RuntimeError(f"{name} timed out.")
+            if isinstance(ex, BaseException):
+                raise ex
             if ex.result.status != "ok":
                 raise RuntimeError(str((ex.result.data or {}).get("error") or f"{name} failed."))
+            tool_call_id = ex.result.request_id
             payload = ex.raw_payload
             duration_ms = int(ex.duration_ms)
-            meta = persist_operator_payload(
+            meta = await phases.run_blocking(
+                persist_operator_payload,
                 db,
                 decision_id=trace.decision_id,
                 tool_name=name,
@@ -1435,7 +1476,7 @@ async def run_chat(
             )
             llm_summary = summarize_tool_for_llm(settings, tool_name=name, operator_payload=payload)
             preview = tool_result_preview(llm_summary, max_chars=1200)
-            tool_logs.append(
+            _log_tool(
                 ToolCallLog(
                     name=name,
                     arguments={},
@@ -1474,16 +1515,24 @@ async def run_chat(
 
         holdings_payload = None
         positions_payload = None
+        # Holdings and positions are independent reads: fetch them together,
+        # then persist/log them in a fixed order once both have settled.
+        wanted: dict[str, Callable[[], Awaitable[LsgExecution]]] = {}
+        if direct_req.want_holdings:
+            wanted["get_holdings"] = _direct_fetch("get_holdings")
+        if direct_req.want_positions:
+            wanted["get_positions"] = _direct_fetch("get_positions")
+        fetched = await gather_with_timeouts(wanted, timeout_sec=fanout_timeout_sec)
         try:
-            if direct_req.want_holdings:
-                holdings_payload = await _call_json("get_holdings")
-            if direct_req.want_positions:
-                positions_payload = await _call_json("get_positions")
+            if "get_holdings" in fetched:
+                holdings_payload = await _record_json("get_holdings", fetched["get_holdings"])
+            if "get_positions" in fetched:
+                positions_payload = await _record_json("get_positions", fetched["get_positions"])
         except Exception as exc:
             final_text = f"Failed to fetch portfolio data from Kite MCP: {str(exc) or 'unknown error'}"
             trace.final_outcome = {"assistant_message": final_text, "tool_calls": [t.__dict__ for t in tool_logs]}
             trace.explanations = []
-            audit_store.persist_decision_trace(db, trace, user_id=None)
+            await _persist_trace()
             return ChatResult(assistant_message=final_text, decision_id=trace.decision_id, tool_calls=tool_logs)
 
         holdings_rows = _holdings_rows(holdings_payload) if holdings_payload is not None else []
@@ -1581,7 +1630,7 @@ async def run_chat(
             "portfolio": {"holdings_count": len(holdings_rows), "positions_count": len(positions_rows)},
         }
         trace.explanations = []
-        audit_store.persist_decision_trace(db, trace, user_id=None)
+        await _persist_trace()
         return ChatResult(assistant_message=final_text, decision_id=trace.decision_id, tool_calls=tool_logs)
 
     structured: dict[str, Any] = {}
@@ -1831,7 +1880,8 @@ async def run_chat(
             }
             structured["trade_plan"] = full_plan
             structured["plan_hash"] = plan_hash
-            record_system_event(
+            await phases.run_blocking(
+                record_system_event,
                 db,
                 level="INFO",
                 category="AI_ORCH",
@@ -1899,7 +1949,8 @@ async def run_chat(
                     ),
                 )
                 structured["playbook_pretrade"] = pb_dec.model_dump(mode="json")
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="INFO",
                     category="AI_ORCH",
@@ -1955,7 +2006,8 @@ async def run_chat(
                     structured["riskgate"] = risk.model_dump(mode="json")
                     if risk.outcome.value != "allow":
                         out = {"executed": False, "veto": True, "reason": "RISK_DENY", "risk": risk.model_dump(mode="json")}
-                        record_system_event(
+                        await phases.run_blocking(
+                            record_system_event,
                             db,
                             level="WARNING",
                             category="AI_ORCH",
@@ -1964,7 +2016,8 @@ async def run_chat(
                             details={"event_type": "RISK_CHECK_DENIED", "policy_hash": risk.policy_hash},
                         )
                     else:
-                        record_system_event(
+                        await phases.run_blocking(
+                            record_system_event,
                             db,
                             level="INFO",
                             category="AI_ORCH",
@@ -2015,7 +2068,8 @@ async def run_chat(
 
             if "execution" not in structured:
                 structured["execution"] = out
-            record_system_event(
+            await phases.run_blocking(
+                record_system_event,
                 db,
                 level="INFO",
                 category="AI_ORCH",
@@ -2066,44 +2120,54 @@ async def run_chat(
                 return str(ex.result.denial_reason)
             return "tool_failed"
 
+        digest_fetch_labels = {
+            "get_holdings": "holdings",
+            "get_positions": "positions",
+            "get_margins": "margins",
+            "get_orders": "orders",
+        }
+
+        async def _digest_fetch(*tool_names: str) -> dict[str, Any]:
+            # Independent broker reads run concurrently, each with its own timeout;
+            # failures are reported in the order the tools were requested.
+            def _one(tool: str) -> Callable[[], Awaitable[LsgExecution]]:
+                return lambda: _lsg_call_mcp_payload(
+                    tool_name=tool,
+                    arguments={},
+                    request_id=uuid4().hex,
+                    source="system",
+                    mode="DIGEST_FETCH",
+                )
+
+            fetched = await gather_with_timeouts(
+                {t: _one(t) for t in tool_names},
+                timeout_sec=fanout_timeout_sec,
+            )
+            payloads: dict[str, Any] = {}
+            for tool in tool_names:
+                ex = fetched[tool]
+                label = digest_fetch_labels.get(tool, tool)
+                if isinstance(ex, asyncio.TimeoutError):
+                    raise RuntimeError(f"Unable to fetch {label} (broker not authorized?): timed out")
+                if isinstance(ex, BaseException):
+                    raise ex
+                if ex.result.status != "ok":
+                    raise RuntimeError(f"Unable to fetch {label} (broker not authorized?): {_lsg_err(ex)}")
+                payloads[tool] = ex.raw_payload
+            return payloads
+
         async def _exec_digest(name: str, args: dict[str, Any]) -> Any:
             if name == "portfolio_digest":
                 try:
                     top_n = int(args.get("top_n") or 5)
                 except Exception:
                     top_n = 5
-                hx = await _lsg_call_mcp_payload(
-                    tool_name="get_holdings",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if hx.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch holdings (broker not authorized?): {_lsg_err(hx)}")
-                px = await _lsg_call_mcp_payload(
-                    tool_name="get_positions",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if px.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch positions (broker not authorized?): {_lsg_err(px)}")
-                mx = await _lsg_call_mcp_payload(
-                    tool_name="get_margins",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if mx.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch margins (broker not authorized?): {_lsg_err(mx)}")
+                got = await _digest_fetch("get_holdings", "get_positions", "get_margins")
                 return portfolio_digest(
                     tm_cfg=tm_cfg,
-                    holdings_payload=hx.raw_payload if hx.result.status == "ok" else [],
-                    positions_payload=px.raw_payload if px.result.status == "ok" else {},
-                    margins_payload=mx.raw_payload if mx.result.status == "ok" else {},
+                    holdings_payload=got["get_holdings"],
+                    positions_payload=got["get_positions"],
+                    margins_payload=got["get_margins"],
                     top_n=top_n,
                 )
             if name == "orders_digest":
@@ -2111,49 +2175,15 @@ async def run_chat(
                     last_n = int(args.get("last_n") or 10)
                 except Exception:
                     last_n = 10
-                ox = await _lsg_call_mcp_payload(
-                    tool_name="get_orders",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if ox.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch orders (broker not authorized?): {_lsg_err(ox)}")
-                return orders_digest(orders_payload=ox.raw_payload if ox.result.status == "ok" else [], last_n=last_n)
+                got = await _digest_fetch("get_orders")
+                return orders_digest(orders_payload=got["get_orders"], last_n=last_n)
             if name == "risk_digest":
-                mx = await _lsg_call_mcp_payload(
-                    tool_name="get_margins",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if mx.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch margins (broker not authorized?): {_lsg_err(mx)}")
-                hx = await _lsg_call_mcp_payload(
-                    tool_name="get_holdings",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if hx.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch holdings (broker not authorized?): {_lsg_err(hx)}")
-                px = await _lsg_call_mcp_payload(
-                    tool_name="get_positions",
-                    arguments={},
-                    request_id=uuid4().hex,
-                    source="system",
-                    mode="DIGEST_FETCH",
-                )
-                if px.result.status != "ok":
-                    raise RuntimeError(f"Unable to fetch positions (broker not authorized?): {_lsg_err(px)}")
+                got = await _digest_fetch("get_margins", "get_holdings", "get_positions")
                 return risk_digest(
                     tm_cfg=tm_cfg,
-                    margins_payload=mx.raw_payload if mx.result.status == "ok" else {},
-                    holdings_payload=hx.raw_payload if hx.result.status == "ok" else [],
-                    positions_payload=px.raw_payload if px.result.status == "ok" else {},
+                    margins_payload=got["get_margins"],
+                    holdings_payload=got["get_holdings"],
+                    positions_payload=got["get_positions"],
                 )
             raise ValueError("unknown digest tool")
 
@@ -2194,7 +2224,7 @@ async def run_chat(
 
                 tr_env = ex.result.model_dump(mode="json")
                 preview = tool_result_preview(tr_env, max_chars=1200)
-                tool_logs.append(
+                _log_tool(
                     ToolCallLog(
                         name="portfolio_digest",
                         arguments={"top_n": 25},
@@ -2309,7 +2339,9 @@ async def run_chat(
                     for tmo in timeouts[:3]:
                         used_timeouts.append(float(tmo))
                         try:
-                            turn = await openai_responses_plain(
+                            turn = await phases.timed(
+                                "llm",
+                                openai_responses_plain,
                                 api_key=toolcall_api_key,
                                 model=str(ai_cfg.model),
                                 messages=messages,
@@ -2351,7 +2383,9 @@ async def run_chat(
                             "timeout_attempts_sec": used_timeouts,
                         }
                 else:
-                    turn = await openai_chat_plain(
+                    turn = await phases.timed(
+                        "llm",
+                        openai_chat_plain,
                         api_key=toolcall_api_key,
                         model=str(ai_cfg.model),
                         messages=messages,
@@ -2475,7 +2509,8 @@ async def run_chat(
                                 },
                             )
                             denied = denied.model_copy(update={"audit_ref": str(meta.get("payload_id") or "")})
-                            record_system_event(
+                            await phases.run_blocking(
+                                record_system_event,
                                 db,
                                 level="WARNING",
                                 category="AI_LSG",
@@ -2519,7 +2554,7 @@ async def run_chat(
                     safe_args = redact_for_llm(args2)
                     tr_env = ex.result.model_dump(mode="json")
                     preview = tool_result_preview(tr_env, max_chars=1200)
-                    tool_logs.append(
+                    _log_tool(
                         ToolCallLog(
                             name=tname or "unknown",
                             arguments=safe_args,
@@ -2622,8 +2657,9 @@ async def run_chat(
             **structured,
         }
         trace.explanations = []
-        audit_store.persist_decision_trace(db, trace, user_id=None)
-        record_system_event(
+        await _persist_trace()
+        await phases.run_blocking(
+            record_system_event,
             db,
             level="INFO",
             category="AI_ORCH",
@@ -2714,7 +2750,9 @@ async def run_chat(
                 for tmo in timeouts[:3]:
                     try:
                         used_timeouts.append(float(tmo))
-                        ws_turn = await openai_responses_plain(
+                        ws_turn = await phases.timed(
+                            "llm",
+                            openai_responses_plain,
                             api_key=toolcall_api_key,
                             model=str(ai_cfg.model),
                             messages=ws_messages,
@@ -2770,7 +2808,8 @@ async def run_chat(
                             ),
                         },
                     )
-                    record_system_event(
+                    await phases.run_blocking(
+                        record_system_event,
                         db,
                         level="INFO",
                         category="AI_ORCH",
@@ -2791,7 +2830,8 @@ async def run_chat(
                         "timeout_attempts_sec": used_timeouts,
                     }
                 elif ws_last is not None:
-                    record_system_event(
+                    await phases.run_blocking(
+                        record_system_event,
                         db,
                         level="WARNING",
                         category="AI_ORCH",
@@ -2819,7 +2859,8 @@ async def run_chat(
                 if isinstance(msgs2, list):
                     messages = msgs2  # keep sanitized copy for the rest of this run
                 if meta2.dropped_fields or meta2.redacted_fields:
-                    record_system_event(
+                    await phases.run_blocking(
+                        record_system_event,
                         db,
                         level="INFO",
                         category="AI_ORCH",
@@ -2851,7 +2892,8 @@ async def run_chat(
                     "findings": findings,
                 }
                 trace.explanations = ["PII_POLICY_BLOCKED_OUTBOUND_LLM_PAYLOAD"]
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="WARNING",
                     category="AI_ORCH",
@@ -2866,7 +2908,9 @@ async def run_chat(
                 )
                 break
         try:
-            turn = await openai_chat_with_tools(
+            turn = await phases.timed(
+                "llm",
+                openai_chat_with_tools,
                 api_key=toolcall_api_key,
                 model=str(ai_cfg.model),
                 messages=messages,
@@ -3012,7 +3056,8 @@ async def run_chat(
                         }
                         structured["trade_plan"] = full_plan
                         structured["plan_hash"] = plan_hash
-                        record_system_event(
+                        await phases.run_blocking(
+                            record_system_event,
                             db,
                             level="INFO",
                             category="AI_ORCH",
@@ -3087,7 +3132,8 @@ async def run_chat(
                                 ),
                             )
                             structured["playbook_pretrade"] = pb_dec.model_dump(mode="json")
-                            record_system_event(
+                            await phases.run_blocking(
+                                record_system_event,
                                 db,
                                 level="INFO",
                                 category="AI_ORCH",
@@ -3175,7 +3221,8 @@ async def run_chat(
                                         "reason": "RISK_DENY",
                                         "risk": risk.model_dump(mode="json"),
                                     }
-                                    record_system_event(
+                                    await phases.run_blocking(
+                                        record_system_event,
                                         db,
                                         level="WARNING",
                                         category="AI_ORCH",
@@ -3184,7 +3231,8 @@ async def run_chat(
                                         details={"event_type": "RISK_CHECK_DENIED", "policy_hash": risk.policy_hash},
                                     )
                                 else:
-                                    record_system_event(
+                                    await phases.run_blocking(
+                                        record_system_event,
                                         db,
                                         level="INFO",
                                         category="AI_ORCH",
@@ -3245,7 +3293,8 @@ async def run_chat(
                         if "execution" not in structured:
                             structured["execution"] = out
 
-                        record_system_event(
+                        await phases.run_blocking(
+                            record_system_event,
                             db,
                             level="INFO",
                             category="AI_ORCH",
@@ -3270,7 +3319,7 @@ async def run_chat(
                     except SafeSummaryError:
                         llm_summary = {"schema": "tool_error.v1", "tool": tc.name, "isError": True}
                     preview = tool_result_preview(llm_summary)
-                    tool_logs.append(
+                    _log_tool(
                         ToolCallLog(
                             name=tc.name,
                             arguments=safe_args,
@@ -3334,7 +3383,7 @@ async def run_chat(
                     )
                     llm_summary = {"schema": "tool_error.v1", "tool": tc.name, "isError": True, "error": str(exc) or ""}
                     preview = tool_result_preview(llm_summary)
-                    tool_logs.append(
+                    _log_tool(
                         ToolCallLog(
                             name=tc.name,
                             arguments=safe_args,
@@ -3409,7 +3458,7 @@ async def run_chat(
                 )
                 llm_summary2: dict[str, Any] = dict(out)
                 preview2 = tool_result_preview(llm_summary2)
-                tool_logs.append(
+                _log_tool(
                     ToolCallLog(
                         name=tc.name,
                         arguments=safe_args,
@@ -3446,7 +3495,8 @@ async def run_chat(
                         llm_summary_count=_llm_summary_count(llm_summary2),
                     )
                 )
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="WARNING",
                     category="AI_ORCH",
@@ -3489,7 +3539,7 @@ async def run_chat(
                     payload=out_ns,
                 )
                 preview_ns = tool_result_preview(out_ns)
-                tool_logs.append(
+                _log_tool(
                     ToolCallLog(
                         name=tc.name,
                         arguments=safe_args,
@@ -3512,7 +3562,8 @@ async def run_chat(
                         truncation_reason="blocked_no_safe_summary",
                     )
                 )
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="WARNING",
                     category="AI_ORCH",
@@ -3583,7 +3634,8 @@ async def run_chat(
                                 "provider": ai_cfg.provider,
                             }
                             trace.explanations = ["PII_POLICY_NO_SAFE_SUMMARY"]
-                            record_system_event(
+                            await phases.run_blocking(
+                                record_system_event,
                                 db,
                                 level="WARNING",
                                 category="AI_ORCH",
@@ -3604,7 +3656,7 @@ async def run_chat(
                 else:
                     llm_summary3 = {"schema": "tool_error.v1", "tool": tc.name, "isError": True, "error": err or ""}
                 preview = tool_result_preview(llm_summary3)
-                tool_logs.append(
+                _log_tool(
                     ToolCallLog(
                         name=tc.name,
                         arguments=safe_args,
@@ -3641,7 +3693,8 @@ async def run_chat(
                         llm_summary_count=_llm_summary_count(llm_summary3),
                     )
                 )
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="INFO" if status_s == "ok" else "WARNING",
                     category="AI_ORCH",
@@ -3684,7 +3737,7 @@ async def run_chat(
                 )
                 llm_summary4 = {"schema": "tool_error.v1", "tool": tc.name, "isError": True, "error": str(exc) or ""}
                 preview = tool_result_preview(llm_summary4)
-                tool_logs.append(
+                _log_tool(
                     ToolCallLog(
                         name=tc.name,
                         arguments=safe_args,
@@ -3721,7 +3774,8 @@ async def run_chat(
                         llm_summary_count=_llm_summary_count(llm_summary4),
                     )
                 )
-                record_system_event(
+                await phases.run_blocking(
+                    record_system_event,
                     db,
                     level="WARNING",
                     category="AI_ORCH",
@@ -3771,9 +3825,10 @@ async def run_chat(
     trace.explanations = []
 
     # Persist trace.
-    audit_store.persist_decision_trace(db, trace, user_id=None)
+    await _persist_trace()
 
-    record_system_event(
+    await phases.run_blocking(
+        record_system_event,
         db,
         level="INFO",
         category="AI_ORCH",
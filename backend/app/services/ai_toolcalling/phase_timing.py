@@ -0,0 +1,130 @@
+"""Phase timing and blocking-work offload for one AI chat request.
+
+`run_chat` interleaves three kinds of work: LLM round-trips, MCP tool calls
+and synchronous DB/crypto work (settings lookups, key decryption, audit and
+trace writes). `ChatPhaseTimer` accumulates wall time per phase so the
+decision trace and each tool-call log can say where a slow turn went.
+
+Blocking calls are moved off the event loop onto a small shared thread pool.
+The request's SQLAlchemy session is not thread-safe, so offloaded calls for
+one request are serialized behind a per-request lock, and callers must not
+offload while sibling coroutines of the same request use the session on the
+loop thread (e.g. inside an `asyncio.gather` fan-out).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Iterator, TypeVar
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+PHASES = ("llm", "tools", "db")
+
+
+class ChatPhaseTimer:
+    """Cumulative milliseconds spent per phase for one chat request.
+
+    Overlapping work (concurrent tool calls) is summed, so `tools` is busy
+    time rather than elapsed time.
+    """
+
+    def __init__(self) -> None:
+        self._totals: Dict[str, float] = {p: 0.0 for p in PHASES}
+        self._marks: Dict[str, float] = {p: 0.0 for p in PHASES}
+        self._db_lock = asyncio.Lock()
+
+    def add(self, phase: str, ms: float) -> None:
+        self._totals[phase] = self._totals.get(phase, 0.0) + max(0.0, float(ms))
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, (time.perf_counter() - start) * 1000.0)
+
+    async def timed(
+        self,
+        phase: str,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Await `fn(*args, **kwargs)` and charge its duration to `phase`."""
+
+        with self.measure(phase):
+            return await fn(*args, **kwargs)
+
+    async def run_blocking(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a synchronous DB/crypto call on the shared pool, charged to `db`."""
+
+        loop = asyncio.get_running_loop()
+        async with self._db_lock:
+            with self.measure("db"):
+                return await loop.run_in_executor(
+                    get_ai_blocking_executor(), partial(fn, *args, **kwargs)
+                )
+
+    def since_last_mark(self) -> Dict[str, int]:
+        """Return per-phase ms accrued since the previous call (for tool logs)."""
+
+        out = {p: int(round(self._totals[p] - self._marks[p])) for p in PHASES}
+        self._marks = dict(self._totals)
+        return out
+
+    def totals_ms(self) -> Dict[str, int]:
+        return {p: int(round(self._totals[p])) for p in PHASES}
+
+
+async def gather_with_timeouts(
+    calls: Dict[str, Callable[[], Awaitable[T]]],
+    *,
+    timeout_sec: float,
+) -> Dict[str, T | BaseException]:
+    """Run independent coroutines concurrently, each bounded by `timeout_sec`.
+
+    Failures (including timeouts) are returned in place of the result so the
+    caller can report them in its own order.
+    """
+
+    names = list(calls)
+    results = await asyncio.gather(
+        *(asyncio.wait_for(calls[n](), timeout=timeout_sec) for n in names),
+        return_exceptions=True,
+    )
+    return dict(zip(names, results, strict=True))
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+
+def get_ai_blocking_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool used for orchestrator DB work."""
+
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(getattr(get_settings(), "ai_blocking_workers", 4) or 4)
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, workers),
+                    thread_name_prefix="ai-orch-db",
+                )
+    return _executor
+
+
+__all__ = [
+    "ChatPhaseTimer",
+    "gather_with_timeouts",
+    "get_ai_blocking_executor",
+]
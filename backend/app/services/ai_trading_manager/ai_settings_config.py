@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.core.config import Settings
 from app.core.crypto import decrypt_token, encrypt_token
 from app.models import BrokerSecret
+from app.services.config_cache import cached_config
 from app.schemas.ai_settings import (
     AiSettings,
     AiSettingsUpdate,
@@ -95,6 +96,20 @@ def _env_defaults(settings: Settings) -> AiSettings:
 def get_ai_settings_with_source(
     db: Session,
     settings: Settings,
+) -> tuple[AiSettings, AiSettingsSource]:
+    cfg, source = cached_config(
+        "ai",
+        "settings",
+        lambda: _read_ai_settings_with_source(db, settings),
+        owner=settings,
+    )
+    # AiSettings is mutable; hand each caller its own copy.
+    return cfg.model_copy(deep=True), source
+
+
+def _read_ai_settings_with_source(
+    db: Session,
+    settings: Settings,
 ) -> tuple[AiSettings, AiSettingsSource]:
     env_defaults = _env_defaults(settings)
     row = (
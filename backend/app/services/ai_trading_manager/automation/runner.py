@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 import logging
-import threading
-import time
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from typing import Any, Dict
@@ -20,6 +18,7 @@ from app.services.ai_trading_manager.feature_flags import require_execution_enab
 from app.services.ai_trading_manager.ledger_snapshot import build_ledger_snapshot
 from app.services.ai_trading_manager.playbooks import create_playbook_run, get_trade_plan
 from app.services.ai_trading_manager.riskgate.engine import evaluate_riskgate
+from app.services.scheduler import register_task
 
 logger = logging.getLogger(__name__)
 
@@ -198,25 +197,20 @@ def run_automation_tick(*, max_playbooks: int = 20) -> int:
     return ran
 
 
-def _loop() -> None:
-    _state.running = True
-    try:
-        while True:
-            _state.last_tick_at = datetime.now(UTC)
-            try:
-                run_automation_tick()
-            except Exception:
-                logger.exception("AI TM automation tick failed.")
-            time.sleep(1.0)
-    finally:
-        _state.running = False
+def _automation_tick() -> None:
+    _state.last_tick_at = datetime.now(UTC)
+    run_automation_tick()
 
 
 def schedule_ai_tm_automation() -> None:
     if _state.running:
         return
-    t = threading.Thread(target=_loop, name="ai-tm-automation", daemon=True)
-    t.start()
+    _state.running = register_task(
+        "ai_tm_automation",
+        _automation_tick,
+        interval_sec=1.0,
+        off_hours=True,
+    )
 
 
 def get_automation_state() -> AutomationState:
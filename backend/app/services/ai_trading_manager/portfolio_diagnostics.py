@@ -4,10 +4,8 @@ import math
 from datetime import UTC, datetime
 from typing import Any, Dict, List
 
-from sqlalchemy import desc, select
 from sqlalchemy.orm import Session
 
-from app.models import Candle
 from app.schemas.ai_trading_manager import (
     BrokerSnapshot,
     LedgerSnapshot,
@@ -15,6 +13,7 @@ from app.schemas.ai_trading_manager import (
     PortfolioDriftItem,
 )
 from app.services.ai_trading_manager.riskgate.policy_config import default_policy
+from app.services.market_data import load_recent_bars_many
 
 from .market_context import build_market_context_overlay
 
@@ -63,30 +62,20 @@ def _build_drift(
     return drift
 
 
-def _load_closes(
+def _load_closes_many(
     db: Session,
     *,
-    symbol: str,
-    exchange: str,
+    pairs: List[tuple[str, str]],
     timeframe: str,
     limit: int,
-) -> List[tuple[datetime, float]]:
-    rows = (
-        db.execute(
-            select(Candle.ts, Candle.close)
-            .where(
-                Candle.symbol == symbol,
-                Candle.exchange == exchange,
-                Candle.timeframe == timeframe,
-            )
-            .order_by(desc(Candle.ts))
-            .limit(limit)
-        )
-        .all()
-    )
+) -> Dict[tuple[str, str], List[tuple[datetime, float]]]:
     # Ascending by ts for return computation.
-    rows2 = [(ts, float(close)) for ts, close in rows]
-    return sorted(rows2, key=lambda x: x[0])
+    bars = load_recent_bars_many(db, pairs=pairs, timeframe=timeframe, limit=limit)
+    out: Dict[tuple[str, str], List[tuple[datetime, float]]] = {}
+    for pair in pairs:
+        cols = bars.get(pair)
+        out[pair] = list(zip(cols.datetimes(), cols.close, strict=True)) if cols else []
+    return out
 
 
 def _align_returns(
@@ -166,15 +155,16 @@ def _correlation_from_candles(
         return {"status": "skipped", "reason": "need_at_least_2_symbols"}
 
     limit = max(int(window_days), 2) + 1
-    series_by_symbol: Dict[str, List[tuple[datetime, float]]] = {}
-    for sym in symbols2:
-        series_by_symbol[sym] = _load_closes(
-            db,
-            symbol=sym,
-            exchange=str(exchange).upper(),
-            timeframe=str(timeframe),
-            limit=limit,
-        )
+    exch = str(exchange).upper()
+    series_by_pair = _load_closes_many(
+        db,
+        pairs=[(sym, exch) for sym in symbols2],
+        timeframe=str(timeframe),
+        limit=limit,
+    )
+    series_by_symbol: Dict[str, List[tuple[datetime, float]]] = {
+        sym: series_by_pair[(sym, exch)] for sym in symbols2
+    }
 
     aligned, returns, as_of_ts = _align_returns(series_by_symbol, min_observations=int(min_observations))
     if not aligned or not returns or as_of_ts is None:
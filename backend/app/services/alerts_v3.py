@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime, timedelta
-from threading import Event, Thread
+from threading import Lock
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from sqlalchemy import or_
@@ -25,6 +26,7 @@ from app.services.alerts_v3_expression import (
     BinaryNode,
     CallNode,
     ComparisonNode,
+    EvalMemo,
     EventNode,
     ExprNode,
     IdentNode,
@@ -37,14 +39,15 @@ from app.services.alerts_v3_expression import (
 )
 from app.services.indicator_alerts import IndicatorAlertError
 from app.services.price_ticks import round_price_to_tick
+from app.services.scheduler import register_task
 
 
 class AlertsV3Error(RuntimeError):
     """Raised when v3 alert evaluation cannot be completed."""
 
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
+_cycle_stats_lock = Lock()
+_last_cycle_stats: Dict[str, Any] = {}
 
 
 _HOLDINGS_SNAPSHOT_METRICS = {
@@ -223,6 +226,11 @@ def evaluate_alerts_v3_once() -> None:
         if not alerts:
             return
 
+        started = time.perf_counter()
+        memo = EvalMemo() if settings.alerts_v3_share_subexpressions else None
+        alerts_evaluated = 0
+        symbol_evaluations = 0
+
         # Cache custom indicators per user.
         custom_by_user: Dict[int, CustomIndicatorMap] = {}
         users_by_id: Dict[int, User] = {}
@@ -315,6 +323,7 @@ def evaluate_alerts_v3_once() -> None:
                 for symbol, exchange in _iter_alert_symbols(
                     db, settings, alert=alert, user=user
                 ):
+                    symbol_evaluations += 1
                     try:
                         holding = (
                             holdings_map.get(symbol.upper())
@@ -330,6 +339,7 @@ def evaluate_alerts_v3_once() -> None:
                             holding=holding,
                             params=params,
                             custom_indicators=custom,
+                            memo=memo,
                         )
                     except IndicatorAlertError:
                         continue
@@ -374,12 +384,40 @@ def evaluate_alerts_v3_once() -> None:
                 if any_triggered:
                     alert.last_triggered_at = now
                 db.add(alert)
+                alerts_evaluated += 1
             except Exception:
                 # Skip malformed rules without failing the whole batch.
                 continue
 
         db.commit()
 
+    stats: Dict[str, Any] = {
+        "finished_at": utc_now().isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000.0, 3),
+        "alerts_evaluated": alerts_evaluated,
+        "symbol_evaluations": symbol_evaluations,
+        "shared_subexpressions": memo is not None,
+    }
+    stats.update(
+        memo.stats()
+        if memo is not None
+        else {"entries": 0, "evaluations": 0, "deduplicated": 0, "hit_rate": 0.0}
+    )
+    with _cycle_stats_lock:
+        _last_cycle_stats.clear()
+        _last_cycle_stats.update(stats)
+
+
+def get_alerts_v3_cycle_stats() -> Dict[str, Any]:
+    """Return counters from the most recent alerts_v3 evaluation cycle.
+
+    `evaluations` counts indicator sub-expressions actually computed and
+    `deduplicated` those served from another alert's result in the same cycle.
+    """
+
+    with _cycle_stats_lock:
+        return dict(_last_cycle_stats)
+
 
 def _parse_action_params(alert: AlertDefinition) -> dict[str, Any]:
     raw = getattr(alert, "action_params_json", "") or "{}"
@@ -539,38 +577,21 @@ def _create_order_for_alert_match(
     return int(order.id)
 
 
-def _alerts_v3_loop() -> None:  # pragma: no cover - background loop
-    interval = timedelta(seconds=15)
-    next_run = utc_now() + timedelta(seconds=5)
-
-    while not _scheduler_stop_event.is_set():
-        now = utc_now()
-        sleep_for = (next_run - now).total_seconds()
-        if sleep_for > 0:
-            _scheduler_stop_event.wait(timeout=sleep_for)
-            if _scheduler_stop_event.is_set():
-                return
-
-        try:
-            evaluate_alerts_v3_once()
-        except Exception:
-            pass
-
-        next_run = utc_now() + interval
-
-
 def schedule_alerts_v3() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    _scheduler_started = True
-
-    thread = Thread(
-        target=_alerts_v3_loop,
-        name="alerts-v3",
-        daemon=True,
+    # Alerts can use daily candles or skip market-hours gating, so they keep
+    # running off-hours at the scheduler's slow cadence.
+    register_task(
+        "alerts_v3",
+        evaluate_alerts_v3_once,
+        interval_sec=15,
+        off_hours=True,
+        initial_delay_sec=5,
     )
-    thread.start()
 
 
-__all__ = ["AlertsV3Error", "evaluate_alerts_v3_once", "schedule_alerts_v3"]
+__all__ = [
+    "AlertsV3Error",
+    "evaluate_alerts_v3_once",
+    "get_alerts_v3_cycle_stats",
+    "schedule_alerts_v3",
+]
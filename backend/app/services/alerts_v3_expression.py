@@ -4,7 +4,8 @@ import json
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from math import exp, isfinite, log, sqrt
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -12,7 +13,33 @@ from app.core.config import Settings
 from app.core.market_hours import IST_OFFSET
 from app.models import Position
 from app.schemas.positions import HoldingRead
-from app.services.indicator_alerts import IndicatorAlertError, _load_candles_for_rule
+from app.services import indicator_kernels as kernels
+from app.services.candle_store import CandleSeries
+from app.services.indicator_alerts import (
+    IndicatorAlertError,
+    _candle_series_for_rule,
+    _load_candles_for_rule,
+)
+from app.services.indicator_kernels import BINARY_OPS
+from app.services.indicator_kernels import adx as _adx_series
+from app.services.indicator_kernels import atr as _atr_series
+from app.services.indicator_kernels import ema as _ema_series
+from app.services.indicator_kernels import macd as _macd_components_series
+from app.services.indicator_kernels import obv as _obv_series
+from app.services.indicator_kernels import pct_change as _ret_series
+from app.services.indicator_kernels import rsi as _rsi_series
+from app.services.indicator_kernels import sma as _sma_series
+from app.services.indicator_kernels import supertrend as _supertrend_series
+from app.services.indicator_state import (
+    AtrStepper,
+    BarStep,
+    EmaStepper,
+    RsiStepper,
+    SupertrendStepper,
+    get_indicator_state_store,
+    hlc_step,
+    source_step,
+)
 
 Timeframe = str  # e.g. "1m", "5m", "1h", "1d"
 
@@ -463,426 +490,17 @@ def _align_series(
 
 
 def _binop_series(a: Sequence[float], b: Sequence[float], op: str) -> list[float]:
-    aa, bb = _align_series(a, b)
-    out: list[float] = []
-    for x, y in zip(aa, bb, strict=False):
-        if not isfinite(x) or not isfinite(y):
-            out.append(_NAN)
-            continue
-        if op == "+":
-            out.append(x + y)
-        elif op == "-":
-            out.append(x - y)
-        elif op == "*":
-            out.append(x * y)
-        elif op == "/":
-            out.append(_NAN if y == 0 else x / y)
-        else:
-            out.append(_NAN)
-    return out
+    if op not in BINARY_OPS:
+        return [_NAN] * min(len(a), len(b))
+    return kernels.binary(a, b, op)
 
 
 def _unary_series(values: Sequence[float], op: str) -> list[float]:
-    if op == "-":
-        return [(-v if isfinite(v) else _NAN) for v in values]
-    return [(_NAN if not isfinite(v) else v) for v in values]
-
-
-def _sma_series(values: Sequence[float], length: int) -> list[float]:
-    n = len(values)
-    if length <= 0:
-        return [_NAN] * n
-    out = [_NAN] * n
-    for i in range(n):
-        if i + 1 < length:
-            continue
-        window = values[i - length + 1 : i + 1]
-        if any(not isfinite(v) for v in window):
-            continue
-        out[i] = sum(window) / length
-    return out
-
-
-def _ema_series(values: Sequence[float], length: int) -> list[float]:
-    n = len(values)
-    if length <= 0:
-        return [_NAN] * n
-    out = [_NAN] * n
-    k = 2.0 / (length + 1.0)
-
-    # Seed on the first window of `length` consecutive finite values so EMA can
-    # be composed over series-producing functions (which often have leading NaNs).
-    start: Optional[int] = None
-    for i in range(length - 1, n):
-        window = values[i - length + 1 : i + 1]
-        if any(not isfinite(v) for v in window):
-            continue
-        start = i
-        break
-    if start is None:
-        return out
-
-    ema = sum(values[start - length + 1 : start + 1]) / length
-    out[start] = ema
-    for i in range(start + 1, n):
-        v = values[i]
-        if not isfinite(v) or not isfinite(ema):
-            ema = _NAN
-        else:
-            ema = v * k + ema * (1 - k)
-        out[i] = ema
-    return out
-
-
-def _rma_series(values: Sequence[float], length: int) -> list[float]:
-    """Wilder's RMA (a.k.a. smoothed moving average).
-
-    Semantics (per docs/v3_dsl_semantics_spec.md):
-    - Requires `length` periods; first `length-1` bars are missing (NaN).
-    - Seed at the first index where a full finite window exists.
-    - Subsequent: rma = (prev_rma*(length-1) + value) / length
-    """
-
-    n = len(values)
-    out = [_NAN] * n
-    if length <= 0 or n < length:
-        return out
-
-    start: Optional[int] = None
-    for i in range(length - 1, n):
-        window = values[i - length + 1 : i + 1]
-        if any(not isfinite(v) for v in window):
-            continue
-        start = i
-        break
-    if start is None:
-        return out
-
-    rma = sum(values[start - length + 1 : start + 1]) / length
-    out[start] = rma
-    for i in range(start + 1, n):
-        v = values[i]
-        if not isfinite(v) or not isfinite(rma):
-            rma = _NAN
-        else:
-            rma = (rma * (length - 1) + v) / length
-        out[i] = rma
-    return out
-
-
-def _rsi_series(values: Sequence[float], length: int) -> list[float]:
-    n = len(values)
-    out = [_NAN] * n
-    if length <= 0 or n < length:
-        return out
-
-    gains = [_NAN] * n
-    losses = [_NAN] * n
-    gains[0] = 0.0
-    losses[0] = 0.0
-    for i in range(1, n):
-        prev = values[i - 1]
-        curr = values[i]
-        if not isfinite(prev) or not isfinite(curr):
-            continue
-        delta = curr - prev
-        if delta >= 0:
-            gains[i] = delta
-            losses[i] = 0.0
-        else:
-            gains[i] = 0.0
-            losses[i] = -delta
-
-    avg_g = _rma_series(gains, length)
-    avg_l = _rma_series(losses, length)
-    for i in range(n):
-        g = avg_g[i]
-        loss = avg_l[i]
-        if not isfinite(g) or not isfinite(loss):
-            continue
-        if loss == 0:
-            out[i] = 100.0
-            continue
-        rs = g / loss
-        out[i] = 100.0 - 100.0 / (1.0 + rs)
-    return out
+    return kernels.unary(values, "-" if op == "-" else "+")
 
 
 def _stddev_series(values: Sequence[float], length: int) -> list[float]:
-    n = len(values)
-    out = [_NAN] * n
-    if length <= 1:
-        return out
-    for i in range(n):
-        if i + 1 < length:
-            continue
-        window = values[i - length + 1 : i + 1]
-        if any(not isfinite(v) for v in window):
-            continue
-        mean = sum(window) / length
-        var = sum((v - mean) ** 2 for v in window) / max(length - 1, 1)
-        out[i] = sqrt(var)
-    return out
-
-
-def _ret_series(values: Sequence[float]) -> list[float]:
-    n = len(values)
-    out = [_NAN] * n
-    for i in range(1, n):
-        a = values[i - 1]
-        b = values[i]
-        if not isfinite(a) or not isfinite(b) or a == 0:
-            continue
-        out[i] = (b - a) / a * 100.0
-    return out
-
-
-def _atr_series(
-    highs: Sequence[float], lows: Sequence[float], closes: Sequence[float], length: int
-) -> list[float]:
-    n = min(len(highs), len(lows), len(closes))
-    if length <= 0 or n < length:
-        return [_NAN] * n
-
-    trs: list[float] = [_NAN] * n
-    # For i=0 we don't have prev_close. Define prev_close = close so TR reduces to (high-low).
-    if n >= 1:
-        h0 = highs[0]
-        l0 = lows[0]
-        c0 = closes[0]
-        if all(isfinite(v) for v in (h0, l0, c0)):
-            trs[0] = max(h0 - l0, abs(h0 - c0), abs(l0 - c0))
-
-    for i in range(1, n):
-        h = highs[i]
-        low = lows[i]
-        pc = closes[i - 1]
-        if any(not isfinite(v) for v in (h, low, pc)):
-            continue
-        trs[i] = max(h - low, abs(h - pc), abs(low - pc))
-
-    return _rma_series(trs, length)
-
-
-def _adx_series(
-    highs: Sequence[float],
-    lows: Sequence[float],
-    closes: Sequence[float],
-    length: int,
-) -> list[float]:
-    """Average Directional Index (ADX), Wilder smoothing.
-
-    Returns a series aligned to input bars, with leading NaNs until enough data
-    is available (first ADX typically appears at index 2*length).
-    """
-
-    n = min(len(highs), len(lows), len(closes))
-    out = [_NAN] * n
-    if length <= 0 or n < (2 * length + 1):
-        return out
-
-    tr: list[float] = [_NAN] * n
-    plus_dm: list[float] = [_NAN] * n
-    minus_dm: list[float] = [_NAN] * n
-    for i in range(1, n):
-        h = highs[i]
-        low = lows[i]
-        pc = closes[i - 1]
-        ph = highs[i - 1]
-        pl = lows[i - 1]
-        if any(not isfinite(v) for v in (h, low, pc, ph, pl)):
-            continue
-        tr[i] = max(h - low, abs(h - pc), abs(low - pc))
-        up_move = h - ph
-        down_move = pl - low
-        plus_dm[i] = up_move if (up_move > down_move and up_move > 0) else 0.0
-        minus_dm[i] = down_move if (down_move > up_move and down_move > 0) else 0.0
-
-    sm_tr: list[float] = [_NAN] * n
-    sm_pdm: list[float] = [_NAN] * n
-    sm_mdm: list[float] = [_NAN] * n
-
-    init_end = length
-    init_tr = tr[1 : init_end + 1]
-    init_pdm = plus_dm[1 : init_end + 1]
-    init_mdm = minus_dm[1 : init_end + 1]
-    if any(not isfinite(v) for v in (*init_tr, *init_pdm, *init_mdm)):
-        return out
-
-    sm_tr[init_end] = sum(init_tr)
-    sm_pdm[init_end] = sum(init_pdm)
-    sm_mdm[init_end] = sum(init_mdm)
-
-    for i in range(init_end + 1, n):
-        if any(not isfinite(v) for v in (sm_tr[i - 1], sm_pdm[i - 1], sm_mdm[i - 1])):
-            continue
-        if any(not isfinite(v) for v in (tr[i], plus_dm[i], minus_dm[i])):
-            continue
-        sm_tr[i] = sm_tr[i - 1] - (sm_tr[i - 1] / length) + tr[i]
-        sm_pdm[i] = sm_pdm[i - 1] - (sm_pdm[i - 1] / length) + plus_dm[i]
-        sm_mdm[i] = sm_mdm[i - 1] - (sm_mdm[i - 1] / length) + minus_dm[i]
-
-    dx: list[float] = [_NAN] * n
-    for i in range(init_end, n):
-        st = sm_tr[i]
-        if not isfinite(st) or st == 0:
-            continue
-        pdi = 100.0 * (sm_pdm[i] / st) if isfinite(sm_pdm[i]) else _NAN
-        mdi = 100.0 * (sm_mdm[i] / st) if isfinite(sm_mdm[i]) else _NAN
-        if not isfinite(pdi) or not isfinite(mdi) or (pdi + mdi) == 0:
-            continue
-        dx[i] = 100.0 * abs(pdi - mdi) / (pdi + mdi)
-
-    first_adx_idx = 2 * length
-    seed_dx = dx[length : first_adx_idx]
-    if len(seed_dx) != length or any(not isfinite(v) for v in seed_dx):
-        return out
-
-    adx = sum(seed_dx) / length
-    out[first_adx_idx] = adx
-    for i in range(first_adx_idx + 1, n):
-        if not isfinite(adx) or not isfinite(dx[i]):
-            adx = _NAN
-        else:
-            adx = ((adx * (length - 1)) + dx[i]) / length
-        out[i] = adx
-
-    return out
-
-
-def _macd_components_series(
-    values: Sequence[float],
-    fast: int,
-    slow: int,
-    signal: int,
-) -> tuple[list[float], list[float], list[float]]:
-    n = len(values)
-    macd = [_NAN] * n
-    sig = [_NAN] * n
-    hist = [_NAN] * n
-    if fast <= 0 or slow <= 0 or signal <= 0 or n == 0:
-        return macd, sig, hist
-
-    ema_fast = _ema_series(values, fast)
-    ema_slow = _ema_series(values, slow)
-    for i in range(n):
-        a = ema_fast[i]
-        b = ema_slow[i]
-        macd[i] = (a - b) if (isfinite(a) and isfinite(b)) else _NAN
-
-    sig = _ema_series(macd, signal)
-    for i in range(n):
-        m = macd[i]
-        s = sig[i]
-        hist[i] = (m - s) if (isfinite(m) and isfinite(s)) else _NAN
-    return macd, sig, hist
-
-
-def _supertrend_series(
-    *,
-    highs: Sequence[float],
-    lows: Sequence[float],
-    closes: Sequence[float],
-    source: Sequence[float],
-    length: int,
-    multiplier: float,
-) -> tuple[list[float], list[float]]:
-    """Compute Supertrend line + direction series.
-
-    Contract: docs/v3_dsl_semantics_spec.md (stateful, no lookahead, warmup).
-
-    Implementation notes:
-    - Uses ATR(length) with Wilder RMA smoothing.
-    - Default source is expected to be hl2 (handled by the caller).
-    - Produces NaN (missing) for the first `length-1` bars.
-    - Direction: +1 for uptrend, -1 for downtrend.
-    """
-
-    n = min(len(highs), len(lows), len(closes), len(source))
-    line = [_NAN] * n
-    direction = [_NAN] * n
-    if length <= 0 or n < length:
-        return line, direction
-
-    atr = _atr_series(highs[:n], lows[:n], closes[:n], length)
-    final_upper = [_NAN] * n
-    final_lower = [_NAN] * n
-
-    for i in range(n):
-        a = atr[i]
-        src = source[i]
-        c = closes[i]
-        if not (isfinite(a) and isfinite(src) and isfinite(c)):
-            continue
-
-        basic_upper = src + multiplier * a
-        basic_lower = src - multiplier * a
-
-        if i == 0:
-            final_upper[i] = basic_upper
-            final_lower[i] = basic_lower
-            continue
-
-        prev_c = closes[i - 1]
-        fu_prev = final_upper[i - 1]
-        fl_prev = final_lower[i - 1]
-
-        if isfinite(fu_prev) and isfinite(prev_c):
-            final_upper[i] = (
-                basic_upper
-                if (basic_upper < fu_prev or prev_c > fu_prev)
-                else fu_prev
-            )
-        else:
-            final_upper[i] = basic_upper
-
-        if isfinite(fl_prev) and isfinite(prev_c):
-            final_lower[i] = (
-                basic_lower
-                if (basic_lower > fl_prev or prev_c < fl_prev)
-                else fl_prev
-            )
-        else:
-            final_lower[i] = basic_lower
-
-        if i < length - 1:
-            continue
-
-        if i == length - 1 or not isfinite(direction[i - 1]):
-            # Deterministic initialization: start in uptrend at the first valid bar.
-            direction[i] = 1.0
-        else:
-            prev_dir = direction[i - 1]
-            if prev_dir > 0:
-                direction[i] = -1.0 if c < final_lower[i] else 1.0
-            else:
-                direction[i] = 1.0 if c > final_upper[i] else -1.0
-
-        line[i] = final_lower[i] if direction[i] > 0 else final_upper[i]
-
-    return line, direction
-
-
-def _obv_series(closes: Sequence[float], volumes: Sequence[float]) -> list[float]:
-    n = min(len(closes), len(volumes))
-    out = [_NAN] * n
-    if n == 0:
-        return out
-    obv = 0.0
-    out[0] = obv
-    for i in range(1, n):
-        c0 = closes[i - 1]
-        c1 = closes[i]
-        v = volumes[i]
-        if any(not isfinite(x) for x in (c0, c1, v)):
-            out[i] = _NAN
-            continue
-        if c1 > c0:
-            obv += v
-        elif c1 < c0:
-            obv -= v
-        out[i] = obv
-    return out
+    return kernels.rolling_std(values, length)
 
 
 def _vwap_series(
@@ -1108,49 +726,54 @@ class CandleCache:
         exchange: str,
         *,
         allow_fetch: bool = True,
+        memo: "EvalMemo | None" = None,
     ) -> None:
         self.db = db
         self.settings = settings
         self.symbol = symbol
         self.exchange = exchange
         self.allow_fetch = allow_fetch
-        self._candles: Dict[str, list[dict[str, Any]]] = {}
+        self.memo = memo
+        self._series: Dict[str, CandleSeries] = {}
 
-    def candles(self, tf: str) -> list[dict[str, Any]]:
+    def _candle_series(self, tf: str) -> CandleSeries:
         tf = tf.lower()
-        if tf not in self._candles:
-            if tf.endswith("w"):
-                # Market data service does not currently persist weekly candles.
-                # Resample from daily candles in-memory.
-                days = (
-                    _load_candles_for_rule(
-                        self.db,
-                        self.settings,
-                        self.symbol,
-                        self.exchange,
-                        "1d",
-                        allow_fetch=self.allow_fetch,
-                    )
-                    or []
-                )
-                self._candles[tf] = (
-                    _resample_weekly(days, weeks=int(tf[:-1] or "1")) if days else []
-                )
-            else:
-                candles = _load_candles_for_rule(
-                    self.db,
-                    self.settings,
-                    self.symbol,
-                    self.exchange,
-                    tf,  # type: ignore[arg-type]
-                    allow_fetch=self.allow_fetch,
-                )
-                self._candles[tf] = candles or []
-        return self._candles[tf]
+        cached = self._series.get(tf)
+        if cached is not None:
+            return cached
+        if tf.endswith("w"):
+            # Market data service does not currently persist weekly candles.
+            # Resample from daily candles in-memory (memoized on the shared
+            # daily snapshot so other alerts reuse it).
+            weeks = int(tf[:-1] or "1")
+            days = _candle_series_for_rule(
+                self.db,
+                self.settings,
+                self.symbol,
+                self.exchange,
+                "1d",
+                allow_fetch=self.allow_fetch,
+            )
+            cached = days.derive(
+                tf, lambda candles: _resample_weekly(candles, weeks=weeks)
+            )
+        else:
+            cached = _candle_series_for_rule(
+                self.db,
+                self.settings,
+                self.symbol,
+                self.exchange,
+                tf,  # type: ignore[arg-type]
+                allow_fetch=self.allow_fetch,
+            )
+        self._series[tf] = cached
+        return cached
+
+    def candles(self, tf: str) -> list[dict[str, Any]]:
+        return self._candle_series(tf).candles
 
     def series(self, tf: str, source: str) -> Tuple[list[float], Optional[datetime]]:
         source = source.lower()
-        candles = self.candles(tf)
         key = {
             "open": "open",
             "high": "high",
@@ -1160,9 +783,142 @@ class CandleCache:
         }.get(source)
         if key is None:
             raise IndicatorAlertError(f"Unsupported source '{source}'")
-        values = [float(c[key]) for c in candles] if candles else []
-        bar_time = candles[-1]["ts"] if candles else None
-        return values, bar_time
+        candle_series = self._candle_series(tf)
+        return candle_series.column(key), candle_series.bar_time
+
+
+class EvalMemo:
+    """Sub-expression results shared by every alert evaluated in one cycle.
+
+    Alerts (and the custom indicators they call) frequently repeat the same
+    indicator calls, e.g. `RSI(CLOSE("1d"), 14, "1d")`, on the same symbols.
+    Values are keyed by (exchange, symbol, node-key), where the node key is
+    the canonical AST dump (like `dumps_ast`) with alert parameters and
+    custom-indicator bodies expanded inline. Subtrees that read holding
+    metrics or non-literal parameters are never shared.
+
+    A memo is only valid for a single cycle: the candles behind it are not
+    re-read once a value is stored.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Tuple[Any, ...]) -> Any:
+        with self._lock:
+            value = self._values.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return value
+
+    def put(self, key: Tuple[Any, ...], value: Any) -> None:
+        with self._lock:
+            self._values[key] = value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._values),
+                "evaluations": self._misses,
+                "deduplicated": self._hits,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+class _Unshareable(Exception):
+    pass
+
+
+def _canonical(
+    node: ExprNode,
+    *,
+    env: Dict[str, Any],
+    custom_indicators: Dict[str, Tuple[List[str], ExprNode]],
+) -> Any:
+    if isinstance(node, NumberNode):
+        return node.to_dict()
+    if isinstance(node, IdentNode):
+        name = node.name.upper()
+        if name in env:
+            bound = env[name]
+            if bound is None:
+                raise _Unshareable
+            return {"type": "BOUND", "name": name, "value": bound}
+        if name in _ALLOWED_METRICS:
+            raise _Unshareable
+        return node.to_dict()
+    if isinstance(node, UnaryNode):
+        return {
+            "type": node.node_type,
+            "op": node.op,
+            "child": _canonical(
+                node.child, env=env, custom_indicators=custom_indicators
+            ),
+        }
+    if isinstance(node, BinaryNode):
+        return {
+            "type": node.node_type,
+            "op": node.op,
+            "left": _canonical(node.left, env=env, custom_indicators=custom_indicators),
+            "right": _canonical(
+                node.right, env=env, custom_indicators=custom_indicators
+            ),
+        }
+    if isinstance(node, CallNode):
+        args = [
+            _canonical(a, env=env, custom_indicators=custom_indicators)
+            for a in node.args
+        ]
+        name = node.name.upper()
+        if name in _ALLOWED_BUILTINS:
+            return {"type": node.node_type, "name": name, "args": args}
+        spec = custom_indicators.get(name)
+        if spec is None or len(spec[0]) != len(args):
+            raise _Unshareable
+        param_names, body = spec
+        # A custom body only sees its own arguments (see `_eval_numeric`), and
+        # two users may define different bodies under the same name.
+        inner = {p.upper(): a for p, a in zip(param_names, args, strict=False)}
+        return {
+            "type": "CUSTOM",
+            "name": name,
+            "body": _canonical(body, env=inner, custom_indicators=custom_indicators),
+        }
+    raise _Unshareable
+
+
+def _memo_key(
+    node: ExprNode,
+    *,
+    cache: CandleCache,
+    params: Dict[str, Any],
+    custom_indicators: Dict[str, Tuple[List[str], ExprNode]],
+    scope: Tuple[Any, ...],
+) -> Optional[Tuple[Any, ...]]:
+    """Return the cycle memo key for a shareable call node (None = not shared)."""
+
+    if cache.memo is None or not isinstance(node, CallNode):
+        return None
+    env = {
+        k: (v if isinstance(v, (bool, int, float, str)) else None)
+        for k, v in params.items()
+    }
+    try:
+        canonical = _canonical(node, env=env, custom_indicators=custom_indicators)
+    except _Unshareable:
+        return None
+    return (
+        cache.exchange.upper(),
+        cache.symbol.upper(),
+        *scope,
+        json.dumps(canonical, default=str),
+    )
 
 
 # -----------------------------------------------------------------------------
@@ -1247,6 +1003,31 @@ def _eval_series(
     cache: CandleCache,
     tf_hint: str,
     params: Dict[str, Any],
+) -> Tuple[list[float], Optional[datetime]]:
+    key = _memo_key(
+        node,
+        cache=cache,
+        params=params,
+        custom_indicators={},
+        scope=("series", (tf_hint or "1d").strip().lower()),
+    )
+    memo = cache.memo if key is not None else None
+    if memo is None:
+        return _eval_series_node(node, cache=cache, tf_hint=tf_hint, params=params)
+    hit = memo.get(key)
+    if hit is not None:
+        return hit
+    result = _eval_series_node(node, cache=cache, tf_hint=tf_hint, params=params)
+    memo.put(key, result)
+    return result
+
+
+def _eval_series_node(
+    node: ExprNode,
+    *,
+    cache: CandleCache,
+    tf_hint: str,
+    params: Dict[str, Any],
 ) -> Tuple[list[float], Optional[datetime]]:
     """Evaluate a series-producing expression into a numeric series.
 
@@ -1370,35 +1151,11 @@ def _eval_series(
             # For rolling aggregations in series context, treat them as
             # SMA-like windows.
             if fn == "MAX":
-                out = [_NAN] * len(src)
-                for i in range(len(src)):
-                    if i + 1 < length:
-                        continue
-                    window = src[i - length + 1 : i + 1]
-                    if any(not isfinite(v) for v in window):
-                        continue
-                    out[i] = max(window)
-                return out, bar_time
+                return kernels.rolling_max(src, length), bar_time
             if fn == "MIN":
-                out = [_NAN] * len(src)
-                for i in range(len(src)):
-                    if i + 1 < length:
-                        continue
-                    window = src[i - length + 1 : i + 1]
-                    if any(not isfinite(v) for v in window):
-                        continue
-                    out[i] = min(window)
-                return out, bar_time
+                return kernels.rolling_min(src, length), bar_time
             if fn == "SUM":
-                out = [_NAN] * len(src)
-                for i in range(len(src)):
-                    if i + 1 < length:
-                        continue
-                    window = src[i - length + 1 : i + 1]
-                    if any(not isfinite(v) for v in window):
-                        continue
-                    out[i] = sum(window)
-                return out, bar_time
+                return kernels.rolling_sum(src, length), bar_time
             if fn == "AVG":
                 return _sma_series(src, length), bar_time
 
@@ -1551,6 +1308,50 @@ def _eval_series(
     raise IndicatorAlertError("Unsupported series expression")
 
 
+_STREAM_SOURCES = {"open", "high", "low", "close", "volume"}
+
+
+def _stream_source(node: ExprNode, *, tf: str, params: Dict[str, Any]) -> Optional[str]:
+    """Return the raw OHLCV column a streamed indicator reads, if it is one."""
+
+    if isinstance(node, IdentNode):
+        key = node.name.strip().lower()
+        return key if key in _STREAM_SOURCES else None
+    if (
+        isinstance(node, CallNode)
+        and node.name.lower() in _STREAM_SOURCES
+        and len(node.args) == 1
+    ):
+        try:
+            arg_tf = _coerce_tf(node.args[0], params=params).lower()
+        except IndicatorAlertError:
+            return None
+        return node.name.lower() if arg_tf == tf else None
+    return None
+
+
+def _streamed(
+    cache: CandleCache,
+    *,
+    tf: str,
+    indicator: Tuple[Any, ...],
+    factory: Callable[[], Any],
+    step: BarStep,
+) -> Optional[Tuple[Any, Any, Optional[datetime]]]:
+    """Evaluate now/prev from persisted streaming state (None = not eligible)."""
+
+    if not isinstance(cache, CandleCache) or not getattr(
+        cache.settings, "alerts_v3_incremental_indicators", False
+    ):
+        return None
+    series = cache._candle_series(tf)
+    key = (cache.exchange.upper(), cache.symbol.upper(), tf.lower(), *indicator)
+    now, prev = get_indicator_state_store().evaluate(
+        key, series, factory=factory, step=step
+    )
+    return now, prev, series.bar_time
+
+
 def _eval_numeric(
     node: ExprNode,
     *,
@@ -1561,6 +1362,44 @@ def _eval_numeric(
     params: Dict[str, Any],
     custom_indicators: Dict[str, Tuple[List[str], ExprNode]],
     allow_fetch: bool,
+) -> SeriesValue:
+    key = _memo_key(
+        node,
+        cache=cache,
+        params=params,
+        custom_indicators=custom_indicators,
+        scope=("numeric",),
+    )
+    memo = cache.memo if key is not None else None
+    if memo is not None:
+        hit = memo.get(key)
+        if hit is not None:
+            return SeriesValue(hit.now, hit.prev, hit.bar_time)
+    v = _eval_numeric_node(
+        node,
+        db=db,
+        settings=settings,
+        cache=cache,
+        holding=holding,
+        params=params,
+        custom_indicators=custom_indicators,
+        allow_fetch=allow_fetch,
+    )
+    if memo is not None:
+        memo.put(key, SeriesValue(v.now, v.prev, v.bar_time))
+    return v
+
+
+def _eval_numeric_node(
+    node: ExprNode,
+    *,
+    db: Session,
+    settings: Settings,
+    cache: CandleCache,
+    holding: HoldingRead | None,
+    params: Dict[str, Any],
+    custom_indicators: Dict[str, Tuple[List[str], ExprNode]],
+    allow_fetch: bool,
 ) -> SeriesValue:
     if isinstance(node, NumberNode):
         return SeriesValue(node.value, node.value, None)
@@ -1731,6 +1570,36 @@ def _eval_numeric(
             return SeriesValue(_as_optional(now), _as_optional(prev), bar_time)
 
         if name in {"SUPERTREND_LINE", "SUPERTREND_DIR"}:
+            # Default (hl2) source with constant length/multiplier can stream.
+            args = node.args
+            if (
+                len(args) in {2, 3}
+                and isinstance(args[0], NumberNode)
+                and isinstance(args[1], NumberNode)
+                and int(args[0].value) > 0
+            ):
+                st_len = int(args[0].value)
+                st_mult = float(args[1].value)
+                st_tf = (
+                    _coerce_tf(args[2], params=params).lower()
+                    if len(args) == 3
+                    else "1d"
+                )
+                streamed = _streamed(
+                    cache,
+                    tf=st_tf,
+                    indicator=("SUPERTREND", st_len, st_mult),
+                    factory=lambda: SupertrendStepper(st_len, st_mult),
+                    step=hlc_step,
+                )
+                if streamed is not None:
+                    now_pair, prev_pair, bar_time = streamed
+                    pos = 0 if name == "SUPERTREND_LINE" else 1
+                    return SeriesValue(
+                        _as_optional(now_pair[pos]) if now_pair else None,
+                        _as_optional(prev_pair[pos]) if prev_pair else None,
+                        bar_time,
+                    )
             series, bar_time = _eval_series(
                 node, cache=cache, tf_hint="1d", params=params
             )
@@ -1759,6 +1628,23 @@ def _eval_numeric(
                 if len(node.args) == 3
                 else "1d"
             )
+            source = (
+                _stream_source(node.args[0], tf=tf, params=params)
+                if name in {"EMA", "RSI"} and length > 0
+                else None
+            )
+            if source is not None:
+                stepper_cls = EmaStepper if name == "EMA" else RsiStepper
+                streamed = _streamed(
+                    cache,
+                    tf=tf,
+                    indicator=(name, source, length),
+                    factory=lambda: stepper_cls(length),
+                    step=source_step(source),
+                )
+                if streamed is not None:
+                    now, prev, bar_time = streamed
+                    return SeriesValue(_as_optional(now), _as_optional(prev), bar_time)
             series, bar_time = _eval_series(
                 node.args[0], cache=cache, tf_hint=tf, params=params
             )
@@ -1885,6 +1771,17 @@ def _eval_numeric(
             )
             length = int(length_val.now) if length_val.now is not None else 0
             tf = _coerce_tf(node.args[1], params=params).lower()
+            if length > 0:
+                streamed = _streamed(
+                    cache,
+                    tf=tf,
+                    indicator=("ATR", length),
+                    factory=lambda: AtrStepper(length),
+                    step=hlc_step,
+                )
+                if streamed is not None:
+                    now, prev, bar_time = streamed
+                    return SeriesValue(_as_optional(now), _as_optional(prev), bar_time)
             highs, bar_time = cache.series(tf, "high")
             lows, _ = cache.series(tf, "low")
             closes, _ = cache.series(tf, "close")
@@ -2045,13 +1942,19 @@ def eval_condition(
     params: Optional[Dict[str, Any]] = None,
     custom_indicators: Dict[str, Tuple[List[str], ExprNode]],
     allow_fetch: bool = True,
+    memo: EvalMemo | None = None,
 ) -> Tuple[bool, Dict[str, float], Optional[datetime]]:
     """Evaluate a compiled v3 alert condition for a symbol.
 
+    Pass the same `memo` for every alert of an evaluation cycle to share
+    common sub-expressions between them.
+
     Returns: (matched, snapshot, bar_time)
     """
 
-    cache = CandleCache(db, settings, symbol, exchange, allow_fetch=allow_fetch)
+    cache = CandleCache(
+        db, settings, symbol, exchange, allow_fetch=allow_fetch, memo=memo
+    )
     snapshot: Dict[str, float] = {}
     p = {str(k).strip().upper(): v for k, v in (params or {}).items() if str(k).strip()}
 
@@ -2186,6 +2089,7 @@ __all__ = [
     "EventNode",
     "LogicalNode",
     "NotNode",
+    "EvalMemo",
     "dumps_ast",
     "loads_ast",
     "eval_condition",
@@ -7,6 +7,7 @@ from typing import Iterable, List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
 
 from app.models import AnalyticsTrade, Order
+from app.services.risk_pnl_state import apply_new_trades, maintained_trade_writes
 
 
 @dataclass
@@ -102,24 +103,30 @@ def rebuild_trades(db: Session, strategy_id: Optional[int] = None) -> int:
         .all()
     )
 
-    created = 0
-    for pair in _iter_order_pairs(orders):
-        trade = AnalyticsTrade(
-            entry_order_id=pair.entry_order_id,
-            exit_order_id=pair.exit_order_id,
-            strategy_id=pair.strategy_id,
-            pnl=pair.pnl,
-            r_multiple=None,
-            opened_at=pair.opened_at,
-            closed_at=pair.closed_at,
-        )
-        db.add(trade)
-        created += 1
-
-    if created:
+    new_trades: List[AnalyticsTrade] = []
+    # New trades are applied to the persisted risk P&L state directly instead
+    # of invalidating it (see services/risk_pnl_state.py).
+    with maintained_trade_writes(db):
+        for pair in _iter_order_pairs(orders):
+            trade = AnalyticsTrade(
+                entry_order_id=pair.entry_order_id,
+                exit_order_id=pair.exit_order_id,
+                strategy_id=pair.strategy_id,
+                pnl=pair.pnl,
+                r_multiple=None,
+                opened_at=pair.opened_at,
+                closed_at=pair.closed_at,
+            )
+            db.add(trade)
+            new_trades.append(trade)
+        if new_trades:
+            db.flush()
+            apply_new_trades(db, new_trades)
+
+    if new_trades:
         db.commit()
 
-    return created
+    return len(new_trades)
 
 
 @dataclass
@@ -0,0 +1,472 @@
+"""Backtest job queue: runs execute off the request thread on a worker pool.
+
+`POST /api/backtests/runs` validates the request, stores a QUEUED
+`BacktestRun` and hands its id to the queue. A worker then moves the row
+through RUNNING to COMPLETED/FAILED, persisting percentage progress while it
+runs. Status transitions are conditional UPDATEs, so a run cancelled (or
+deleted) from the API is never overwritten by its worker:
+
+- cancelling a QUEUED run drops it before a worker picks it up;
+- cancelling a RUNNING run is noticed at the worker's next progress write,
+  which aborts the backtest.
+
+With `backtest_executor="process"` workers are separate processes (spawned,
+not forked) so CPU-bound runs use multiple cores; each opens its own DB
+session from the shared settings. "thread" keeps everything in-process.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import UTC, datetime
+from threading import Lock
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+from app.db.session import SessionLocal
+from app.models import BacktestRun
+from app.pydantic_compat import PYDANTIC_V2
+from app.schemas.backtests import BacktestUniverse
+from app.schemas.backtests_execution import ExecutionBacktestConfigIn
+from app.schemas.backtests_portfolio import PortfolioBacktestConfigIn
+from app.schemas.backtests_portfolio_strategy import PortfolioStrategyBacktestConfigIn
+from app.schemas.backtests_signal import SignalBacktestConfigIn
+from app.schemas.backtests_sweep import SweepBacktestConfigIn
+from app.services.backtests_data import ProgressCallback, _norm_symbol_ref
+from app.services.backtests_execution import run_execution_backtest
+from app.services.backtests_portfolio import run_portfolio_backtest
+from app.services.backtests_portfolio_strategy import run_portfolio_strategy_backtest
+from app.services.backtests_signal import SignalBacktestConfig, run_signal_backtest
+from app.services.backtests_strategy import run_strategy_backtest
+from app.services.backtests_sweep import run_sweep_backtest
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("QUEUED", "RUNNING")
+
+# Progress is written at most this often (plus once at 100%).
+_PROGRESS_INTERVAL_SEC = 1.0
+
+# First key of the (namespace, owner_id) advisory locks that serialize
+# submits per owner on PostgreSQL.
+_CAPACITY_LOCK_NAMESPACE = 0xB7C4
+
+
+class BacktestCancelled(Exception):
+    """Raised from the progress callback once a run is no longer RUNNING."""
+
+
+def _parse(model: Any, data: dict[str, Any]) -> Any:
+    return model.model_validate(data) if PYDANTIC_V2 else model.parse_obj(data)
+
+
+def run_backtest(
+    db: Session,
+    settings: Settings,
+    *,
+    kind: str,
+    universe: dict[str, Any],
+    config: dict[str, Any],
+    on_progress: ProgressCallback | None = None,
+    allow_fetch: bool = True,
+) -> dict[str, Any] | None:
+    """Execute one backtest from a stored run config (`config_json`)."""
+
+    uni = _parse(BacktestUniverse, universe or {})
+    if kind == "SIGNAL":
+        cfg_in = _parse(SignalBacktestConfigIn, config)
+        sym_refs = [_norm_symbol_ref(s.exchange, s.symbol) for s in uni.symbols]
+        cfg = SignalBacktestConfig(
+            mode=cfg_in.mode,
+            start_date=cfg_in.start_date,
+            end_date=cfg_in.end_date,
+            forward_windows=cfg_in.forward_windows,
+            dsl=cfg_in.dsl,
+            ranking_metric=cfg_in.ranking_metric,
+            ranking_window=cfg_in.ranking_window,
+            top_n=cfg_in.top_n,
+            cadence=cfg_in.cadence,
+        )
+        return run_signal_backtest(
+            db,
+            settings,
+            symbols=sym_refs,
+            config=cfg,
+            allow_fetch=allow_fetch,
+            on_progress=on_progress,
+        )
+    if kind == "PORTFOLIO":
+        if uni.group_id is None:
+            raise ValueError("PORTFOLIO backtests require universe.group_id.")
+        return run_portfolio_backtest(
+            db,
+            settings,
+            group_id=int(uni.group_id),
+            config=_parse(PortfolioBacktestConfigIn, config),
+            allow_fetch=allow_fetch,
+            on_progress=on_progress,
+        )
+    if kind == "EXECUTION":
+        exec_cfg = _parse(ExecutionBacktestConfigIn, config)
+        base_run = db.get(BacktestRun, int(exec_cfg.base_run_id))
+        if base_run is None:
+            raise ValueError("base_run_id not found.")
+        return run_execution_backtest(
+            db,
+            settings,
+            base_run=base_run,
+            config=exec_cfg,
+            allow_fetch=allow_fetch,
+            on_progress=on_progress,
+        )
+    if kind == "STRATEGY":
+        sym = uni.symbols[0]
+        return run_strategy_backtest(
+            db,
+            settings,
+            symbol=_norm_symbol_ref(sym.exchange, sym.symbol),
+            config=config,
+            allow_fetch=allow_fetch,
+            on_progress=on_progress,
+        )
+    if kind == "PORTFOLIO_STRATEGY":
+        return run_portfolio_strategy_backtest(
+            db,
+            settings,
+            symbols=[_norm_symbol_ref(s.exchange, s.symbol) for s in uni.symbols],
+            config=_parse(PortfolioStrategyBacktestConfigIn, config),
+            allow_fetch=allow_fetch,
+            on_progress=on_progress,
+        )
+    if kind == "SWEEP":
+        return run_sweep_backtest(
+            db,
+            settings,
+            symbols=[_norm_symbol_ref(s.exchange, s.symbol) for s in uni.symbols],
+            config=_parse(SweepBacktestConfigIn, config),
+            allow_fetch=allow_fetch,
+            on_progress=on_progress,
+        )
+    raise ValueError(f"Unsupported backtest kind: {kind}")
+
+
+class _ProgressWriter:
+    """Throttled progress persistence that doubles as the cancellation probe."""
+
+    def __init__(self, run_id: int) -> None:
+        self.run_id = run_id
+        self._last_write = 0.0
+        self._last_pct = -1.0
+
+    def __call__(self, pct: float) -> None:
+        now = time.monotonic()
+        pct = round(min(100.0, max(0.0, float(pct))), 1)
+        if pct <= self._last_pct:
+            return
+        if pct < 100.0 and now - self._last_write < _PROGRESS_INTERVAL_SEC:
+            return
+        self._last_write = now
+        self._last_pct = pct
+        with SessionLocal() as db:
+            res = db.execute(
+                update(BacktestRun)
+                .where(BacktestRun.id == self.run_id, BacktestRun.status == "RUNNING")
+                .values(progress=pct)
+            )
+            db.commit()
+        if res.rowcount == 0:
+            raise BacktestCancelled()
+
+
+def _transition(
+    db: Session, run_id: int, from_status: str, **values: Any
+) -> bool:
+    res = db.execute(
+        update(BacktestRun)
+        .where(BacktestRun.id == run_id, BacktestRun.status == from_status)
+        .values(updated_at=datetime.now(UTC), **values)
+    )
+    db.commit()
+    return res.rowcount > 0
+
+
+def execute_backtest_run(run_id: int) -> str:
+    """Worker entry point: run one QUEUED backtest and return its final status."""
+
+    settings = get_settings()
+    with SessionLocal() as db:
+        if not _transition(
+            db,
+            run_id,
+            "QUEUED",
+            status="RUNNING",
+            started_at=datetime.now(UTC),
+            progress=0.0,
+        ):
+            run = db.get(BacktestRun, run_id)
+            return run.status if run is not None else "MISSING"
+        run = db.get(BacktestRun, run_id)
+        if run is None:
+            return "MISSING"
+        try:
+            cfg = json.loads(run.config_json or "{}")
+            result = run_backtest(
+                db,
+                settings,
+                kind=run.kind,
+                universe=cfg.get("universe") or {},
+                config=cfg.get("config") or {},
+                on_progress=_ProgressWriter(run_id),
+            )
+        except BacktestCancelled:
+            db.rollback()
+            return "CANCELLED"
+        except Exception as exc:
+            db.rollback()
+            failed = _transition(
+                db,
+                run_id,
+                "RUNNING",
+                status="FAILED",
+                finished_at=datetime.now(UTC),
+                error_message=str(exc),
+            )
+            return "FAILED" if failed else "CANCELLED"
+        done = _transition(
+            db,
+            run_id,
+            "RUNNING",
+            status="COMPLETED",
+            finished_at=datetime.now(UTC),
+            progress=100.0,
+            result_json=json.dumps(result, ensure_ascii=False) if result else None,
+        )
+        return "COMPLETED" if done else "CANCELLED"
+
+
+def _fail_orphaned_run(run_id: int, message: str) -> None:
+    with SessionLocal() as db:
+        for from_status in ACTIVE_STATUSES:
+            _transition(
+                db,
+                run_id,
+                from_status,
+                status="FAILED",
+                finished_at=datetime.now(UTC),
+                error_message=message,
+            )
+
+
+class BacktestJobQueue:
+    """Submits queued runs to a lazily created process or thread pool."""
+
+    def __init__(self, *, executor: str, workers: int) -> None:
+        kind = (executor or "process").strip().lower()
+        self.executor = kind if kind in {"process", "thread"} else "process"
+        self.workers = max(1, int(workers))
+        self._lock = Lock()
+        self._pool: Executor | None = None
+        self._futures: dict[int, Future] = {}
+        self._submitted = 0
+        self._finished: dict[str, int] = {}
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.executor == "process":
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="backtest-job",
+                    )
+            return self._pool
+
+    def submit(self, run_id: int) -> None:
+        fut = self._get_pool().submit(execute_backtest_run, int(run_id))
+        with self._lock:
+            self._futures[int(run_id)] = fut
+            self._submitted += 1
+        fut.add_done_callback(lambda f, rid=int(run_id): self._on_done(rid, f))
+
+    def _on_done(self, run_id: int, fut: Future) -> None:
+        with self._lock:
+            self._futures.pop(run_id, None)
+        if fut.cancelled():
+            outcome = "CANCELLED"
+        elif fut.exception() is not None:
+            exc = fut.exception()
+            outcome = "CRASHED"
+            logger.error("Backtest job %s crashed: %s", run_id, exc)
+            _fail_orphaned_run(run_id, f"Backtest worker crashed: {exc}")
+            if isinstance(exc, BrokenProcessPool):
+                with self._lock:
+                    self._pool = None
+        else:
+            outcome = str(fut.result())
+        with self._lock:
+            self._finished[outcome] = self._finished.get(outcome, 0) + 1
+
+    def cancel(self, run_id: int) -> None:
+        """Drop a job that has not started yet (running jobs stop on their own)."""
+
+        with self._lock:
+            fut = self._futures.get(int(run_id))
+        if fut is not None:
+            fut.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "executor": self.executor,
+                "workers": self.workers,
+                "in_flight": len(self._futures),
+                "submitted": self._submitted,
+                "finished": dict(self._finished),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_queue: BacktestJobQueue | None = None
+_queue_lock = Lock()
+
+
+def get_backtest_job_queue() -> BacktestJobQueue:
+    """Return the process-wide backtest job queue, creating it on first use."""
+
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                settings = get_settings()
+                _queue = BacktestJobQueue(
+                    executor=str(getattr(settings, "backtest_executor", "process")),
+                    workers=int(getattr(settings, "backtest_workers", 2)),
+                )
+    return _queue
+
+
+def ensure_backtest_capacity(
+    db: Session,
+    settings: Settings,
+    *,
+    owner_id: Optional[int],
+    exclude_run_id: Optional[int] = None,
+) -> None:
+    """Reject a new job when the owner already has the maximum active runs."""
+
+    cap = int(getattr(settings, "backtest_max_active_per_user", 2) or 0)
+    if cap <= 0:
+        return
+    q = db.query(func.count(BacktestRun.id)).filter(BacktestRun.status.in_(ACTIVE_STATUSES))
+    if owner_id is None:
+        q = q.filter(BacktestRun.owner_id.is_(None))
+    else:
+        q = q.filter(BacktestRun.owner_id == owner_id)
+    if exclude_run_id is not None:
+        q = q.filter(BacktestRun.id != exclude_run_id)
+    active = int(q.scalar() or 0)
+    if active >= cap:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many active backtests ({active}/{cap}); wait for one to finish.",
+        )
+
+
+def add_backtest_run(db: Session, settings: Settings, run: BacktestRun) -> None:
+    """Insert and commit a new run, enforcing the per-owner active-run cap.
+
+    The run is flushed before the cap is checked, so concurrent submits
+    serialize on the write (SQLite's write lock, a per-owner advisory lock on
+    PostgreSQL) and each check counts the other's committed run.
+    """
+
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            select(func.pg_advisory_xact_lock(_CAPACITY_LOCK_NAMESPACE, run.owner_id or 0))
+        )
+    db.add(run)
+    db.flush()
+    try:
+        ensure_backtest_capacity(db, settings, owner_id=run.owner_id, exclude_run_id=run.id)
+    except HTTPException:
+        db.rollback()
+        raise
+    db.commit()
+
+
+def cancel_backtest_run(db: Session, run: BacktestRun) -> bool:
+    """Mark a QUEUED/RUNNING run as cancelled.
+
+    Returns False when the run has already finished.
+    """
+
+    if run.status not in ACTIVE_STATUSES:
+        return False
+    if not _transition(
+        db,
+        run.id,
+        run.status,
+        status="CANCELLED",
+        finished_at=datetime.now(UTC),
+    ):
+        return False
+    if _queue is not None:
+        _queue.cancel(run.id)
+    return True
+
+
+def recover_backtest_jobs() -> None:
+    """Startup: fail runs interrupted by a restart and resubmit queued ones."""
+
+    with SessionLocal() as db:
+        db.execute(
+            update(BacktestRun)
+            .where(BacktestRun.status == "RUNNING")
+            .values(
+                status="FAILED",
+                finished_at=datetime.now(UTC),
+                error_message="Interrupted by a server restart.",
+            )
+        )
+        db.commit()
+        queued = [
+            int(rid)
+            for (rid,) in db.query(BacktestRun.id)
+            .filter(BacktestRun.status == "QUEUED")
+            .order_by(BacktestRun.created_at)
+            .all()
+        ]
+    queue = get_backtest_job_queue()
+    for rid in queued:
+        queue.submit(rid)
+
+
+__all__ = [
+    "BacktestCancelled",
+    "add_backtest_run",
+    "BacktestJobQueue",
+    "cancel_backtest_run",
+    "ensure_backtest_capacity",
+    "execute_backtest_run",
+    "get_backtest_job_queue",
+    "recover_backtest_jobs",
+    "run_backtest",
+]
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings
-from app.services.market_data import load_series
+from app.services.market_data import load_series_columns_many
 
 
 @dataclass(frozen=True)
@@ -20,6 +21,43 @@ class UniverseSymbolRef:
         return f"{self.exchange}:{self.symbol}"
 
 
+# Called with a 0-100 completion percentage. Job runners use it to persist
+# progress and may raise from it to abort a run (cancellation).
+ProgressCallback = Callable[[float], None]
+
+
+def report_progress(
+    on_progress: ProgressCallback | None,
+    done: int,
+    total: int,
+    *,
+    lo: float = 0.0,
+    hi: float = 100.0,
+) -> None:
+    """Report `done` of `total` steps of a stage spanning [lo, hi] percent."""
+
+    if on_progress is None:
+        return
+    frac = min(1.0, max(0.0, done / total)) if total > 0 else 1.0
+    on_progress(lo + (hi - lo) * frac)
+
+
+def scaled_progress(
+    on_progress: ProgressCallback | None, lo: float, hi: float
+) -> ProgressCallback | None:
+    """Map a nested run's 0-100 progress onto [lo, hi] of the caller's."""
+
+    if on_progress is None:
+        return None
+    return lambda pct: on_progress(lo + (hi - lo) * min(100.0, max(0.0, pct)) / 100.0)
+
+
+def _optional(values: list[float]) -> list[Optional[float]]:
+    """Map non-finite kernel outputs (NaN warmup) to None."""
+
+    return [v if math.isfinite(v) else None for v in values]
+
+
 def _norm_symbol_ref(exchange: str | None, symbol: str) -> UniverseSymbolRef:
     exch_u = (exchange or "NSE").strip().upper() or "NSE"
     sym_u = (symbol or "").strip().upper()
@@ -41,7 +79,8 @@ def load_eod_close_matrix(
 
     - Returns aligned dates and per-symbol close series.
     - Missing days are represented as None per symbol.
-    - Uses the existing candle DB cache (and can fetch when allowed).
+    - Uses the existing candle DB cache (and can fetch when allowed); all
+      symbols are read together through `load_series_columns_many`.
     """
 
     if start >= end:
@@ -59,31 +98,22 @@ def load_eod_close_matrix(
     missing_symbols: list[str] = []
     all_dates: set[date] = set()
 
+    series = load_series_columns_many(
+        db,
+        settings,
+        pairs=[(s.symbol, s.exchange) for s in unique],
+        timeframe="1d",
+        start=start,
+        end=end,
+        allow_fetch=allow_fetch,
+    )
     for s in unique:
-        rows = load_series(
-            db,
-            settings,
-            symbol=s.symbol,
-            exchange=s.exchange,
-            timeframe="1d",
-            start=start,
-            end=end,
-            allow_fetch=allow_fetch,
-        )
-        if not rows:
+        cols = series[(s.symbol, s.exchange)]
+        if not len(cols):
             missing_symbols.append(s.key)
             continue
         by_date: dict[date, float] = {}
-        for r in rows:
-            ts = r.get("ts")
-            close = r.get("close")
-            if ts is None or close is None:
-                continue
-            d = ts.date()
-            try:
-                c = float(close)
-            except (TypeError, ValueError):
-                continue
+        for d, c in zip(cols.dates(), cols.close, strict=False):
             if c <= 0:
                 continue
             by_date[d] = c
@@ -119,7 +149,8 @@ def load_eod_open_close_matrix(
 
     - Returns aligned dates and per-symbol open/close series.
     - Missing days are represented as None per symbol.
-    - Uses the existing candle DB cache (and can fetch when allowed).
+    - Uses the existing candle DB cache (and can fetch when allowed); all
+      symbols are read together through `load_series_columns_many`.
     """
 
     if start >= end:
@@ -138,41 +169,27 @@ def load_eod_open_close_matrix(
     missing_symbols: list[str] = []
     all_dates: set[date] = set()
 
+    series = load_series_columns_many(
+        db,
+        settings,
+        pairs=[(s.symbol, s.exchange) for s in unique],
+        timeframe="1d",
+        start=start,
+        end=end,
+        allow_fetch=allow_fetch,
+    )
     for s in unique:
-        rows = load_series(
-            db,
-            settings,
-            symbol=s.symbol,
-            exchange=s.exchange,
-            timeframe="1d",
-            start=start,
-            end=end,
-            allow_fetch=allow_fetch,
-        )
-        if not rows:
+        cols = series[(s.symbol, s.exchange)]
+        if not len(cols):
             missing_symbols.append(s.key)
             continue
         by_date_open: dict[date, float] = {}
         by_date_close: dict[date, float] = {}
-        for r in rows:
-            ts = r.get("ts")
-            o = r.get("open")
-            c = r.get("close")
-            if ts is None:
-                continue
-            d = ts.date()
-            try:
-                ov = float(o) if o is not None else None
-            except (TypeError, ValueError):
-                ov = None
-            try:
-                cv = float(c) if c is not None else None
-            except (TypeError, ValueError):
-                cv = None
-            if ov is not None and ov > 0:
+        for d, ov, cv in zip(cols.dates(), cols.open, cols.close, strict=False):
+            if ov > 0:
                 by_date_open[d] = ov
                 all_dates.add(d)
-            if cv is not None and cv > 0:
+            if cv > 0:
                 by_date_close[d] = cv
                 all_dates.add(d)
         if by_date_open or by_date_close:
@@ -11,6 +11,7 @@ from app.models import BacktestRun
 from app.pydantic_compat import PYDANTIC_V2
 from app.schemas.backtests_execution import ExecutionBacktestConfigIn
 from app.schemas.backtests_portfolio import PortfolioBacktestConfigIn
+from app.services.backtests_data import ProgressCallback, scaled_progress
 from app.services.backtests_portfolio import run_portfolio_backtest
 
 
@@ -52,6 +53,7 @@ def run_execution_backtest(
     base_run: BacktestRun,
     config: ExecutionBacktestConfigIn,
     allow_fetch: bool = True,
+    on_progress: ProgressCallback | None = None,
 ) -> dict[str, Any]:
     group_id, base_pf_cfg = _parse_base_portfolio_config(base_run)
 
@@ -84,6 +86,7 @@ def run_execution_backtest(
         group_id=group_id,
         config=ideal_cfg,
         allow_fetch=allow_fetch,
+        on_progress=scaled_progress(on_progress, 0.0, 50.0),
     )
     realistic = run_portfolio_backtest(
         db,
@@ -91,6 +94,7 @@ def run_execution_backtest(
         group_id=group_id,
         config=realistic_cfg,
         allow_fetch=allow_fetch,
+        on_progress=scaled_progress(on_progress, 50.0, 100.0),
     )
 
     ideal_series = (ideal.get("series") or {}) if isinstance(ideal, dict) else {}
@@ -12,10 +12,12 @@ from app.models import Group, GroupMember
 from app.schemas.backtests_portfolio import PortfolioBacktestConfigIn, RebalanceCadence
 from app.services.alert_expression_dsl import parse_expression
 from app.services.backtests_data import (
+    ProgressCallback,
     UniverseSymbolRef,
     _norm_symbol_ref,
     load_eod_close_matrix,
     load_eod_open_close_matrix,
+    report_progress,
 )
 from app.services.backtests_group_index import (
     compute_equal_weight_returns_index,
@@ -29,7 +31,7 @@ from app.services.backtests_signal import (
     _series_key,
 )
 from app.services.charges_india import estimate_india_equity_charges
-from app.services.rebalance_risk import solve_risk_parity_erc
+from app.services.portfolio_math import covariance_matrix, solve_risk_parity_erc
 
 
 @dataclass(frozen=True)
@@ -112,22 +114,7 @@ def _forward_fill(series: list[float | None]) -> list[float | None]:
 
 
 def _compute_covariance(returns: list[list[float]]) -> list[list[float]]:
-    n = len(returns)
-    t = len(returns[0]) if n else 0
-    if n == 0 or t <= 1:
-        raise ValueError("Insufficient returns to compute covariance.")
-
-    means = [sum(r) / t for r in returns]
-    cov = [[0.0 for _ in range(n)] for _ in range(n)]
-    for i in range(n):
-        for j in range(i, n):
-            s = 0.0
-            for k in range(t):
-                s += (returns[i][k] - means[i]) * (returns[j][k] - means[j])
-            v = s / float(t - 1)
-            cov[i][j] = float(v)
-            cov[j][i] = float(v)
-    return cov
+    return covariance_matrix(returns)
 
 
 def _portfolio_value(
@@ -331,6 +318,7 @@ def run_portfolio_backtest(
     group_id: int,
     config: PortfolioBacktestConfigIn,
     allow_fetch: bool = True,
+    on_progress: ProgressCallback | None = None,
 ) -> dict[str, Any]:
     if config.product == "MIS" and config.fill_timing != "NEXT_OPEN":
         raise ValueError(
@@ -375,6 +363,7 @@ def run_portfolio_backtest(
     )
     if not dates:
         raise ValueError("No candles available.")
+    report_progress(on_progress, 1, 1, hi=20.0)
 
     sim_start = None
     sim_end = None
@@ -658,6 +647,7 @@ def run_portfolio_backtest(
     pending: dict[int, list[dict[str, Any]]] = {}
     peak = -math.inf
     for i in range(sim_start, sim_end + 1):
+        report_progress(on_progress, i - sim_start, sim_end + 1 - sim_start, lo=20.0)
         d = dates[i]
         px_close_by_key: dict[str, float] = {}
         px_open_by_key: dict[str, float] = {}
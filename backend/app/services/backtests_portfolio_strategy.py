@@ -10,13 +10,20 @@ from sqlalchemy.orm import Session
 from app.core.config import Settings
 from app.schemas.backtests_portfolio_strategy import PortfolioStrategyBacktestConfigIn
 from app.services.alert_expression_dsl import parse_expression
-from app.services.backtests_data import UniverseSymbolRef
+from app.services.backtests_data import (
+    ProgressCallback,
+    UniverseSymbolRef,
+    report_progress,
+)
 from app.services.backtests_strategy import (
+    IndicatorCache,
+    _cached_indicator_series,
     _eval_expr_at,
     _IndicatorKey,
     _iter_indicator_operands,
-    _resolve_indicator_series,
+    _preloaded_rows,
     _series_key,
+    _series_window,
 )
 from app.services.charges_india import estimate_india_equity_charges
 from app.services.market_data import Timeframe, load_series
@@ -89,19 +96,6 @@ def _intraday_in_market_hours(ts: datetime) -> bool:
     return time(9, 15) <= t <= time(15, 30)
 
 
-def _compute_perf_pct_series(closes: list[float], window: int) -> list[Optional[float]]:
-    n = len(closes)
-    if window <= 0:
-        return [None] * n
-    out: list[Optional[float]] = [None] * n
-    for i in range(window, n):
-        base = closes[i - window]
-        curr = closes[i]
-        if base > 0:
-            out[i] = (curr / base - 1.0) * 100.0
-    return out
-
-
 def run_portfolio_strategy_backtest(
     db: Session,
     settings: Settings,
@@ -109,6 +103,9 @@ def run_portfolio_strategy_backtest(
     symbols: list[UniverseSymbolRef],
     config: PortfolioStrategyBacktestConfigIn,
     allow_fetch: bool = True,
+    on_progress: ProgressCallback | None = None,
+    preloaded: dict[str, list[dict[str, Any]]] | None = None,
+    indicator_cache: IndicatorCache | None = None,
 ) -> dict[str, Any]:
     """Portfolio-level entry/exit backtest for many symbols sharing a cash pool.
 
@@ -118,6 +115,9 @@ def run_portfolio_strategy_backtest(
     - MIS: long/short allowed, and positions are squared-off at end of day (IST).
     - One position per symbol (no pyramiding); symbols compete for shared cash and
       max positions.
+
+    Parameter sweeps pass `preloaded` candles (keyed by symbol key, covering
+    at least this run's window) and a shared `indicator_cache`.
     """
 
     tf: Timeframe = config.timeframe  # type: ignore[assignment]
@@ -147,22 +147,9 @@ def run_portfolio_strategy_backtest(
         [k.period for k in needed if k.period]
         + [max(20, int(config.ranking_window or 0) or 0)]
     )
-    if config.timeframe == "1d":
-        lookback_days = max(30, int(max_period) * 3)
-    else:
-        bars_per_day = {
-            "1m": 375,
-            "5m": 75,
-            "15m": 25,
-            "30m": 13,
-            "1h": 6,
-        }.get(config.timeframe, 75)
-        lookback_days = max(5, int(math.ceil(max_period / bars_per_day)) + 3)
-
-    start_dt = datetime.combine(config.start_date, time.min) - timedelta(
-        days=lookback_days
+    start_dt, end_dt = _series_window(
+        config.timeframe, config.start_date, config.end_date, max_period
     )
-    end_dt = datetime.combine(config.end_date, time.max)
 
     unique: list[UniverseSymbolRef] = []
     seen: set[str] = set()
@@ -177,17 +164,21 @@ def run_portfolio_strategy_backtest(
     bars_by_key: dict[str, _SymbolBars] = {}
     missing_symbols: list[str] = []
 
-    for s in unique:
-        rows = load_series(
-            db,
-            settings,
-            symbol=s.symbol,
-            exchange=s.exchange,
-            timeframe=tf,
-            start=start_dt,
-            end=end_dt,
-            allow_fetch=allow_fetch,
-        )
+    for n_loaded, s in enumerate(unique):
+        report_progress(on_progress, n_loaded, len(unique), hi=30.0)
+        if preloaded is not None:
+            rows = _preloaded_rows(preloaded, s.key, start_dt, end_dt)
+        else:
+            rows = load_series(
+                db,
+                settings,
+                symbol=s.symbol,
+                exchange=s.exchange,
+                timeframe=tf,
+                start=start_dt,
+                end=end_dt,
+                allow_fetch=allow_fetch,
+            )
         if not rows:
             missing_symbols.append(s.key)
             continue
@@ -242,9 +233,10 @@ def run_portfolio_strategy_backtest(
 
         series: dict[_IndicatorKey, list[Optional[float]]] = {}
         for k in needed:
-            series[k] = _resolve_indicator_series(
-                k.kind,
-                k.period,
+            series[k] = _cached_indicator_series(
+                indicator_cache,
+                (s.key, tf, start_dt, end_dt),
+                k,
                 closes=closes,
                 highs=highs,
                 lows=lows,
@@ -255,8 +247,14 @@ def run_portfolio_strategy_backtest(
         if config.allocation_mode == "RANKING":
             if config.ranking_metric != "PERF_PCT":
                 raise ValueError("Only PERF_PCT ranking is supported in v1.")
-            rank_series = _compute_perf_pct_series(
-                closes, int(config.ranking_window or 1)
+            rank_series = _cached_indicator_series(
+                indicator_cache,
+                (s.key, tf, start_dt, end_dt),
+                _IndicatorKey(kind="PERF_PCT", period=int(config.ranking_window or 1)),
+                closes=closes,
+                highs=highs,
+                lows=lows,
+                volumes=volumes,
             )
 
         idx_by_ts = {t: i for i, t in enumerate(ts)}
@@ -380,6 +378,7 @@ def run_portfolio_strategy_backtest(
             per_symbol_pnl[key].append(float(pnl))
 
     for gi, t in enumerate(gts):
+        report_progress(on_progress, gi, len(gts), lo=30.0)
         # 1) Execute exits at this bar open (symbol-specific).
         for key, (exec_ts, reason) in list(pending_exit_ts.items()):
             if exec_ts != t:
@@ -7,6 +7,7 @@ from typing import Any, Iterable, Literal, Optional
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings
+from app.services import indicator_kernels as kernels
 from app.services.alert_expression import (
     ComparisonNode,
     ExpressionNode,
@@ -17,7 +18,7 @@ from app.services.alert_expression import (
     NumberOperand,
 )
 from app.services.alert_expression_dsl import parse_expression
-from app.services.backtests_data import UniverseSymbolRef
+from app.services.backtests_data import ProgressCallback, UniverseSymbolRef, _optional, report_progress
 from app.services.market_data import load_series
 
 SignalMode = Literal["DSL", "RANKING"]
@@ -78,18 +79,7 @@ def _series_key(operand: IndicatorOperand) -> tuple[str, str, int]:
 
 
 def _compute_sma_series(closes: list[float], period: int) -> list[Optional[float]]:
-    n = len(closes)
-    if period <= 0:
-        return [None] * n
-    out: list[Optional[float]] = [None] * n
-    window_sum = 0.0
-    for i, c in enumerate(closes):
-        window_sum += c
-        if i >= period:
-            window_sum -= closes[i - period]
-        if i >= period - 1:
-            out[i] = window_sum / period
-    return out
+    return _optional(kernels.sma(closes, period))
 
 
 def _compute_perf_pct_series(closes: list[float], window: int) -> list[Optional[float]]:
@@ -109,30 +99,12 @@ def _compute_rsi_series(closes: list[float], period: int) -> list[Optional[float
     n = len(closes)
     if period <= 0 or n < period + 1:
         return [None] * n
-    out: list[Optional[float]] = [None] * n
-
-    gains: list[float] = [0.0] * n
-    losses: list[float] = [0.0] * n
-    for i in range(1, n):
-        d = closes[i] - closes[i - 1]
-        gains[i] = d if d > 0 else 0.0
-        losses[i] = -d if d < 0 else 0.0
-
-    avg_gain = sum(gains[1 : period + 1]) / period
-    avg_loss = sum(losses[1 : period + 1]) / period
-
-    def _rsi(gain: float, loss: float) -> float:
-        if loss <= 0:
-            return 100.0
-        rs = gain / loss
-        return 100.0 - (100.0 / (1.0 + rs))
-
-    out[period] = _rsi(avg_gain, avg_loss)
-    for i in range(period + 1, n):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-        out[i] = _rsi(avg_gain, avg_loss)
-    return out
+    # Wilder smoothing seeded with the mean of the first `period` deltas.
+    gains, losses = kernels.gains_losses(closes)
+    rsi = kernels.rsi_from_averages(
+        kernels.rma(gains[1:], period), kernels.rma(losses[1:], period)
+    )
+    return [None, *_optional(rsi)]
 
 
 def _resolve_indicator_series(
@@ -282,6 +254,7 @@ def run_signal_backtest(
     symbols: list[UniverseSymbolRef],
     config: SignalBacktestConfig,
     allow_fetch: bool = True,
+    on_progress: ProgressCallback | None = None,
 ) -> dict[str, Any]:
     # Use a conservative lookback so indicators have enough history.
     lookback_days = 400
@@ -301,7 +274,8 @@ def run_signal_backtest(
     per_symbol_dates: dict[str, list[date]] = {}
     per_symbol_closes: dict[str, list[float]] = {}
 
-    for s in symbols:
+    for n_loaded, s in enumerate(symbols):
+        report_progress(on_progress, n_loaded, len(symbols), hi=50.0)
         key = s.key
         rows = load_series(
             db,
@@ -366,7 +340,8 @@ def run_signal_backtest(
         operands = list(_iter_indicator_operands(expr))
         needed = sorted({_series_key(o) for o in operands})
 
-        for key, closes_full in per_symbol_closes.items():
+        for n_done, (key, closes_full) in enumerate(per_symbol_closes.items()):
+            report_progress(on_progress, n_done, len(per_symbol_closes), lo=50.0)
             dates_s = per_symbol_dates[key]
             idx_by_date = {d: i for i, d in enumerate(dates_s)}
             window_indices = [
@@ -408,7 +383,8 @@ def run_signal_backtest(
         ]
         window = max(1, int(config.ranking_window))
 
-        for d in rebalance_dates:
+        for n_done, d in enumerate(rebalance_dates):
+            report_progress(on_progress, n_done, len(rebalance_dates), lo=50.0)
             scores: list[tuple[str, float]] = []
             for key, dates_s in per_symbol_dates.items():
                 idx_by_date = {dd: ii for ii, dd in enumerate(dates_s)}
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
-from datetime import datetime, time, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from typing import Any, Iterable, Optional
 
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings
+from app.services import indicator_kernels as kernels
 from app.services.alert_expression import (
     ComparisonNode,
     ExpressionNode,
@@ -18,7 +19,7 @@ from app.services.alert_expression import (
     NumberOperand,
 )
 from app.services.alert_expression_dsl import parse_expression
-from app.services.backtests_data import UniverseSymbolRef
+from app.services.backtests_data import ProgressCallback, UniverseSymbolRef, _optional, report_progress
 from app.services.charges_india import estimate_india_equity_charges
 from app.services.market_data import Timeframe, load_series
 
@@ -61,18 +62,7 @@ def _series_key(operand: IndicatorOperand) -> _IndicatorKey:
 
 
 def _compute_sma_series(closes: list[float], period: int) -> list[Optional[float]]:
-    n = len(closes)
-    if period <= 0:
-        return [None] * n
-    out: list[Optional[float]] = [None] * n
-    window_sum = 0.0
-    for i, c in enumerate(closes):
-        window_sum += c
-        if i >= period:
-            window_sum -= closes[i - period]
-        if i >= period - 1:
-            out[i] = window_sum / period
-    return out
+    return _optional(kernels.sma(closes, period))
 
 
 def _compute_perf_pct_series(closes: list[float], window: int) -> list[Optional[float]]:
@@ -92,55 +82,33 @@ def _compute_rsi_series(closes: list[float], period: int) -> list[Optional[float
     n = len(closes)
     if period <= 0 or n < period + 1:
         return [None] * n
-    out: list[Optional[float]] = [None] * n
-
-    gains: list[float] = [0.0] * n
-    losses: list[float] = [0.0] * n
-    for i in range(1, n):
-        d = closes[i] - closes[i - 1]
-        gains[i] = d if d > 0 else 0.0
-        losses[i] = -d if d < 0 else 0.0
-
-    avg_gain = sum(gains[1 : period + 1]) / period
-    avg_loss = sum(losses[1 : period + 1]) / period
-
-    def _rsi(gain: float, loss: float) -> float:
-        if loss <= 0:
-            return 100.0
-        rs = gain / loss
-        return 100.0 - (100.0 / (1.0 + rs))
-
-    out[period] = _rsi(avg_gain, avg_loss)
-    for i in range(period + 1, n):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-        out[i] = _rsi(avg_gain, avg_loss)
-    return out
+    # Wilder smoothing seeded with the mean of the first `period` deltas.
+    gains, losses = kernels.gains_losses(closes)
+    rsi = kernels.rsi_from_averages(
+        kernels.rma(gains[1:], period), kernels.rma(losses[1:], period)
+    )
+    return [None, *_optional(rsi)]
 
 
 def _compute_volatility_pct_series(
     closes: list[float],
     window: int,
 ) -> list[Optional[float]]:
-    from math import log, sqrt
-
     n = len(closes)
     if window <= 1:
         return [None] * n
+    # Log returns over the trailing window, skipping non-positive prices.
+    rets = [math.nan] * n
+    for j in range(1, n):
+        prev = closes[j - 1]
+        curr = closes[j]
+        if prev > 0 and curr > 0:
+            rets[j] = math.log(curr / prev)
+    std = kernels.rolling_std(rets, window, skip_missing=True, min_count=2)
     out: list[Optional[float]] = [None] * n
     for i in range(window, n):
-        rets: list[float] = []
-        for j in range(i - window + 1, i + 1):
-            prev = closes[j - 1]
-            curr = closes[j]
-            if prev <= 0 or curr <= 0:
-                continue
-            rets.append(log(curr / prev))
-        if len(rets) <= 1:
-            continue
-        mean = sum(rets) / len(rets)
-        var = sum((r - mean) ** 2 for r in rets) / max(len(rets) - 1, 1)
-        out[i] = sqrt(var) * 100.0
+        if math.isfinite(std[i]):
+            out[i] = std[i] * 100.0
     return out
 
 
@@ -208,17 +176,16 @@ def _compute_vwap_series(
     n = len(closes)
     if window <= 0:
         return [None] * n
+    pv = [
+        (h + lo + c) / 3.0 * v
+        for h, lo, c, v in zip(highs, lows, closes, volumes, strict=False)
+    ]
+    num = kernels.rolling_sum(pv, window)
+    den = kernels.rolling_sum(volumes, window)
     out: list[Optional[float]] = [None] * n
     for i in range(window - 1, n):
-        num = 0.0
-        den = 0.0
-        for j in range(i - window + 1, i + 1):
-            typical = (highs[j] + lows[j] + closes[j]) / 3.0
-            vol = volumes[j]
-            num += typical * vol
-            den += vol
-        if den > 0:
-            out[i] = num / den
+        if den[i] > 0:
+            out[i] = num[i] / den[i]
     return out
 
 
@@ -251,6 +218,81 @@ def _resolve_indicator_series(
     raise ValueError(f"Unsupported indicator for strategy backtest: {indicator_kind}")
 
 
+def _series_window(
+    timeframe: str,
+    start_date: date,
+    end_date: date,
+    max_period: int,
+) -> tuple[datetime, datetime]:
+    """Candle window for a run: the sim range plus indicator warm-up."""
+
+    if timeframe == "1d":
+        lookback_days = max(30, int(max_period) * 3)
+    else:
+        bars_per_day = {
+            "1m": 375,
+            "5m": 75,
+            "15m": 25,
+            "30m": 13,
+            "1h": 6,
+        }.get(timeframe, 75)
+        lookback_days = max(5, int(math.ceil(max_period / bars_per_day)) + 3)
+
+    start_dt = datetime.combine(start_date, time.min) - timedelta(days=lookback_days)
+    return start_dt, datetime.combine(end_date, time.max)
+
+
+# Indicator series shared between runs over the same candles (parameter
+# sweeps). Keys are (symbol key, timeframe, window start, kind, period);
+# cached series are shared and must not be mutated.
+IndicatorCache = dict[tuple[Any, ...], list[Optional[float]]]
+
+
+def _cached_indicator_series(
+    cache: IndicatorCache | None,
+    scope: tuple[Any, ...],
+    key: _IndicatorKey,
+    *,
+    closes: list[float],
+    highs: list[float],
+    lows: list[float],
+    volumes: list[float],
+) -> list[Optional[float]]:
+    # The scope names the loaded window; the series length guards against a
+    # scope that does not pin down the exact bars.
+    cache_key = (*scope, len(closes), key.kind, key.period)
+    if cache is not None:
+        hit = cache.get(cache_key)
+        if hit is not None:
+            return hit
+    out = _resolve_indicator_series(
+        key.kind,
+        key.period,
+        closes=closes,
+        highs=highs,
+        lows=lows,
+        volumes=volumes,
+    )
+    if cache is not None:
+        cache[cache_key] = out
+    return out
+
+
+def _preloaded_rows(
+    preloaded: dict[str, list[dict[str, Any]]],
+    key: str,
+    start: datetime,
+    end: datetime,
+) -> list[dict[str, Any]]:
+    """Slice candles loaded once for a wider window down to one run's window."""
+
+    return [
+        r
+        for r in preloaded.get(key) or []
+        if isinstance(r.get("ts"), datetime) and start <= r["ts"] <= end
+    ]
+
+
 def _eval_operand_at(
     operand: Any,
     series: dict[_IndicatorKey, list[Optional[float]]],
@@ -347,6 +389,9 @@ def run_strategy_backtest(
     symbol: UniverseSymbolRef,
     config: dict[str, Any],
     allow_fetch: bool = True,
+    on_progress: ProgressCallback | None = None,
+    preloaded: dict[str, list[dict[str, Any]]] | None = None,
+    indicator_cache: IndicatorCache | None = None,
 ) -> dict[str, Any]:
     """Entry/exit rule backtest for a single symbol.
 
@@ -354,6 +399,9 @@ def run_strategy_backtest(
     - Evaluate signals at candle close, execute at next candle open.
     - CNC: long-only.
     - MIS: long/short allowed, and position is squared-off at end of day (IST).
+
+    Parameter sweeps pass `preloaded` candles (keyed by symbol key, covering
+    at least this run's window) and a shared `indicator_cache`.
     """
 
     from app.schemas.backtests_strategy import StrategyBacktestConfigIn
@@ -389,35 +437,26 @@ def run_strategy_backtest(
         needed.add(_IndicatorKey(kind="MA", period=45))
 
     max_period = max([k.period for k in needed if k.period] + [20])
-    if cfg.timeframe == "1d":
-        lookback_days = max(30, int(max_period) * 3)
-    else:
-        bars_per_day = {
-            "1m": 375,
-            "5m": 75,
-            "15m": 25,
-            "30m": 13,
-            "1h": 6,
-        }.get(cfg.timeframe, 75)
-        lookback_days = max(5, int(math.ceil(max_period / bars_per_day)) + 3)
-
-    start_dt = datetime.combine(cfg.start_date, time.min) - timedelta(
-        days=lookback_days,
-    )
-    end_dt = datetime.combine(cfg.end_date, time.max)
-
-    candles = load_series(
-        db,
-        settings,
-        symbol=symbol.symbol,
-        exchange=symbol.exchange,
-        timeframe=tf,
-        start=start_dt,
-        end=end_dt,
-        allow_fetch=allow_fetch,
+    start_dt, end_dt = _series_window(
+        cfg.timeframe, cfg.start_date, cfg.end_date, max_period
     )
+
+    if preloaded is not None:
+        candles = _preloaded_rows(preloaded, symbol.key, start_dt, end_dt)
+    else:
+        candles = load_series(
+            db,
+            settings,
+            symbol=symbol.symbol,
+            exchange=symbol.exchange,
+            timeframe=tf,
+            start=start_dt,
+            end=end_dt,
+            allow_fetch=allow_fetch,
+        )
     if not candles:
         raise ValueError("No candles available.")
+    report_progress(on_progress, 1, 1, hi=20.0)
 
     ts: list[datetime] = []
     opens: list[float] = []
@@ -460,9 +499,10 @@ def run_strategy_backtest(
 
     series: dict[_IndicatorKey, list[Optional[float]]] = {}
     for k in needed:
-        series[k] = _resolve_indicator_series(
-            k.kind,
-            k.period,
+        series[k] = _cached_indicator_series(
+            indicator_cache,
+            (symbol.key, tf, start_dt, end_dt),
+            k,
             closes=closes,
             highs=highs,
             lows=lows,
@@ -586,6 +626,7 @@ def run_strategy_backtest(
         cooldown_remaining = 0
 
     for i in range(sim_start, sim_end + 1):
+        report_progress(on_progress, i - sim_start, sim_end + 1 - sim_start, lo=20.0)
         # Execute pending orders at this candle open.
         if pending_entry and pending_entry[0] == i and qty == 0:
             _, side, ent_reason = pending_entry
@@ -0,0 +1,455 @@
+"""Parameter sweeps over STRATEGY and PORTFOLIO_STRATEGY backtests.
+
+A sweep expands a base config into variants (a grid or a seeded random sample
+of parameter combinations), loads the candles once for the union of all
+variant windows, and evaluates every variant against those preloaded rows.
+Indicator series are memoised per (symbol, window, kind, period), so variants
+that only change risk/sizing fields reuse the same SMA/RSI/... arrays.
+
+Variants run inline or on a spawned process pool (`backtest_sweep_workers`);
+each worker receives the preloaded candles once via the pool initializer and
+keeps its own indicator cache. Sweeps already run inside a backtest job slot,
+so the pool is capped at that slot's share of the CPU cores. A variant that
+raises is recorded as failed without stopping the others. The result is a
+metrics table ranked by `rank_by`, plus the full config of the best variant so
+it can be re-run as a regular backtest.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+from app.db.session import SessionLocal
+from app.pydantic_compat import PYDANTIC_V2, model_to_json
+from app.schemas.backtests_portfolio_strategy import PortfolioStrategyBacktestConfigIn
+from app.schemas.backtests_strategy import StrategyBacktestConfigIn
+from app.schemas.backtests_sweep import SweepBacktestConfigIn
+from app.services.alert_expression_dsl import parse_expression
+from app.services.backtests_data import (
+    ProgressCallback,
+    UniverseSymbolRef,
+    report_progress,
+)
+from app.services.backtests_portfolio_strategy import run_portfolio_strategy_backtest
+from app.services.backtests_strategy import (
+    IndicatorCache,
+    _iter_indicator_operands,
+    _series_key,
+    _series_window,
+    run_strategy_backtest,
+)
+from app.services.market_data import load_series
+
+MAX_SWEEP_VARIANTS = 1000
+
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+_DSL_FIELDS = ("entry_dsl", "exit_dsl")
+
+# Share of the progress bar spent preloading candles.
+_LOAD_PROGRESS_PCT = 10.0
+
+
+def _config_model(base_kind: str) -> Any:
+    if base_kind == "STRATEGY":
+        return StrategyBacktestConfigIn
+    return PortfolioStrategyBacktestConfigIn
+
+
+def _model_fields(model: Any) -> set[str]:
+    return set(model.model_fields if PYDANTIC_V2 else model.__fields__)
+
+
+def _parse(model: Any, data: dict[str, Any]) -> Any:
+    return model.model_validate(data) if PYDANTIC_V2 else model.parse_obj(data)
+
+
+def _placeholders(base_config: dict[str, Any]) -> set[str]:
+    names: set[str] = set()
+    for field in _DSL_FIELDS:
+        names.update(_PLACEHOLDER_RE.findall(str(base_config.get(field) or "")))
+    return names
+
+
+def apply_sweep_params(
+    base_config: dict[str, Any], params: dict[str, Any]
+) -> dict[str, Any]:
+    """Return the base config with `params` applied (fields and DSL placeholders)."""
+
+    cfg = dict(base_config)
+    placeholders = _placeholders(base_config)
+    for name, value in params.items():
+        if name in placeholders:
+            for field in _DSL_FIELDS:
+                cfg[field] = str(cfg.get(field) or "").replace(
+                    "{" + name + "}", str(value)
+                )
+        else:
+            cfg[name] = value
+    return cfg
+
+
+def expand_sweep_variants(config: SweepBacktestConfigIn) -> list[dict[str, Any]]:
+    """Expand a sweep into parameter combinations, in a deterministic order."""
+
+    placeholders = _placeholders(config.base_config)
+    fields = _model_fields(_config_model(config.base_kind))
+    names = list(config.params)
+    for name in names:
+        if name not in placeholders and name not in fields:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+        if not config.params[name]:
+            raise ValueError(f"Sweep parameter {name} has no values.")
+    unbound = placeholders - set(names)
+    if unbound:
+        raise ValueError(
+            "DSL placeholders without sweep values: "
+            + ", ".join(sorted(unbound))
+        )
+
+    values = [list(config.params[n]) for n in names]
+    total = 1
+    for v in values:
+        total *= len(v)
+
+    if config.mode == "RANDOM" and config.samples < total:
+        rng = random.Random(config.seed)
+        indices = sorted(rng.sample(range(total), config.samples))
+    else:
+        if total > MAX_SWEEP_VARIANTS:
+            raise ValueError(
+                f"Sweep grid has {total} variants (max {MAX_SWEEP_VARIANTS}); "
+                "narrow the ranges or use RANDOM mode."
+            )
+        return [dict(zip(names, combo, strict=True)) for combo in itertools.product(*values)]
+
+    out: list[dict[str, Any]] = []
+    for idx in indices:
+        combo: dict[str, Any] = {}
+        # Decode the mixed-radix index (last parameter varies fastest, as in
+        # itertools.product) without materialising the whole grid.
+        for name, vals in zip(reversed(names), reversed(values), strict=True):
+            idx, pos = divmod(idx, len(vals))
+            combo[name] = vals[pos]
+        out.append({n: combo[n] for n in names})
+    return out
+
+
+def build_sweep_configs(config: SweepBacktestConfigIn) -> list[tuple[dict[str, Any], Any]]:
+    """Expand and validate every variant as (params, parsed base-kind config)."""
+
+    model = _config_model(config.base_kind)
+    out: list[tuple[dict[str, Any], Any]] = []
+    for params in expand_sweep_variants(config):
+        cfg = _parse(model, apply_sweep_params(config.base_config, params))
+        parse_expression(cfg.entry_dsl)
+        parse_expression(cfg.exit_dsl)
+        out.append((params, cfg))
+    return out
+
+
+def _max_period(cfg: Any) -> int:
+    """Upper bound of the indicator warm-up a variant needs (see the runners)."""
+
+    periods = [20]
+    for field in _DSL_FIELDS:
+        for op in _iter_indicator_operands(parse_expression(getattr(cfg, field))):
+            key = _series_key(op)
+            if key.period:
+                periods.append(int(key.period))
+    if getattr(cfg, "allow_reentry_after_trailing_stop", False):
+        periods.append(45)
+    ranking_window = getattr(cfg, "ranking_window", None)
+    if ranking_window:
+        periods.append(int(ranking_window))
+    return max(periods)
+
+
+def _preload(
+    db: Session,
+    settings: Settings,
+    *,
+    symbols: list[UniverseSymbolRef],
+    configs: list[Any],
+    allow_fetch: bool,
+    on_progress: ProgressCallback | None,
+) -> dict[str, dict[str, list[dict[str, Any]]]]:
+    """Load each symbol once per timeframe over the union of variant windows."""
+
+    windows: dict[str, tuple[Any, Any]] = {}
+    for cfg in configs:
+        start_dt, end_dt = _series_window(
+            cfg.timeframe, cfg.start_date, cfg.end_date, _max_period(cfg)
+        )
+        lo, hi = windows.get(cfg.timeframe, (start_dt, end_dt))
+        windows[cfg.timeframe] = (min(lo, start_dt), max(hi, end_dt))
+
+    preloaded: dict[str, dict[str, list[dict[str, Any]]]] = {}
+    steps = len(windows) * len(symbols)
+    done = 0
+    for tf, (start_dt, end_dt) in windows.items():
+        rows_by_key: dict[str, list[dict[str, Any]]] = {}
+        for s in symbols:
+            rows_by_key[s.key] = load_series(
+                db,
+                settings,
+                symbol=s.symbol,
+                exchange=s.exchange,
+                timeframe=tf,  # type: ignore[arg-type]
+                start=start_dt,
+                end=end_dt,
+                allow_fetch=allow_fetch,
+            )
+            done += 1
+            report_progress(on_progress, done, steps, hi=_LOAD_PROGRESS_PCT)
+        preloaded[tf] = rows_by_key
+    return preloaded
+
+
+def _run_variant(
+    db: Session,
+    settings: Settings,
+    *,
+    base_kind: str,
+    symbols: list[UniverseSymbolRef],
+    cfg: Any,
+    preloaded: dict[str, dict[str, list[dict[str, Any]]]],
+    indicator_cache: IndicatorCache,
+) -> dict[str, Any]:
+    rows = preloaded.get(cfg.timeframe) or {}
+    if base_kind == "STRATEGY":
+        res = run_strategy_backtest(
+            db,
+            settings,
+            symbol=symbols[0],
+            config=_config_dict(cfg),
+            allow_fetch=False,
+            preloaded=rows,
+            indicator_cache=indicator_cache,
+        )
+    else:
+        res = run_portfolio_strategy_backtest(
+            db,
+            settings,
+            symbols=symbols,
+            config=cfg,
+            allow_fetch=False,
+            preloaded=rows,
+            indicator_cache=indicator_cache,
+        )
+    metrics = dict(res.get("metrics") or {})
+    # Single-symbol runs report trade counts under trade_stats; align the
+    # keys with the portfolio runner so both rank on the same columns.
+    trade_stats = res.get("trade_stats") or {}
+    if "count" in trade_stats:
+        metrics.setdefault("trades", trade_stats["count"])
+    if "win_rate_pct" in trade_stats:
+        metrics.setdefault("win_rate_pct", trade_stats["win_rate_pct"])
+    return metrics
+
+
+def _variant_error(exc: Exception) -> str:
+    if isinstance(exc, ValueError):
+        return str(exc)
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _sweep_workers(settings: Settings) -> int:
+    """Pool size when the caller does not pass one.
+
+    Sweeps run inside the backtest job pool, which runs up to
+    `backtest_workers` jobs at once, so one sweep gets that share of the CPU
+    cores (and never more, even if `backtest_sweep_workers` asks for it).
+    """
+
+    slots = max(1, int(getattr(settings, "backtest_workers", 1) or 1))
+    budget = max(1, (os.cpu_count() or 1) // slots)
+    configured = int(getattr(settings, "backtest_sweep_workers", 0) or 0)
+    return min(configured, budget) if configured > 0 else budget
+
+
+def _config_dict(cfg: Any) -> dict[str, Any]:
+    return json.loads(model_to_json(cfg))
+
+
+# Per-process state for pool workers, set once by `_init_worker`.
+_worker_state: dict[str, Any] = {}
+
+
+def _init_worker(
+    base_kind: str,
+    symbols: list[UniverseSymbolRef],
+    preloaded: dict[str, dict[str, list[dict[str, Any]]]],
+) -> None:
+    _worker_state.clear()
+    _worker_state.update(
+        base_kind=base_kind,
+        symbols=symbols,
+        preloaded=preloaded,
+        indicator_cache={},
+    )
+
+
+def _worker_run(config: dict[str, Any]) -> dict[str, Any]:
+    base_kind = _worker_state["base_kind"]
+    cfg = _parse(_config_model(base_kind), config)
+    # Preloaded runs never query the DB; the session is only a placeholder.
+    with SessionLocal() as db:
+        return _run_variant(
+            db,
+            get_settings(),
+            base_kind=base_kind,
+            symbols=_worker_state["symbols"],
+            cfg=cfg,
+            preloaded=_worker_state["preloaded"],
+            indicator_cache=_worker_state["indicator_cache"],
+        )
+
+
+def _rank(rows: list[dict[str, Any]], rank_by: str, rank_order: str) -> None:
+    """Sort rows best-first in place; failed variants go last, unranked."""
+
+    ok = [r for r in rows if r["error"] is None and rank_by in r["metrics"]]
+    ok.sort(key=lambda r: float(r["metrics"][rank_by]), reverse=rank_order == "DESC")
+    for i, r in enumerate(ok):
+        r["rank"] = i + 1
+    rows[:] = ok + [r for r in rows if r["rank"] is None]
+
+
+def run_sweep_backtest(
+    db: Session,
+    settings: Settings,
+    *,
+    symbols: list[UniverseSymbolRef],
+    config: SweepBacktestConfigIn,
+    allow_fetch: bool = True,
+    on_progress: ProgressCallback | None = None,
+    workers: Optional[int] = None,
+) -> dict[str, Any]:
+    """Evaluate every sweep variant and return a ranked metrics table."""
+
+    started = time.perf_counter()
+    unique: list[UniverseSymbolRef] = []
+    for s in symbols:
+        if s not in unique:
+            unique.append(s)
+    if not unique:
+        raise ValueError("No symbols provided.")
+    if config.base_kind == "STRATEGY":
+        unique = unique[:1]
+
+    variants = build_sweep_configs(config)
+    preloaded = _preload(
+        db,
+        settings,
+        symbols=unique,
+        configs=[cfg for _, cfg in variants],
+        allow_fetch=allow_fetch,
+        on_progress=on_progress,
+    )
+
+    if workers is None:
+        workers = _sweep_workers(settings)
+    workers = max(1, min(int(workers), len(variants)))
+
+    rows: list[dict[str, Any]] = [
+        {"variant": i, "rank": None, "params": params, "metrics": {}, "error": None}
+        for i, (params, _) in enumerate(variants)
+    ]
+
+    total = len(variants)
+    if workers == 1:
+        cache: IndicatorCache = {}
+        for i, (_, cfg) in enumerate(variants):
+            try:
+                rows[i]["metrics"] = _run_variant(
+                    db,
+                    settings,
+                    base_kind=config.base_kind,
+                    symbols=unique,
+                    cfg=cfg,
+                    preloaded=preloaded,
+                    indicator_cache=cache,
+                )
+            except Exception as exc:
+                rows[i]["error"] = _variant_error(exc)
+            report_progress(on_progress, i + 1, total, lo=_LOAD_PROGRESS_PCT)
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config.base_kind, unique, preloaded),
+        )
+        try:
+            pending: dict[Future, int] = {
+                pool.submit(_worker_run, _config_dict(cfg)): i
+                for i, (_, cfg) in enumerate(variants)
+            }
+            done_count = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = pending.pop(fut)
+                    try:
+                        rows[i]["metrics"] = fut.result()
+                    except Exception as exc:
+                        rows[i]["error"] = _variant_error(exc)
+                    done_count += 1
+                report_progress(on_progress, done_count, total, lo=_LOAD_PROGRESS_PCT)
+        finally:
+            # Also reached when the progress callback aborts a cancelled run.
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    failed = [r for r in rows if r["error"] is not None]
+    if len(failed) == total:
+        raise ValueError(f"All sweep variants failed: {failed[0]['error']}")
+
+    _rank(rows, config.rank_by, config.rank_order)
+    # Failed variants and ones without the ranking metric are never "best".
+    best = next((r for r in rows if r["rank"] is not None), None)
+
+    return {
+        "meta": {
+            "base_kind": config.base_kind,
+            "mode": config.mode,
+            "symbols": [s.key for s in unique],
+            "params": list(config.params),
+            "rank_by": config.rank_by,
+            "rank_order": config.rank_order,
+            "variants": total,
+            "evaluated": total - len(failed),
+            "failed": len(failed),
+            "workers": workers,
+            "duration_sec": round(time.perf_counter() - started, 3),
+        },
+        "rows": rows,
+        "best": (
+            {
+                "params": best["params"],
+                "metrics": best["metrics"],
+                "config": _config_dict(variants[best["variant"]][1]),
+            }
+            if best is not None
+            else None
+        ),
+    }
+
+
+__all__ = [
+    "MAX_SWEEP_VARIANTS",
+    "apply_sweep_params",
+    "build_sweep_configs",
+    "expand_sweep_variants",
+    "run_sweep_backtest",
+]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import math
 import time
+from array import array
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Iterable, Sequence
@@ -21,9 +22,11 @@ from app.services.alerts_v3_expression import (
     dumps_ast,
     timeframe_to_timedelta,
 )
+from app.services.candle_columns import PRICE_COLUMNS, CandleColumns
 from app.services.indicator_alerts import IndicatorAlertError
 
-# Reuse v3 indicator implementations to ensure formula parity.
+# Reuse the shared indicator kernels to ensure formula parity with alerts.
+from app.services import indicator_kernels as kernels  # noqa: E402
 from app.services.alerts_v3_expression import (  # noqa: E402
     _adx_series,
     _atr_series,
@@ -100,11 +103,28 @@ class TimeframeCandles:
     tf: str
     ts: list[datetime]  # candle timestamp (IST-naive); represents bar start in current storage.
     close_ts: list[datetime]  # evaluation timestamp for the bar close.
-    open: list[float]
-    high: list[float]
-    low: list[float]
-    close: list[float]
-    volume: list[float]
+    open: Sequence[float]
+    high: Sequence[float]
+    low: Sequence[float]
+    close: Sequence[float]
+    volume: Sequence[float]
+
+    @classmethod
+    def from_columns(cls, tf: str, columns: CandleColumns) -> "TimeframeCandles":
+        """Wrap a columnar series without copying its price columns."""
+
+        ts = columns.datetimes()
+        step = timeframe_to_timedelta(tf)
+        return cls(
+            tf=tf,
+            ts=ts,
+            close_ts=[t + step for t in ts],
+            open=columns.open,
+            high=columns.high,
+            low=columns.low,
+            close=columns.close,
+            volume=columns.volume,
+        )
 
 
 @dataclass
@@ -231,16 +251,12 @@ class V3SeriesEngine:
         if data is None:
             raise IndicatorAlertError(f"Unknown timeframe '{tf}'")
         key = name.lower()
-        if key == "open":
-            return [float(x) for x in data.open]
-        if key == "high":
-            return [float(x) for x in data.high]
-        if key == "low":
-            return [float(x) for x in data.low]
-        if key == "close":
-            return [float(x) for x in data.close]
-        if key == "volume":
-            return [float(x) for x in data.volume]
+        if key in PRICE_COLUMNS:
+            col = getattr(data, key)
+            # Columnar (array('d')) sources are already floats; copy in one pass.
+            if isinstance(col, array):
+                return col.tolist()
+            return [float(x) for x in col]
         if key == "hlc3":
             n = min(len(data.high), len(data.low), len(data.close))
             out = [_NAN] * n
@@ -282,36 +298,18 @@ class V3SeriesEngine:
 
         if isinstance(node, UnaryNode):
             child = self._eval_series_tf(node.child, tf=tf)
-            out = [_NAN] * len(child)
-            if node.op == "+":
-                out = [(_NAN if _is_missing(v) else float(v)) for v in child]
-            elif node.op == "-":
-                out = [(_NAN if _is_missing(v) else -float(v)) for v in child]
-            else:
+            if node.op not in {"+", "-"}:
                 raise IndicatorAlertError(f"Unsupported unary operator '{node.op}'")
+            out = kernels.unary(child, node.op)
             self._tf_cache[k] = out
             return out
 
         if isinstance(node, BinaryNode):
             a = self._eval_series_tf(node.left, tf=tf)
             b = self._eval_series_tf(node.right, tf=tf)
-            m = min(len(a), len(b))
-            out = [_NAN] * m
-            for i in range(m):
-                x = a[i]
-                y = b[i]
-                if _is_missing(x) or _is_missing(y):
-                    continue
-                if node.op == "+":
-                    out[i] = x + y
-                elif node.op == "-":
-                    out[i] = x - y
-                elif node.op == "*":
-                    out[i] = x * y
-                elif node.op == "/":
-                    out[i] = _NAN if y == 0 else x / y
-                else:
-                    raise IndicatorAlertError(f"Unsupported binary operator '{node.op}'")
+            if node.op not in kernels.BINARY_OPS:
+                raise IndicatorAlertError(f"Unsupported binary operator '{node.op}'")
+            out = kernels.binary(a, b, node.op)
             self._tf_cache[k] = out
             return out
 
@@ -382,21 +380,12 @@ class V3SeriesEngine:
                     out = _rsi_series(src, length)
                 elif fn == "STDDEV":
                     out = _stddev_series(src, length)
+                elif fn == "MAX":
+                    out = kernels.rolling_max(src, length)
+                elif fn == "MIN":
+                    out = kernels.rolling_min(src, length)
                 else:
-                    # Rolling aggregations
-                    out = [_NAN] * len(src)
-                    for i in range(len(src)):
-                        if i + 1 < length:
-                            continue
-                        window = src[i - length + 1 : i + 1]
-                        if any(_is_missing(v) for v in window):
-                            continue
-                        if fn == "MAX":
-                            out[i] = max(window)
-                        elif fn == "MIN":
-                            out[i] = min(window)
-                        elif fn == "SUM":
-                            out[i] = sum(window)
+                    out = kernels.rolling_sum(src, length)
                 self._tf_cache[k] = out
                 return out
 
@@ -407,13 +396,7 @@ class V3SeriesEngine:
                 if arg_tf != tf:
                     raise IndicatorAlertError("Mixed timeframes inside series expressions are not supported")
                 src = self._eval_series_tf(node.args[0], tf=tf)
-                out = [_NAN] * len(src)
-                for i in range(1, len(src)):
-                    a = src[i - 1]
-                    b = src[i]
-                    if _is_missing(a) or _is_missing(b) or a == 0:
-                        continue
-                    out[i] = (b - a) / a * 100.0
+                out = kernels.pct_change(src)
                 self._tf_cache[k] = out
                 return out
 
@@ -474,21 +457,7 @@ class V3SeriesEngine:
                 prices = self._eval_series_tf(node.args[0], tf=tf)
                 vols = self._eval_series_tf(node.args[1], tf=tf)
                 if fn == "OBV":
-                    out = [_NAN] * min(len(prices), len(vols))
-                    obv = 0.0
-                    if out:
-                        out[0] = 0.0
-                    for i in range(1, len(out)):
-                        p0 = prices[i - 1]
-                        p1 = prices[i]
-                        v = vols[i]
-                        if any(_is_missing(x) for x in (p0, p1, v)):
-                            continue
-                        if p1 > p0:
-                            obv += v
-                        elif p1 < p0:
-                            obv -= v
-                        out[i] = obv
+                    out = kernels.obv(prices, vols)
                     self._tf_cache[k] = out
                     return out
                 candles = [
@@ -0,0 +1,446 @@
+"""Process-wide registry of long-lived broker clients.
+
+Every broker hop used to query `BrokerConnection`, resolve the API key via
+`get_broker_secret` (several alias lookups plus a decrypt), decrypt the
+access token and open a fresh HTTP session. The registry keeps one pooled
+transport per (user, broker):
+
+- Zerodha: a `KiteConnect` whose `requests.Session` (HTTP keep-alive, sized
+  connection pool) is reused across calls and threads;
+- AngelOne: an `httpx.Client` (keep-alive, HTTP/2 when `h2` is installed)
+  handed to short-lived `AngelOneClient` wrappers.
+
+Each lookup still reads the connection row, so a rotated access token (new
+ciphertext) or a reconnect to another account rebuilds the transport; API
+key changes invalidate via an ORM listener on `BrokerSecret`. A replaced or
+invalidated transport is only closed once no `AngelOneClient` handed out
+for it is still alive, so calls already in flight on another thread finish
+on it. Per-client HTTP latency is recorded from transport hooks and exposed
+by `stats()`.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import weakref
+from dataclasses import dataclass, field, replace
+from threading import Lock
+from typing import Any, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.clients import AngelOneClient, AngelOneSession, ZerodhaClient
+from app.core.config import Settings, get_settings
+from app.core.crypto import decrypt_token
+from app.core.latency import LatencyWindow
+from app.models import BrokerConnection, BrokerSecret
+from app.services.broker_secrets import get_broker_secret
+
+ClientKey = tuple[Optional[int], str]
+
+_BROKERS = {"zerodha", "angelone"}
+
+try:  # pragma: no cover - depends on the environment
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:  # pragma: no cover - defensive
+    _HTTP2 = False
+
+
+class BrokerClientError(RuntimeError):
+    """Raised when a broker client cannot be built for a connection.
+
+    `reason` is one of "not_connected", "missing_api_key", "invalid_session"
+    or "library_missing" so callers can map it onto their own error types.
+    """
+
+    def __init__(self, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.reason = reason
+
+
+class ClientCallStats:
+    """Latency counters for one pooled client (recent window for percentiles)."""
+
+    def __init__(self, window: int = 256) -> None:
+        self._lock = Lock()
+        self._latency = LatencyWindow(window)
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, elapsed_ms: float, *, error: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            if error:
+                self.errors += 1
+            self.total_ms += elapsed_ms
+            self.last_ms = elapsed_ms
+            self._latency.record(elapsed_ms)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            calls = self.calls
+            latency = self._latency.as_dict()
+            latency.pop("count")
+            return {
+                "calls": calls,
+                "errors": self.errors,
+                "avg_ms": round(self.total_ms / calls, 2) if calls else 0.0,
+                **latency,
+                "last_ms": round(self.last_ms, 2),
+            }
+
+
+@dataclass
+class _Pooled:
+    fingerprint: tuple[Any, ...]
+    transport: Any
+    api_key: str
+    broker_user_id: str | None
+    session: AngelOneSession | None = None
+    created_at: float = field(default_factory=time.monotonic)
+    stats: ClientCallStats = field(default_factory=ClientCallStats)
+    # Live wrappers using `transport`; a retired transport closes at zero.
+    leases: int = 0
+    retired: bool = False
+
+
+def _close_transport(transport: Any) -> None:
+    try:
+        if isinstance(transport, httpx.Client):
+            transport.close()
+        else:
+            reqsession = getattr(transport, "reqsession", None)
+            if reqsession is not None:
+                reqsession.close()
+    except Exception:  # pragma: no cover - best effort
+        pass
+
+
+class BrokerClientRegistry:
+    """Thread-safe cache of pooled broker transports keyed by (user, broker)."""
+
+    def __init__(self, *, pool_size: int, timeout_sec: float) -> None:
+        self.pool_size = max(int(pool_size), 1)
+        self.timeout_sec = float(timeout_sec)
+        self._lock = Lock()
+        self._clients: dict[ClientKey, _Pooled] = {}
+        self._builds = 0
+        self._reuses = 0
+        self._invalidations = 0
+
+    def _retire(self, pooled: _Pooled) -> None:
+        with self._lock:
+            pooled.retired = True
+            idle = pooled.leases == 0
+        if idle:
+            _close_transport(pooled.transport)
+
+    def _lease(self, pooled: _Pooled, holder: Any) -> None:
+        with self._lock:
+            pooled.leases += 1
+        weakref.finalize(holder, self._release, pooled)
+
+    def _release(self, pooled: _Pooled) -> None:
+        with self._lock:
+            pooled.leases -= 1
+            idle = pooled.retired and pooled.leases == 0
+        if idle:
+            _close_transport(pooled.transport)
+
+    def _connection(
+        self, db: Session, broker: str, user_id: int | None
+    ) -> BrokerConnection:
+        q = db.query(BrokerConnection).filter(BrokerConnection.broker_name == broker)
+        if user_id is not None:
+            q = q.filter(BrokerConnection.user_id == user_id)
+        conn = q.order_by(BrokerConnection.updated_at.desc()).first()
+        if conn is None:
+            label = "Zerodha" if broker == "zerodha" else "AngelOne"
+            raise BrokerClientError("not_connected", f"{label} is not connected.")
+        return conn
+
+    def _api_key(self, db: Session, settings: Settings, broker: str, user_id: int | None) -> str:
+        api_key = get_broker_secret(
+            db,
+            settings,
+            broker_name=broker,
+            key="api_key",
+            user_id=user_id,
+        )
+        if not api_key:
+            label = "Zerodha" if broker == "zerodha" else "SmartAPI"
+            raise BrokerClientError(
+                "missing_api_key",
+                f"{label} API key is not configured. "
+                "Please configure it in the broker settings.",
+            )
+        return str(api_key)
+
+    def _lookup(
+        self, db: Session, broker: str, user_id: int | None
+    ) -> tuple[BrokerConnection, ClientKey, tuple[Any, ...], _Pooled | None]:
+        conn = self._connection(db, broker, user_id)
+        key: ClientKey = (conn.user_id, broker)
+        fingerprint = (conn.id, conn.access_token_encrypted)
+        with self._lock:
+            pooled = self._clients.get(key)
+            if pooled is not None and pooled.fingerprint == fingerprint:
+                self._reuses += 1
+                pooled.broker_user_id = getattr(conn, "broker_user_id", None)
+                return conn, key, fingerprint, pooled
+        return conn, key, fingerprint, None
+
+    def _store(self, key: ClientKey, pooled: _Pooled) -> _Pooled:
+        with self._lock:
+            old = self._clients.get(key)
+            if old is not None and old.fingerprint == pooled.fingerprint:
+                # Another thread built the same client first; keep theirs.
+                _close_transport(pooled.transport)
+                self._reuses += 1
+                return old
+            self._clients[key] = pooled
+            self._builds += 1
+        if old is not None:
+            self._retire(old)
+        return pooled
+
+    def kite(
+        self, db: Session, settings: Settings, *, user_id: int | None = None
+    ) -> tuple[Any, str | None]:
+        """Return (pooled KiteConnect, broker_user_id) for the connection."""
+
+        conn, key, fingerprint, pooled = self._lookup(db, "zerodha", user_id)
+        if pooled is not None:
+            return pooled.transport, pooled.broker_user_id
+
+        api_key = self._api_key(db, settings, "zerodha", conn.user_id)
+        try:
+            from kiteconnect import KiteConnect  # type: ignore[import]
+        except ImportError as exc:  # pragma: no cover - defensive
+            raise BrokerClientError(
+                "library_missing",
+                "kiteconnect library is not installed in the backend environment.",
+            ) from exc
+
+        access_token = decrypt_token(settings, conn.access_token_encrypted)
+        kite = KiteConnect(api_key=api_key)
+        kite.set_access_token(access_token)
+        pooled = _Pooled(
+            fingerprint=fingerprint,
+            transport=kite,
+            api_key=api_key,
+            broker_user_id=getattr(conn, "broker_user_id", None),
+        )
+        reqsession = getattr(kite, "reqsession", None)
+        if reqsession is not None:
+            from requests.adapters import HTTPAdapter
+
+            reqsession.mount(
+                "https://",
+                HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size),
+            )
+            stats = pooled.stats
+
+            def _record(resp: Any, *_args: Any, **_kwargs: Any) -> None:
+                elapsed = getattr(resp, "elapsed", None)
+                if elapsed is not None:
+                    stats.record(
+                        elapsed.total_seconds() * 1000.0,
+                        error=int(getattr(resp, "status_code", 0) or 0) >= 400,
+                    )
+
+            reqsession.hooks.setdefault("response", []).append(_record)
+        pooled = self._store(key, pooled)
+        return pooled.transport, pooled.broker_user_id
+
+    def zerodha(
+        self, db: Session, settings: Settings, *, user_id: int | None = None
+    ) -> ZerodhaClient:
+        kite, broker_user_id = self.kite(db, settings, user_id=user_id)
+        client = ZerodhaClient(kite)
+        client.broker_user_id = broker_user_id  # type: ignore[attr-defined]
+        return client
+
+    def angelone(
+        self, db: Session, settings: Settings, *, user_id: int | None = None
+    ) -> AngelOneClient:
+        conn, key, fingerprint, pooled = self._lookup(db, "angelone", user_id)
+        if pooled is None:
+            api_key = self._api_key(db, settings, "angelone", conn.user_id)
+            raw = decrypt_token(settings, conn.access_token_encrypted)
+            try:
+                parsed = json.loads(raw) if raw else {}
+            except Exception as exc:
+                raise BrokerClientError(
+                    "invalid_session", f"AngelOne session is invalid: {exc}"
+                ) from exc
+            jwt = str(parsed.get("jwt_token") or "")
+            if not jwt:
+                raise BrokerClientError(
+                    "invalid_session",
+                    "AngelOne session is missing jwt_token. Please reconnect.",
+                )
+            session = AngelOneSession(
+                jwt_token=jwt,
+                refresh_token=str(parsed.get("refresh_token") or "") or None,
+                feed_token=str(parsed.get("feed_token") or "") or None,
+                client_code=str(parsed.get("client_code") or "") or None,
+            )
+            stats = ClientCallStats()
+
+            def _start(request: httpx.Request) -> None:
+                request.extensions["st_started"] = time.perf_counter()
+
+            def _finish(response: httpx.Response) -> None:
+                started = response.request.extensions.get("st_started")
+                if started is not None:
+                    stats.record(
+                        (time.perf_counter() - started) * 1000.0,
+                        error=response.status_code >= 400,
+                    )
+
+            transport = httpx.Client(
+                timeout=self.timeout_sec,
+                http2=_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                event_hooks={"request": [_start], "response": [_finish]},
+            )
+            pooled = self._store(
+                key,
+                _Pooled(
+                    fingerprint=fingerprint,
+                    transport=transport,
+                    api_key=api_key,
+                    broker_user_id=getattr(conn, "broker_user_id", None),
+                    session=session,
+                    stats=stats,
+                ),
+            )
+
+        if pooled.session is None:
+            raise BrokerClientError(
+                "invalid_session", "AngelOne session is missing. Please reconnect."
+            )
+        client = AngelOneClient(
+            api_key=pooled.api_key,
+            session=replace(pooled.session),
+            http_client=pooled.transport,
+        )
+        client.broker_user_id = pooled.broker_user_id  # type: ignore[attr-defined]
+        self._lease(pooled, client)
+        return client
+
+    def invalidate(
+        self,
+        *,
+        user_id: Optional[int] = None,
+        broker_name: Optional[str] = None,
+    ) -> int:
+        """Drop pooled clients (None matches all); returns how many were dropped.
+
+        Transports still used by live `AngelOneClient` wrappers close when the
+        last of those wrappers is garbage collected.
+        """
+
+        broker = (broker_name or "").strip().lower() or None
+        with self._lock:
+            keys = [
+                k
+                for k in self._clients
+                if (user_id is None or k[0] == user_id)
+                and (broker is None or k[1] == broker)
+            ]
+            dropped = [self._clients.pop(k) for k in keys]
+            self._invalidations += len(dropped)
+        for pooled in dropped:
+            self._retire(pooled)
+        return len(dropped)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            clients = {
+                f"{broker}:{uid if uid is not None else '-'}": {
+                    "age_sec": round(time.monotonic() - pooled.created_at, 1),
+                    **pooled.stats.as_dict(),
+                }
+                for (uid, broker), pooled in self._clients.items()
+            }
+            return {
+                "pool_size": self.pool_size,
+                "http2": _HTTP2,
+                "clients": clients,
+                "builds": self._builds,
+                "reuses": self._reuses,
+                "invalidations": self._invalidations,
+            }
+
+
+def http_error_from_client_error(exc: BrokerClientError) -> HTTPException:
+    """Map a registry error onto the HTTP error API routes have always returned."""
+
+    code = (
+        status.HTTP_500_INTERNAL_SERVER_ERROR
+        if exc.reason == "library_missing"
+        else status.HTTP_400_BAD_REQUEST
+    )
+    return HTTPException(status_code=code, detail=str(exc))
+
+
+_registry: BrokerClientRegistry | None = None
+_registry_lock = Lock()
+
+
+def get_broker_client_registry() -> BrokerClientRegistry:
+    """Return the process-wide broker client registry, creating it on first use."""
+
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                settings = get_settings()
+                _registry = BrokerClientRegistry(
+                    pool_size=int(getattr(settings, "broker_client_pool_size", 10)),
+                    timeout_sec=float(
+                        getattr(settings, "broker_client_timeout_sec", 30.0)
+                    ),
+                )
+    return _registry
+
+
+@event.listens_for(BrokerSecret, "after_insert")
+@event.listens_for(BrokerSecret, "after_update")
+@event.listens_for(BrokerSecret, "after_delete")
+def _invalidate_on_secret_change(_mapper, _connection, target: BrokerSecret) -> None:
+    broker = (target.broker_name or "").strip().lower()
+    if _registry is None or broker not in _BROKERS:
+        return
+    # Legacy global secrets (user_id NULL) can back any user's client, and
+    # user_id=None matches every user.
+    _registry.invalidate(user_id=target.user_id, broker_name=broker)
+
+
+@event.listens_for(BrokerConnection, "after_delete")
+def _invalidate_on_disconnect(_mapper, _connection, target: BrokerConnection) -> None:
+    if _registry is None:
+        return
+    _registry.invalidate(user_id=target.user_id, broker_name=target.broker_name)
+
+
+__all__ = [
+    "BrokerClientError",
+    "BrokerClientRegistry",
+    "ClientCallStats",
+    "get_broker_client_registry",
+    "http_error_from_client_error",
+]
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.core.config import Settings
 from app.core.crypto import decrypt_token, encrypt_token
 from app.models import BrokerSecret
+from app.services.config_cache import cached_config, secret_family
 
 
 def get_broker_secret(
@@ -42,20 +43,32 @@ def get_broker_secret(
         elif k_norm == "api_secret":
             alias_keys += ["SMARTAPI_API_SECRET", "ANGELONE_API_SECRET"]
 
-    # Prefer the canonical key first, then any known aliases.
-    for candidate in alias_keys:
-        query = db.query(BrokerSecret).filter(
-            BrokerSecret.broker_name == broker_name,
-            func.lower(BrokerSecret.key) == candidate.lower(),
-        )
-        if user_id is not None:
-            query = query.filter(BrokerSecret.user_id == user_id)
-        else:
-            query = query.filter(BrokerSecret.user_id.is_(None))
-        # If duplicates exist due to legacy case variations, pick the first.
-        secret = query.order_by(BrokerSecret.updated_at.desc()).first()
-        if secret is not None:
-            return decrypt_token(settings, secret.value_encrypted)
+    def _load() -> Optional[str]:
+        # Prefer the canonical key first, then any known aliases.
+        for candidate in alias_keys:
+            query = db.query(BrokerSecret).filter(
+                BrokerSecret.broker_name == broker_name,
+                func.lower(BrokerSecret.key) == candidate.lower(),
+            )
+            if user_id is not None:
+                query = query.filter(BrokerSecret.user_id == user_id)
+            else:
+                query = query.filter(BrokerSecret.user_id.is_(None))
+            # If duplicates exist due to legacy case variations, pick the first.
+            secret = query.order_by(BrokerSecret.updated_at.desc()).first()
+            if secret is not None:
+                return decrypt_token(settings, secret.value_encrypted)
+        return None
+
+    # Only the DB lookup is cached; env fallbacks below are read live.
+    stored = cached_config(
+        secret_family(broker_name),
+        ("secret", broker_name, k, user_id),
+        _load,
+        owner=settings,
+    )
+    if stored is not None:
+        return stored
 
     # Env fallback (optional): allow deploying without storing secrets in DB.
     # Settings uses env_prefix=ST_, so these are ST_KITE_API_KEY, etc.
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+from app.core.market_hours import IST_OFFSET
+
+# Candle timestamps are stored as IST-naive datetimes. Columns keep them as
+# int64 microseconds since the Unix epoch (UTC) so round-trips are exact.
+_EPOCH_IST_NAIVE = datetime(1970, 1, 1) + IST_OFFSET
+_ONE_US = timedelta(microseconds=1)
+_US_PER_DAY = 86_400 * 1_000_000
+_IST_OFFSET_US = int(IST_OFFSET / _ONE_US)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def ist_naive_to_epoch_us(dt: datetime) -> int:
+    """Convert an IST-naive datetime into UTC epoch microseconds."""
+
+    return (dt - _EPOCH_IST_NAIVE) // _ONE_US
+
+
+def epoch_us_to_ist_naive(value: int) -> datetime:
+    """Convert UTC epoch microseconds back into an IST-naive datetime."""
+
+    return _EPOCH_IST_NAIVE + timedelta(microseconds=int(value))
+
+
+class CandleColumns:
+    """Compact columnar OHLCV series.
+
+    `ts` is an `array('q')` of UTC epoch microseconds; open/high/low/close and
+    volume are parallel `array('d')` columns. One bar costs 48 bytes instead of
+    a dict plus a datetime and five boxed floats on the `load_series` path.
+    """
+
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(
+        self,
+        ts: Iterable[int] = (),
+        open: Iterable[float] = (),  # noqa: A002 - OHLCV field name
+        high: Iterable[float] = (),
+        low: Iterable[float] = (),
+        close: Iterable[float] = (),
+        volume: Iterable[float] = (),
+    ) -> None:
+        self.ts = ts if isinstance(ts, array) and ts.typecode == "q" else array("q", ts)
+        self.open = _as_double_array(open)
+        self.high = _as_double_array(high)
+        self.low = _as_double_array(low)
+        self.close = _as_double_array(close)
+        self.volume = _as_double_array(volume)
+
+    @classmethod
+    def from_tuples(cls, rows: Iterable[Sequence[Any]]) -> "CandleColumns":
+        """Build from (ts, open, high, low, close, volume) tuples sorted by ts."""
+
+        out = cls()
+        ts_append = out.ts.append
+        o_append = out.open.append
+        h_append = out.high.append
+        l_append = out.low.append
+        c_append = out.close.append
+        v_append = out.volume.append
+        epoch = _EPOCH_IST_NAIVE
+        for ts, o, h, lo, c, v in rows:
+            ts_append((ts - epoch) // _ONE_US)
+            o_append(o)
+            h_append(h)
+            l_append(lo)
+            c_append(c)
+            v_append(v or 0.0)
+        return out
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "CandleColumns":
+        """Build from `load_series`-style OHLCV dicts."""
+
+        return cls.from_tuples(
+            (r["ts"], r["open"], r["high"], r["low"], r["close"], r["volume"])
+            for r in rows
+        )
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def column(self, name: str) -> array:
+        key = name.lower()
+        if key not in PRICE_COLUMNS:
+            raise KeyError(name)
+        return getattr(self, key)
+
+    def datetime_at(self, idx: int) -> datetime:
+        return epoch_us_to_ist_naive(self.ts[idx])
+
+    def datetimes(self) -> List[datetime]:
+        epoch = _EPOCH_IST_NAIVE
+        return [epoch + timedelta(microseconds=t) for t in self.ts]
+
+    def dates(self) -> List[date]:
+        """Return the IST calendar date of every bar."""
+
+        offset = _IST_OFFSET_US
+        ordinal = _EPOCH_ORDINAL
+        return [date.fromordinal(ordinal + (t + offset) // _US_PER_DAY) for t in self.ts]
+
+    def index_at_or_after(self, dt: datetime) -> int:
+        return bisect_left(self.ts, ist_naive_to_epoch_us(dt))
+
+    def slice(self, start: int = 0, stop: int | None = None) -> "CandleColumns":
+        end = len(self.ts) if stop is None else stop
+        return CandleColumns(
+            self.ts[start:end],
+            self.open[start:end],
+            self.high[start:end],
+            self.low[start:end],
+            self.close[start:end],
+            self.volume[start:end],
+        )
+
+    def concat(self, other: "CandleColumns") -> "CandleColumns":
+        return CandleColumns(
+            self.ts + other.ts,
+            self.open + other.open,
+            self.high + other.high,
+            self.low + other.low,
+            self.close + other.close,
+            self.volume + other.volume,
+        )
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Materialize `load_series`-compatible dicts (for legacy callers)."""
+
+        return [
+            {"ts": ts, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+            for ts, o, h, lo, c, v in zip(
+                self.datetimes(),
+                self.open,
+                self.high,
+                self.low,
+                self.close,
+                self.volume,
+                strict=False,
+            )
+        ]
+
+    def nbytes(self) -> int:
+        return sum(
+            col.itemsize * len(col)
+            for col in (self.ts, self.open, self.high, self.low, self.close, self.volume)
+        )
+
+
+def _as_double_array(values: Iterable[float]) -> array:
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    return array("d", values)
+
+
+__all__ = [
+    "CandleColumns",
+    "PRICE_COLUMNS",
+    "epoch_us_to_ist_naive",
+    "ist_naive_to_epoch_us",
+]
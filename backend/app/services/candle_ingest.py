@@ -0,0 +1,189 @@
+"""Bulk candle ingestion.
+
+Broker history arrives in batches of thousands of bars. Instead of one ORM
+`Candle` object per bar and a preload of every timestamp ever stored for the
+instrument, rows are written with Core `executemany` using
+`INSERT ... ON CONFLICT DO NOTHING` on SQLite and PostgreSQL, so duplicates
+(including ones inserted concurrently by another writer) are skipped by the
+database. Existence checks are limited to the time range being written.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import Insert, insert
+from sqlalchemy.orm import Session
+
+from app.models import Candle
+from app.services.candle_rollups import refresh_rollups
+
+CANDLE_KEY_COLUMNS = ("symbol", "exchange", "timeframe", "ts")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+@dataclass
+class IngestResult:
+    received: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.inserted / self.seconds if self.seconds > 0 else 0.0
+
+
+_stats_lock = Lock()
+_totals = IngestResult()
+_batches = 0
+
+
+def _insert_statement(dialect_name: str) -> Insert:
+    """Return a conflict-skipping insert where the dialect supports one."""
+
+    table = Candle.__table__
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table).on_conflict_do_nothing(
+            index_elements=list(CANDLE_KEY_COLUMNS)
+        )
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table).on_conflict_do_nothing(
+            index_elements=list(CANDLE_KEY_COLUMNS)
+        )
+    # Other dialects raise IntegrityError on a concurrent duplicate; callers
+    # roll back that batch as before.
+    return insert(table)
+
+
+def existing_candle_ts(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+) -> set[datetime]:
+    """Return stored bar timestamps for one instrument within [start, end]."""
+
+    return {
+        row[0]
+        for row in db.query(Candle.ts).filter(
+            Candle.symbol == symbol,
+            Candle.exchange == exchange,
+            Candle.timeframe == timeframe,
+            Candle.ts >= start,
+            Candle.ts <= end,
+        )
+    }
+
+
+def bulk_insert_candles(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    timeframe: str,
+    bars: Iterable[Mapping[str, Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> IngestResult:
+    """Insert OHLCV bars for one instrument/timeframe, skipping stored bars.
+
+    Each bar needs `ts`, `open`, `high`, `low`, `close` and optionally
+    `volume`. Rollups of derived timeframes are refreshed in the same
+    transaction. The caller owns the transaction; the candle store is
+    invalidated for the instrument when it commits.
+    """
+
+    started = time.perf_counter()
+    by_ts: dict[datetime, dict[str, Any]] = {}
+    received = 0
+    for bar in bars:
+        received += 1
+        ts = bar["ts"]
+        by_ts[ts] = {
+            "symbol": symbol,
+            "exchange": exchange,
+            "timeframe": timeframe,
+            "ts": ts,
+            "open": float(bar["open"]),
+            "high": float(bar["high"]),
+            "low": float(bar["low"]),
+            "close": float(bar["close"]),
+            "volume": float(bar.get("volume") or 0.0),
+        }
+
+    result = IngestResult(received=received)
+    if by_ts:
+        existing = existing_candle_ts(
+            db,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=timeframe,
+            start=min(by_ts),
+            end=max(by_ts),
+        )
+        rows = [row for ts, row in sorted(by_ts.items()) if ts not in existing]
+        stmt = _insert_statement(db.get_bind().dialect.name)
+        size = max(int(chunk_size), 1)
+        for i in range(0, len(rows), size):
+            chunk = rows[i : i + size]
+            count = db.execute(stmt, chunk).rowcount
+            # Skipped conflicts are not counted; drivers that cannot report an
+            # executemany rowcount return -1.
+            result.inserted += count if count is not None and count >= 0 else len(chunk)
+        if rows:
+            # candle_store imports market_data, which imports this module.
+            from app.services.candle_store import mark_candles_written
+
+            mark_candles_written(db, symbol=symbol, exchange=exchange)
+            refresh_rollups(
+                db,
+                symbol=symbol,
+                exchange=exchange,
+                base_timeframe=timeframe,
+                start=rows[0]["ts"],
+                end=rows[-1]["ts"],
+            )
+    result.skipped = result.received - result.inserted
+    result.seconds = time.perf_counter() - started
+
+    global _batches
+    with _stats_lock:
+        _batches += 1
+        _totals.received += result.received
+        _totals.inserted += result.inserted
+        _totals.skipped += result.skipped
+        _totals.seconds += result.seconds
+    return result
+
+
+def get_ingest_stats() -> dict[str, Any]:
+    """Return process-wide bulk ingestion totals."""
+
+    with _stats_lock:
+        return {
+            "batches": _batches,
+            "received": _totals.received,
+            "inserted": _totals.inserted,
+            "skipped": _totals.skipped,
+            "seconds": round(_totals.seconds, 3),
+            "rows_per_sec": round(_totals.rows_per_sec, 1),
+        }
+
+
+__all__ = [
+    "IngestResult",
+    "bulk_insert_candles",
+    "existing_candle_ts",
+    "get_ingest_stats",
+]
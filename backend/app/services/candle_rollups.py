@@ -0,0 +1,550 @@
+"""Materialized multi-timeframe candle rollups.
+
+Derived timeframes (5m/15m/30m/1h from 1m, 1mo/1y from 1d) used to be
+re-aggregated from base candles on every `load_series` call, so a year of 1h
+bars meant reading ~90k 1m rows. Rollups are stored in `candle_rollups` and
+kept current when base candles are ingested:
+
+- `refresh_rollups` re-aggregates only the buckets touched by a write;
+- an instrument whose rollups have never been built (no `candle_rollup_state`
+  row) gets a full build on its next ingest, or via `rebuild_rollups`;
+- ORM candle writes bypass ingestion, so they drop the instrument's state row
+  and reads fall back to aggregating base candles until the next rebuild.
+
+Reads (`load_rollup_series`) take whole buckets from the rollup table and
+aggregate only the partial buckets at the window edges from base candles, so
+results match the on-the-fly aggregation bar for bar.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from threading import Lock
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.market_hours import IST_OFFSET
+from app.models import Candle, CandleRollup, CandleRollupState
+
+ROLLUP_TIMEFRAMES: dict[str, tuple[str, ...]] = {
+    "1m": ("5m", "15m", "30m", "1h"),
+    "1d": ("1mo", "1y"),
+}
+ROLLUP_BASE: dict[str, str] = {
+    tf: base for base, tfs in ROLLUP_TIMEFRAMES.items() for tf in tfs
+}
+_INTRADAY_MINUTES = {"5m": 5, "15m": 15, "30m": 30, "1h": 60}
+_INSERT_CHUNK = 2000
+_STALE_INFO_KEY = "candle_rollups_stale"
+
+Row = tuple[datetime, float, float, float, float, float]
+
+_stats_lock = Lock()
+_stats = {
+    "reads": 0,
+    "fallback_reads": 0,
+    "refreshes": 0,
+    "rebuilds": 0,
+    "rows_written": 0,
+}
+
+
+def _bump(**deltas: int) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def _now_ist_naive() -> datetime:
+    return (datetime.now(UTC) + IST_OFFSET).replace(tzinfo=None)
+
+
+def bucket_start(timeframe: str, ts: datetime) -> datetime:
+    """Return the start of the `timeframe` bucket containing `ts`."""
+
+    minutes = _INTRADAY_MINUTES.get(timeframe)
+    if minutes is not None:
+        return ts.replace(
+            minute=(ts.minute // minutes) * minutes, second=0, microsecond=0
+        )
+    if timeframe == "1mo":
+        return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if timeframe == "1y":
+        return ts.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported rollup timeframe: {timeframe}")
+
+
+def next_bucket(timeframe: str, start: datetime) -> datetime:
+    """Return the start of the bucket following the one starting at `start`."""
+
+    minutes = _INTRADAY_MINUTES.get(timeframe)
+    if minutes is not None:
+        return start + timedelta(minutes=minutes)
+    if timeframe == "1mo":
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+    if timeframe == "1y":
+        return start.replace(year=start.year + 1)
+    raise ValueError(f"Unsupported rollup timeframe: {timeframe}")
+
+
+def _series_ts(timeframe: str, bucket: datetime, first_ts: datetime) -> datetime:
+    # Yearly bars have always been stamped with the month of their first bar
+    # (a series starting mid-year opens on that month), not with January.
+    if timeframe == "1y":
+        return first_ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return bucket
+
+
+def aggregate(timeframe: str, rows: Iterable[Sequence[Any]]) -> list[list[Any]]:
+    """Aggregate ts-ordered (ts, o, h, l, c, v) rows into rollup buckets.
+
+    Each bucket is `[bucket_ts, first_ts, bar_count, o, h, l, c, v]`.
+    """
+
+    key: datetime | None = None
+    bucket: list[Any] = []
+    out: list[list[Any]] = []
+    for ts, bo, bh, bl, bc, bv in rows:
+        start = bucket_start(timeframe, ts)
+        if start != key:
+            key = start
+            bucket = [start, ts, 1, bo, bh, bl, bc, bv]
+            out.append(bucket)
+            continue
+        bucket[2] += 1
+        if bh > bucket[4]:
+            bucket[4] = bh
+        if bl < bucket[5]:
+            bucket[5] = bl
+        bucket[6] = bc
+        bucket[7] += bv
+    return out
+
+
+def _as_rows(timeframe: str, buckets: Iterable[Sequence[Any]]) -> list[Row]:
+    return [
+        (_series_ts(timeframe, b[0], b[1]), b[3], b[4], b[5], b[6], b[7])
+        for b in buckets
+    ]
+
+
+def _base_rows(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    base_timeframe: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    end_inclusive: bool = False,
+) -> list[Row]:
+    stmt = select(
+        Candle.ts, Candle.open, Candle.high, Candle.low, Candle.close, Candle.volume
+    ).where(
+        Candle.symbol == symbol,
+        Candle.exchange == exchange,
+        Candle.timeframe == base_timeframe,
+    )
+    if start is not None:
+        stmt = stmt.where(Candle.ts >= start)
+    if end is not None:
+        stmt = stmt.where(Candle.ts <= end if end_inclusive else Candle.ts < end)
+    return [tuple(r) for r in db.execute(stmt.order_by(Candle.ts))]  # type: ignore[misc]
+
+
+def rollups_ready(
+    db: Session, *, symbol: str, exchange: str, base_timeframe: str
+) -> bool:
+    """Return True when the instrument's rollups are complete and maintained."""
+
+    return (
+        db.execute(
+            select(CandleRollupState.id).where(
+                CandleRollupState.symbol == symbol,
+                CandleRollupState.exchange == exchange,
+                CandleRollupState.base_timeframe == base_timeframe,
+            )
+        ).first()
+        is not None
+    )
+
+
+def _write_buckets(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    timeframe: str,
+    buckets: list[list[Any]],
+) -> int:
+    rows = [
+        {
+            "symbol": symbol,
+            "exchange": exchange,
+            "timeframe": timeframe,
+            "ts": b[0],
+            "first_ts": b[1],
+            "bar_count": b[2],
+            "open": b[3],
+            "high": b[4],
+            "low": b[5],
+            "close": b[6],
+            "volume": b[7],
+        }
+        for b in buckets
+    ]
+    stmt = insert(CandleRollup.__table__)
+    for i in range(0, len(rows), _INSERT_CHUNK):
+        db.execute(stmt, rows[i : i + _INSERT_CHUNK])
+    return len(rows)
+
+
+def _delete_rollups(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    timeframes: Sequence[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> None:
+    stmt = delete(CandleRollup).where(
+        CandleRollup.symbol == symbol,
+        CandleRollup.exchange == exchange,
+        CandleRollup.timeframe.in_(list(timeframes)),
+    )
+    if start is not None:
+        stmt = stmt.where(CandleRollup.ts >= start)
+    if end is not None:
+        stmt = stmt.where(CandleRollup.ts < end)
+    db.execute(stmt.execution_options(synchronize_session=False))
+
+
+def rebuild_rollups(
+    db: Session, *, symbol: str, exchange: str, base_timeframe: str
+) -> int:
+    """Rebuild every rollup of one instrument from its base candles.
+
+    Returns the number of rollup rows written. The caller commits.
+    """
+
+    timeframes = ROLLUP_TIMEFRAMES.get(base_timeframe)
+    if not timeframes:
+        return 0
+    rows = _base_rows(
+        db, symbol=symbol, exchange=exchange, base_timeframe=base_timeframe
+    )
+    _delete_rollups(db, symbol=symbol, exchange=exchange, timeframes=timeframes)
+    written = 0
+    for tf in timeframes:
+        written += _write_buckets(
+            db,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=tf,
+            buckets=aggregate(tf, rows),
+        )
+    db.execute(
+        delete(CandleRollupState).where(
+            CandleRollupState.symbol == symbol,
+            CandleRollupState.exchange == exchange,
+            CandleRollupState.base_timeframe == base_timeframe,
+        )
+    )
+    db.execute(
+        insert(CandleRollupState.__table__).values(
+            symbol=symbol,
+            exchange=exchange,
+            base_timeframe=base_timeframe,
+            built_at=_now_ist_naive(),
+        )
+    )
+    # Later ORM writes in this transaction must drop the fresh state again.
+    db.info.get(_STALE_INFO_KEY, set()).discard((symbol, exchange, base_timeframe))
+    _bump(rebuilds=1, rows_written=written)
+    return written
+
+
+def refresh_rollups(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    base_timeframe: str,
+    start: datetime,
+    end: datetime,
+) -> int:
+    """Re-aggregate the rollup buckets overlapping base bars in [start, end].
+
+    Instruments without built rollups get a full rebuild instead. Returns the
+    number of rollup rows written. The caller commits.
+    """
+
+    timeframes = ROLLUP_TIMEFRAMES.get(base_timeframe)
+    if not timeframes:
+        return 0
+    if not rollups_ready(
+        db, symbol=symbol, exchange=exchange, base_timeframe=base_timeframe
+    ):
+        return rebuild_rollups(
+            db, symbol=symbol, exchange=exchange, base_timeframe=base_timeframe
+        )
+
+    # Buckets nest (5m..30m inside 1h, months inside years), so the widest
+    # timeframe's range covers every bucket that needs recomputing.
+    widest = timeframes[-1]
+    lo = bucket_start(widest, start)
+    hi = next_bucket(widest, bucket_start(widest, end))
+    rows = _base_rows(
+        db,
+        symbol=symbol,
+        exchange=exchange,
+        base_timeframe=base_timeframe,
+        start=lo,
+        end=hi,
+    )
+    written = 0
+    for tf in timeframes:
+        tf_lo = bucket_start(tf, start)
+        tf_hi = next_bucket(tf, bucket_start(tf, end))
+        _delete_rollups(
+            db,
+            symbol=symbol,
+            exchange=exchange,
+            timeframes=(tf,),
+            start=tf_lo,
+            end=tf_hi,
+        )
+        written += _write_buckets(
+            db,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=tf,
+            buckets=aggregate(tf, (r for r in rows if tf_lo <= r[0] < tf_hi)),
+        )
+    _bump(refreshes=1, rows_written=written)
+    return written
+
+
+def load_rollup_series(
+    db: Session,
+    *,
+    symbol: str,
+    exchange: str,
+    timeframe: str,
+    start: datetime,
+    end: datetime,
+) -> list[Row] | None:
+    """Return (ts, o, h, l, c, v) rows for a derived timeframe from rollups.
+
+    Returns None when the instrument has no built rollups; callers then
+    aggregate base candles themselves.
+    """
+
+    base_timeframe = ROLLUP_BASE.get(timeframe)
+    if base_timeframe is None:
+        return None
+    if not rollups_ready(
+        db, symbol=symbol, exchange=exchange, base_timeframe=base_timeframe
+    ):
+        _bump(fallback_reads=1)
+        return None
+
+    first_full = bucket_start(timeframe, start)
+    if first_full < start:
+        first_full = next_bucket(timeframe, first_full)
+    tail_start = max(bucket_start(timeframe, end), first_full)
+
+    out: list[Row] = []
+    if start < first_full:
+        # Partial leading bucket: only the bars inside the window count.
+        head_end = min(first_full - timedelta(microseconds=1), end)
+        out.extend(
+            _as_rows(
+                timeframe,
+                aggregate(
+                    timeframe,
+                    _base_rows(
+                        db,
+                        symbol=symbol,
+                        exchange=exchange,
+                        base_timeframe=base_timeframe,
+                        start=start,
+                        end=head_end,
+                        end_inclusive=True,
+                    ),
+                ),
+            )
+        )
+    if first_full < tail_start:
+        stored = db.execute(
+            select(
+                CandleRollup.ts,
+                CandleRollup.first_ts,
+                CandleRollup.bar_count,
+                CandleRollup.open,
+                CandleRollup.high,
+                CandleRollup.low,
+                CandleRollup.close,
+                CandleRollup.volume,
+            )
+            .where(
+                CandleRollup.symbol == symbol,
+                CandleRollup.exchange == exchange,
+                CandleRollup.timeframe == timeframe,
+                CandleRollup.ts >= first_full,
+                CandleRollup.ts < tail_start,
+            )
+            .order_by(CandleRollup.ts)
+        )
+        out.extend(_as_rows(timeframe, stored))
+    if tail_start <= end:
+        # The last bucket may extend past `end` (or still be forming).
+        out.extend(
+            _as_rows(
+                timeframe,
+                aggregate(
+                    timeframe,
+                    _base_rows(
+                        db,
+                        symbol=symbol,
+                        exchange=exchange,
+                        base_timeframe=base_timeframe,
+                        start=tail_start,
+                        end=end,
+                        end_inclusive=True,
+                    ),
+                ),
+            )
+        )
+    _bump(reads=1)
+    return out
+
+
+def check_rollups(
+    db: Session, *, symbol: str, exchange: str, base_timeframe: str
+) -> dict[str, Any]:
+    """Compare stored rollups with a fresh aggregation of base candles."""
+
+    timeframes = ROLLUP_TIMEFRAMES.get(base_timeframe, ())
+    ready = rollups_ready(
+        db, symbol=symbol, exchange=exchange, base_timeframe=base_timeframe
+    )
+    rows = _base_rows(
+        db, symbol=symbol, exchange=exchange, base_timeframe=base_timeframe
+    )
+    mismatches: dict[str, int] = {}
+    for tf in timeframes:
+        expected = {b[0]: tuple(b[1:]) for b in aggregate(tf, rows)}
+        stored = {
+            r[0]: tuple(r[1:])
+            for r in db.execute(
+                select(
+                    CandleRollup.ts,
+                    CandleRollup.first_ts,
+                    CandleRollup.bar_count,
+                    CandleRollup.open,
+                    CandleRollup.high,
+                    CandleRollup.low,
+                    CandleRollup.close,
+                    CandleRollup.volume,
+                ).where(
+                    CandleRollup.symbol == symbol,
+                    CandleRollup.exchange == exchange,
+                    CandleRollup.timeframe == tf,
+                )
+            )
+        }
+        bad = sum(
+            1
+            for ts in expected.keys() | stored.keys()
+            if expected.get(ts) != stored.get(ts)
+        )
+        if bad:
+            mismatches[tf] = bad
+    return {
+        "symbol": symbol,
+        "exchange": exchange,
+        "base_timeframe": base_timeframe,
+        "ready": ready,
+        "base_bars": len(rows),
+        "consistent": ready and not mismatches,
+        "mismatches": mismatches,
+    }
+
+
+def rollup_instruments(
+    db: Session, *, symbol: str | None = None, exchange: str | None = None
+) -> list[tuple[str, str, str]]:
+    """Return (symbol, exchange, base_timeframe) for instruments with base bars."""
+
+    stmt = (
+        select(Candle.symbol, Candle.exchange, Candle.timeframe)
+        .where(Candle.timeframe.in_(list(ROLLUP_TIMEFRAMES)))
+        .distinct()
+        .order_by(Candle.symbol, Candle.exchange, Candle.timeframe)
+    )
+    if symbol:
+        stmt = stmt.where(Candle.symbol == symbol)
+    if exchange:
+        stmt = stmt.where(Candle.exchange == exchange)
+    return [(str(s), str(e), str(tf)) for s, e, tf in db.execute(stmt)]
+
+
+def get_rollup_stats() -> dict[str, Any]:
+    """Return process-wide rollup read/maintenance counters."""
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+# ORM candle writes do not go through ingestion, so they cannot maintain the
+# rollups; drop the instrument's state row (once per transaction) so readers
+# fall back to base aggregation until the rollups are rebuilt.
+@event.listens_for(Candle, "after_insert")
+@event.listens_for(Candle, "after_update")
+@event.listens_for(Candle, "after_delete")
+def _invalidate_rollups_on_orm_write(_mapper, connection, target: Candle) -> None:
+    base_timeframe = str(target.timeframe)
+    if base_timeframe not in ROLLUP_TIMEFRAMES:
+        return
+    session = object_session(target)
+    if session is None:
+        return
+    key = (str(target.symbol), str(target.exchange), base_timeframe)
+    stale = session.info.setdefault(_STALE_INFO_KEY, set())
+    if key in stale:
+        return
+    stale.add(key)
+    connection.execute(
+        delete(CandleRollupState.__table__).where(
+            CandleRollupState.__table__.c.symbol == key[0],
+            CandleRollupState.__table__.c.exchange == key[1],
+            CandleRollupState.__table__.c.base_timeframe == key[2],
+        )
+    )
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_stale_rollups(session: Session) -> None:
+    session.info.pop(_STALE_INFO_KEY, None)
+
+
+__all__ = [
+    "ROLLUP_TIMEFRAMES",
+    "aggregate",
+    "bucket_start",
+    "check_rollups",
+    "get_rollup_stats",
+    "load_rollup_series",
+    "next_bucket",
+    "rebuild_rollups",
+    "refresh_rollups",
+    "rollup_instruments",
+    "rollups_ready",
+]
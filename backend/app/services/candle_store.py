@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from threading import Lock
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import Settings, get_settings
+from app.core.market_hours import IST_OFFSET
+from app.models import Candle
+from app.services.candle_columns import CandleColumns
+from app.services.market_data import Timeframe, load_series_columns
+
+StoreKey = Tuple[str, str, str]  # (exchange, symbol, timeframe)
+
+_DIRTY_INFO_KEY = "candle_store_dirty"
+
+_lineages = itertools.count(1)
+
+
+def _now_ist_naive() -> datetime:
+    return (datetime.now(UTC) + IST_OFFSET).replace(tzinfo=None)
+
+
+class CandleSeries:
+    """Immutable snapshot of cached candles for one (exchange, symbol, timeframe).
+
+    Bars are held as compact `CandleColumns`; legacy dict rows are only
+    materialized when a caller asks for `.candles`. Everything is shared
+    between readers and must be treated as read-only. A refresh never mutates
+    a snapshot; it publishes a new one.
+
+    `lineage` identifies a chain of snapshots produced by incremental
+    refreshes of one full load: within a lineage bars are only appended or the
+    last bar replaced, so every earlier bar is final and the first bar never
+    changes.
+    """
+
+    __slots__ = ("columns", "lineage", "_rows", "_derived", "_lock")
+
+    def __init__(self, columns: CandleColumns, *, lineage: int | None = None) -> None:
+        self.columns = columns
+        self.lineage = next(_lineages) if lineage is None else lineage
+        self._rows: list[dict[str, Any]] | None = None
+        self._derived: Dict[str, CandleSeries] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def candles(self) -> list[dict[str, Any]]:
+        rows = self._rows
+        if rows is None:
+            rows = self.columns.to_rows()
+            self._rows = rows
+        return rows
+
+    @property
+    def bar_time(self) -> datetime | None:
+        if not len(self.columns):
+            return None
+        return self.columns.datetime_at(-1)
+
+    def column(self, key: str) -> Sequence[float]:
+        """Return the float column for an OHLCV field."""
+
+        return self.columns.column(key)
+
+    def derive(
+        self,
+        name: str,
+        builder: Callable[[list[dict[str, Any]]], list[dict[str, Any]]],
+    ) -> "CandleSeries":
+        """Return a memoized series derived from this one (e.g. weekly resample)."""
+
+        derived = self._derived.get(name)
+        if derived is None:
+            rows = builder(self.candles) if len(self.columns) else []
+            derived = CandleSeries(CandleColumns.from_rows(rows))
+            with self._lock:
+                derived = self._derived.setdefault(name, derived)
+        return derived
+
+
+@dataclass
+class _Entry:
+    series: CandleSeries
+    start: datetime
+    fetched: bool
+    checked_at: float
+    nbytes: int = field(default=0)
+
+
+class CandleStore:
+    """Process-wide, bounded in-memory store of recent candles.
+
+    Entries are keyed by (exchange, symbol, timeframe). The first read loads
+    the full lookback window via `load_series_columns`; later reads within
+    `refresh_seconds` are served from memory, and reads after that only pull
+    bars at or after the last loaded bar. Entries are evicted least recently
+    used first once the column memory budget is exceeded.
+    """
+
+    def __init__(self, *, max_bytes: int, refresh_seconds: float) -> None:
+        self.max_bytes = max(int(max_bytes), 0)
+        self.refresh_seconds = max(float(refresh_seconds), 0.0)
+        self._lock = Lock()
+        self._entries: "OrderedDict[StoreKey, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._evictions = 0
+        self._invalidations = 0
+        # Bumped on every invalidation so loads that raced with a write do not
+        # publish rows read before that write committed.
+        self._epoch = 0
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(
+        self,
+        db: Session,
+        settings: Settings,
+        *,
+        symbol: str,
+        exchange: str,
+        timeframe: Timeframe,
+        start: datetime,
+        allow_fetch: bool = True,
+    ) -> CandleSeries:
+        key: StoreKey = (exchange.upper(), symbol.upper(), str(timeframe))
+        now_mono = time.monotonic()
+
+        with self._lock:
+            epoch = self._epoch
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                fresh = (
+                    entry.start <= start
+                    and (entry.fetched or not allow_fetch)
+                    and now_mono - entry.checked_at < self.refresh_seconds
+                )
+                if fresh:
+                    self._hits += 1
+                    return entry.series
+
+        if (
+            entry is None
+            or entry.start > start
+            or (allow_fetch and not entry.fetched)
+            or not len(entry.series)
+        ):
+            series = self._load_full(
+                db,
+                settings,
+                symbol=symbol,
+                exchange=exchange,
+                timeframe=timeframe,
+                start=start,
+                allow_fetch=allow_fetch,
+            )
+            fetched = allow_fetch
+            with self._lock:
+                self._misses += 1
+        else:
+            series = self._load_tail(
+                db,
+                settings,
+                entry=entry,
+                symbol=symbol,
+                exchange=exchange,
+                timeframe=timeframe,
+                start=start,
+                allow_fetch=allow_fetch,
+            )
+            fetched = entry.fetched
+            with self._lock:
+                self._refreshes += 1
+
+        self._put(
+            key,
+            _Entry(
+                series=series,
+                start=start,
+                fetched=fetched,
+                checked_at=time.monotonic(),
+                nbytes=series.columns.nbytes(),
+            ),
+            epoch=epoch,
+        )
+        return series
+
+    def _load_full(
+        self,
+        db: Session,
+        settings: Settings,
+        *,
+        symbol: str,
+        exchange: str,
+        timeframe: Timeframe,
+        start: datetime,
+        allow_fetch: bool,
+    ) -> CandleSeries:
+        columns = load_series_columns(
+            db,
+            settings,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=timeframe,
+            start=start,
+            end=_now_ist_naive(),
+            allow_fetch=allow_fetch,
+        )
+        return CandleSeries(columns)
+
+    def _load_tail(
+        self,
+        db: Session,
+        settings: Settings,
+        *,
+        entry: _Entry,
+        symbol: str,
+        exchange: str,
+        timeframe: Timeframe,
+        start: datetime,
+        allow_fetch: bool,
+    ) -> CandleSeries:
+        old = entry.series.columns
+        last_ts = old.ts[-1]
+        # Reload from the last cached bar: it may have been a partial bucket for
+        # aggregated timeframes (and confirms the cached data still exists).
+        tail = load_series_columns(
+            db,
+            settings,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=timeframe,
+            start=old.datetime_at(-1),
+            end=_now_ist_naive(),
+            allow_fetch=allow_fetch,
+        )
+        if not len(tail) or tail.ts[0] != last_ts:
+            # The underlying rows changed beneath us; fall back to a full load.
+            return self._load_full(
+                db,
+                settings,
+                symbol=symbol,
+                exchange=exchange,
+                timeframe=timeframe,
+                start=start,
+                allow_fetch=allow_fetch,
+            )
+
+        keep_from = old.index_at_or_after(start) if start > entry.start else 0
+        # Dropping leading bars removes history that streamed indicator state
+        # has already consumed, so a trimmed snapshot starts a new lineage.
+        return CandleSeries(
+            old.slice(keep_from, len(old) - 1).concat(tail),
+            lineage=entry.series.lineage if keep_from == 0 else None,
+        )
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _put(self, key: StoreKey, entry: _Entry, *, epoch: int) -> None:
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+
+    def invalidate(self, *, symbol: str, exchange: str) -> None:
+        """Drop all cached timeframes for a symbol (e.g. after candle writes)."""
+
+        exch = exchange.upper()
+        sym = symbol.upper()
+        with self._lock:
+            self._epoch += 1
+            for key in [k for k in self._entries if k[0] == exch and k[1] == sym]:
+                entry = self._entries.pop(key)
+                self._bytes -= entry.nbytes
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses + self._refreshes
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+_store: CandleStore | None = None
+_store_lock = Lock()
+
+
+def get_candle_store() -> CandleStore:
+    """Return the process-wide candle store, creating it on first use."""
+
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                _store = CandleStore(
+                    max_bytes=int(settings.candle_store_max_mb) * 1024 * 1024,
+                    refresh_seconds=float(settings.candle_store_refresh_sec),
+                )
+    return _store
+
+
+# Keep the store coherent with in-process candle writes. Mapper events record
+# the touched symbols on the session; they are dropped from the store once the
+# transaction commits so readers never keep serving superseded rows.
+
+
+@event.listens_for(Candle, "after_insert")
+@event.listens_for(Candle, "after_update")
+@event.listens_for(Candle, "after_delete")
+def _track_candle_write(_mapper, _connection, target: Candle) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    dirty = session.info.setdefault(_DIRTY_INFO_KEY, set())
+    dirty.add((str(target.symbol), str(target.exchange)))
+
+
+def mark_candles_written(session: Session, *, symbol: str, exchange: str) -> None:
+    """Record a candle write made outside the ORM (e.g. Core bulk inserts).
+
+    Core statements bypass mapper events, so bulk writers call this to get the
+    same invalidate-on-commit behaviour as ORM writes.
+    """
+
+    dirty = session.info.setdefault(_DIRTY_INFO_KEY, set())
+    dirty.add((str(symbol), str(exchange)))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_candles(session: Session) -> None:
+    dirty = session.info.pop(_DIRTY_INFO_KEY, None)
+    if not dirty or _store is None:
+        return
+    for symbol, exchange in dirty:
+        _store.invalidate(symbol=symbol, exchange=exchange)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_candles(session: Session) -> None:
+    session.info.pop(_DIRTY_INFO_KEY, None)
+
+
+__all__ = [
+    "CandleSeries",
+    "CandleStore",
+    "get_candle_store",
+    "mark_candles_written",
+]
@@ -0,0 +1,318 @@
+"""Process-wide, versioned cache for hot configuration reads.
+
+Risk globals/profiles, TradingView webhook secret/config, AI settings and
+broker secrets are read on every order, webhook, monitoring tick and broker
+call. `ConfigCache` keeps the loaded (decrypted/parsed) values per setting
+family and serves them as dict lookups.
+
+Invalidation:
+- ORM writes to the backing tables (the setter APIs, admin edits, tests
+  seeding rows) are detected by session listeners. The family's row in
+  `config_versions` is bumped inside the writing transaction, and the local
+  family version is bumped once that transaction commits.
+- While any session holds uncommitted writes to a family, reads of that
+  family bypass the cache, so a value that may still be rolled back is never
+  stored.
+- Other processes notice the bump by polling `config_versions` at most every
+  `config_cache_poll_sec` and drop the families whose version moved.
+- `create_all` (test DB rebuilds) drops everything.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from itertools import chain
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal
+from app.models import BrokerSecret, ConfigVersion, RiskGlobalConfig, RiskProfile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+FAMILIES = ("risk", "webhook", "ai", "broker")
+
+# BrokerSecret rows double as storage for non-broker settings, keyed by
+# broker_name (see webhook_secrets and ai_settings_config).
+_SECRET_FAMILIES = {"webhook": "webhook", "ai_trading_manager": "ai"}
+
+_PENDING_KEY = "config_cache_families"
+
+# Families with uncommitted ORM writes, counted per open writing session.
+_open_writes: Dict[str, int] = {f: 0 for f in FAMILIES}
+_open_writes_lock = Lock()
+
+
+def secret_family(broker_name: str | None) -> str:
+    """Cache family for a BrokerSecret row with this broker_name."""
+
+    return _SECRET_FAMILIES.get(str(broker_name or "").strip().lower(), "broker")
+
+
+def _family_for(obj: Any) -> str | None:
+    if isinstance(obj, (RiskGlobalConfig, RiskProfile)):
+        return "risk"
+    if isinstance(obj, BrokerSecret):
+        return secret_family(getattr(obj, "broker_name", None))
+    return None
+
+
+def _families_for_class(cls: Any) -> set[str]:
+    if cls in (RiskGlobalConfig, RiskProfile):
+        return {"risk"}
+    if cls is BrokerSecret:
+        return {"webhook", "ai", "broker"}
+    return set()
+
+
+class ConfigCache:
+    """Versioned per-family cache. Entries are `(version, owner, value)`.
+
+    `owner` pins entries whose value depends on an object's identity (e.g.
+    the `Settings` whose crypto key decrypted a secret); a different owner
+    is a miss.
+    """
+
+    def __init__(self, *, poll_interval_sec: float = 1.0) -> None:
+        self.poll_interval_sec = max(0.0, float(poll_interval_sec))
+        self._lock = Lock()
+        self._entries: Dict[str, Dict[Hashable, tuple[int, Any, Any]]] = {
+            f: {} for f in FAMILIES
+        }
+        self._versions: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self._db_versions: Dict[str, int] | None = None
+        self._last_poll = 0.0
+        self.hits: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self.misses: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self.invalidations: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self.bypasses: Dict[str, int] = {f: 0 for f in FAMILIES}
+        self.polls = 0
+
+    def get(
+        self,
+        family: str,
+        key: Hashable,
+        loader: Callable[[], T],
+        *,
+        owner: Any = None,
+    ) -> T:
+        self._maybe_poll()
+        if _open_writes[family]:
+            with self._lock:
+                self.bypasses[family] += 1
+            return loader()
+        with self._lock:
+            version = self._versions[family]
+            entry = self._entries[family].get(key)
+            if entry is not None and entry[0] == version and entry[1] is owner:
+                self.hits[family] += 1
+                return entry[2]
+        value = loader()
+        with self._lock:
+            self.misses[family] += 1
+            # Skip storing if the family was invalidated while loading.
+            if self._versions[family] == version:
+                self._entries[family][key] = (version, owner, value)
+        return value
+
+    def invalidate(self, *families: str) -> None:
+        with self._lock:
+            for family in families or FAMILIES:
+                self._versions[family] += 1
+                self._entries[family].clear()
+                self.invalidations[family] += 1
+
+    def _maybe_poll(self) -> None:
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval_sec:
+            return
+        self._last_poll = now
+        try:
+            self.poll()
+        except Exception:
+            logger.debug("Config version poll failed", exc_info=True)
+
+    def poll(self) -> None:
+        """Drop families whose `config_versions` row moved since the last poll."""
+
+        with SessionLocal() as db:
+            rows = db.execute(select(ConfigVersion.family, ConfigVersion.version)).all()
+        current = {f: 0 for f in FAMILIES}
+        current.update({str(f): int(v or 0) for f, v in rows if f in current})
+        self.polls += 1
+        previous, self._db_versions = self._db_versions, current
+        if previous is None:
+            return
+        changed = [f for f in FAMILIES if previous.get(f) != current[f]]
+        if changed:
+            self.invalidate(*changed)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            families = {
+                f: {
+                    "version": self._versions[f],
+                    "entries": len(self._entries[f]),
+                    "hits": self.hits[f],
+                    "misses": self.misses[f],
+                    "invalidations": self.invalidations[f],
+                    "bypasses": self.bypasses[f],
+                }
+                for f in FAMILIES
+            }
+        return {
+            "poll_interval_sec": self.poll_interval_sec,
+            "polls": self.polls,
+            "db_hits_avoided": sum(self.hits.values()),
+            "families": families,
+        }
+
+
+_cache: ConfigCache | None = None
+_cache_lock = Lock()
+
+
+def get_config_cache() -> ConfigCache | None:
+    """Return the process cache, or None when `config_cache_enabled` is off."""
+
+    global _cache
+    if _cache is not None:
+        return _cache
+    settings = get_settings()
+    if not bool(getattr(settings, "config_cache_enabled", True)):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConfigCache(
+                poll_interval_sec=float(getattr(settings, "config_cache_poll_sec", 1.0))
+            )
+        return _cache
+
+
+def cached_config(
+    family: str,
+    key: Hashable,
+    loader: Callable[[], T],
+    *,
+    owner: Any = None,
+) -> T:
+    """Return `loader()` through the process cache (direct call when disabled)."""
+
+    cache = get_config_cache()
+    if cache is None:
+        return loader()
+    return cache.get(family, key, loader, owner=owner)
+
+
+def invalidate_config(*families: str) -> None:
+    cache = _cache
+    if cache is not None:
+        cache.invalidate(*families)
+
+
+def get_config_cache_stats() -> dict[str, Any]:
+    cache = get_config_cache()
+    return {"enabled": cache is not None, **(cache.stats() if cache is not None else {})}
+
+
+_versions_table_ok: Dict[str, bool] = {}
+
+
+def _bump_db_versions(session: Session, families: set[str]) -> None:
+    conn = session.connection()
+    url = str(conn.engine.url)
+    ok = _versions_table_ok.get(url)
+    if ok is None:
+        ok = _versions_table_ok[url] = inspect(conn).has_table(ConfigVersion.__tablename__)
+    if not ok:
+        return
+    for family in sorted(families):
+        res = conn.execute(
+            update(ConfigVersion)
+            .where(ConfigVersion.family == family)
+            .values(version=ConfigVersion.version + 1)
+        )
+        if not res.rowcount:
+            conn.execute(insert(ConfigVersion).values(family=family, version=1))
+
+
+def _mark_pending(session: Session, families: set[str]) -> None:
+    if not families:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    new = families - pending
+    pending |= families
+    if new:
+        _change_open_writes(new, +1)
+        _bump_db_versions(session, new)
+
+
+def _change_open_writes(families: set[str], delta: int) -> None:
+    with _open_writes_lock:
+        for family in families:
+            _open_writes[family] = max(0, _open_writes[family] + delta)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_config_writes(session: Session, _flush_context: Any) -> None:
+    families = {
+        f
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if (f := _family_for(obj)) is not None
+    }
+    _mark_pending(session, families)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_config_writes(state: Any) -> None:
+    if not (state.is_update or state.is_delete) or state.bind_mapper is None:
+        return
+    _mark_pending(state.session, _families_for_class(state.bind_mapper.class_))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_config_writes(session: Session) -> None:
+    # Savepoint commits also fire after_commit; only the root commit counts.
+    if session.in_nested_transaction():
+        return
+    families = session.info.get(_PENDING_KEY)
+    if families:
+        invalidate_config(*families)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _end_config_writes(session: Session, transaction: SessionTransaction) -> None:
+    # Fires on commit, rollback and close; after_rollback alone misses close().
+    if transaction.parent is not None:
+        return
+    families = session.info.pop(_PENDING_KEY, None)
+    if families:
+        _change_open_writes(families, -1)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _reset_after_create(*_args: Any, **_kwargs: Any) -> None:
+    _versions_table_ok.clear()
+    invalidate_config()
+    cache = _cache
+    if cache is not None:
+        cache._db_versions = None
+
+
+__all__ = [
+    "ConfigCache",
+    "FAMILIES",
+    "cached_config",
+    "get_config_cache",
+    "get_config_cache_stats",
+    "invalidate_config",
+    "secret_family",
+]
@@ -4,10 +4,12 @@ import json
 import math
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from threading import Condition
 from typing import Any
 
+from sqlalchemy import event, exists, func, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
 from app.models import (
     StrategyDeploymentAction,
@@ -26,6 +28,52 @@ class JobClaim:
     claimed_at: datetime
 
 
+# (index, count): a worker only claims jobs whose deployment_id % count == index.
+JobShard = tuple[int, int]
+
+# In-process wake-up for idle workers. `enqueue_job` flags its session and the
+# flag is turned into a notification once that session commits, so workers
+# never wake for a job they cannot see yet. Workers in other processes (or
+# jobs enqueued by another process) are picked up by their idle re-poll.
+_enqueue_cond = Condition()
+_enqueue_seq = 0
+_ENQUEUED_FLAG = "deployment_jobs_enqueued"
+# First key of the (namespace, deployment_id) advisory locks taken while
+# claiming on PostgreSQL.
+_CLAIM_LOCK_NAMESPACE = 0x5D31
+
+
+def notify_jobs_enqueued() -> None:
+    global _enqueue_seq
+    with _enqueue_cond:
+        _enqueue_seq += 1
+        _enqueue_cond.notify_all()
+
+
+def enqueue_seq() -> int:
+    """Current wake-up sequence; pass it to `wait_for_enqueued_jobs`."""
+
+    return _enqueue_seq
+
+
+def wait_for_enqueued_jobs(seen_seq: int, timeout: float) -> bool:
+    """Block until a job is enqueued after `seen_seq` (True) or `timeout` elapses."""
+
+    with _enqueue_cond:
+        return _enqueue_cond.wait_for(lambda: _enqueue_seq != seen_seq, timeout=timeout)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session) -> None:
+    if session.info.pop(_ENQUEUED_FLAG, False):
+        notify_jobs_enqueued()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session: Session) -> None:
+    session.info.pop(_ENQUEUED_FLAG, None)
+
+
 def enqueue_job(
     db: Session,
     *,
@@ -64,9 +112,113 @@ def enqueue_job(
             db.flush()
     except IntegrityError:
         return None
+    db.info[_ENQUEUED_FLAG] = True
     return job
 
 
+def _runnable_jobs_stmt(ts: datetime, shard: JobShard | None) -> Any:
+    """PENDING jobs that are due, oldest first, skipping deployments that
+    already have a RUNNING job so each deployment's jobs execute in order."""
+
+    running = aliased(StrategyDeploymentJob)
+    stmt = (
+        select(StrategyDeploymentJob)
+        .where(StrategyDeploymentJob.status == "PENDING")
+        .where(
+            (StrategyDeploymentJob.run_after.is_(None))
+            | (StrategyDeploymentJob.run_after <= ts)
+        )
+        .where(
+            ~exists().where(
+                running.deployment_id == StrategyDeploymentJob.deployment_id,
+                running.status == "RUNNING",
+            )
+        )
+        .order_by(StrategyDeploymentJob.created_at, StrategyDeploymentJob.id)
+    )
+    if shard is not None:
+        index, count = shard
+        if count > 1:
+            stmt = stmt.where(StrategyDeploymentJob.deployment_id % count == index)
+    return stmt
+
+
+def claim_jobs(
+    db: Session,
+    *,
+    worker_id: str,
+    now: datetime | None = None,
+    limit: int = 1,
+    shard: JobShard | None = None,
+) -> list[JobClaim]:
+    """Claim up to `limit` runnable PENDING jobs (at most one per deployment).
+
+    Each candidate is claimed with a conditional UPDATE that re-checks there
+    is no RUNNING job for its deployment; jobs another worker won first are
+    skipped. On PostgreSQL candidates are also row-locked with
+    `FOR UPDATE SKIP LOCKED`, and the claim holds a transaction-scoped
+    advisory lock on the deployment: row locks alone let two workers claim
+    two different jobs of one deployment, since neither sees the other's
+    uncommitted RUNNING row.
+    """
+
+    ts = now or datetime.now(UTC)
+    skip_locked = db.get_bind().dialect.name == "postgresql"
+    # Over-fetch a little: candidates sharing a deployment are dropped below.
+    stmt = _runnable_jobs_stmt(ts, shard).limit(max(1, int(limit)) * 4)
+    if skip_locked:
+        stmt = stmt.with_for_update(skip_locked=True)
+
+    picked: list[StrategyDeploymentJob] = []
+    seen: set[int] = set()
+    for job in db.execute(stmt).scalars():
+        if job.deployment_id in seen:
+            continue
+        seen.add(job.deployment_id)
+        picked.append(job)
+        if len(picked) >= limit:
+            break
+    if not picked:
+        return []
+
+    values = {
+        "status": "RUNNING",
+        "locked_by": worker_id,
+        "locked_at": ts,
+        "updated_at": ts,
+    }
+    won: list[StrategyDeploymentJob] = []
+    running = aliased(StrategyDeploymentJob)
+    for job in picked:
+        if skip_locked and not db.execute(
+            select(func.pg_try_advisory_xact_lock(_CLAIM_LOCK_NAMESPACE, job.deployment_id))
+        ).scalar():
+            # Another worker is claiming for this deployment right now.
+            continue
+        # Under READ COMMITTED this statement also sees a RUNNING job that
+        # the lock's previous holder committed after our candidate SELECT.
+        res = db.execute(
+            update(StrategyDeploymentJob)
+            .where(StrategyDeploymentJob.id == job.id)
+            .where(StrategyDeploymentJob.status == "PENDING")
+            .where(
+                ~exists().where(
+                    running.deployment_id == job.deployment_id,
+                    running.status == "RUNNING",
+                )
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount == 1:
+            won.append(job)
+
+    db.flush()
+    for job in won:
+        db.refresh(job)
+    return [JobClaim(job=job, claimed_at=ts) for job in won]
+
+
 def claim_next_job(
     db: Session,
     *,
@@ -75,42 +227,49 @@ def claim_next_job(
 ) -> JobClaim | None:
     """Claim the next runnable PENDING job (SQLite-friendly semantics)."""
 
+    claims = claim_jobs(db, worker_id=worker_id, now=now, limit=1)
+    return claims[0] if claims else None
+
+
+def renew_job_claim(
+    db: Session,
+    *,
+    job: StrategyDeploymentJob,
+    worker_id: str,
+    now: datetime | None = None,
+) -> bool:
+    """Refresh a batch-claimed job's lock before running it.
+
+    Returns False when the claim was lost (e.g. the sweeper re-queued it
+    because earlier jobs of the batch ran past the RUNNING TTL).
+    """
+
     ts = now or datetime.now(UTC)
-    job: StrategyDeploymentJob | None = (
-        db.query(StrategyDeploymentJob)
-        .filter(StrategyDeploymentJob.status == "PENDING")
-        .filter(
-            (StrategyDeploymentJob.run_after.is_(None))
-            | (StrategyDeploymentJob.run_after <= ts)
-        )
-        .order_by(StrategyDeploymentJob.created_at, StrategyDeploymentJob.id)
-        .limit(1)
-        .one_or_none()
+    res = db.execute(
+        update(StrategyDeploymentJob)
+        .where(StrategyDeploymentJob.id == job.id)
+        .where(StrategyDeploymentJob.status == "RUNNING")
+        .where(StrategyDeploymentJob.locked_by == worker_id)
+        .values(locked_at=ts, updated_at=ts)
+        .execution_options(synchronize_session=False)
     )
-    if job is None:
-        return None
+    return res.rowcount == 1
 
-    updated = (
-        db.query(StrategyDeploymentJob)
-        .filter(StrategyDeploymentJob.id == job.id)
-        .filter(StrategyDeploymentJob.status == "PENDING")
-        .update(
-            {
-                "status": "RUNNING",
-                "locked_by": worker_id,
-                "locked_at": ts,
-                "updated_at": ts,
-            },
-            synchronize_session=False,
-        )
-    )
-    if updated != 1:
-        db.rollback()
-        return None
 
-    db.flush()
-    db.refresh(job)
-    return JobClaim(job=job, claimed_at=ts)
+def count_runnable_jobs(db: Session, *, now: datetime | None = None) -> int:
+    """Queue depth: PENDING jobs that are due now."""
+
+    ts = now or datetime.now(UTC)
+    return int(
+        db.execute(
+            select(func.count(StrategyDeploymentJob.id))
+            .where(StrategyDeploymentJob.status == "PENDING")
+            .where(
+                (StrategyDeploymentJob.run_after.is_(None))
+                | (StrategyDeploymentJob.run_after <= ts)
+            )
+        ).scalar_one()
+    )
 
 
 def mark_job_done(
@@ -290,13 +449,20 @@ def record_action(
 
 __all__ = [
     "JobClaim",
+    "JobShard",
     "acquire_deployment_lock",
+    "claim_jobs",
     "claim_next_job",
+    "count_runnable_jobs",
     "enqueue_job",
+    "enqueue_seq",
     "mark_job_done",
     "mark_job_error",
+    "notify_jobs_enqueued",
     "record_action",
     "release_deployment_lock",
+    "renew_job_claim",
     "requeue_stale_running_jobs",
     "sweep_stale_locks",
+    "wait_for_enqueued_jobs",
 ]
@@ -26,7 +26,7 @@ from app.services.backtests_strategy import (
     _resolve_indicator_series,
     _series_key,
 )
-from app.services.market_data import load_series
+from app.services.market_data import load_series, load_series_columns
 
 
 def _json_load(raw: str | None) -> dict[str, Any]:
@@ -108,7 +108,7 @@ def _load_intraday_series(
     start = bar_start - delta * max(lookback_bars, 10)
     end = bar_start
 
-    rows = load_series(
+    cols = load_series_columns(
         db,
         settings,
         symbol=symbol,
@@ -118,21 +118,23 @@ def _load_intraday_series(
         end=end,
         allow_fetch=allow_fetch,
     )
+    # Bars are ordered by ts, so everything past bar_start is a suffix.
+    head = cols.slice(0, cols.index_at_or_after(bar_start + timedelta(microseconds=1)))
     ts: list[datetime] = []
     opens: list[float] = []
     highs: list[float] = []
     lows: list[float] = []
     closes: list[float] = []
     vols: list[float] = []
-    for r in rows:
-        t = r.get("ts")
-        if not isinstance(t, datetime) or t > bar_start:
-            continue
-        o = float(r.get("open") or 0.0)
-        h = float(r.get("high") or 0.0)
-        lo = float(r.get("low") or 0.0)
-        c = float(r.get("close") or 0.0)
-        v = float(r.get("volume") or 0.0)
+    for t, o, h, lo, c, v in zip(
+        head.datetimes(),
+        head.open,
+        head.high,
+        head.low,
+        head.close,
+        head.volume,
+        strict=False,
+    ):
         if min(o, h, lo, c) <= 0:
             continue
         ts.append(t)
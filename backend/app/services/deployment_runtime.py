@@ -14,14 +14,15 @@ from app.services.deployment_scheduler import (
     schedule_deployment_scheduler,
 )
 from app.services.deployment_sweeper import schedule_deployment_sweeper, sweep_once
-from app.services.deployment_worker import execute_job_once, schedule_deployment_worker
+from app.services.deployment_worker import execute_job_once, schedule_deployment_workers
 
 
 def start_deployments_runtime(*, mode: str = "threads") -> None:
     """Start deployment runtime services.
 
     mode:
-    - threads: start background threads (scheduler/worker/sweeper/reconciler)
+    - threads: start background threads (scheduler/sweeper/reconciler) and the
+      configured job workers (`deployment_workers`, threads or processes)
     - once: run a single pass of each component (smoke-test friendly)
     """
 
@@ -50,7 +51,7 @@ def start_deployments_runtime(*, mode: str = "threads") -> None:
         return
 
     schedule_deployment_scheduler()
-    schedule_deployment_worker(worker_id="worker-1")
+    schedule_deployment_workers()
     schedule_deployment_sweeper()
     schedule_deployment_reconciler()
 
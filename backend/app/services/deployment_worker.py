@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import logging
+import multiprocessing
+import time
 from datetime import UTC, datetime, timedelta
 from threading import Event, Lock, Thread
 from typing import Any
@@ -9,16 +11,23 @@ from typing import Any
 from sqlalchemy.orm import Session, joinedload
 
 from app.core.config import get_settings
+from app.core.latency import LatencyWindow
 from app.db.session import SessionLocal
 from app.models import StrategyDeployment, StrategyDeploymentJob
 from app.services.deployment_event_log import emit_deployment_event
 from app.services.deployment_jobs import (
+    JobClaim,
+    JobShard,
     acquire_deployment_lock,
+    claim_jobs,
     claim_next_job,
+    enqueue_seq,
     mark_job_done,
     mark_job_error,
     record_action,
     release_deployment_lock,
+    renew_job_claim,
+    wait_for_enqueued_jobs,
 )
 from app.services.deployment_runner import process_deployment_job
 
@@ -29,6 +38,64 @@ _worker_stop_event = Event()
 _worker_lock = Lock()
 
 
+class DeploymentWorkerStats:
+    """Counters for the in-process deployment workers.
+
+    `queue_latency` is the time from a job becoming runnable (created, or its
+    retry `run_after`) to being claimed; `exec_latency` is the time to run it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.batches = 0
+        self.claimed = 0
+        self.completed = 0
+        self.failed = 0
+        self.lost_claims = 0
+        self.queue_latency = LatencyWindow()
+        self.exec_latency = LatencyWindow()
+
+    def record_batch(self, claims: list[JobClaim]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.claimed += len(claims)
+            for claim in claims:
+                ready = claim.job.run_after or claim.job.created_at
+                if ready is None:
+                    continue
+                if ready.tzinfo is None:
+                    ready = ready.replace(tzinfo=UTC)
+                ms = (claim.claimed_at - ready).total_seconds() * 1000.0
+                self.queue_latency.record(max(0.0, ms))
+
+    def record_result(self, outcome: str, elapsed_ms: float) -> None:
+        with self._lock:
+            if outcome == "lost":
+                self.lost_claims += 1
+                return
+            if outcome == "error":
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.exec_latency.record(elapsed_ms)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "claimed": self.claimed,
+                "completed": self.completed,
+                "failed": self.failed,
+                "lost_claims": self.lost_claims,
+                "queue_latency": self.queue_latency.as_dict(),
+                "exec_latency": self.exec_latency.as_dict(),
+            }
+
+
+_stats = DeploymentWorkerStats()
+_workers: list[dict[str, Any]] = []
+
+
 def _json_load(raw: str | None) -> dict[str, Any]:
     if not raw:
         return {}
@@ -78,6 +145,19 @@ def execute_job_once(
     claim = claim_next_job(db, worker_id=worker_id, now=ts)
     if claim is None:
         return False
+    _execute_claim(db, claim, worker_id=worker_id, ts=ts)
+    return True
+
+
+def _execute_claim(
+    db: Session,
+    claim: JobClaim,
+    *,
+    worker_id: str,
+    ts: datetime,
+) -> str:
+    """Run one claimed job; returns "done", "skipped" or "error"."""
+
     job = claim.job
 
     got_lock = acquire_deployment_lock(
@@ -90,7 +170,7 @@ def execute_job_once(
     if not got_lock:
         mark_job_error(db, job=job, error="Deployment is locked.", now=ts)
         db.commit()
-        return True
+        return "error"
 
     dep = (
         db.query(StrategyDeployment)
@@ -116,7 +196,7 @@ def execute_job_once(
             now=ts,
         )
         db.commit()
-        return True
+        return "skipped"
 
     payload = _json_load(job.payload_json)
     status = str(getattr(dep.state, "status", None) or "STOPPED").upper()
@@ -159,7 +239,7 @@ def execute_job_once(
             now=ts,
         )
         db.commit()
-        return True
+        return "skipped"
 
     try:
         emit_deployment_event(
@@ -258,7 +338,7 @@ def execute_job_once(
         mark_job_done(db, job=job, now=ts)
         release_deployment_lock(db, deployment_id=dep.id, worker_id=worker_id, now=ts)
         db.commit()
-        return True
+        return "done"
     except Exception as exc:
         db.rollback()
         with SessionLocal() as db2:
@@ -276,32 +356,125 @@ def execute_job_once(
             except Exception:
                 db2.rollback()
         logger.exception("Deployment job failed")
-        return True
+        return "error"
+
+
+def run_worker_batch(
+    db: Session,
+    *,
+    worker_id: str,
+    now: datetime | None = None,
+    batch_size: int = 1,
+    shard: JobShard | None = None,
+) -> int:
+    """Claim up to `batch_size` jobs and run them in order; returns jobs claimed."""
+
+    claims = claim_jobs(
+        db,
+        worker_id=worker_id,
+        now=now or datetime.now(UTC),
+        limit=batch_size,
+        shard=shard,
+    )
+    db.commit()
+    if not claims:
+        return 0
+    _stats.record_batch(claims)
+    for claim in claims:
+        ts = now or datetime.now(UTC)
+        started = time.perf_counter()
+        if not renew_job_claim(db, job=claim.job, worker_id=worker_id, now=ts):
+            db.rollback()
+            outcome = "lost"
+        else:
+            db.commit()
+            outcome = _execute_claim(db, claim, worker_id=worker_id, ts=ts)
+        _stats.record_result(outcome, (time.perf_counter() - started) * 1000.0)
+    return len(claims)
 
 
-def _worker_loop(worker_id: str) -> None:  # pragma: no cover - background thread
+def _worker_loop(
+    worker_id: str,
+    shard: JobShard | None,
+    batch_size: int,
+    idle_poll_sec: float,
+) -> None:  # pragma: no cover - background thread
     while not _worker_stop_event.is_set():
-        with SessionLocal() as db:
-            did_work = execute_job_once(db, worker_id=worker_id)
+        seq = enqueue_seq()
+        try:
+            with SessionLocal() as db:
+                did_work = run_worker_batch(
+                    db, worker_id=worker_id, batch_size=batch_size, shard=shard
+                )
+        except Exception:
+            logger.exception("Deployment worker %s failed to claim jobs", worker_id)
+            did_work = 0
         if did_work:
             continue
-        _worker_stop_event.wait(timeout=0.5)
+        # Sleep until something is enqueued in this process (or the idle poll
+        # elapses, which also covers retries whose run_after comes due).
+        wait_for_enqueued_jobs(seq, timeout=idle_poll_sec)
+
 
+def _process_worker_main(
+    worker_id: str,
+    shard: JobShard | None,
+    batch_size: int,
+    idle_poll_sec: float,
+) -> None:  # pragma: no cover - child process
+    _worker_loop(worker_id, shard, batch_size, idle_poll_sec)
+
+
+def schedule_deployment_workers() -> None:
+    """Start `deployment_workers` job workers (threads or spawned processes)."""
 
-def schedule_deployment_worker(*, worker_id: str = "worker-1") -> None:
     global _worker_started
     with _worker_lock:
         if _worker_started:
             return
         _worker_started = True
 
-    thread = Thread(
-        target=_worker_loop,
-        args=(worker_id,),
-        name=f"deployment-worker-{worker_id}",
-        daemon=True,
-    )
-    thread.start()
+    settings = get_settings()
+    count = max(1, int(getattr(settings, "deployment_workers", 1) or 1))
+    executor = str(getattr(settings, "deployment_worker_executor", "thread") or "thread")
+    batch_size = max(1, int(getattr(settings, "deployment_worker_batch_size", 1) or 1))
+    shard_on = bool(getattr(settings, "deployment_worker_shard_by_deployment", True))
+    idle_poll_sec = float(getattr(settings, "deployment_worker_idle_poll_sec", 2.0) or 2.0)
+    ctx = multiprocessing.get_context("spawn")
+
+    for i in range(count):
+        worker_id = f"worker-{i + 1}"
+        shard = (i, count) if shard_on and count > 1 else None
+        args = (worker_id, shard, batch_size, idle_poll_sec)
+        if executor == "process":
+            proc = ctx.Process(
+                target=_process_worker_main,
+                args=args,
+                name=f"deployment-worker-{worker_id}",
+                daemon=True,
+            )
+            proc.start()
+        else:
+            thread = Thread(
+                target=_worker_loop,
+                args=args,
+                name=f"deployment-worker-{worker_id}",
+                daemon=True,
+            )
+            thread.start()
+        _workers.append({"worker_id": worker_id, "executor": executor, "shard": shard})
+
+
+def get_deployment_worker_stats() -> dict[str, Any]:
+    """In-process worker counters (process workers keep their own)."""
+
+    return {"workers": list(_workers), **_stats.as_dict()}
 
 
-__all__ = ["execute_job_once", "schedule_deployment_worker"]
+__all__ = [
+    "DeploymentWorkerStats",
+    "execute_job_once",
+    "get_deployment_worker_stats",
+    "run_worker_batch",
+    "schedule_deployment_workers",
+]
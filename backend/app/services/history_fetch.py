@@ -0,0 +1,224 @@
+"""Scheduling for broker history fetches.
+
+History maintenance used to run under one process-wide lock, so a slow
+`historical_data` pull for one instrument blocked every other caller. The
+scheduler here replaces it with:
+
+- a lock per (symbol, exchange, timeframe), so fetches for different
+  instruments run concurrently while writes for the same instrument stay
+  serialised (the candles unique constraint is per instrument);
+- request coalescing: concurrent callers asking for the same window of the
+  same instrument wait for the single in-flight fetch instead of repeating it;
+- a bounded number of concurrent fetches, plus a worker pool for bulk
+  hydration of many instruments;
+- a token bucket shared by every broker history call, sized to Kite's
+  historical API rate limit.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore, Condition, Lock
+from typing import Any, Callable, Hashable, Iterable, TypeVar
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+HistoryKey = tuple[str, str, str]
+
+
+class TokenBucket:
+    """Blocking token-bucket rate limiter."""
+
+    def __init__(self, *, rate_per_sec: float, burst: int) -> None:
+        self.rate_per_sec = max(float(rate_per_sec), 0.001)
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._cond = Condition(Lock())
+        self._acquired = 0
+        self._waited_sec = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(
+                float(self.burst), self._tokens + elapsed * self.rate_per_sec
+            )
+            self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    waited = now - started
+                    self._acquired += 1
+                    self._waited_sec += waited
+                    return waited
+                self._cond.wait(timeout=(1.0 - self._tokens) / self.rate_per_sec)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_sec": self.rate_per_sec,
+                "burst": self.burst,
+                "available": round(self._tokens, 3),
+                "acquired": self._acquired,
+                "waited_sec": round(self._waited_sec, 3),
+            }
+
+
+class _KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.users = 0
+
+
+class HistoryFetchScheduler:
+    """Per-instrument locking, coalescing and bounded concurrency for fetches."""
+
+    def __init__(
+        self, *, max_workers: int, rate_per_sec: float, burst: int
+    ) -> None:
+        self.max_workers = max(int(max_workers), 1)
+        self.limiter = TokenBucket(rate_per_sec=rate_per_sec, burst=burst)
+        self._slots = BoundedSemaphore(self.max_workers)
+        self._guard = Lock()
+        self._key_locks: dict[HistoryKey, _KeyLock] = {}
+        self._inflight: dict[tuple[HistoryKey, Hashable], Future] = {}
+        self._pool: ThreadPoolExecutor | None = None
+        self._runs = 0
+        self._coalesced = 0
+        self._failures = 0
+        self._active = 0
+
+    def _acquire_key(self, key: HistoryKey) -> _KeyLock:
+        with self._guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = _KeyLock()
+            entry.users += 1
+        entry.lock.acquire()
+        return entry
+
+    def _release_key(self, key: HistoryKey, entry: _KeyLock) -> None:
+        entry.lock.release()
+        with self._guard:
+            entry.users -= 1
+            if entry.users == 0:
+                self._key_locks.pop(key, None)
+
+    def run(self, key: HistoryKey, window: Hashable, fn: Callable[[], R]) -> R:
+        """Run `fn` under the instrument's lock, sharing identical concurrent calls.
+
+        `window` identifies the request; a caller arriving while the same
+        (key, window) is in flight waits for that result (or exception)
+        instead of running `fn` again.
+        """
+
+        token = (key, window)
+        with self._guard:
+            fut = self._inflight.get(token)
+            owner = fut is None
+            if fut is None:
+                fut = self._inflight[token] = Future()
+            else:
+                self._coalesced += 1
+        if not owner:
+            return fut.result()
+
+        try:
+            entry = self._acquire_key(key)
+            try:
+                with self._slots:
+                    with self._guard:
+                        self._active += 1
+                    try:
+                        result = fn()
+                    finally:
+                        with self._guard:
+                            self._active -= 1
+            finally:
+                self._release_key(key, entry)
+        except BaseException as exc:
+            with self._guard:
+                self._failures += 1
+                self._inflight.pop(token, None)
+            fut.set_exception(exc)
+            raise
+        with self._guard:
+            self._runs += 1
+            self._inflight.pop(token, None)
+        fut.set_result(result)
+        return result
+
+    def map(
+        self, fn: Callable[[T], R], items: Iterable[T]
+    ) -> list[tuple[T, R | None, BaseException | None]]:
+        """Run `fn` over `items` on the worker pool; returns (item, result, error)."""
+
+        with self._guard:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="history-fetch"
+                )
+            pool = self._pool
+        submitted = [(item, pool.submit(fn, item)) for item in items]
+        out: list[tuple[T, R | None, BaseException | None]] = []
+        for item, fut in submitted:
+            exc = fut.exception()
+            out.append((item, None if exc is not None else fut.result(), exc))
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            stats: dict[str, Any] = {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "in_flight": len(self._inflight),
+                "locked_keys": len(self._key_locks),
+                "runs": self._runs,
+                "coalesced": self._coalesced,
+                "failures": self._failures,
+            }
+        stats["rate_limiter"] = self.limiter.stats()
+        return stats
+
+
+_scheduler: HistoryFetchScheduler | None = None
+_scheduler_lock = Lock()
+
+
+def get_history_fetch_scheduler() -> HistoryFetchScheduler:
+    """Return the process-wide history fetch scheduler, creating it on first use."""
+
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                settings = get_settings()
+                _scheduler = HistoryFetchScheduler(
+                    max_workers=int(settings.history_fetch_workers),
+                    rate_per_sec=float(settings.history_fetch_rate_per_sec),
+                    burst=int(settings.history_fetch_burst),
+                )
+    return _scheduler
+
+
+__all__ = [
+    "HistoryFetchScheduler",
+    "TokenBucket",
+    "get_history_fetch_scheduler",
+]
@@ -5,26 +5,22 @@ import os
 import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from threading import Event, Thread
 from typing import Any
 
 from sqlalchemy.orm import Session
 
 from app.clients import ZerodhaClient
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.db.session import SessionLocal
 from app.holdings_exit.symbols import normalize_holding_symbol_exchange
-from app.models import BrokerConnection, Order, HoldingExitSubscription
-from app.services.broker_secrets import get_broker_secret
+from app.models import Order, HoldingExitSubscription
+from app.services.broker_clients import get_broker_client_registry
 from app.services.holdings_exit_config import get_holdings_exit_config_with_source
 from app.services.holdings_exit_store import utc_now, write_holding_exit_event
+from app.services.scheduler import register_task
 
 logger = logging.getLogger(__name__)
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
-
 
 @dataclass(frozen=True)
 class HoldingSnapshot:
@@ -44,28 +40,7 @@ def _as_float(v: object, default: float | None = None) -> float | None:
 
 
 def _get_zerodha_client(db: Session, settings: Settings, *, user_id: int) -> ZerodhaClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "zerodha",
-            BrokerConnection.user_id == user_id,
-        )
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
-    )
-    if conn is None:
-        raise RuntimeError("Zerodha is not connected.")
-
-    api_key = get_broker_secret(db, settings, "zerodha", "api_key", user_id=user_id)
-    if not api_key:
-        raise RuntimeError("Zerodha API key is not configured.")
-
-    from kiteconnect import KiteConnect  # type: ignore[import]
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-    return ZerodhaClient(kite)
+    return get_broker_client_registry().zerodha(db, settings, user_id=user_id)
 
 
 def _build_holdings_map(raw: list[dict[str, Any]]) -> dict[tuple[str, str], HoldingSnapshot]:
@@ -574,32 +549,21 @@ def process_holdings_exit_once() -> int:
     return processed
 
 
-def _holdings_exit_loop() -> None:  # pragma: no cover - background loop
+def schedule_holdings_exit() -> None:
+    if "pytest" in sys.modules or os.getenv("PYTEST_CURRENT_TEST"):
+        return
     settings = get_settings()
     poll = float(getattr(settings, "holdings_exit_poll_interval_sec", 5.0) or 5.0)
     if poll <= 0:
         poll = 5.0
-    while not _scheduler_stop_event.is_set():
-        try:
-            process_holdings_exit_once()
-        except Exception:
-            pass
-        _scheduler_stop_event.wait(timeout=poll)
-
-
-def schedule_holdings_exit() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    if "pytest" in sys.modules or os.getenv("PYTEST_CURRENT_TEST"):
-        return
-    _scheduler_started = True
-    thread = Thread(
-        target=_holdings_exit_loop,
-        name="holdings-exit",
-        daemon=True,
+    # Pending exit orders are reconciled every cycle, so keep a slow off-hours
+    # cadence instead of pausing until the next session.
+    register_task(
+        "holdings_exit",
+        process_holdings_exit_once,
+        interval_sec=poll,
+        off_hours=True,
     )
-    thread.start()
 
 
 __all__ = ["process_holdings_exit_once", "schedule_holdings_exit"]
@@ -0,0 +1,265 @@
+"""Short-TTL holdings snapshots shared by alerts, screener, rebalance and UI.
+
+`api/positions.list_holdings` fetches broker holdings plus a bulk LTP/quote
+call on every invocation, and it is called per user per cycle from several
+background engines as well as from the holdings page. The cache here keeps
+one snapshot per (user, broker):
+
+- snapshots younger than `holdings_snapshot_ttl_sec` are served as-is;
+- concurrent refreshes of the same key are coalesced into one broker fetch;
+- broker fetches are bounded to `holdings_snapshot_max_fetches_per_min` per
+  key; once the budget is spent the previous snapshot is served (stale)
+  until the window frees up;
+- committed fills (Order.status moving to EXECUTED/PARTIALLY_EXECUTED) and
+  position syncs invalidate the affected snapshots.
+
+Snapshots are shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from threading import Lock
+from typing import Any, Callable, Deque, Generic, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import get_settings
+from app.models import Order
+
+T = TypeVar("T")
+
+SnapshotKey = tuple[int, str]
+
+_FILLED_STATUSES = {"EXECUTED", "PARTIALLY_EXECUTED"}
+_PENDING_INFO_KEY = "holdings_snapshot_invalidations"
+
+
+@dataclass
+class _Entry(Generic[T]):
+    data: T
+    fetched_at: float
+    fetched_at_utc: datetime
+    valid: bool = True
+
+
+class HoldingsSnapshotCache:
+    """Per-(user, broker) TTL cache with single-flight refresh and a fetch budget."""
+
+    def __init__(self, *, ttl_sec: float, max_fetches_per_min: int) -> None:
+        self.ttl_sec = float(ttl_sec)
+        self.max_fetches_per_min = int(max_fetches_per_min)
+        self._lock = Lock()
+        self._entries: dict[SnapshotKey, _Entry[Any]] = {}
+        self._fetch_log: dict[SnapshotKey, Deque[float]] = {}
+        self._inflight: dict[SnapshotKey, Future] = {}
+        # Bumped by invalidate(); a fetch that started under an older
+        # generation may predate the fill and is not cached as fresh.
+        self._generations: dict[SnapshotKey, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._stale_served = 0
+        self._rate_limited = 0
+        self._fetches = 0
+        self._failures = 0
+        self._invalidations = 0
+
+    def _budget_left(self, key: SnapshotKey, now: float) -> bool:
+        if self.max_fetches_per_min <= 0:
+            return True
+        log = self._fetch_log.get(key)
+        if log is None:
+            return True
+        while log and log[0] <= now - 60.0:
+            log.popleft()
+        return len(log) < self.max_fetches_per_min
+
+    def get(
+        self,
+        key: SnapshotKey,
+        fetch: Callable[[], T],
+        *,
+        force: bool = False,
+    ) -> T:
+        """Return the snapshot for `key`, calling `fetch` only when needed.
+
+        `force` skips the TTL check (explicit UI refresh) but still honours
+        the per-minute fetch budget.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = (
+                entry is not None
+                and entry.valid
+                and not force
+                and now - entry.fetched_at < self.ttl_sec
+            )
+            if fresh:
+                self._hits += 1
+                return entry.data  # type: ignore[union-attr]
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if fut is not None:
+                self._coalesced += 1
+            elif not self._budget_left(key, now):
+                self._rate_limited += 1
+                if entry is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="Holdings refresh limit reached; try again shortly.",
+                    )
+                self._stale_served += 1
+                return entry.data
+            else:
+                self._misses += 1
+                generation = self._generations.get(key, 0)
+                fut = self._inflight[key] = Future()
+                self._fetch_log.setdefault(key, deque()).append(now)
+        if not owner:
+            return fut.result()
+
+        try:
+            data = fetch()
+        except BaseException as exc:
+            with self._lock:
+                self._failures += 1
+                self._inflight.pop(key, None)
+            fut.set_exception(exc)
+            raise
+        with self._lock:
+            self._fetches += 1
+            self._entries[key] = _Entry(
+                data=data,
+                fetched_at=time.monotonic(),
+                fetched_at_utc=datetime.now(UTC),
+                valid=self._generations.get(key, 0) == generation,
+            )
+            self._inflight.pop(key, None)
+        fut.set_result(data)
+        return data
+
+    def invalidate(
+        self,
+        *,
+        user_id: Optional[int] = None,
+        broker_name: Optional[str] = None,
+    ) -> int:
+        """Mark matching snapshots stale; returns how many were affected.
+
+        Stale snapshots are kept so they can still be served while the fetch
+        budget for their key is exhausted. A fetch already in flight for a
+        matching key is stored stale too, since it may predate the change.
+        """
+
+        broker = (broker_name or "").strip().lower() or None
+        count = 0
+        with self._lock:
+            for key in set(self._entries) | set(self._inflight):
+                uid, b = key
+                if user_id is not None and uid != user_id:
+                    continue
+                if broker is not None and b != broker:
+                    continue
+                self._generations[key] = self._generations.get(key, 0) + 1
+                entry = self._entries.get(key)
+                if entry is not None and entry.valid:
+                    entry.valid = False
+                    count += 1
+            self._invalidations += count
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._fetch_log.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl_sec": self.ttl_sec,
+                "max_fetches_per_min": self.max_fetches_per_min,
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "stale_served": self._stale_served,
+                "rate_limited": self._rate_limited,
+                "fetches": self._fetches,
+                "failures": self._failures,
+                "invalidations": self._invalidations,
+            }
+
+
+_cache: HoldingsSnapshotCache | None = None
+_cache_lock = Lock()
+
+
+def get_holdings_snapshot_cache() -> HoldingsSnapshotCache:
+    """Return the process-wide holdings snapshot cache, creating it on first use."""
+
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = HoldingsSnapshotCache(
+                    ttl_sec=float(getattr(settings, "holdings_snapshot_ttl_sec", 10.0)),
+                    max_fetches_per_min=int(
+                        getattr(settings, "holdings_snapshot_max_fetches_per_min", 6)
+                    ),
+                )
+    return _cache
+
+
+def invalidate_holdings_snapshots(
+    *,
+    user_id: Optional[int] = None,
+    broker_name: Optional[str] = None,
+) -> int:
+    """Mark snapshots stale after fills or position syncs (None matches all)."""
+
+    if _cache is None:
+        return 0
+    return _cache.invalidate(user_id=user_id, broker_name=broker_name)
+
+
+@event.listens_for(Order, "after_update")
+def _record_fill(_mapper, _connection, target: Order) -> None:
+    if target.status not in _FILLED_STATUSES or target.simulated:
+        return
+    if not inspect(target).attrs.status.history.has_changes():
+        return
+    session = object_session(target)
+    if session is None:
+        return
+    pending = session.info.setdefault(_PENDING_INFO_KEY, set())
+    pending.add((target.user_id, (target.broker_name or "zerodha").lower()))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_fills(session: Session) -> None:
+    pending = session.info.pop(_PENDING_INFO_KEY, None)
+    for user_id, broker_name in pending or ():
+        invalidate_holdings_snapshots(user_id=user_id, broker_name=broker_name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_fills(session: Session) -> None:
+    session.info.pop(_PENDING_INFO_KEY, None)
+
+
+__all__ = [
+    "HoldingsSnapshotCache",
+    "get_holdings_snapshot_cache",
+    "invalidate_holdings_snapshots",
+]
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import os
 import sys
-from datetime import UTC, date, datetime, timedelta
-from threading import Event, Lock, Thread
+from datetime import UTC, date, datetime
+from threading import Lock
 
 from sqlalchemy.orm import Session
 
@@ -12,28 +12,22 @@ from app.core.market_hours import IST_OFFSET, resolve_market_session
 from app.db.session import SessionLocal
 from app.models import BrokerConnection, User
 from app.services.holdings_summary_snapshots import _as_of_date_ist, upsert_holdings_summary_snapshot
+from app.services.scheduler import register_task
 from app.services.system_events import record_system_event
 
 _state_lock = Lock()
-_scheduler_started = False
-_stop_event = Event()
 _state: dict[str, date | None] = {
     "last_1530_ist_date": None,
     "last_1700_ist_date": None,
 }
 
 
-def _time_in_window(
-    now: datetime,
-    *,
-    start_hhmm: tuple[int, int],
-    window_seconds: int,
-) -> bool:
-    start = now.replace(
-        hour=start_hhmm[0], minute=start_hhmm[1], second=0, microsecond=0
-    )
-    end = start + timedelta(seconds=window_seconds)
-    return start <= now < end
+_SLOT_1530 = (15, 30)
+_SLOT_1700 = (17, 0)
+
+
+def _slot_passed(now: datetime, hhmm: tuple[int, int]) -> bool:
+    return now >= now.replace(hour=hhmm[0], minute=hhmm[1], second=0, microsecond=0)
 
 
 def _get_zerodha_user_ids(db: Session) -> list[int]:
@@ -143,62 +137,53 @@ def _run_capture_for_all_users(*, settings: Settings, as_of_date: date, run_at_i
                 )
 
 
-def _daily_snapshot_loop() -> None:  # pragma: no cover - background loop
+def _daily_snapshot_tick() -> None:
+    """Capture today's 15:30 / 17:00 snapshots that are due but not yet taken.
+
+    Runs are triggered at the slot times, but a run that starts late (busy
+    worker pool, restart) still catches up on the same IST day instead of
+    skipping it.
+    """
+
     settings = get_settings()
-    window_seconds = 90  # tolerate clock skew / scheduling jitter
-
-    while not _stop_event.is_set():
-        now_utc = datetime.now(UTC)
-        today_ist = _as_of_date_ist(now_utc)
-        now_ist = (now_utc + IST_OFFSET).replace(tzinfo=None)
-
-        if today_ist.weekday() < 5:
-            run_1530 = _time_in_window(
-                now_ist, start_hhmm=(15, 30), window_seconds=window_seconds
-            )
-            run_1700 = _time_in_window(
-                now_ist, start_hhmm=(17, 0), window_seconds=window_seconds
-            )
-
-            if run_1530:
-                with _state_lock:
-                    if _state.get("last_1530_ist_date") == today_ist:
-                        run_1530 = False
-                    else:
-                        _state["last_1530_ist_date"] = today_ist
-                if run_1530:
-                    _run_capture_for_all_users(
-                        settings=settings, as_of_date=today_ist, run_at_ist=now_ist
-                    )
-
-            if run_1700:
-                with _state_lock:
-                    if _state.get("last_1700_ist_date") == today_ist:
-                        run_1700 = False
-                    else:
-                        _state["last_1700_ist_date"] = today_ist
-                if run_1700:
-                    # This overwrites the 15:30 snapshot for the same IST day.
-                    _run_capture_for_all_users(
-                        settings=settings, as_of_date=today_ist, run_at_ist=now_ist
-                    )
-
-        _stop_event.wait(timeout=20.0)
+    now_utc = datetime.now(UTC)
+    today_ist = _as_of_date_ist(now_utc)
+    now_ist = (now_utc + IST_OFFSET).replace(tzinfo=None)
+    if today_ist.weekday() >= 5:
+        return
+
+    with _state_lock:
+        run_1700 = _slot_passed(now_ist, _SLOT_1700) and (
+            _state.get("last_1700_ist_date") != today_ist
+        )
+        # Once 17:00 is due it overwrites the 15:30 snapshot anyway.
+        run_1530 = (
+            not run_1700
+            and _slot_passed(now_ist, _SLOT_1530)
+            and not _slot_passed(now_ist, _SLOT_1700)
+            and _state.get("last_1530_ist_date") != today_ist
+        )
+        if run_1700:
+            _state["last_1530_ist_date"] = today_ist
+            _state["last_1700_ist_date"] = today_ist
+        elif run_1530:
+            _state["last_1530_ist_date"] = today_ist
+
+    if run_1530 or run_1700:
+        # The 17:00 capture overwrites the 15:30 snapshot for the same IST day.
+        _run_capture_for_all_users(
+            settings=settings, as_of_date=today_ist, run_at_ist=now_ist
+        )
 
 
 def schedule_holdings_summary_daily_snapshots() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
     if "pytest" in sys.modules or os.getenv("PYTEST_CURRENT_TEST"):
         return
-    _scheduler_started = True
-
-    Thread(
-        target=_daily_snapshot_loop,
-        name="holdings-summary-daily-snapshots",
-        daemon=True,
-    ).start()
+    register_task(
+        "holdings_summary_daily_snapshots",
+        _daily_snapshot_tick,
+        daily_at_ist=(_SLOT_1530, _SLOT_1700),
+    )
 
 
 __all__ = ["schedule_holdings_summary_daily_snapshots"]
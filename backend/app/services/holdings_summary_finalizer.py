@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 import sys
 from datetime import UTC, date, datetime
-from threading import Event, Lock, Thread
+from threading import Lock
 
 from sqlalchemy.orm import Session
 
@@ -17,11 +17,11 @@ from app.services.holdings_summary_snapshots import (
     prev_trading_day,
     upsert_holdings_summary_snapshot,
 )
+from app.services.scheduler import register_task
 from app.services.system_events import record_system_event
 
 _state_lock = Lock()
-_scheduler_started = False
-_stop_event = Event()
+_startup_checked = False
 _state: dict[str, date | None] = {
     "last_run_ist_date": None,
     "last_missed_ist_date": None,
@@ -32,10 +32,8 @@ def _now_ist_naive() -> datetime:
     return (datetime.now(UTC) + IST_OFFSET).replace(tzinfo=None)
 
 
-def _time_in_window(now: datetime, *, start_hhmm: tuple[int, int], end_hhmm: tuple[int, int]) -> bool:
-    start = now.replace(hour=start_hhmm[0], minute=start_hhmm[1], second=0, microsecond=0)
-    end = now.replace(hour=end_hhmm[0], minute=end_hhmm[1], second=0, microsecond=0)
-    return start <= now < end
+def _slot_passed(now: datetime, hhmm: tuple[int, int]) -> bool:
+    return now >= now.replace(hour=hhmm[0], minute=hhmm[1], second=0, microsecond=0)
 
 
 def _get_zerodha_user_ids(db: Session) -> list[int]:
@@ -173,93 +171,99 @@ def _finalize_prev_trading_day(
                 )
 
 
-def _finalizer_loop() -> None:  # pragma: no cover - background loop
-    settings = get_settings()
+# Capture window: run once between 08:30–09:00 IST.
+_WINDOW_START = (8, 30)
+_WINDOW_END = (9, 0)
+_DEADLINE_HHMM = (9, 15)
+
 
-    # Capture window: run once between 08:30–09:00 IST.
-    window_start = (8, 30)
-    window_end = (9, 0)
-    deadline_hhmm = (9, 15)
+def _finalizer_tick() -> None:
+    global _startup_checked
+    settings = get_settings()
 
     # Startup catch-up: if we boot before 09:15 IST and yesterday's snapshot is
     # missing, capture it once immediately.
-    now_ist = _now_ist_naive()
-    if now_ist.weekday() < 5:
-        deadline = now_ist.replace(
-            hour=deadline_hhmm[0], minute=deadline_hhmm[1], second=0, microsecond=0
-        )
-        if now_ist < deadline:
-            _finalize_prev_trading_day(
-                settings=settings,
-                mode="startup",
-                overwrite_existing=False,
-            )
-
-    while not _stop_event.is_set():
+    if not _startup_checked:
+        _startup_checked = True
         now_ist = _now_ist_naive()
-        today_ist = _as_of_date_ist(datetime.now(UTC))
-
-        if today_ist.weekday() < 5:
+        if now_ist.weekday() < 5:
             deadline = now_ist.replace(
-                hour=deadline_hhmm[0],
-                minute=deadline_hhmm[1],
-                second=0,
-                microsecond=0,
+                hour=_DEADLINE_HHMM[0], minute=_DEADLINE_HHMM[1], second=0, microsecond=0
             )
-
-            should_run = _time_in_window(now_ist, start_hhmm=window_start, end_hhmm=window_end)
-            if should_run:
-                with _state_lock:
-                    if _state.get("last_run_ist_date") == today_ist:
-                        should_run = False
-                    else:
-                        _state["last_run_ist_date"] = today_ist
-                        _state["last_missed_ist_date"] = None
-
-            if should_run:
+            if now_ist < deadline:
                 _finalize_prev_trading_day(
                     settings=settings,
-                    mode="window",
-                    overwrite_existing=True,
+                    mode="startup",
+                    overwrite_existing=False,
                 )
-            elif now_ist >= deadline:
-                # Missed the safe window: record once per IST day to keep the UI
-                # explainable when daily P&L falls back.
-                with _state_lock:
-                    if _state.get("last_missed_ist_date") != today_ist:
-                        _state["last_missed_ist_date"] = today_ist
-                        _state["last_run_ist_date"] = _state.get("last_run_ist_date")
-                        try:
-                            with SessionLocal() as db:
-                                record_system_event(
-                                    db,
-                                    level="WARNING",
-                                    category="holdings_summary_finalizer",
-                                    message="Holdings summary finalization missed window",
-                                    details={
-                                        "deadline_ist": f"{deadline_hhmm[0]:02d}:{deadline_hhmm[1]:02d}",
-                                        "today_ist": today_ist.isoformat(),
-                                    },
-                                )
-                        except Exception:
-                            pass
-
-        _stop_event.wait(timeout=30.0)
+
+    now_ist = _now_ist_naive()
+    today_ist = _as_of_date_ist(datetime.now(UTC))
+    if today_ist.weekday() >= 5:
+        return
+
+    deadline = now_ist.replace(
+        hour=_DEADLINE_HHMM[0],
+        minute=_DEADLINE_HHMM[1],
+        second=0,
+        microsecond=0,
+    )
+
+    # A tick delayed past the window (e.g. queued behind other scheduled
+    # tasks) still finalizes today's run, as long as it lands before the
+    # deadline.
+    should_run = _slot_passed(now_ist, _WINDOW_START) and now_ist < deadline
+    if should_run:
+        with _state_lock:
+            if _state.get("last_run_ist_date") == today_ist:
+                should_run = False
+            else:
+                _state["last_run_ist_date"] = today_ist
+                _state["last_missed_ist_date"] = None
+
+    if should_run:
+        _finalize_prev_trading_day(
+            settings=settings,
+            mode="catch_up" if _slot_passed(now_ist, _WINDOW_END) else "window",
+            overwrite_existing=True,
+        )
+    elif now_ist >= deadline:
+        # Missed the safe window: record once per IST day to keep the UI
+        # explainable when daily P&L falls back.
+        with _state_lock:
+            if (
+                _state.get("last_missed_ist_date") != today_ist
+                and _state.get("last_run_ist_date") != today_ist
+            ):
+                _state["last_missed_ist_date"] = today_ist
+                _state["last_run_ist_date"] = _state.get("last_run_ist_date")
+                try:
+                    with SessionLocal() as db:
+                        record_system_event(
+                            db,
+                            level="WARNING",
+                            category="holdings_summary_finalizer",
+                            message="Holdings summary finalization missed window",
+                            details={
+                                "deadline_ist": f"{_DEADLINE_HHMM[0]:02d}:{_DEADLINE_HHMM[1]:02d}",
+                                "today_ist": today_ist.isoformat(),
+                            },
+                        )
+                except Exception:
+                    pass
 
 
 def schedule_holdings_summary_finalizer() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
     if "pytest" in sys.modules or os.getenv("PYTEST_CURRENT_TEST"):
         return
-    _scheduler_started = True
-
-    Thread(
-        target=_finalizer_loop,
-        name="holdings-summary-finalizer",
-        daemon=True,
-    ).start()
+    # Ticks at the window start and the deadline, plus once at startup for the
+    # catch-up (which also covers booting inside the window).
+    register_task(
+        "holdings_summary_finalizer",
+        _finalizer_tick,
+        daily_at_ist=(_WINDOW_START, _DEADLINE_HHMM),
+        run_at_start=True,
+    )
 
 
 __all__ = ["schedule_holdings_summary_finalizer"]
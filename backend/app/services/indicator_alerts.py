@@ -4,7 +4,6 @@ import json
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from math import log, sqrt
-from threading import Event, Thread
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from sqlalchemy import or_
@@ -23,17 +22,16 @@ from app.schemas.indicator_rules import (
     OperatorType,
     TriggerMode,
 )
-from app.services.market_data import Timeframe, load_series
+from app.services import indicator_kernels as kernels
+from app.services.candle_store import CandleSeries, get_candle_store
+from app.services.market_data import Timeframe
+from app.services.scheduler import register_task
 
 
 class IndicatorAlertError(RuntimeError):
     """Raised when indicator alert evaluation cannot be completed."""
 
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
-
-
 def _deserialize_conditions(
     rule: IndicatorRule,
 ) -> Tuple[LogicType, List[IndicatorCondition]]:
@@ -108,8 +106,9 @@ def _compute_rsi(
         rs = avg_gain / avg_loss
         return 100.0 - 100.0 / (1.0 + rs)
 
-    curr = rsi_slice(values)
-    prev = rsi_slice(values[:-1]) if len(values) >= period + 2 else None
+    # Only the last `period` deltas contribute, so avoid walking the full history.
+    curr = rsi_slice(values[-(period + 1) :])
+    prev = rsi_slice(values[-(period + 2) : -1]) if len(values) >= period + 2 else None
     return curr, prev
 
 
@@ -140,16 +139,11 @@ def _compute_atr_pct(
 ) -> Optional[float]:
     if period <= 0 or len(highs) < period + 1 or len(closes) < period + 1:
         return None
-    trs: List[float] = []
-    for i in range(1, len(highs)):
-        high = highs[i]
-        low = lows[i]
-        prev_close = closes[i - 1]
-        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        trs.append(tr)
+    tail = period + 1
+    trs = kernels.true_range(highs[-tail:], lows[-tail:], closes[-tail:])[1:]
     if len(trs) < period:
         return None
-    atr = sum(trs[-period:]) / period
+    atr = sum(trs) / period
     last_close = closes[-1]
     if last_close == 0:
         return None
@@ -239,7 +233,7 @@ def _compute_pvt_series(
     return pvt
 
 
-def _load_candles_for_rule(
+def _candle_series_for_rule(
     db: Session,
     settings: Settings,
     symbol: str,
@@ -247,7 +241,7 @@ def _load_candles_for_rule(
     timeframe: Timeframe,
     *,
     allow_fetch: bool = True,
-) -> List[Dict]:
+) -> CandleSeries:
     now_ist = datetime.now(UTC) + IST_OFFSET
     end = now_ist.replace(tzinfo=None)
     # Use conservative lookback; indicator-specific helpers ensure they
@@ -257,18 +251,33 @@ def _load_candles_for_rule(
     else:
         lookback_days = 90
     start = end - timedelta(days=lookback_days)
-    return load_series(
+    # Served from the shared candle store so alerts, screeners and indicator
+    # rules touching the same symbol reuse one load per refresh interval.
+    return get_candle_store().get(
         db,
         settings,
         symbol=symbol,
         exchange=exchange,
         timeframe=timeframe,
         start=start,
-        end=end,
         allow_fetch=allow_fetch,
     )
 
 
+def _load_candles_for_rule(
+    db: Session,
+    settings: Settings,
+    symbol: str,
+    exchange: str,
+    timeframe: Timeframe,
+    *,
+    allow_fetch: bool = True,
+) -> List[Dict]:
+    return _candle_series_for_rule(
+        db, settings, symbol, exchange, timeframe, allow_fetch=allow_fetch
+    ).candles
+
+
 def _compute_indicator_sample(
     candles: List[Dict],
     condition: IndicatorCondition,
@@ -723,41 +732,15 @@ def evaluate_indicator_rules_once() -> None:
                 db.commit()
 
 
-def _indicator_alerts_loop() -> None:  # pragma: no cover - background loop
-    interval = timedelta(minutes=5)
-    next_run = utc_now() + timedelta(minutes=1)
-
-    while not _scheduler_stop_event.is_set():
-        now = utc_now()
-        sleep_for = (next_run - now).total_seconds()
-        if sleep_for > 0:
-            _scheduler_stop_event.wait(timeout=sleep_for)
-            if _scheduler_stop_event.is_set():
-                return
-
-        try:
-            evaluate_indicator_rules_once()
-        except Exception:
-            # Errors are logged via the global logging config; never kill the loop.
-            pass
-
-        next_run = utc_now() + interval
-
-
 def schedule_indicator_alerts() -> None:
-    """Start a background thread that periodically evaluates indicator rules."""
-
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    _scheduler_started = True
+    """Register periodic evaluation of indicator rules with the scheduler."""
 
-    thread = Thread(
-        target=_indicator_alerts_loop,
-        name="indicator-alerts",
-        daemon=True,
+    register_task(
+        "indicator_alerts",
+        evaluate_indicator_rules_once,
+        interval_sec=5 * 60,
+        initial_delay_sec=60,
     )
-    thread.start()
 
 
 __all__ = [
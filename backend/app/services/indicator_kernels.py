@@ -0,0 +1,611 @@
+"""Shared series kernels for indicator evaluation.
+
+Every function takes plain float sequences (lists or `array('d')` columns) and
+returns a new list aligned to the input, with NaN marking missing values.
+Rolling windows are maintained incrementally so each kernel is O(n) in the
+number of bars regardless of the window length.
+
+Semantics follow docs/v3_dsl_semantics_spec.md: a window containing any
+non-finite value yields NaN, and stateful indicators (EMA, RMA, RSI, ATR,
+ADX, Supertrend) seed on the first full finite window.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from math import isfinite, sqrt
+from typing import Optional, Sequence
+
+NAN = float("nan")
+
+BINARY_OPS = ("+", "-", "*", "/")
+
+
+def first_full_window(values: Sequence[float], length: int) -> Optional[int]:
+    """Return the end index of the first run of `length` finite values."""
+
+    if length <= 0:
+        return None
+    run = 0
+    for i, v in enumerate(values):
+        if isfinite(v):
+            run += 1
+            if run >= length:
+                return i
+        else:
+            run = 0
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Element-wise
+# ---------------------------------------------------------------------------
+
+
+def binary(a: Sequence[float], b: Sequence[float], op: str) -> list[float]:
+    """Apply an arithmetic operator element-wise (truncated to the shorter input)."""
+
+    if op == "+":
+        return [x + y if isfinite(x) and isfinite(y) else NAN for x, y in zip(a, b, strict=False)]
+    if op == "-":
+        return [x - y if isfinite(x) and isfinite(y) else NAN for x, y in zip(a, b, strict=False)]
+    if op == "*":
+        return [x * y if isfinite(x) and isfinite(y) else NAN for x, y in zip(a, b, strict=False)]
+    if op == "/":
+        return [
+            x / y if isfinite(x) and isfinite(y) and y != 0 else NAN
+            for x, y in zip(a, b, strict=False)
+        ]
+    raise ValueError(f"Unsupported binary operator '{op}'")
+
+
+def unary(values: Sequence[float], op: str) -> list[float]:
+    if op == "-":
+        return [-float(v) if isfinite(v) else NAN for v in values]
+    if op == "+":
+        return [float(v) if isfinite(v) else NAN for v in values]
+    raise ValueError(f"Unsupported unary operator '{op}'")
+
+
+def pct_change(values: Sequence[float]) -> list[float]:
+    """Bar-over-bar percentage change; NaN on the first bar and zero bases."""
+
+    n = len(values)
+    out = [NAN] * n
+    for i in range(1, n):
+        a = values[i - 1]
+        b = values[i]
+        if not isfinite(a) or not isfinite(b) or a == 0:
+            continue
+        out[i] = (b - a) / a * 100.0
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Rolling windows
+# ---------------------------------------------------------------------------
+
+
+def rolling_sum(values: Sequence[float], length: int) -> list[float]:
+    """Rolling window sum using a compensated (Neumaier) running total."""
+
+    n = len(values)
+    out = [NAN] * n
+    if length <= 0:
+        return out
+    total = 0.0
+    comp = 0.0
+    bad = 0
+    for i in range(n):
+        v = values[i]
+        if isfinite(v):
+            t = total + v
+            if abs(total) >= abs(v):
+                comp += (total - t) + v
+            else:
+                comp += (v - t) + total
+            total = t
+        else:
+            bad += 1
+        if i >= length:
+            old = values[i - length]
+            if isfinite(old):
+                t = total - old
+                if abs(total) >= abs(old):
+                    comp += (total - t) - old
+                else:
+                    comp += (-old - t) + total
+                total = t
+            else:
+                bad -= 1
+        if i >= length - 1 and not bad:
+            out[i] = total + comp
+    return out
+
+
+def sma(values: Sequence[float], length: int) -> list[float]:
+    if length <= 0:
+        return [NAN] * len(values)
+    return [s / length for s in rolling_sum(values, length)]
+
+
+def rolling_max(values: Sequence[float], length: int) -> list[float]:
+    """Rolling maximum via a monotonic index deque."""
+
+    n = len(values)
+    out = [NAN] * n
+    if length <= 0:
+        return out
+    window: deque[int] = deque()
+    last_bad = -1
+    for i in range(n):
+        v = values[i]
+        if not isfinite(v):
+            last_bad = i
+            window.clear()
+            continue
+        while window and values[window[-1]] <= v:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - length:
+            window.popleft()
+        if i - last_bad >= length:
+            out[i] = values[window[0]]
+    return out
+
+
+def rolling_min(values: Sequence[float], length: int) -> list[float]:
+    """Rolling minimum via a monotonic index deque."""
+
+    n = len(values)
+    out = [NAN] * n
+    if length <= 0:
+        return out
+    window: deque[int] = deque()
+    last_bad = -1
+    for i in range(n):
+        v = values[i]
+        if not isfinite(v):
+            last_bad = i
+            window.clear()
+            continue
+        while window and values[window[-1]] >= v:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - length:
+            window.popleft()
+        if i - last_bad >= length:
+            out[i] = values[window[0]]
+    return out
+
+
+def rolling_std(
+    values: Sequence[float],
+    length: int,
+    *,
+    skip_missing: bool = False,
+    min_count: int = 2,
+) -> list[float]:
+    """Rolling sample standard deviation (ddof=1).
+
+    Uses Welford add/remove updates, re-synchronised with an exact two-pass
+    pass every `length` bars to bound rounding drift. By default a window with
+    any non-finite value is NaN; with `skip_missing` only the finite values
+    are used and at least `min_count` of them are required.
+    """
+
+    n = len(values)
+    out = [NAN] * n
+    if length <= 1:
+        return out
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    bad = 0
+    since_sync = length
+    for i in range(n):
+        v = values[i]
+        if isfinite(v):
+            count += 1
+            d = v - mean
+            mean += d / count
+            m2 += d * (v - mean)
+        else:
+            bad += 1
+        if i >= length:
+            old = values[i - length]
+            if isfinite(old):
+                if count <= 1:
+                    count = 0
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    count -= 1
+                    d = old - mean
+                    mean -= d / count
+                    m2 -= d * (old - mean)
+            else:
+                bad -= 1
+        if i < length - 1:
+            continue
+        if skip_missing:
+            if count < max(min_count, 1):
+                continue
+        elif bad:
+            continue
+        since_sync += 1
+        if since_sync >= length:
+            window = [x for x in values[i - length + 1 : i + 1] if isfinite(x)]
+            count = len(window)
+            mean = sum(window) / count
+            m2 = sum((x - mean) ** 2 for x in window)
+            since_sync = 0
+        out[i] = sqrt(max(m2, 0.0) / max(count - 1, 1))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Recursive smoothers
+# ---------------------------------------------------------------------------
+
+
+def ema(values: Sequence[float], length: int) -> list[float]:
+    """Exponential moving average seeded with the SMA of the first full window.
+
+    Seeding on the first window of `length` consecutive finite values lets EMA
+    be composed over series-producing functions (which often have leading
+    NaNs). A later gap turns the rest of the series into NaN.
+    """
+
+    n = len(values)
+    out = [NAN] * n
+    start = first_full_window(values, length)
+    if start is None:
+        return out
+    k = 2.0 / (length + 1.0)
+    decay = 1 - k
+    e = sum(values[start - length + 1 : start + 1]) / length
+    out[start] = e
+    for i in range(start + 1, n):
+        v = values[i]
+        if not isfinite(v) or not isfinite(e):
+            break
+        e = v * k + e * decay
+        out[i] = e
+    return out
+
+
+def rma(values: Sequence[float], length: int) -> list[float]:
+    """Wilder's RMA (a.k.a. smoothed moving average).
+
+    - Requires `length` periods; first `length-1` bars are missing (NaN).
+    - Seed at the first index where a full finite window exists.
+    - Subsequent: rma = (prev_rma*(length-1) + value) / length
+    """
+
+    n = len(values)
+    out = [NAN] * n
+    if length <= 0 or n < length:
+        return out
+    start = first_full_window(values, length)
+    if start is None:
+        return out
+    r = sum(values[start - length + 1 : start + 1]) / length
+    out[start] = r
+    for i in range(start + 1, n):
+        v = values[i]
+        if not isfinite(v) or not isfinite(r):
+            break
+        r = (r * (length - 1) + v) / length
+        out[i] = r
+    return out
+
+
+def gains_losses(values: Sequence[float]) -> tuple[list[float], list[float]]:
+    """Split bar-over-bar changes into gains and losses (bar 0 counts as flat)."""
+
+    n = len(values)
+    gains = [NAN] * n
+    losses = [NAN] * n
+    if n:
+        gains[0] = 0.0
+        losses[0] = 0.0
+    for i in range(1, n):
+        prev = values[i - 1]
+        curr = values[i]
+        if not isfinite(prev) or not isfinite(curr):
+            continue
+        delta = curr - prev
+        if delta >= 0:
+            gains[i] = delta
+            losses[i] = 0.0
+        else:
+            gains[i] = 0.0
+            losses[i] = -delta
+    return gains, losses
+
+
+def rsi_from_averages(
+    avg_gains: Sequence[float], avg_losses: Sequence[float]
+) -> list[float]:
+    out: list[float] = []
+    append = out.append
+    for g, loss in zip(avg_gains, avg_losses, strict=False):
+        if not isfinite(g) or not isfinite(loss):
+            append(NAN)
+        elif loss == 0:
+            append(100.0)
+        else:
+            append(100.0 - 100.0 / (1.0 + g / loss))
+    return out
+
+
+def rsi(values: Sequence[float], length: int) -> list[float]:
+    n = len(values)
+    if length <= 0 or n < length:
+        return [NAN] * n
+    gains, losses = gains_losses(values)
+    return rsi_from_averages(rma(gains, length), rma(losses, length))
+
+
+def true_range(
+    highs: Sequence[float], lows: Sequence[float], closes: Sequence[float]
+) -> list[float]:
+    """True range per bar; bar 0 uses its own close as the previous close."""
+
+    n = min(len(highs), len(lows), len(closes))
+    trs = [NAN] * n
+    if n >= 1:
+        h0 = highs[0]
+        l0 = lows[0]
+        c0 = closes[0]
+        if isfinite(h0) and isfinite(l0) and isfinite(c0):
+            trs[0] = max(h0 - l0, abs(h0 - c0), abs(l0 - c0))
+    for i in range(1, n):
+        h = highs[i]
+        low = lows[i]
+        pc = closes[i - 1]
+        if not (isfinite(h) and isfinite(low) and isfinite(pc)):
+            continue
+        trs[i] = max(h - low, abs(h - pc), abs(low - pc))
+    return trs
+
+
+def atr(
+    highs: Sequence[float], lows: Sequence[float], closes: Sequence[float], length: int
+) -> list[float]:
+    n = min(len(highs), len(lows), len(closes))
+    if length <= 0 or n < length:
+        return [NAN] * n
+    return rma(true_range(highs, lows, closes), length)
+
+
+def adx(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    closes: Sequence[float],
+    length: int,
+) -> list[float]:
+    """Average Directional Index (ADX), Wilder smoothing.
+
+    Returns a series aligned to input bars, with leading NaNs until enough data
+    is available (first ADX typically appears at index 2*length).
+    """
+
+    n = min(len(highs), len(lows), len(closes))
+    out = [NAN] * n
+    if length <= 0 or n < (2 * length + 1):
+        return out
+
+    tr: list[float] = [NAN] * n
+    plus_dm: list[float] = [NAN] * n
+    minus_dm: list[float] = [NAN] * n
+    for i in range(1, n):
+        h = highs[i]
+        low = lows[i]
+        pc = closes[i - 1]
+        ph = highs[i - 1]
+        pl = lows[i - 1]
+        if any(not isfinite(v) for v in (h, low, pc, ph, pl)):
+            continue
+        tr[i] = max(h - low, abs(h - pc), abs(low - pc))
+        up_move = h - ph
+        down_move = pl - low
+        plus_dm[i] = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm[i] = down_move if (down_move > up_move and down_move > 0) else 0.0
+
+    sm_tr: list[float] = [NAN] * n
+    sm_pdm: list[float] = [NAN] * n
+    sm_mdm: list[float] = [NAN] * n
+
+    init_end = length
+    init_tr = tr[1 : init_end + 1]
+    init_pdm = plus_dm[1 : init_end + 1]
+    init_mdm = minus_dm[1 : init_end + 1]
+    if any(not isfinite(v) for v in (*init_tr, *init_pdm, *init_mdm)):
+        return out
+
+    sm_tr[init_end] = sum(init_tr)
+    sm_pdm[init_end] = sum(init_pdm)
+    sm_mdm[init_end] = sum(init_mdm)
+
+    for i in range(init_end + 1, n):
+        if any(not isfinite(v) for v in (sm_tr[i - 1], sm_pdm[i - 1], sm_mdm[i - 1])):
+            continue
+        if any(not isfinite(v) for v in (tr[i], plus_dm[i], minus_dm[i])):
+            continue
+        sm_tr[i] = sm_tr[i - 1] - (sm_tr[i - 1] / length) + tr[i]
+        sm_pdm[i] = sm_pdm[i - 1] - (sm_pdm[i - 1] / length) + plus_dm[i]
+        sm_mdm[i] = sm_mdm[i - 1] - (sm_mdm[i - 1] / length) + minus_dm[i]
+
+    dx: list[float] = [NAN] * n
+    for i in range(init_end, n):
+        st = sm_tr[i]
+        if not isfinite(st) or st == 0:
+            continue
+        pdi = 100.0 * (sm_pdm[i] / st) if isfinite(sm_pdm[i]) else NAN
+        mdi = 100.0 * (sm_mdm[i] / st) if isfinite(sm_mdm[i]) else NAN
+        if not isfinite(pdi) or not isfinite(mdi) or (pdi + mdi) == 0:
+            continue
+        dx[i] = 100.0 * abs(pdi - mdi) / (pdi + mdi)
+
+    first_adx_idx = 2 * length
+    seed_dx = dx[length:first_adx_idx]
+    if len(seed_dx) != length or any(not isfinite(v) for v in seed_dx):
+        return out
+
+    value = sum(seed_dx) / length
+    out[first_adx_idx] = value
+    for i in range(first_adx_idx + 1, n):
+        if not isfinite(value) or not isfinite(dx[i]):
+            break
+        value = ((value * (length - 1)) + dx[i]) / length
+        out[i] = value
+
+    return out
+
+
+def macd(
+    values: Sequence[float],
+    fast: int,
+    slow: int,
+    signal: int,
+) -> tuple[list[float], list[float], list[float]]:
+    """Return (macd, signal, histogram) series."""
+
+    n = len(values)
+    if fast <= 0 or slow <= 0 or signal <= 0 or n == 0:
+        return [NAN] * n, [NAN] * n, [NAN] * n
+    line = binary(ema(values, fast), ema(values, slow), "-")
+    sig = ema(line, signal)
+    hist = binary(line, sig, "-")
+    return line, sig, hist
+
+
+def supertrend(
+    *,
+    highs: Sequence[float],
+    lows: Sequence[float],
+    closes: Sequence[float],
+    source: Sequence[float],
+    length: int,
+    multiplier: float,
+) -> tuple[list[float], list[float]]:
+    """Compute Supertrend line + direction series.
+
+    - Uses ATR(length) with Wilder RMA smoothing.
+    - Default source is expected to be hl2 (handled by the caller).
+    - Produces NaN (missing) for the first `length-1` bars.
+    - Direction: +1 for uptrend, -1 for downtrend.
+    """
+
+    n = min(len(highs), len(lows), len(closes), len(source))
+    line = [NAN] * n
+    direction = [NAN] * n
+    if length <= 0 or n < length:
+        return line, direction
+
+    atr_values = atr(highs[:n], lows[:n], closes[:n], length)
+    final_upper = [NAN] * n
+    final_lower = [NAN] * n
+
+    for i in range(n):
+        a = atr_values[i]
+        src = source[i]
+        c = closes[i]
+        if not (isfinite(a) and isfinite(src) and isfinite(c)):
+            continue
+
+        basic_upper = src + multiplier * a
+        basic_lower = src - multiplier * a
+
+        if i == 0:
+            final_upper[i] = basic_upper
+            final_lower[i] = basic_lower
+            continue
+
+        prev_c = closes[i - 1]
+        fu_prev = final_upper[i - 1]
+        fl_prev = final_lower[i - 1]
+
+        if isfinite(fu_prev) and isfinite(prev_c):
+            final_upper[i] = (
+                basic_upper
+                if (basic_upper < fu_prev or prev_c > fu_prev)
+                else fu_prev
+            )
+        else:
+            final_upper[i] = basic_upper
+
+        if isfinite(fl_prev) and isfinite(prev_c):
+            final_lower[i] = (
+                basic_lower
+                if (basic_lower > fl_prev or prev_c < fl_prev)
+                else fl_prev
+            )
+        else:
+            final_lower[i] = basic_lower
+
+        if i < length - 1:
+            continue
+
+        if i == length - 1 or not isfinite(direction[i - 1]):
+            # Deterministic initialization: start in uptrend at the first valid bar.
+            direction[i] = 1.0
+        else:
+            prev_dir = direction[i - 1]
+            if prev_dir > 0:
+                direction[i] = -1.0 if c < final_lower[i] else 1.0
+            else:
+                direction[i] = 1.0 if c > final_upper[i] else -1.0
+
+        line[i] = final_lower[i] if direction[i] > 0 else final_upper[i]
+
+    return line, direction
+
+
+def obv(closes: Sequence[float], volumes: Sequence[float]) -> list[float]:
+    n = min(len(closes), len(volumes))
+    out = [NAN] * n
+    if n == 0:
+        return out
+    total = 0.0
+    out[0] = total
+    for i in range(1, n):
+        c0 = closes[i - 1]
+        c1 = closes[i]
+        v = volumes[i]
+        if not (isfinite(c0) and isfinite(c1) and isfinite(v)):
+            continue
+        if c1 > c0:
+            total += v
+        elif c1 < c0:
+            total -= v
+        out[i] = total
+    return out
+
+
+__all__ = [
+    "BINARY_OPS",
+    "NAN",
+    "adx",
+    "atr",
+    "binary",
+    "ema",
+    "first_full_window",
+    "gains_losses",
+    "macd",
+    "obv",
+    "pct_change",
+    "rma",
+    "rolling_max",
+    "rolling_min",
+    "rolling_std",
+    "rolling_sum",
+    "rsi",
+    "rsi_from_averages",
+    "sma",
+    "supertrend",
+    "true_range",
+    "unary",
+]
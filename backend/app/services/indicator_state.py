@@ -0,0 +1,361 @@
+"""Incremental (streaming) indicator state for alert evaluation.
+
+Alert cycles only need the last two values of an indicator (`now`/`prev`).
+For recursive indicators (EMA, Wilder RSI, ATR, Supertrend) this module keeps
+the recursion state per (exchange, symbol, timeframe, indicator, params) and
+advances it bar by bar, so a new bar costs O(1) instead of a full replay of
+the loaded history.
+
+State is tied to the `CandleSeries.lineage` it was built from. Within one
+lineage the candle store only ever appends bars or replaces the last (live)
+bar, so every bar before the last is final. State is therefore committed up
+to the second-to-last bar, and the live bar is stepped on a throwaway copy.
+Any full reload of the underlying candles (writes, eviction, a wider lookback)
+or a trim of leading bars starts a new lineage and the state is rebuilt from
+scratch, so the state always covers exactly the bars of the served series.
+
+The steppers replay exactly the same arithmetic as `indicator_kernels`, so the
+streamed values are bit-for-bit identical to the series kernels run over the
+same `CandleSeries`.
+"""
+
+from __future__ import annotations
+
+import copy
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from math import isfinite
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from app.core.config import get_settings
+from app.services.candle_columns import CandleColumns
+from app.services.candle_store import CandleSeries
+
+_NAN = float("nan")
+
+StateKey = Tuple[Hashable, ...]
+
+
+class _SeededSmoother(ABC):
+    """Common warmup: seed with the mean of the first run of `length` finite values."""
+
+    __slots__ = ("length", "value", "_run")
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.value = _NAN
+        self._run: deque[float] | None = deque(maxlen=length)
+
+    @abstractmethod
+    def _next(self, x: float) -> float:
+        """Advance the seeded value by one finite input."""
+
+    def step(self, x: float) -> float:
+        run = self._run
+        if run is not None:
+            if not isfinite(x):
+                run.clear()
+                return _NAN
+            run.append(x)
+            if len(run) < self.length:
+                return _NAN
+            self.value = sum(run) / self.length
+            self._run = None
+            return self.value
+        v = self.value
+        if not isfinite(x) or not isfinite(v):
+            self.value = _NAN
+            return _NAN
+        self.value = self._next(x)
+        return self.value
+
+
+class EmaStepper(_SeededSmoother):
+    __slots__ = ("_k", "_decay")
+
+    def __init__(self, length: int) -> None:
+        super().__init__(length)
+        self._k = 2.0 / (length + 1.0)
+        self._decay = 1 - self._k
+
+    def _next(self, x: float) -> float:
+        return x * self._k + self.value * self._decay
+
+
+class RmaStepper(_SeededSmoother):
+    __slots__ = ()
+
+    def _next(self, x: float) -> float:
+        return (self.value * (self.length - 1) + x) / self.length
+
+
+class RsiStepper:
+    __slots__ = ("_gain", "_loss", "_prev", "_started")
+
+    def __init__(self, length: int) -> None:
+        self._gain = RmaStepper(length)
+        self._loss = RmaStepper(length)
+        self._prev = _NAN
+        self._started = False
+
+    def step(self, x: float) -> float:
+        if not self._started:
+            gain, loss = 0.0, 0.0
+            self._started = True
+        elif not isfinite(self._prev) or not isfinite(x):
+            gain, loss = _NAN, _NAN
+        else:
+            delta = x - self._prev
+            gain, loss = (delta, 0.0) if delta >= 0 else (0.0, -delta)
+        self._prev = x
+        g = self._gain.step(gain)
+        loss_avg = self._loss.step(loss)
+        if not isfinite(g) or not isfinite(loss_avg):
+            return _NAN
+        if loss_avg == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + g / loss_avg)
+
+
+class AtrStepper:
+    __slots__ = ("_rma", "_prev_close", "_started")
+
+    def __init__(self, length: int) -> None:
+        self._rma = RmaStepper(length)
+        self._prev_close = _NAN
+        self._started = False
+
+    def step(self, h: float, low: float, c: float) -> float:
+        pc = self._prev_close if self._started else c
+        self._started = True
+        self._prev_close = c
+        if isfinite(h) and isfinite(low) and isfinite(pc):
+            tr = max(h - low, abs(h - pc), abs(low - pc))
+        else:
+            tr = _NAN
+        return self._rma.step(tr)
+
+
+class SupertrendStepper:
+    """Streaming version of `indicator_kernels.supertrend` with an hl2 source."""
+
+    __slots__ = (
+        "length",
+        "multiplier",
+        "_atr",
+        "_i",
+        "_prev_close",
+        "_upper",
+        "_lower",
+        "_direction",
+    )
+
+    def __init__(self, length: int, multiplier: float) -> None:
+        self.length = length
+        self.multiplier = multiplier
+        self._atr = AtrStepper(length)
+        self._i = 0
+        self._prev_close = _NAN
+        self._upper = _NAN
+        self._lower = _NAN
+        self._direction = _NAN
+
+    def step(self, h: float, low: float, c: float) -> tuple[float, float]:
+        i = self._i
+        self._i += 1
+        a = self._atr.step(h, low, c)
+        prev_c = self._prev_close
+        self._prev_close = c
+        src = (h + low) / 2.0 if isfinite(h) and isfinite(low) else _NAN
+        fu_prev = self._upper
+        fl_prev = self._lower
+        dir_prev = self._direction
+        if not (isfinite(a) and isfinite(src) and isfinite(c)):
+            self._upper = self._lower = self._direction = _NAN
+            return _NAN, _NAN
+
+        basic_upper = src + self.multiplier * a
+        basic_lower = src - self.multiplier * a
+        if i == 0:
+            self._upper = basic_upper
+            self._lower = basic_lower
+            self._direction = _NAN
+            return _NAN, _NAN
+
+        if isfinite(fu_prev) and isfinite(prev_c):
+            upper = (
+                basic_upper if (basic_upper < fu_prev or prev_c > fu_prev) else fu_prev
+            )
+        else:
+            upper = basic_upper
+        if isfinite(fl_prev) and isfinite(prev_c):
+            lower = (
+                basic_lower if (basic_lower > fl_prev or prev_c < fl_prev) else fl_prev
+            )
+        else:
+            lower = basic_lower
+        self._upper = upper
+        self._lower = lower
+
+        if i < self.length - 1:
+            self._direction = _NAN
+            return _NAN, _NAN
+        if i == self.length - 1 or not isfinite(dir_prev):
+            direction = 1.0
+        elif dir_prev > 0:
+            direction = -1.0 if c < lower else 1.0
+        else:
+            direction = 1.0 if c > upper else -1.0
+        self._direction = direction
+        return (lower if direction > 0 else upper), direction
+
+
+# Adapters from a stepper to one bar of a columnar series.
+BarStep = Callable[[Any, CandleColumns, int], Any]
+
+
+def source_step(source: str) -> BarStep:
+    def _step(stepper: Any, cols: CandleColumns, i: int) -> Any:
+        return stepper.step(cols.column(source)[i])
+
+    return _step
+
+
+def hlc_step(stepper: Any, cols: CandleColumns, i: int) -> Any:
+    return stepper.step(cols.high[i], cols.low[i], cols.close[i])
+
+
+@dataclass
+class _State:
+    lineage: int
+    last_ts: int  # epoch microseconds of the last committed bar
+    stepper: Any
+    last_output: Any
+
+
+class IndicatorStateStore:
+    """Bounded LRU of streaming indicator states."""
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max(int(max_entries), 1)
+        self._lock = Lock()
+        self._entries: "OrderedDict[StateKey, _State]" = OrderedDict()
+        self._incremental = 0
+        self._rebuilds = 0
+        self._bars_stepped = 0
+
+    def evaluate(
+        self,
+        key: StateKey,
+        series: CandleSeries,
+        *,
+        factory: Callable[[], Any],
+        step: BarStep,
+    ) -> tuple[Optional[Any], Optional[Any]]:
+        """Return the indicator output for the last two bars as (now, prev)."""
+
+        cols = series.columns
+        n = len(cols)
+        if n == 0:
+            return None, None
+
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+
+        stepper = None
+        prev_out: Any = None
+        start = 0
+        if state is not None and state.lineage == series.lineage:
+            j = bisect_left(cols.ts, state.last_ts)
+            if j < n - 1 and cols.ts[j] == state.last_ts:
+                stepper = copy.deepcopy(state.stepper)
+                prev_out = state.last_output
+                start = j + 1
+        incremental = stepper is not None
+        if stepper is None:
+            stepper = factory()
+
+        for i in range(start, n - 1):
+            prev_out = step(stepper, cols, i)
+        live = copy.deepcopy(stepper)
+        now_out = step(live, cols, n - 1)
+
+        with self._lock:
+            if incremental:
+                self._incremental += 1
+            else:
+                self._rebuilds += 1
+            self._bars_stepped += n - start
+            if n >= 2:
+                current = self._entries.get(key)
+                # Never move committed state backwards when evaluations race.
+                if (
+                    current is None
+                    or current.lineage != series.lineage
+                    or current.last_ts <= cols.ts[n - 2]
+                ):
+                    self._entries[key] = _State(
+                        lineage=series.lineage,
+                        last_ts=cols.ts[n - 2],
+                        stepper=stepper,
+                        last_output=prev_out,
+                    )
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+        return now_out, (prev_out if n >= 2 else None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            evaluations = self._incremental + self._rebuilds
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "incremental": self._incremental,
+                "rebuilds": self._rebuilds,
+                "bars_stepped": self._bars_stepped,
+                "incremental_rate": (
+                    self._incremental / evaluations if evaluations else 0.0
+                ),
+            }
+
+
+_store: IndicatorStateStore | None = None
+_store_lock = Lock()
+
+
+def get_indicator_state_store() -> IndicatorStateStore:
+    """Return the process-wide indicator state store, creating it on first use."""
+
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                _store = IndicatorStateStore(
+                    max_entries=int(settings.indicator_state_max_entries),
+                )
+    return _store
+
+
+__all__ = [
+    "AtrStepper",
+    "EmaStepper",
+    "IndicatorStateStore",
+    "RmaStepper",
+    "RsiStepper",
+    "SupertrendStepper",
+    "get_indicator_state_store",
+    "hlc_step",
+    "source_step",
+]
@@ -0,0 +1,510 @@
+"""Diff-based bulk apply of broker instrument masters.
+
+The Zerodha and SmartAPI masters have ~100k rows. Syncing them row by row
+through `_get_or_create_listing`/`_upsert_broker_instrument` meant several
+SELECTs and flushes per row inside one long transaction, holding the SQLite
+write lock for minutes. `InstrumentMasterSync` instead:
+
+1. loads securities, listings and the broker's instruments into memory once;
+2. diffs every incoming row against those maps, applying the same
+   get-or-create/upsert rules in memory;
+3. writes only the inserts, updates and deactivations as Core `executemany`
+   statements, committing every `chunk_size` rows.
+
+Instruments of a fully synced exchange that are missing from the master are
+deactivated. Listings and securities are shared across brokers and are never
+deactivated here.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Iterable
+
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models import BrokerInstrument, Listing, Security
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+@dataclass
+class _Sec:
+    id: int | None
+    isin: str | None
+    name: str | None
+    active: bool
+    new: bool = False
+    dirty: bool = False
+
+
+@dataclass
+class _Lst:
+    id: int | None
+    exchange: str
+    symbol: str
+    name: str | None
+    sec: _Sec | None
+    security_id: int | None
+    active: bool
+    new: bool = False
+    dirty: bool = False
+
+
+@dataclass
+class _BI:
+    id: int | None
+    listing: _Lst
+    exchange: str
+    broker_symbol: str
+    token: str
+    isin: str | None
+    active: bool
+    new: bool = False
+    dirty: bool = False
+    seen: bool = False
+
+
+@dataclass
+class MasterSyncCounts:
+    processed: int = 0
+    securities_inserted: int = 0
+    securities_updated: int = 0
+    listings_inserted: int = 0
+    listings_updated: int = 0
+    instruments_inserted: int = 0
+    instruments_updated: int = 0
+    instruments_deactivated: int = 0
+    instruments_unchanged: int = 0
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "securities": {
+                "inserted": self.securities_inserted,
+                "updated": self.securities_updated,
+            },
+            "listings": {
+                "inserted": self.listings_inserted,
+                "updated": self.listings_updated,
+            },
+            "instruments": {
+                "inserted": self.instruments_inserted,
+                "updated": self.instruments_updated,
+                "deactivated": self.instruments_deactivated,
+                "unchanged": self.instruments_unchanged,
+            },
+            "timings_ms": {k: round(v, 2) for k, v in self.timings_ms.items()},
+        }
+
+
+def _chunks(items: list[Any], size: int) -> Iterable[list[Any]]:
+    for i in range(0, len(items), max(size, 1)):
+        yield items[i : i + size]
+
+
+class InstrumentMasterSync:
+    """In-memory diff of one broker's instrument master against the DB."""
+
+    def __init__(
+        self,
+        db: Session,
+        *,
+        broker_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self.db = db
+        self.broker_name = broker_name.strip().lower()
+        self.chunk_size = int(chunk_size)
+        self.counts = MasterSyncCounts()
+        self._now = datetime.now(UTC)
+        self._securities: dict[str, _Sec] = {}
+        self._listings: dict[tuple[str, str], _Lst] = {}
+        self._instruments: dict[str, _BI] = {}
+        # (isin, exchange) -> (updated_at, symbol) of the most recently
+        # updated listing, used to keep SmartAPI rows on existing symbols.
+        self._isin_listing: dict[tuple[str, str], tuple[datetime, str]] = {}
+        self._diff_seconds = 0.0
+
+    def _time(self, phase: str, started: float) -> None:
+        self.counts.timings_ms[phase] = (
+            self.counts.timings_ms.get(phase, 0.0) + (time.perf_counter() - started) * 1000.0
+        )
+
+    # Phase 1: load.
+
+    def load(self) -> None:
+        started = time.perf_counter()
+        sec_t = Security.__table__
+        lst_t = Listing.__table__
+        bi_t = BrokerInstrument.__table__
+
+        by_id: dict[int, _Sec] = {}
+        for sid, isin, name, active in self.db.execute(
+            select(sec_t.c.id, sec_t.c.isin, sec_t.c.name, sec_t.c.active)
+        ):
+            sec = _Sec(id=sid, isin=isin, name=name, active=bool(active))
+            by_id[sid] = sec
+            if isin:
+                self._securities[isin] = sec
+
+        by_listing_id: dict[int, _Lst] = {}
+        for lid, sec_id, exch, sym, name, active, updated_at in self.db.execute(
+            select(
+                lst_t.c.id,
+                lst_t.c.security_id,
+                lst_t.c.exchange,
+                lst_t.c.symbol,
+                lst_t.c.name,
+                lst_t.c.active,
+                lst_t.c.updated_at,
+            )
+        ):
+            sec = by_id.get(sec_id) if sec_id is not None else None
+            lst = _Lst(
+                id=lid,
+                exchange=exch,
+                symbol=sym,
+                name=name,
+                sec=sec,
+                security_id=sec_id,
+                active=bool(active),
+            )
+            self._listings[(exch, sym)] = lst
+            by_listing_id[lid] = lst
+            if sec is not None and sec.isin:
+                ts = updated_at or datetime.min.replace(tzinfo=UTC)
+                if ts.tzinfo is None:
+                    ts = ts.replace(tzinfo=UTC)
+                key = (sec.isin, exch)
+                current = self._isin_listing.get(key)
+                if current is None or ts > current[0]:
+                    self._isin_listing[key] = (ts, sym)
+
+        for bid, lid, exch, bsym, token, isin, active in self.db.execute(
+            select(
+                bi_t.c.id,
+                bi_t.c.listing_id,
+                bi_t.c.exchange,
+                bi_t.c.broker_symbol,
+                bi_t.c.instrument_token,
+                bi_t.c.isin,
+                bi_t.c.active,
+            ).where(bi_t.c.broker_name == self.broker_name)
+        ):
+            lst = by_listing_id.get(lid)
+            if lst is None:
+                continue
+            self._instruments[token] = _BI(
+                id=bid,
+                listing=lst,
+                exchange=exch,
+                broker_symbol=bsym,
+                token=token,
+                isin=isin,
+                active=bool(active),
+            )
+        self._time("load", started)
+
+    # Phase 2: diff.
+
+    def listing_symbol_for_isin(self, isin: str | None, exchange: str) -> str | None:
+        """Return the symbol of the most recently updated listing for an ISIN."""
+
+        if not isin:
+            return None
+        hit = self._isin_listing.get((isin, exchange))
+        return hit[1] if hit is not None else None
+
+    def _security(self, isin: str, name: str | None) -> _Sec:
+        sec = self._securities.get(isin)
+        if sec is None:
+            sec = _Sec(id=None, isin=isin, name=name, active=True, new=True)
+            self._securities[isin] = sec
+            return sec
+        if name and not sec.name:
+            sec.name = name
+            sec.dirty = True
+        if not sec.active:
+            sec.active = True
+            sec.dirty = True
+        return sec
+
+    def _listing(self, exchange: str, symbol: str, isin: str | None, name: str | None) -> _Lst:
+        key = (exchange, symbol)
+        lst = self._listings.get(key)
+        if lst is None:
+            lst = _Lst(
+                id=None,
+                exchange=exchange,
+                symbol=symbol,
+                name=name,
+                sec=None,
+                security_id=None,
+                active=True,
+                new=True,
+            )
+            self._listings[key] = lst
+        changed = lst.new
+        if name and not lst.name:
+            lst.name = name
+            changed = True
+        if isin:
+            sec = self._security(isin, name)
+            if lst.sec is not sec:
+                lst.sec = sec
+                changed = True
+        if not lst.active:
+            lst.active = True
+            changed = True
+        if changed:
+            if not lst.new:
+                lst.dirty = True
+            if lst.sec is not None and lst.sec.isin:
+                self._isin_listing[(lst.sec.isin, exchange)] = (self._now, symbol)
+        return lst
+
+    def add(
+        self,
+        *,
+        exchange: str,
+        symbol: str,
+        broker_symbol: str,
+        instrument_token: str,
+        isin: str | None,
+        name: str | None,
+    ) -> None:
+        """Apply one master row (same rules as the per-row ORM upserts)."""
+
+        started = time.perf_counter()
+        exch = exchange.strip().upper()
+        lst = self._listing(exch, symbol.strip().upper(), isin, name)
+        token = instrument_token.strip()
+        bsym = broker_symbol.strip().upper()
+        listing_isin = lst.sec.isin if lst.sec is not None else None
+
+        bi = self._instruments.get(token)
+        if bi is None:
+            bi = _BI(
+                id=None,
+                listing=lst,
+                exchange=exch,
+                broker_symbol=bsym,
+                token=token,
+                isin=listing_isin,
+                active=True,
+                new=True,
+            )
+            self._instruments[token] = bi
+        else:
+            changed = False
+            if bi.listing is not lst:
+                bi.listing = lst
+                changed = True
+            if bi.exchange != exch:
+                bi.exchange = exch
+                changed = True
+            if bi.broker_symbol != bsym:
+                bi.broker_symbol = bsym
+                changed = True
+            if listing_isin and not bi.isin:
+                bi.isin = listing_isin
+                changed = True
+            if not bi.active:
+                bi.active = True
+                changed = True
+            if changed and not bi.new:
+                bi.dirty = True
+        bi.seen = True
+        self.counts.processed += 1
+        self._diff_seconds += time.perf_counter() - started
+
+    # Phase 3: apply.
+
+    def apply(self, *, complete_exchanges: Iterable[str] = ()) -> MasterSyncCounts:
+        """Write the diff; deactivate unseen instruments of complete exchanges."""
+
+        self.counts.timings_ms["diff"] = self._diff_seconds * 1000.0
+        complete = {str(e).strip().upper() for e in complete_exchanges}
+        for bi in self._instruments.values():
+            if not bi.seen and bi.active and bi.exchange in complete and not bi.new:
+                bi.active = False
+                bi.dirty = True
+                self.counts.instruments_deactivated += 1
+
+        self._apply_securities()
+        self._apply_listings()
+        self._apply_instruments()
+        self.counts.timings_ms["total"] = sum(
+            v for k, v in self.counts.timings_ms.items() if k != "total"
+        )
+        return self.counts
+
+    def _commit_chunks(self, stmt: Any, rows: list[dict[str, Any]]) -> None:
+        for chunk in _chunks(rows, self.chunk_size):
+            self.db.execute(stmt, chunk)
+            self.db.commit()
+
+    def _apply_securities(self) -> None:
+        started = time.perf_counter()
+        table = Security.__table__
+        new = [s for s in self._securities.values() if s.new]
+        self._commit_chunks(
+            insert(table),
+            [
+                {
+                    "isin": s.isin,
+                    "name": s.name,
+                    "active": s.active,
+                    "created_at": self._now,
+                    "updated_at": self._now,
+                }
+                for s in new
+            ],
+        )
+        for chunk in _chunks(new, self.chunk_size):
+            by_isin = {s.isin: s for s in chunk}
+            for sid, isin in self.db.execute(
+                select(table.c.id, table.c.isin).where(table.c.isin.in_(list(by_isin)))
+            ):
+                by_isin[isin].id = sid
+
+        dirty = [s for s in self._securities.values() if s.dirty and not s.new]
+        self._commit_chunks(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                name=bindparam("b_name"),
+                active=bindparam("b_active"),
+                updated_at=bindparam("b_updated_at"),
+            ),
+            [
+                {
+                    "b_id": s.id,
+                    "b_name": s.name,
+                    "b_active": s.active,
+                    "b_updated_at": self._now,
+                }
+                for s in dirty
+            ],
+        )
+        self.counts.securities_inserted = len(new)
+        self.counts.securities_updated = len(dirty)
+        self._time("securities", started)
+
+    @staticmethod
+    def _security_id(lst: _Lst) -> int | None:
+        return lst.sec.id if lst.sec is not None else lst.security_id
+
+    def _apply_listings(self) -> None:
+        started = time.perf_counter()
+        table = Listing.__table__
+        new = [lst for lst in self._listings.values() if lst.new]
+        self._commit_chunks(
+            insert(table),
+            [
+                {
+                    "security_id": self._security_id(lst),
+                    "exchange": lst.exchange,
+                    "symbol": lst.symbol,
+                    "name": lst.name,
+                    "active": lst.active,
+                    "created_at": self._now,
+                    "updated_at": self._now,
+                }
+                for lst in new
+            ],
+        )
+        for chunk in _chunks(new, self.chunk_size):
+            by_key = {(lst.exchange, lst.symbol): lst for lst in chunk}
+            for lid, exch, sym in self.db.execute(
+                select(table.c.id, table.c.exchange, table.c.symbol).where(
+                    tuple_(table.c.exchange, table.c.symbol).in_(list(by_key))
+                )
+            ):
+                by_key[(exch, sym)].id = lid
+
+        dirty = [lst for lst in self._listings.values() if lst.dirty and not lst.new]
+        self._commit_chunks(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                security_id=bindparam("b_security_id"),
+                name=bindparam("b_name"),
+                active=bindparam("b_active"),
+                updated_at=bindparam("b_updated_at"),
+            ),
+            [
+                {
+                    "b_id": lst.id,
+                    "b_security_id": self._security_id(lst),
+                    "b_name": lst.name,
+                    "b_active": lst.active,
+                    "b_updated_at": self._now,
+                }
+                for lst in dirty
+            ],
+        )
+        self.counts.listings_inserted = len(new)
+        self.counts.listings_updated = len(dirty)
+        self._time("listings", started)
+
+    def _apply_instruments(self) -> None:
+        started = time.perf_counter()
+        table = BrokerInstrument.__table__
+        new = [bi for bi in self._instruments.values() if bi.new]
+        self._commit_chunks(
+            insert(table),
+            [
+                {
+                    "listing_id": bi.listing.id,
+                    "broker_name": self.broker_name,
+                    "exchange": bi.exchange,
+                    "broker_symbol": bi.broker_symbol,
+                    "instrument_token": bi.token,
+                    "isin": bi.isin,
+                    "active": bi.active,
+                    "created_at": self._now,
+                    "updated_at": self._now,
+                }
+                for bi in new
+            ],
+        )
+        dirty = [bi for bi in self._instruments.values() if bi.dirty and not bi.new]
+        self._commit_chunks(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                listing_id=bindparam("b_listing_id"),
+                exchange=bindparam("b_exchange"),
+                broker_symbol=bindparam("b_broker_symbol"),
+                isin=bindparam("b_isin"),
+                active=bindparam("b_active"),
+                updated_at=bindparam("b_updated_at"),
+            ),
+            [
+                {
+                    "b_id": bi.id,
+                    "b_listing_id": bi.listing.id,
+                    "b_exchange": bi.exchange,
+                    "b_broker_symbol": bi.broker_symbol,
+                    "b_isin": bi.isin,
+                    "b_active": bi.active,
+                    "b_updated_at": self._now,
+                }
+                for bi in dirty
+            ],
+        )
+        self.counts.instruments_inserted = len(new)
+        self.counts.instruments_updated = len(dirty) - self.counts.instruments_deactivated
+        self.counts.instruments_unchanged = sum(
+            1 for bi in self._instruments.values() if bi.seen and not bi.new and not bi.dirty
+        )
+        self._time("broker_instruments", started)
+
+
+__all__ = ["InstrumentMasterSync", "MasterSyncCounts"]
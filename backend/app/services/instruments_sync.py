@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-from datetime import timedelta
-from threading import Event, Thread
+import time
 from typing import Any, Iterable
 
 import httpx
@@ -9,20 +8,15 @@ from sqlalchemy.orm import Session
 
 from app.core.config import Settings, get_settings
 from app.db.session import SessionLocal
-from app.models import Listing, Security
+from app.services.instrument_master_bulk import InstrumentMasterSync
 from app.services.market_data import (
     MarketDataError,
     _get_kite_client,
-    _get_or_create_listing,
     _invert_zerodha_symbol_map,
-    _upsert_broker_instrument,
-    listing_isin,
 )
+from app.services.scheduler import register_task
 from app.services.system_events import record_system_event
 
-_scheduler_started = False
-_stop_event = Event()
-
 
 def _canonicalize_smartapi_symbol(symbol: str) -> str:
     """Return canonical app symbol for a SmartAPI broker symbol.
@@ -41,21 +35,25 @@ def _canonicalize_smartapi_symbol(symbol: str) -> str:
     return sym
 
 
-def _iter_zerodha_instruments(
+def _fetch_zerodha_instruments(
     db: Session,
     settings: Settings,
     *,
     exchanges: Iterable[str],
-) -> Iterable[dict[str, Any]]:
+) -> Iterable[tuple[str, list[dict[str, Any]]]]:
+    """Yield (exchange, rows) per exchange; exchanges that fail are skipped."""
+
     kite = _get_kite_client(db, settings)
     for exch in exchanges:
         try:
             rows = kite.instruments(str(exch).upper())
         except Exception:
             continue
-        for row in rows:
-            if isinstance(row, dict):
-                yield row
+        yield str(exch).upper(), [row for row in rows if isinstance(row, dict)]
+
+
+def _parse_isin(raw: Any) -> str | None:
+    return str(raw).strip().upper() if isinstance(raw, str) and raw.strip() else None
 
 
 def sync_zerodha_instrument_master(
@@ -64,61 +62,60 @@ def sync_zerodha_instrument_master(
     *,
     exchanges: Iterable[str] = ("NSE", "BSE"),
 ) -> dict[str, Any]:
-    """Ingest Kite instrument master into canonical security/listing mapping."""
-
-    inverse_map = _invert_zerodha_symbol_map()
-    processed = 0
-    upserted = 0
-
-    for row in _iter_zerodha_instruments(db, settings, exchanges=exchanges):
-        exch = str(row.get("exchange") or "").strip().upper()
-        if exch not in {"NSE", "BSE"}:
-            continue
-        broker_symbol = str(row.get("tradingsymbol") or "").strip().upper()
-        token = row.get("instrument_token")
-        if not broker_symbol or token is None:
-            continue
+    """Ingest Kite instrument master into canonical security/listing mapping.
 
-        isin_raw = row.get("isin")
-        isin = (
-            str(isin_raw).strip().upper()
-            if isinstance(isin_raw, str) and isin_raw.strip()
-            else None
-        )
-        name = str(row.get("name") or "").strip() or None
-
-        canonical_symbol = inverse_map.get(exch, {}).get(broker_symbol, broker_symbol)
-
-        listing = _get_or_create_listing(
-            db,
-            exchange=exch,
-            symbol=canonical_symbol,
-            isin=isin,
-            name=name,
-        )
-        _upsert_broker_instrument(
-            db,
-            broker_name="zerodha",
-            listing_id=listing.id,
-            exchange=exch,
-            broker_symbol=broker_symbol,
-            instrument_token=str(token),
-            isin=listing_isin(db, listing),
-            active=True,
-        )
-        processed += 1
-        upserted += 1
+    The master is diffed in memory against the stored mapping and only the
+    changes are written (see `instrument_master_bulk`). Zerodha instruments
+    of an exchange whose master was fetched but no longer lists them are
+    deactivated.
+    """
 
-    db.commit()
+    inverse_map = _invert_zerodha_symbol_map()
+    sync = InstrumentMasterSync(db, broker_name="zerodha")
+    sync.load()
+
+    complete: list[str] = []
+    fetch_started = time.perf_counter()
+    fetch_seconds = 0.0
+    for exch_fetched, rows in _fetch_zerodha_instruments(db, settings, exchanges=exchanges):
+        fetch_seconds += time.perf_counter() - fetch_started
+        if rows:
+            complete.append(exch_fetched)
+        for row in rows:
+            exch = str(row.get("exchange") or "").strip().upper()
+            if exch not in {"NSE", "BSE"}:
+                continue
+            broker_symbol = str(row.get("tradingsymbol") or "").strip().upper()
+            token = row.get("instrument_token")
+            if not broker_symbol or token is None:
+                continue
+            sync.add(
+                exchange=exch,
+                symbol=inverse_map.get(exch, {}).get(broker_symbol, broker_symbol),
+                broker_symbol=broker_symbol,
+                instrument_token=str(token),
+                isin=_parse_isin(row.get("isin")),
+                name=str(row.get("name") or "").strip() or None,
+            )
+        fetch_started = time.perf_counter()
+
+    sync.counts.timings_ms["fetch"] = fetch_seconds * 1000.0
+    counts = sync.apply(complete_exchanges=[e for e in complete if e in {"NSE", "BSE"}])
+    result = {
+        "broker": "zerodha",
+        "processed": counts.processed,
+        "upserted": counts.processed,
+        **counts.as_dict(),
+    }
     record_system_event(
         db,
         level="INFO",
         category="instruments",
         message="Zerodha instrument master synced",
         correlation_id=None,
-        details={"broker": "zerodha", "processed": processed, "upserted": upserted},
+        details=result,
     )
-    return {"broker": "zerodha", "processed": processed, "upserted": upserted}
+    return result
 
 
 def sync_smartapi_instrument_master(
@@ -132,25 +129,34 @@ def sync_smartapi_instrument_master(
 
     This endpoint does not require AngelOne authentication; the scrip master is
     a public dataset. We map into the canonical universe via ISIN when present.
+    Unless `limit` truncates the master, AngelOne instruments of an exchange
+    the master still has rows for, but no longer lists them, are deactivated.
     """
 
     master_url = (url or settings.smartapi_instrument_master_url or "").strip()
     if not master_url:
         raise RuntimeError("SmartAPI instrument master URL is not configured.")
 
+    fetch_started = time.perf_counter()
     with httpx.Client(timeout=60) as client:
         resp = client.get(master_url)
         resp.raise_for_status()
         payload = resp.json()
+    fetch_ms = (time.perf_counter() - fetch_started) * 1000.0
 
     if not isinstance(payload, list):
         raise RuntimeError("Unexpected SmartAPI instrument master format.")
 
-    processed = 0
-    upserted = 0
+    sync = InstrumentMasterSync(db, broker_name="angelone")
+    sync.load()
+    truncated = False
+    # Only exchanges that contributed rows count as complete: an empty or
+    # reshaped payload must not deactivate every AngelOne instrument.
+    complete: set[str] = set()
 
     for row in payload:
-        if limit is not None and processed >= limit:
+        if limit is not None and sync.counts.processed >= limit:
+            truncated = True
             break
         if not isinstance(row, dict):
             continue
@@ -162,70 +168,45 @@ def sync_smartapi_instrument_master(
 
         broker_symbol = str(row.get("symbol") or row.get("tradingsymbol") or "").strip()
         token = row.get("token") or row.get("instrument_token")
-        isin_raw = row.get("isin") or row.get("ISIN")
-        isin = (
-            str(isin_raw).strip().upper()
-            if isinstance(isin_raw, str) and isin_raw.strip()
-            else None
-        )
+        isin = _parse_isin(row.get("isin") or row.get("ISIN"))
         name = str(row.get("name") or "").strip() or None
 
         if not broker_symbol or token is None:
             continue
 
-        canonical_symbol = _canonicalize_smartapi_symbol(broker_symbol)
-
         # If we already have a canonical listing for this ISIN+exchange (e.g.
         # from Zerodha), prefer that symbol to keep groups broker-agnostic.
-        if isin:
-            existing = (
-                db.query(Listing)
-                .join(Security, Security.id == Listing.security_id)
-                .filter(
-                    Security.isin == isin,
-                    Listing.exchange == exch,
-                )
-                .order_by(Listing.updated_at.desc())
-                .first()
-            )
-            if existing is not None:
-                canonical_symbol = existing.symbol
+        canonical_symbol = sync.listing_symbol_for_isin(
+            isin, exch
+        ) or _canonicalize_smartapi_symbol(broker_symbol)
 
-        listing = _get_or_create_listing(
-            db,
+        sync.add(
             exchange=exch,
             symbol=canonical_symbol,
+            broker_symbol=broker_symbol,
+            instrument_token=str(token),
             isin=isin,
             name=name,
         )
-        _upsert_broker_instrument(
-            db,
-            broker_name="angelone",
-            listing_id=listing.id,
-            exchange=exch,
-            broker_symbol=broker_symbol.strip().upper(),
-            instrument_token=str(token),
-            isin=listing_isin(db, listing),
-            active=True,
-        )
-        processed += 1
-        upserted += 1
-
-    db.commit()
+        complete.add(exch)
+
+    sync.counts.timings_ms["fetch"] = fetch_ms
+    counts = sync.apply(complete_exchanges=() if truncated else sorted(complete))
+    result = {
+        "broker": "angelone",
+        "processed": counts.processed,
+        "upserted": counts.processed,
+        **counts.as_dict(),
+    }
     record_system_event(
         db,
         level="INFO",
         category="instruments",
         message="SmartAPI instrument master synced",
         correlation_id=None,
-        details={
-            "broker": "angelone",
-            "processed": processed,
-            "upserted": upserted,
-            "url": master_url,
-        },
+        details={**result, "url": master_url},
     )
-    return {"broker": "angelone", "processed": processed, "upserted": upserted}
+    return result
 
 
 def sync_instrument_master_once() -> None:
@@ -239,30 +220,14 @@ def sync_instrument_master_once() -> None:
             return
 
 
-def _loop() -> None:  # pragma: no cover
+def schedule_instrument_master_sync() -> None:
     settings = get_settings()
-    interval = timedelta(
-        hours=max(int(settings.instrument_master_sync_interval_hours), 1)
+    register_task(
+        "instrument_master_sync",
+        sync_instrument_master_once,
+        interval_sec=max(int(settings.instrument_master_sync_interval_hours), 1) * 3600,
+        initial_delay_sec=5,
     )
-    next_run = timedelta(seconds=5)
-    _stop_event.wait(timeout=next_run.total_seconds())
-
-    while not _stop_event.is_set():
-        try:
-            sync_instrument_master_once()
-        except Exception:
-            pass
-        _stop_event.wait(timeout=interval.total_seconds())
-
-
-def schedule_instrument_master_sync() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    _scheduler_started = True
-
-    thread = Thread(target=_loop, name="instrument-master-sync", daemon=True)
-    thread.start()
 
 
 __all__ = [
@@ -4,28 +4,24 @@ import json
 import logging
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
-from threading import Event, Thread
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.clients import AngelOneClient, AngelOneSession, ZerodhaClient
+from app.clients import AngelOneClient, ZerodhaClient
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.core.market_hours import is_market_open_now
 from app.db.session import SessionLocal
-from app.models import Alert, BrokerConnection, ManagedRiskPosition, Order, Position, RiskProfile
+from app.models import Alert, ManagedRiskPosition, Order, Position, RiskProfile
 from app.schemas.managed_risk import DistanceSpec, RiskSpec
+from app.services.broker_clients import get_broker_client_registry
 from app.services.broker_instruments import resolve_broker_symbol_and_token
-from app.services.broker_secrets import get_broker_secret
 from app.services.market_data import load_series
+from app.services.scheduler import register_task
 from app.services.system_events import record_system_event
 
 logger = logging.getLogger(__name__)
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
-
 
 def _now_utc() -> datetime:
     return datetime.now(UTC)
@@ -319,66 +315,21 @@ def _update_stop_state(
 
 
 def _get_zerodha_client(
-    db: Session, settings: Settings, *, user_id: int
+    db: Session,
+    settings: Settings,
+    *,
+    user_id: int,
 ) -> ZerodhaClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "zerodha",
-            BrokerConnection.user_id == user_id,
-        )
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
-    )
-    if conn is None:
-        raise RuntimeError("Zerodha is not connected.")
-
-    api_key = get_broker_secret(db, settings, "zerodha", "api_key", user_id=user_id)
-    if not api_key:
-        raise RuntimeError("Zerodha API key is not configured.")
-
-    from kiteconnect import KiteConnect  # type: ignore[import]
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-    return ZerodhaClient(kite)
+    return get_broker_client_registry().zerodha(db, settings, user_id=user_id)
 
 
 def _get_angelone_client(
-    db: Session, settings: Settings, *, user_id: int
+    db: Session,
+    settings: Settings,
+    *,
+    user_id: int,
 ) -> AngelOneClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "angelone",
-            BrokerConnection.user_id == user_id,
-        )
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
-    )
-    if conn is None:
-        raise RuntimeError("AngelOne is not connected.")
-
-    api_key = get_broker_secret(db, settings, "angelone", "api_key", user_id=user_id)
-    if not api_key:
-        raise RuntimeError("SmartAPI API key is not configured.")
-
-    raw = decrypt_token(settings, conn.access_token_encrypted)
-    import json
-
-    parsed = json.loads(raw) if raw else {}
-    jwt = str(parsed.get("jwt_token") or "")
-    if not jwt:
-        raise RuntimeError("AngelOne session is missing jwt_token.")
-
-    session = AngelOneSession(
-        jwt_token=jwt,
-        refresh_token=str(parsed.get("refresh_token") or "") or None,
-        feed_token=str(parsed.get("feed_token") or "") or None,
-        client_code=str(parsed.get("client_code") or "") or None,
-    )
-    return AngelOneClient(api_key=api_key, session=session)
+    return get_broker_client_registry().angelone(db, settings, user_id=user_id)
 
 
 def _fetch_ltp(
@@ -1271,30 +1222,17 @@ def process_managed_risk_once() -> int:
     return processed
 
 
-def _managed_risk_loop() -> None:  # pragma: no cover - background loop
+def schedule_managed_risk() -> None:
     settings = get_settings()
     poll = float(getattr(settings, "managed_risk_poll_interval_sec", 2.0) or 2.0)
     if poll <= 0:
         poll = 2.0
-    while not _scheduler_stop_event.is_set():
-        try:
-            process_managed_risk_once()
-        except Exception:
-            pass
-        _scheduler_stop_event.wait(timeout=poll)
-
-
-def schedule_managed_risk() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    _scheduler_started = True
-    thread = Thread(
-        target=_managed_risk_loop,
-        name="managed-risk",
-        daemon=True,
+    register_task(
+        "managed_risk",
+        process_managed_risk_once,
+        interval_sec=poll,
+        market_hours_only=True,
     )
-    thread.start()
 
 
 __all__ = [
@@ -1,27 +1,31 @@
 from __future__ import annotations
 
 from datetime import UTC, datetime, timedelta
-from threading import Event, Lock, Thread
-from typing import Dict, Iterable, List, Literal
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Literal, Sequence, Tuple
 
-from sqlalchemy import and_, func, tuple_
+from sqlalchemy import and_, func, select, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.config_files import load_zerodha_symbol_map
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.core.market_hours import IST_OFFSET
 from app.db.session import SessionLocal
 from app.models import (
-    BrokerConnection,
     BrokerInstrument,
     Candle,
     Listing,
     MarketInstrument,
     Security,
 )
-from app.services.broker_secrets import get_broker_secret
+from app.services.broker_clients import BrokerClientError, get_broker_client_registry
+from app.services.candle_columns import CandleColumns
+from app.services.candle_ingest import bulk_insert_candles
+from app.services.candle_rollups import load_rollup_series
+from app.services.history_fetch import get_history_fetch_scheduler
+from app.services.scheduler import register_task
 
 Timeframe = Literal["1m", "5m", "15m", "30m", "1h", "1d", "1mo", "1y"]
 
@@ -44,9 +48,11 @@ KITE_INTERVAL_MAP: dict[str, str] = {
 MAX_HISTORY_YEARS = 2
 MAX_DAYS_PER_CALL = 60
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
-_history_lock = Lock()
+# (symbol, exchange) pairs per chunked `IN` query in the bulk loaders. Each
+# pair binds two parameters, which keeps a chunk well under SQLite's limit.
+BULK_PAIR_CHUNK = 400
+
+SymbolPair = Tuple[str, str]
 
 
 class MarketDataError(RuntimeError):
@@ -294,39 +300,18 @@ def _upsert_broker_instrument(
 
 
 def _get_kite_client(db: Session, settings: Settings):
-    """Return a configured KiteConnect client for market data."""
-
-    conn = (
-        db.query(BrokerConnection)
-        .filter(BrokerConnection.broker_name == "zerodha")
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
-    )
-    if conn is None:
-        raise MarketDataError("Zerodha is not connected; cannot fetch market data.")
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="zerodha",
-        key="api_key",
-        user_id=conn.user_id,
-    )
-    if not api_key:
-        raise MarketDataError(
-            "Zerodha API key is not configured; cannot fetch market data.",
-        )
+    """Return the pooled KiteConnect client for market data."""
 
     try:
-        from kiteconnect import KiteConnect  # type: ignore[import]
-    except ImportError as exc:  # pragma: no cover - defensive
-        raise MarketDataError(
-            "kiteconnect library is not installed in the backend environment.",
-        ) from exc
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
+        kite, _broker_user_id = get_broker_client_registry().kite(db, settings)
+    except BrokerClientError as exc:
+        detail = {
+            "not_connected": "Zerodha is not connected; cannot fetch market data.",
+            "missing_api_key": (
+                "Zerodha API key is not configured; cannot fetch market data."
+            ),
+        }.get(exc.reason, str(exc))
+        raise MarketDataError(detail) from exc
     return kite
 
 
@@ -680,25 +665,14 @@ def _fetch_and_store_history(
 
     token = _get_instrument_token(db, settings, symbol=symbol, exchange=exchange)
     kite = _get_kite_client(db, settings)
-
-    # Preload existing timestamps for this window so we can skip duplicates and
-    # avoid violating the unique constraint on (symbol, exchange, timeframe, ts).
-    existing_ts: set[datetime] = {
-        row[0]
-        for row in db.query(Candle.ts)
-        .filter(
-            Candle.symbol == symbol,
-            Candle.exchange == exchange,
-            Candle.timeframe == base_timeframe,
-        )
-        .all()
-    }
+    limiter = get_history_fetch_scheduler().limiter
 
     for chunk_start, chunk_end in _iter_history_chunks(
         start,
         end,
         max_days=MAX_DAYS_PER_CALL,
     ):
+        limiter.acquire()
         try:
             bars = kite.historical_data(
                 int(token),
@@ -709,38 +683,33 @@ def _fetch_and_store_history(
         except Exception as exc:  # pragma: no cover - network/runtime
             raise MarketDataError(f"Failed to fetch history from Kite: {exc}") from exc
 
-        for bar in bars:
-            bar_ts = bar.get("date")
-            if not isinstance(bar_ts, datetime):
-                continue
-            bar_ts = _to_ist_naive(bar_ts)
-            if bar_ts in existing_ts:
-                continue
-            existing_ts.add(bar_ts)
-
-            candle = Candle(
+        rows = [
+            {
+                "ts": _to_ist_naive(bar["date"]),
+                "open": bar.get("open"),
+                "high": bar.get("high"),
+                "low": bar.get("low"),
+                "close": bar.get("close"),
+                "volume": bar.get("volume"),
+            }
+            for bar in bars
+            if isinstance(bar.get("date"), datetime)
+        ]
+        try:
+            bulk_insert_candles(
+                db,
                 symbol=symbol,
                 exchange=exchange,
                 timeframe=base_timeframe,
-                ts=bar_ts,
-                open=float(bar.get("open")),
-                high=float(bar.get("high")),
-                low=float(bar.get("low")),
-                close=float(bar.get("close")),
-                volume=float(bar.get("volume") or 0.0),
+                bars=rows,
             )
-            db.add(candle)
-
-        try:
             db.commit()
         except IntegrityError:
-            # In concurrent scenarios (e.g. background sync running alongside
-            # on-demand API calls) another transaction may have inserted some of
-            # the same candles after our initial existence check. Since the
-            # candles table enforces a unique constraint on
-            # (symbol, exchange, timeframe, ts), such conflicts simply mean the
-            # desired data is already present. Roll back this chunk and
-            # continue.
+            # Dialects without ON CONFLICT support can still race with another
+            # writer inserting the same candles after our range-scoped
+            # existence check. The unique constraint on
+            # (symbol, exchange, timeframe, ts) means the data is already
+            # present, so roll back this chunk and continue.
             db.rollback()
 
 
@@ -762,64 +731,119 @@ def ensure_history(
       historical APIs with chunked date ranges.
     """
 
-    # Serialise history maintenance to avoid race conditions between the
-    # background scheduler and on-demand API calls. This keeps the unique
-    # constraint on (symbol, exchange, timeframe, ts) from being violated by
-    # concurrent inserts for the same instrument and timeframe.
-    with _history_lock:
-        now = _now_ist_naive()
-        max_age = now - timedelta(days=365 * MAX_HISTORY_YEARS)
+    # History maintenance for one instrument/timeframe is serialised by the
+    # fetch scheduler (the unique constraint on (symbol, exchange, timeframe,
+    # ts) is per instrument); other instruments fetch concurrently, and
+    # identical concurrent requests share one fetch.
+    def _extend() -> None:
+        _ensure_history_extend(
+            db,
+            settings,
+            symbol=symbol,
+            exchange=exchange,
+            base_timeframe=base_timeframe,
+            start=start,
+            end=end,
+        )
 
-        # Clamp requested window to retention bounds.
-        if start < max_age:
-            start = max_age
-        if end > now:
-            end = now
-        if start >= end:
-            return
+    get_history_fetch_scheduler().run(
+        (symbol, exchange, base_timeframe), ("extend", start, end), _extend
+    )
 
-        existing_min, existing_max = (
-            db.query(
-                func.min(Candle.ts),
-                func.max(Candle.ts),
-            )
-            .filter(
-                Candle.symbol == symbol,
-                Candle.exchange == exchange,
-                Candle.timeframe == base_timeframe,
-            )
-            .one()
+
+def _clamp_history_window(
+    start: datetime, end: datetime, *, now: datetime
+) -> tuple[datetime, datetime] | None:
+    """Clamp a requested window to retention bounds (None if it is empty)."""
+
+    start = max(start, now - timedelta(days=365 * MAX_HISTORY_YEARS))
+    end = min(end, now)
+    return (start, end) if start < end else None
+
+
+def history_extend_segments(
+    bounds: tuple[datetime, datetime] | None,
+    *,
+    start: datetime,
+    end: datetime,
+    now: datetime | None = None,
+) -> list[tuple[datetime, datetime]]:
+    """Windows `ensure_history` fetches for a series with stored `bounds`.
+
+    `bounds` is the (min ts, max ts) of the stored candles, or None when there
+    are none. An empty list means the stored range already covers the window.
+    """
+
+    window = _clamp_history_window(start, end, now=now or _now_ist_naive())
+    if window is None:
+        return []
+    start, end = window
+    if bounds is None:
+        return [(start, end)]
+    existing_min, existing_max = bounds
+
+    segments: list[tuple[datetime, datetime]] = []
+    # When extending backwards, stop just before the earliest known candle
+    # to avoid re-fetching the boundary bar.
+    if start < existing_min:
+        seg_end = existing_min - timedelta(seconds=1)
+        if start < seg_end:
+            segments.append((start, seg_end))
+
+    # When extending forwards, start just after the latest known candle so
+    # we do not insert duplicates and violate the unique constraint on
+    # (symbol, exchange, timeframe, ts).
+    if end > existing_max:
+        seg_start = existing_max + timedelta(seconds=1)
+        if seg_start < end:
+            segments.append((seg_start, end))
+    return segments
+
+
+def _ensure_history_extend(
+    db: Session,
+    settings: Settings,
+    *,
+    symbol: str,
+    exchange: str,
+    base_timeframe: str,
+    start: datetime,
+    end: datetime,
+) -> None:
+    now = _now_ist_naive()
+    if _clamp_history_window(start, end, now=now) is None:
+        return
+
+    existing_min, existing_max = (
+        db.query(
+            func.min(Candle.ts),
+            func.max(Candle.ts),
         )
+        .filter(
+            Candle.symbol == symbol,
+            Candle.exchange == exchange,
+            Candle.timeframe == base_timeframe,
+        )
+        .one()
+    )
+    bounds = (
+        None
+        if existing_min is None or existing_max is None
+        else (existing_min, existing_max)
+    )
 
-        segments: list[tuple[datetime, datetime]] = []
-        if existing_min is None or existing_max is None:
-            segments.append((start, end))
-        else:
-            # When extending backwards, stop just before the earliest known candle
-            # to avoid re-fetching the boundary bar.
-            if start < existing_min:
-                seg_end = existing_min - timedelta(seconds=1)
-                if start < seg_end:
-                    segments.append((start, seg_end))
-
-            # When extending forwards, start just after the latest known candle so
-            # we do not insert duplicates and violate the unique constraint on
-            # (symbol, exchange, timeframe, ts).
-            if end > existing_max:
-                seg_start = existing_max + timedelta(seconds=1)
-                if seg_start < end:
-                    segments.append((seg_start, end))
-
-        for seg_start, seg_end in segments:
-            _fetch_and_store_history(
-                db,
-                settings,
-                symbol=symbol,
-                exchange=exchange,
-                base_timeframe=base_timeframe,
-                start=seg_start,
-                end=seg_end,
-            )
+    for seg_start, seg_end in history_extend_segments(
+        bounds, start=start, end=end, now=now
+    ):
+        _fetch_and_store_history(
+            db,
+            settings,
+            symbol=symbol,
+            exchange=exchange,
+            base_timeframe=base_timeframe,
+            start=seg_start,
+            end=seg_end,
+        )
 
 
 def ensure_history_window(
@@ -843,27 +867,67 @@ def ensure_history_window(
     preferred over minimizing fetch calls, and it also fills internal gaps.
     """
 
-    with _history_lock:
+    def _fill() -> None:
         now = _now_ist_naive()
         max_age = now - timedelta(days=365 * MAX_HISTORY_YEARS)
-
-        if start < max_age:
-            start = max_age
-        if end > now:
-            end = now
-        if start >= end:
+        window_start = max(start, max_age)
+        window_end = min(end, now)
+        if window_start >= window_end:
             return
-
         _fetch_and_store_history(
             db,
             settings,
             symbol=symbol,
             exchange=exchange,
             base_timeframe=base_timeframe,
-            start=start,
-            end=end,
+            start=window_start,
+            end=window_end,
         )
 
+    get_history_fetch_scheduler().run(
+        (symbol, exchange, base_timeframe), ("window", start, end), _fill
+    )
+
+
+def ensure_history_many(
+    settings: Settings,
+    pairs: Iterable[tuple[str, str]],
+    *,
+    base_timeframe: str,
+    start: datetime,
+    end: datetime,
+    full_window: bool = False,
+) -> tuple[int, list[str]]:
+    """Hydrate many (symbol, exchange) pairs in parallel on the fetch pool.
+
+    Each worker uses its own session; broker calls across all workers share the
+    scheduler's rate limiter. Returns (hydrated_count, error messages).
+    """
+
+    fill = ensure_history_window if full_window else ensure_history
+
+    def _one(pair: tuple[str, str]) -> None:
+        symbol, exchange = pair
+        with SessionLocal() as db:
+            fill(
+                db,
+                settings,
+                symbol=symbol,
+                exchange=exchange,
+                base_timeframe=base_timeframe,
+                start=start,
+                end=end,
+            )
+
+    hydrated = 0
+    errors: list[str] = []
+    for (symbol, exchange), _, exc in get_history_fetch_scheduler().map(_one, pairs):
+        if exc is None:
+            hydrated += 1
+        else:
+            errors.append(f"{exchange}:{symbol}: {exc}")
+    return hydrated, errors
+
 
 def _aggregate_intraday(candles: List[Candle], *, minutes: int) -> List[Dict]:
     buckets: dict[datetime, Dict[str, float]] = {}
@@ -942,7 +1006,8 @@ def load_series(
     This function:
     - Ensures base timeframe history is present using `ensure_history`.
     - Loads base candles from the DB.
-    - Aggregates them into the requested timeframe when necessary.
+    - Aggregates them into the requested timeframe when necessary, reading
+      materialized rollups for derived timeframes when they are built.
     """
 
     base_timeframe = BASE_TIMEFRAME_MAP[timeframe]
@@ -957,6 +1022,21 @@ def load_series(
             end=end,
         )
 
+    if timeframe != base_timeframe:
+        rolled = load_rollup_series(
+            db,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=timeframe,
+            start=start,
+            end=end,
+        )
+        if rolled is not None:
+            return [
+                {"ts": ts, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+                for ts, o, h, lo, c, v in rolled
+            ]
+
     candles: List[Candle] = (
         db.query(Candle)
         .filter(
@@ -995,6 +1075,409 @@ def load_series(
     raise MarketDataError(f"Unsupported timeframe: {timeframe}")
 
 
+def _aggregate_intraday_columns(
+    rows: Iterable[tuple],
+    *,
+    minutes: int,
+) -> CandleColumns:
+    """Columnar counterpart of `_aggregate_intraday` for ts-ordered rows."""
+
+    bucket_ts: datetime | None = None
+    bucket: list = []
+    buckets: list[list] = []
+    for ts, bo, bh, bl, bc, bv in rows:
+        minute_bucket = (ts.minute // minutes) * minutes
+        key = ts.replace(minute=0, second=0, microsecond=0) + timedelta(
+            minutes=minute_bucket,
+        )
+        if key != bucket_ts:
+            bucket_ts = key
+            bucket = [key, bo, bh, bl, bc, bv]
+            buckets.append(bucket)
+            continue
+        if bh > bucket[2]:
+            bucket[2] = bh
+        if bl < bucket[3]:
+            bucket[3] = bl
+        bucket[4] = bc
+        bucket[5] += bv
+    return CandleColumns.from_tuples(buckets)
+
+
+def _aggregate_daily_to_period_columns(
+    rows: Iterable[tuple],
+    *,
+    mode: Literal["1mo", "1y"],
+) -> CandleColumns:
+    """Columnar counterpart of `_aggregate_daily_to_period` for ts-ordered rows."""
+
+    key: tuple[int, int | None] | None = None
+    bucket: list = []
+    buckets: list[list] = []
+    for ts, bo, bh, bl, bc, bv in rows:
+        row_key = (ts.year, ts.month) if mode == "1mo" else (ts.year, None)
+        if row_key != key:
+            key = row_key
+            bucket = [
+                ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+                bo,
+                bh,
+                bl,
+                bc,
+                bv,
+            ]
+            buckets.append(bucket)
+            continue
+        if bh > bucket[2]:
+            bucket[2] = bh
+        if bl < bucket[3]:
+            bucket[3] = bl
+        bucket[4] = bc
+        bucket[5] += bv
+    return CandleColumns.from_tuples(buckets)
+
+
+def load_series_columns(
+    db: Session,
+    settings: Settings,
+    *,
+    symbol: str,
+    exchange: str,
+    timeframe: Timeframe,
+    start: datetime,
+    end: datetime,
+    allow_fetch: bool = True,
+) -> CandleColumns:
+    """Return the same series as `load_series` as compact OHLCV columns.
+
+    Base candles are read as plain column tuples (no ORM entities) and written
+    straight into typed arrays, so indicator engines can consume the columns
+    without walking per-bar dicts.
+    """
+
+    base_timeframe = BASE_TIMEFRAME_MAP[timeframe]
+    if allow_fetch:
+        ensure_history(
+            db,
+            settings,
+            symbol=symbol,
+            exchange=exchange,
+            base_timeframe=base_timeframe,
+            start=start,
+            end=end,
+        )
+
+    if timeframe != base_timeframe:
+        rolled = load_rollup_series(
+            db,
+            symbol=symbol,
+            exchange=exchange,
+            timeframe=timeframe,
+            start=start,
+            end=end,
+        )
+        if rolled is not None:
+            return CandleColumns.from_tuples(rolled)
+
+    rows = (
+        db.query(
+            Candle.ts,
+            Candle.open,
+            Candle.high,
+            Candle.low,
+            Candle.close,
+            Candle.volume,
+        )
+        .filter(
+            Candle.symbol == symbol,
+            Candle.exchange == exchange,
+            Candle.timeframe == base_timeframe,
+            and_(Candle.ts >= start, Candle.ts <= end),
+        )
+        .order_by(Candle.ts)
+        .all()
+    )
+
+    if timeframe == base_timeframe:
+        return CandleColumns.from_tuples(rows)
+
+    if timeframe in {"5m", "15m", "30m", "1h"}:
+        minutes = {"5m": 5, "15m": 15, "30m": 30, "1h": 60}[timeframe]
+        return _aggregate_intraday_columns(rows, minutes=minutes)
+
+    if timeframe in {"1mo", "1y"}:
+        return _aggregate_daily_to_period_columns(rows, mode=timeframe)
+
+    raise MarketDataError(f"Unsupported timeframe: {timeframe}")
+
+
+def _pair_chunks(pairs: Sequence[SymbolPair]) -> Iterator[list[SymbolPair]]:
+    for i in range(0, len(pairs), BULK_PAIR_CHUNK):
+        yield list(pairs[i : i + BULK_PAIR_CHUNK])
+
+
+def _unique_pairs(pairs: Iterable[SymbolPair]) -> list[SymbolPair]:
+    return list(dict.fromkeys((str(sym), str(exch)) for sym, exch in pairs))
+
+
+def load_ts_bounds_many(
+    db: Session,
+    *,
+    pairs: Iterable[SymbolPair],
+    timeframe: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Dict[SymbolPair, tuple[datetime, datetime]]:
+    """Return (min ts, max ts) per (symbol, exchange) with candles.
+
+    One grouped query per `BULK_PAIR_CHUNK` pairs. `start`/`end` restrict the
+    bounds to candles inside that window.
+    """
+
+    out: Dict[SymbolPair, tuple[datetime, datetime]] = {}
+    for chunk in _pair_chunks(_unique_pairs(pairs)):
+        q = db.query(
+            Candle.symbol, Candle.exchange, func.min(Candle.ts), func.max(Candle.ts)
+        ).filter(
+            Candle.timeframe == timeframe,
+            tuple_(Candle.symbol, Candle.exchange).in_(chunk),
+        )
+        if start is not None:
+            q = q.filter(Candle.ts >= start)
+        if end is not None:
+            q = q.filter(Candle.ts <= end)
+        for sym, exch, lo, hi in q.group_by(Candle.symbol, Candle.exchange).all():
+            if lo is not None and hi is not None:
+                out[(sym, exch)] = (lo, hi)
+    return out
+
+
+def ensure_history_for_pairs(
+    db: Session,
+    settings: Settings,
+    *,
+    pairs: Iterable[SymbolPair],
+    base_timeframe: str,
+    start: datetime,
+    end: datetime,
+) -> list[SymbolPair]:
+    """Run `ensure_history` only for pairs whose stored range falls short.
+
+    Coverage for all pairs is read with `load_ts_bounds_many`, so instruments
+    that already span the window cost no per-symbol query. Returns the pairs
+    that were extended.
+    """
+
+    unique = _unique_pairs(pairs)
+    bounds = load_ts_bounds_many(db, pairs=unique, timeframe=base_timeframe)
+    now = _now_ist_naive()
+    extended: list[SymbolPair] = []
+    for symbol, exchange in unique:
+        if not history_extend_segments(
+            bounds.get((symbol, exchange)), start=start, end=end, now=now
+        ):
+            continue
+        ensure_history(
+            db,
+            settings,
+            symbol=symbol,
+            exchange=exchange,
+            base_timeframe=base_timeframe,
+            start=start,
+            end=end,
+        )
+        extended.append((symbol, exchange))
+    return extended
+
+
+def load_series_columns_many(
+    db: Session,
+    settings: Settings,
+    *,
+    pairs: Iterable[SymbolPair],
+    timeframe: Timeframe,
+    start: datetime,
+    end: datetime,
+    allow_fetch: bool = True,
+) -> Dict[SymbolPair, CandleColumns]:
+    """`load_series_columns` for many (symbol, exchange) pairs at once.
+
+    Base candles for all pairs are read in chunked `(symbol, exchange) IN`
+    queries ordered by (symbol, exchange, ts) and split into per-pair columns.
+    Derived timeframes still read built rollups per instrument and aggregate
+    the rest from the bulk read. Every requested pair is present in the
+    result (empty columns when there is no data).
+    """
+
+    unique = _unique_pairs(pairs)
+    base_timeframe = BASE_TIMEFRAME_MAP[timeframe]
+    if allow_fetch:
+        ensure_history_for_pairs(
+            db,
+            settings,
+            pairs=unique,
+            base_timeframe=base_timeframe,
+            start=start,
+            end=end,
+        )
+
+    out: Dict[SymbolPair, CandleColumns] = {}
+    pending = unique
+    if timeframe != base_timeframe:
+        pending = []
+        for symbol, exchange in unique:
+            rolled = load_rollup_series(
+                db,
+                symbol=symbol,
+                exchange=exchange,
+                timeframe=timeframe,
+                start=start,
+                end=end,
+            )
+            if rolled is not None:
+                out[(symbol, exchange)] = CandleColumns.from_tuples(rolled)
+            else:
+                pending.append((symbol, exchange))
+
+    if timeframe in {"5m", "15m", "30m", "1h"}:
+        minutes = {"5m": 5, "15m": 15, "30m": 30, "1h": 60}[timeframe]
+
+        def _build(rows: Iterable[tuple]) -> CandleColumns:
+            return _aggregate_intraday_columns(rows, minutes=minutes)
+
+    elif timeframe in {"1mo", "1y"}:
+
+        def _build(rows: Iterable[tuple]) -> CandleColumns:
+            return _aggregate_daily_to_period_columns(rows, mode=timeframe)
+
+    elif timeframe == base_timeframe:
+        _build = CandleColumns.from_tuples
+    else:
+        raise MarketDataError(f"Unsupported timeframe: {timeframe}")
+
+    for chunk in _pair_chunks(pending):
+        rows = (
+            db.query(
+                Candle.symbol,
+                Candle.exchange,
+                Candle.ts,
+                Candle.open,
+                Candle.high,
+                Candle.low,
+                Candle.close,
+                Candle.volume,
+            )
+            .filter(
+                Candle.timeframe == base_timeframe,
+                tuple_(Candle.symbol, Candle.exchange).in_(chunk),
+                and_(Candle.ts >= start, Candle.ts <= end),
+            )
+            .order_by(Candle.symbol, Candle.exchange, Candle.ts)
+            .all()
+        )
+        for pair, group in groupby(rows, key=itemgetter(0, 1)):
+            out[pair] = _build(r[2:] for r in group)
+
+    return {pair: out.get(pair) or CandleColumns() for pair in unique}
+
+
+def load_latest_closes(
+    db: Session,
+    *,
+    pairs: Iterable[SymbolPair],
+    timeframe: str = "1d",
+) -> Dict[SymbolPair, tuple[datetime, float]]:
+    """Return the (ts, close) of the latest candle per (symbol, exchange).
+
+    Joins each pair's `MAX(ts)` back to its candle, one query per chunk of
+    pairs; pairs without candles are omitted.
+    """
+
+    out: Dict[SymbolPair, tuple[datetime, float]] = {}
+    for chunk in _pair_chunks(_unique_pairs(pairs)):
+        latest = (
+            select(
+                Candle.symbol.label("symbol"),
+                Candle.exchange.label("exchange"),
+                func.max(Candle.ts).label("ts"),
+            )
+            .where(
+                Candle.timeframe == timeframe,
+                tuple_(Candle.symbol, Candle.exchange).in_(chunk),
+            )
+            .group_by(Candle.symbol, Candle.exchange)
+            .subquery()
+        )
+        rows = (
+            db.query(Candle.symbol, Candle.exchange, Candle.ts, Candle.close)
+            .join(
+                latest,
+                and_(
+                    Candle.symbol == latest.c.symbol,
+                    Candle.exchange == latest.c.exchange,
+                    Candle.ts == latest.c.ts,
+                ),
+            )
+            .filter(Candle.timeframe == timeframe)
+            .all()
+        )
+        for sym, exch, ts, close in rows:
+            out[(sym, exch)] = (ts, close)
+    return out
+
+
+def load_recent_bars_many(
+    db: Session,
+    *,
+    pairs: Iterable[SymbolPair],
+    timeframe: str,
+    limit: int,
+) -> Dict[SymbolPair, CandleColumns]:
+    """Return the last `limit` stored bars per (symbol, exchange), oldest first.
+
+    Uses `ROW_NUMBER() OVER (PARTITION BY symbol, exchange ORDER BY ts DESC)`
+    so each chunk of pairs is a single query. Pairs without candles are
+    omitted.
+    """
+
+    out: Dict[SymbolPair, CandleColumns] = {}
+    if limit <= 0:
+        return out
+    for chunk in _pair_chunks(_unique_pairs(pairs)):
+        ranked = (
+            select(
+                Candle.symbol,
+                Candle.exchange,
+                Candle.ts,
+                Candle.open,
+                Candle.high,
+                Candle.low,
+                Candle.close,
+                Candle.volume,
+                func.row_number()
+                .over(
+                    partition_by=(Candle.symbol, Candle.exchange),
+                    order_by=Candle.ts.desc(),
+                )
+                .label("rn"),
+            )
+            .where(
+                Candle.timeframe == timeframe,
+                tuple_(Candle.symbol, Candle.exchange).in_(chunk),
+            )
+            .subquery()
+        )
+        c = ranked.c
+        rows = db.execute(
+            select(c.symbol, c.exchange, c.ts, c.open, c.high, c.low, c.close, c.volume)
+            .where(c.rn <= int(limit))
+            .order_by(c.symbol, c.exchange, c.ts)
+        ).all()
+        for pair, group in groupby(rows, key=itemgetter(0, 1)):
+            out[pair] = CandleColumns.from_tuples(r[2:] for r in group)
+    return out
+
+
 def _sync_all_instruments_once() -> None:
     """Background sync to keep OHLCV data reasonably fresh.
 
@@ -1026,87 +1509,75 @@ def _sync_all_instruments_once() -> None:
             .all()
         )
 
-        for inst in listings:
-            for base_tf in ("1m", "1d"):
-                latest_ts: datetime | None = (
-                    db.query(func.max(Candle.ts))
-                    .filter(
-                        Candle.symbol == inst.symbol,
-                        Candle.exchange == inst.exchange,
-                        Candle.timeframe == base_tf,
-                    )
-                    .scalar()
+        items = [
+            (inst.symbol, inst.exchange, base_tf)
+            for inst in listings
+            for base_tf in ("1m", "1d")
+        ]
+
+    def _sync_one(item: tuple[str, str, str]) -> None:
+        symbol, exchange, base_tf = item
+        with SessionLocal() as db:
+            latest_ts: datetime | None = (
+                db.query(func.max(Candle.ts))
+                .filter(
+                    Candle.symbol == symbol,
+                    Candle.exchange == exchange,
+                    Candle.timeframe == base_tf,
                 )
+                .scalar()
+            )
 
-                if latest_ts is None:
-                    start = max_age
-                else:
-                    start = max(latest_ts, max_age)
-
-                end = now
-                if start >= end:
-                    continue
-
-                try:
-                    ensure_history(
-                        db,
-                        settings,
-                        symbol=inst.symbol,
-                        exchange=inst.exchange,
-                        base_timeframe=base_tf,
-                        start=start,
-                        end=end,
-                    )
-                except MarketDataError:
-                    # Failures are logged in the caller; continue with next instrument.
-                    continue
-
-
-def _market_sync_loop() -> None:  # pragma: no cover - background loop
-    """Simple background loop to periodically sync market data."""
-
-    # Run an initial sync shortly after startup, then every 6 hours.
-    interval = timedelta(hours=6)
-    next_run = _now_ist_naive() + timedelta(minutes=5)
-
-    while not _scheduler_stop_event.is_set():
-        now = _now_ist_naive()
-        sleep_seconds = (next_run - now).total_seconds()
-        if sleep_seconds > 0:
-            _scheduler_stop_event.wait(timeout=sleep_seconds)
-            if _scheduler_stop_event.is_set():
+            if latest_ts is None:
+                start = max_age
+            else:
+                start = max(latest_ts, max_age)
+
+            end = now
+            if start >= end:
                 return
 
-        try:
-            _sync_all_instruments_once()
-        except Exception:
-            # Swallow all exceptions to avoid killing the loop; errors should be
-            # visible in logs via the logging configuration.
-            pass
+            ensure_history(
+                db,
+                settings,
+                symbol=symbol,
+                exchange=exchange,
+                base_timeframe=base_tf,
+                start=start,
+                end=end,
+            )
 
-        next_run = _now_ist_naive() + interval
+    # Instruments are synced in parallel on the fetch pool; failures (e.g. a
+    # missing instrument token) are per-instrument and do not stop the rest.
+    get_history_fetch_scheduler().map(_sync_one, items)
 
 
 def schedule_market_data_sync() -> None:
-    """Start a background thread that periodically syncs market data.
+    """Register the periodic market data sync with the background scheduler.
 
-    This uses a very lightweight loop and is intended to keep data reasonably
-    fresh for the active instruments universe. Lazy gap-filling on reads is
-    still performed by `load_series`.
+    An initial sync runs shortly after startup, then every 6 hours, to keep
+    data reasonably fresh for the active instruments universe. Lazy
+    gap-filling on reads is still performed by `load_series`.
     """
 
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    _scheduler_started = True
-
-    thread = Thread(target=_market_sync_loop, name="market-data-sync", daemon=True)
-    thread.start()
+    register_task(
+        "market_data_sync",
+        _sync_all_instruments_once,
+        interval_sec=6 * 3600,
+        initial_delay_sec=5 * 60,
+    )
 
 
 __all__ = [
     "Timeframe",
     "MarketDataError",
+    "ensure_history_for_pairs",
+    "history_extend_segments",
+    "load_latest_closes",
+    "load_recent_bars_many",
     "load_series",
+    "load_series_columns",
+    "load_series_columns_many",
+    "load_ts_bounds_many",
     "schedule_market_data_sync",
 ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import time
 from threading import Lock
-from typing import Dict, Iterable, Tuple
+from typing import Dict, Iterable, Tuple, TypeVar
 
 from sqlalchemy.orm import Session
 
@@ -16,6 +16,8 @@ from app.services.market_data import (
 
 QuoteKey = Tuple[str, str]  # (exchange, symbol) both uppercased
 
+T = TypeVar("T")
+
 
 class QuotePayload(dict):
     """Small dict wrapper for clarity (ltp/prev_close)."""
@@ -26,6 +28,14 @@ _cache_lock = Lock()
 _cache: Dict[QuoteKey, tuple[float, dict[str, float | None]]] = {}
 
 
+def chunked(items: list[T], *, size: int) -> list[list[T]]:
+    """Split `items` into quote-call batches of at most `size` (<= 0: one batch)."""
+
+    if size <= 0:
+        return [items]
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
 def _now_monotonic() -> float:
     return time.monotonic()
 
@@ -121,5 +131,38 @@ def get_bulk_quotes(
     return out
 
 
-__all__ = ["QuoteKey", "get_bulk_quotes"]
+def get_cached_quotes(
+    keys: Iterable[QuoteKey],
+    *,
+    max_age_sec: float = _CACHE_TTL_SECONDS,
+) -> Dict[QuoteKey, dict[str, float | None]]:
+    """Return cached quotes no older than `max_age_sec`, without broker calls."""
+
+    now = _now_monotonic()
+    out: Dict[QuoteKey, dict[str, float | None]] = {}
+    with _cache_lock:
+        for k in keys:
+            cached = _cache.get(k)
+            if cached is None or now - cached[0] > max_age_sec:
+                continue
+            out[k] = dict(cached[1])
+    return out
+
+
+def prime_quote_cache(quotes: Dict[QuoteKey, dict[str, float | None]]) -> None:
+    """Store quotes fetched elsewhere (e.g. the live quote hub) in the cache."""
+
+    now = _now_monotonic()
+    with _cache_lock:
+        for k, payload in quotes.items():
+            _cache[k] = (
+                now,
+                {
+                    "last_price": payload.get("last_price"),
+                    "prev_close": payload.get("prev_close"),
+                },
+            )
+
+
+__all__ = ["QuoteKey", "chunked", "get_bulk_quotes", "get_cached_quotes", "prime_quote_cache"]
 
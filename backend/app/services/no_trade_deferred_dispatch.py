@@ -2,15 +2,12 @@ from __future__ import annotations
 
 import logging
 from datetime import UTC, datetime
-from threading import Event, Thread
 
 from app.core.config import get_settings
+from app.services.scheduler import register_task
 
 logger = logging.getLogger(__name__)
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
-
 
 def _now_utc() -> datetime:
     return datetime.now(UTC)
@@ -31,28 +28,17 @@ def process_no_trade_deferred_dispatch_once() -> int:
     return 0
 
 
-def _loop() -> None:
-    settings = get_settings()
-    interval = float(getattr(settings, "no_trade_deferred_dispatch_poll_interval_sec", 5) or 5)
-    interval = max(1.0, interval)
-    while not _scheduler_stop_event.is_set():
-        try:
-            process_no_trade_deferred_dispatch_once()
-        except Exception:
-            logger.exception("Deferred NO_TRADE dispatch loop failed.")
-        _scheduler_stop_event.wait(timeout=interval)
-
-
 def schedule_no_trade_deferred_dispatch() -> None:
-    global _scheduler_started
     settings = get_settings()
     if not getattr(settings, "no_trade_deferred_dispatch_enabled", True):
         return
-    if _scheduler_started:
-        return
-    _scheduler_started = True
-    thread = Thread(target=_loop, name="no-trade-deferred", daemon=True)
-    thread.start()
+    interval = float(getattr(settings, "no_trade_deferred_dispatch_poll_interval_sec", 5) or 5)
+    register_task(
+        "no_trade_deferred_dispatch",
+        process_no_trade_deferred_dispatch_once,
+        interval_sec=max(1.0, interval),
+        market_hours_only=True,
+    )
 
 
 __all__ = [
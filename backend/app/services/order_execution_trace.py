@@ -0,0 +1,190 @@
+"""Per-order stage timing for the execute path.
+
+`execute_order_internal` threads one `OrderExecutionTrace` through the
+pre-trade checks and the broker call. Each stage (execution policy, risk,
+sizing, broker guards, margin preview, broker placement, persistence) is
+recorded as a span with its offset from the start of the execute call, and
+the finished trace is stored on `Order.execution_trace_json`.
+
+Traces also feed `OrderExecutionStats`, an in-process window of recent
+latencies: total execute time, execute-to-broker-ack time and, for orders
+created from an alert, webhook-to-broker time (alert `received_at` to the
+broker acknowledging the order).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from threading import Lock
+from typing import Any, Dict, Iterator
+
+from app.core.latency import LatencyWindow
+
+STAGES = (
+    "policy",
+    "risk",
+    "sizing",
+    "guards",
+    "margin_preview",
+    "broker_client",
+    "broker_place",
+    "persistence",
+)
+
+
+class OrderExecutionTrace:
+    """Spans recorded while executing one order.
+
+    Spans may nest (`margin_preview` runs inside `guards`), so per-stage
+    totals are not additive. A stage left open by an exception is closed by
+    `finish()`.
+    """
+
+    def __init__(self, order_id: int, *, correlation_id: str | None = None) -> None:
+        self.order_id = int(order_id)
+        self.correlation_id = correlation_id
+        self.started_at = datetime.now(UTC)
+        self._t0 = time.perf_counter()
+        self._open: Dict[str, float] = {}
+        self.spans: list[dict[str, Any]] = []
+        self.origin_at: datetime | None = None
+        self.broker_ack_ms: float | None = None
+        self.outcome: str | None = None
+        self.total_ms: float | None = None
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def begin(self, stage: str) -> None:
+        self._open.setdefault(stage, self._now_ms())
+
+    def end(self, stage: str) -> None:
+        start = self._open.pop(stage, None)
+        if start is None:
+            return
+        self.spans.append(
+            {
+                "stage": stage,
+                "start_ms": round(start, 3),
+                "ms": round(self._now_ms() - start, 3),
+            }
+        )
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        self.begin(stage)
+        try:
+            yield
+        finally:
+            self.end(stage)
+
+    def mark_broker_ack(self) -> None:
+        """Record the moment the broker (or paper engine) accepted the order."""
+
+        self.broker_ack_ms = self._now_ms()
+
+    @property
+    def webhook_to_broker_ms(self) -> float | None:
+        if self.origin_at is None or self.broker_ack_ms is None:
+            return None
+        origin = self.origin_at
+        if origin.tzinfo is None:
+            origin = origin.replace(tzinfo=UTC)
+        queued_ms = (self.started_at - origin).total_seconds() * 1000.0
+        return max(0.0, queued_ms) + self.broker_ack_ms
+
+    def finish(self, outcome: str) -> None:
+        for stage in list(self._open):
+            self.end(stage)
+        self.outcome = outcome
+        self.total_ms = self._now_ms()
+
+    def stage_totals(self) -> dict[str, float]:
+        out: dict[str, float] = {}
+        for s in self.spans:
+            out[s["stage"]] = round(out.get(s["stage"], 0.0) + s["ms"], 3)
+        return out
+
+    def as_dict(self) -> dict[str, Any]:
+        w2b = self.webhook_to_broker_ms
+        return {
+            "started_at": self.started_at.isoformat(),
+            "correlation_id": self.correlation_id,
+            "outcome": self.outcome,
+            "total_ms": round(self.total_ms or 0.0, 3),
+            "broker_ack_ms": (
+                round(self.broker_ack_ms, 3) if self.broker_ack_ms is not None else None
+            ),
+            "webhook_to_broker_ms": round(w2b, 3) if w2b is not None else None,
+            "stages": self.stage_totals(),
+            "spans": self.spans,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), ensure_ascii=False)
+
+
+_QUANTILES = (0.5, 0.99)
+
+
+class OrderExecutionStats:
+    """Rolling latency percentiles over recently finished order traces."""
+
+    def __init__(self, window: int = 1024) -> None:
+        self._lock = Lock()
+        self.outcomes: Dict[str, int] = {}
+        self.total = LatencyWindow(window)
+        self.to_broker = LatencyWindow(window)
+        self.webhook_to_broker = LatencyWindow(window)
+        self.stages: Dict[str, LatencyWindow] = {}
+        self._window = window
+
+    def record(self, trace: OrderExecutionTrace) -> None:
+        with self._lock:
+            outcome = trace.outcome or "unknown"
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            self.total.record(trace.total_ms or 0.0)
+            if trace.broker_ack_ms is not None:
+                self.to_broker.record(trace.broker_ack_ms)
+            w2b = trace.webhook_to_broker_ms
+            if w2b is not None:
+                self.webhook_to_broker.record(w2b)
+            for stage, ms in trace.stage_totals().items():
+                self.stages.setdefault(stage, LatencyWindow(self._window)).record(ms)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "outcomes": dict(self.outcomes),
+                "execute": self.total.as_dict(_QUANTILES),
+                "execute_to_broker": self.to_broker.as_dict(_QUANTILES),
+                "webhook_to_broker": self.webhook_to_broker.as_dict(_QUANTILES),
+                "stages": {
+                    s: self.stages[s].as_dict(_QUANTILES)
+                    for s in STAGES
+                    if s in self.stages
+                },
+            }
+
+
+_stats = OrderExecutionStats()
+
+
+def record_order_execution_trace(trace: OrderExecutionTrace) -> None:
+    _stats.record(trace)
+
+
+def get_order_execution_stats() -> dict[str, Any]:
+    return _stats.as_dict()
+
+
+__all__ = [
+    "OrderExecutionStats",
+    "OrderExecutionTrace",
+    "STAGES",
+    "get_order_execution_stats",
+    "record_order_execution_trace",
+]
@@ -0,0 +1,358 @@
+"""Shared portfolio math: covariance, shrinkage and risk-parity (ERC) weights.
+
+Used by risk-parity rebalance previews (`rebalance_risk`) and RISK_PARITY
+portfolio backtests (`backtests_portfolio`). The backend has no numeric
+array dependency, so kernels are written as whole-row operations
+(`sum(map(mul, a, b))`) whose inner loops run in C instead of per-element
+Python loops; sums keep the sequential order of the original loops.
+
+Matrices are plain `list[list[float]]`. Covariance matrices can be packed
+into a compact binary form (upper triangle of float64) for caching.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from itertools import repeat
+from operator import add, mul
+from typing import List, Literal, Sequence, Tuple
+
+Matrix = List[List[float]]
+ShrinkageMethod = Literal["none", "ledoit_wolf", "diagonal"]
+
+_BLOB_MAGIC = b"SYM1"
+_BLOB_HEADER = struct.Struct("<4sI")
+
+
+def _centered(returns: Sequence[Sequence[float]]) -> Tuple[Matrix, int]:
+    n = len(returns)
+    t = len(returns[0]) if n else 0
+    if n == 0 or t <= 1:
+        raise ValueError("Insufficient returns to compute covariance.")
+    out: Matrix = []
+    for r in returns:
+        m = sum(r) / t
+        out.append([x - m for x in r])
+    return out, t
+
+
+def covariance_matrix(returns: Sequence[Sequence[float]]) -> Matrix:
+    """Sample covariance (t-1 denominator) of per-asset return rows."""
+
+    centered, t = _centered(returns)
+    n = len(centered)
+    denom = float(t - 1)
+    cov: Matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        ci = centered[i]
+        row = cov[i]
+        for j in range(i, n):
+            v = sum(map(mul, ci, centered[j])) / denom
+            row[j] = v
+            cov[j][i] = v
+    return cov
+
+
+def volatilities(cov: Matrix) -> List[float]:
+    return [math.sqrt(max(0.0, cov[i][i])) for i in range(len(cov))]
+
+
+def correlation_matrix(cov: Matrix, vol: Sequence[float] | None = None) -> Matrix:
+    """Correlation from covariance; zero-vol assets get an identity row."""
+
+    vols = list(vol) if vol is not None else volatilities(cov)
+    n = len(cov)
+    corr: Matrix = []
+    for i in range(n):
+        vi = vols[i]
+        row = cov[i]
+        out = [0.0] * n
+        for j in range(n):
+            denom = (vi * vols[j]) if vi > 0 and vols[j] > 0 else 0.0
+            out[j] = row[j] / denom if denom else (1.0 if i == j else 0.0)
+        corr.append(out)
+    return corr
+
+
+def covariance_stats(
+    returns: Sequence[Sequence[float]],
+) -> Tuple[Matrix, List[float], Matrix]:
+    """Return (covariance, volatilities, correlation) for return rows."""
+
+    cov = covariance_matrix(returns)
+    vol = volatilities(cov)
+    return cov, vol, correlation_matrix(cov, vol)
+
+
+def ledoit_wolf_intensity(
+    returns: Sequence[Sequence[float]],
+    cov: Matrix | None = None,
+) -> float:
+    """Ledoit-Wolf (2004) intensity for shrinking toward a scaled identity.
+
+    `cov` is the sample covariance of `returns` when already computed. Uses
+    sum_k ||x_k x_k' - S||^2 = sum_k ||x_k||^4 - t ||S||^2 (S = X X' / t), so
+    the estimate costs O(n t) on top of the covariance.
+    """
+
+    centered, t = _centered(returns)
+    n = len(centered)
+    sample = cov if cov is not None else covariance_matrix(returns)
+    scale = (t - 1) / float(t)
+    mu = sum(sample[i][i] for i in range(n)) * scale / n
+    s_norm2 = sum(sum(map(mul, row, row)) for row in sample) * scale * scale
+    d2 = (s_norm2 - n * mu * mu) / n
+    if d2 <= 0:
+        return 0.0
+    sq = [0.0] * t
+    for row in centered:
+        sq = list(map(add, sq, map(mul, row, row)))
+    obs_norm4 = sum(map(mul, sq, sq))
+    b_bar2 = max(0.0, (obs_norm4 - t * s_norm2) / (t * t) / n)
+    return max(0.0, min(1.0, min(b_bar2, d2) / d2))
+
+
+def shrink_covariance(
+    cov: Matrix,
+    *,
+    method: ShrinkageMethod,
+    intensity: float,
+) -> Matrix:
+    """Linearly shrink `cov` toward a structured target.
+
+    - "ledoit_wolf": target is mu*I with mu the average variance;
+    - "diagonal": target keeps variances and zeroes covariances.
+    """
+
+    delta = max(0.0, min(1.0, float(intensity)))
+    if method == "none" or delta == 0.0:
+        return cov
+    n = len(cov)
+    keep = 1.0 - delta
+    out: Matrix = [[v * keep for v in row] for row in cov]
+    if method == "ledoit_wolf":
+        mu = sum(cov[i][i] for i in range(n)) / n if n else 0.0
+        for i in range(n):
+            out[i][i] += delta * mu
+    elif method == "diagonal":
+        for i in range(n):
+            out[i][i] = cov[i][i]
+    else:
+        raise ValueError(f"Unknown shrinkage method: {method}")
+    return out
+
+
+def mat_vec(cov: Matrix, w: Sequence[float]) -> List[float]:
+    return [sum(map(mul, row, w)) for row in cov]
+
+
+def project_simplex_bounds(
+    w: Sequence[float],
+    *,
+    min_w: float,
+    max_w: float,
+) -> List[float]:
+    """Project weights onto {sum=1, min_w <= w_i <= max_w} by redistribution."""
+
+    n = len(w)
+    if n == 0:
+        return []
+    if min_w * n > 1.0 + 1e-12:
+        raise ValueError("min_weight is too high for the number of assets.")
+    if max_w * n < 1.0 - 1e-12:
+        raise ValueError("max_weight is too low for the number of assets.")
+
+    w2 = [float(x) if math.isfinite(float(x)) else 0.0 for x in w]
+    w2 = [max(min(x, max_w), min_w) for x in w2]
+
+    eps = 1e-12
+    for _ in range(200):
+        total = sum(w2)
+        if abs(total - 1.0) <= 1e-12:
+            break
+        if total < 1.0:
+            add = 1.0 - total
+            free = [i for i in range(n) if w2[i] < (max_w - eps)]
+            if not free:
+                break
+            weights = [max(w2[i], eps) for i in free]
+            denom = sum(weights) or float(len(free))
+            for i, base in zip(free, weights, strict=False):
+                w2[i] = min(max_w, w2[i] + add * (base / denom))
+        else:
+            sub = total - 1.0
+            free = [i for i in range(n) if w2[i] > (min_w + eps)]
+            if not free:
+                break
+            weights = [max(w2[i] - min_w, eps) for i in free]
+            denom = sum(weights) or float(len(free))
+            for i, base in zip(free, weights, strict=False):
+                w2[i] = max(min_w, w2[i] - sub * (base / denom))
+
+    total = sum(w2) or 1.0
+    return [x / total for x in w2]
+
+
+@dataclass(frozen=True)
+class RiskParityResult:
+    weights: List[float]
+    converged: bool
+    iterations: int
+    max_rc_error: float
+
+
+def risk_contribution_shares(cov: Matrix, w: Sequence[float]) -> List[float]:
+    m = mat_vec(cov, w)
+    rc = list(map(mul, w, m))
+    total = sum(rc) or 1.0
+    return [r / total for r in rc]
+
+
+def _max_share_error(cov: Matrix, w: Sequence[float], target: float) -> float:
+    return max(abs(s - target) for s in risk_contribution_shares(cov, w))
+
+
+def solve_risk_parity_erc(
+    cov: Matrix,
+    *,
+    min_weight: float,
+    max_weight: float,
+    max_iter: int,
+    tol: float,
+) -> RiskParityResult:
+    """Equal-risk-contribution weights.
+
+    Solves the unconstrained problem min 0.5 y'Cy - sum(ln y_i)/n by cyclical
+    coordinate descent (each coordinate has a closed-form root and the
+    product Cy is updated one row at a time), then normalizes. When the
+    weight bounds bind, projected multiplicative updates continue from there.
+
+    Raises ValueError for an empty universe or infeasible weight bounds.
+    """
+
+    n = len(cov)
+    if n == 0:
+        raise ValueError("No assets for risk parity.")
+
+    w = project_simplex_bounds([1.0 / n] * n, min_w=min_weight, max_w=max_weight)
+    target_share = 1.0 / n
+
+    converged = False
+    max_err = 1.0
+    iterations = 0
+
+    y = list(w)
+    m = mat_vec(cov, y)
+    for it in range(1, max_iter + 1):
+        iterations = it
+        for i in range(n):
+            row = cov[i]
+            a = row[i]
+            if a <= 0:
+                continue
+            b = m[i] - a * y[i]
+            yi = (math.sqrt(b * b + 4.0 * a * target_share) - b) / (2.0 * a)
+            d = yi - y[i]
+            if d:
+                y[i] = yi
+                m = list(map(add, m, map(mul, row, repeat(d))))
+        total = sum(y)
+        if total <= 0 or not math.isfinite(total):
+            break
+        w = [v / total for v in y]
+        max_err = _max_share_error(cov, w, target_share)
+        if max_err <= tol:
+            converged = True
+            break
+
+    projected = project_simplex_bounds(w, min_w=min_weight, max_w=max_weight)
+    if any(abs(a - b) > 1e-12 for a, b in zip(projected, w, strict=False)):
+        # Bounds bind: exact ERC is infeasible, approach it within the box.
+        converged = False
+        w = projected
+        for it in range(iterations + 1, max_iter + 1):
+            iterations = it
+            rc = list(map(mul, w, mat_vec(cov, w)))
+            total = sum(rc)
+            if total <= 0 or not math.isfinite(total):
+                break
+            shares = [r / total for r in rc]
+            max_err = max(abs(s - target_share) for s in shares)
+            if max_err <= tol:
+                converged = True
+                break
+            w = [
+                wi * math.sqrt(target_share / s) if s > 0 else wi * 1.1
+                for wi, s in zip(w, shares, strict=False)
+            ]
+            w = project_simplex_bounds(w, min_w=min_weight, max_w=max_weight)
+        else:
+            max_err = _max_share_error(cov, w, target_share)
+
+    return RiskParityResult(
+        weights=w,
+        converged=converged,
+        iterations=iterations,
+        max_rc_error=float(max_err),
+    )
+
+
+def encode_symmetric_matrix(m: Matrix) -> bytes:
+    """Pack the upper triangle of a symmetric matrix as little-endian float64."""
+
+    n = len(m)
+    tri = array("d")
+    for i in range(n):
+        tri.extend(m[i][i:])
+    if sys.byteorder != "little":
+        tri.byteswap()
+    return _BLOB_HEADER.pack(_BLOB_MAGIC, n) + tri.tobytes()
+
+
+def decode_symmetric_matrix(blob: bytes) -> Matrix:
+    """Inverse of `encode_symmetric_matrix`; raises ValueError if malformed."""
+
+    if len(blob) < _BLOB_HEADER.size:
+        raise ValueError("Matrix blob is too short.")
+    magic, n = _BLOB_HEADER.unpack_from(blob)
+    if magic != _BLOB_MAGIC:
+        raise ValueError("Unknown matrix blob encoding.")
+    tri = array("d")
+    tri.frombytes(blob[_BLOB_HEADER.size :])
+    if sys.byteorder != "little":
+        tri.byteswap()
+    if len(tri) != n * (n + 1) // 2:
+        raise ValueError("Matrix blob size does not match its dimension.")
+    out: Matrix = [[0.0] * n for _ in range(n)]
+    pos = 0
+    for i in range(n):
+        width = n - i
+        row = tri[pos : pos + width]
+        pos += width
+        out[i][i:] = row
+        for j in range(i + 1, n):
+            out[j][i] = row[j - i]
+    return out
+
+
+__all__ = [
+    "Matrix",
+    "RiskParityResult",
+    "ShrinkageMethod",
+    "correlation_matrix",
+    "covariance_matrix",
+    "covariance_stats",
+    "decode_symmetric_matrix",
+    "encode_symmetric_matrix",
+    "ledoit_wolf_intensity",
+    "mat_vec",
+    "project_simplex_bounds",
+    "risk_contribution_shares",
+    "shrink_covariance",
+    "solve_risk_parity_erc",
+    "volatilities",
+]
@@ -9,10 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.clients import ZerodhaClient
 from app.core.config import Settings
-from app.core.crypto import decrypt_token
 from app.db.session import SessionLocal
-from app.models import BrokerConnection
-from app.services.broker_secrets import get_broker_secret
+from app.services.broker_clients import get_broker_client_registry
 from app.services.positions_sync import sync_positions_from_zerodha
 from app.services.system_events import record_system_event
 
@@ -35,39 +33,7 @@ def _should_schedule(*, key: tuple[str, int], min_interval: timedelta) -> bool:
 
 
 def _build_zerodha_client(db: Session, settings: Settings, *, user_id: int) -> ZerodhaClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "zerodha",
-            BrokerConnection.user_id == user_id,
-        )
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
-    )
-    if conn is None:
-        raise RuntimeError("Zerodha is not connected.")
-
-    api_key = get_broker_secret(
-        db,
-        settings,
-        broker_name="zerodha",
-        key="api_key",
-        user_id=user_id,
-    )
-    if not api_key:
-        raise RuntimeError("Zerodha API key is not configured.")
-
-    try:
-        from kiteconnect import KiteConnect  # type: ignore[import]
-    except ImportError as exc:  # pragma: no cover - defensive
-        raise RuntimeError(
-            "kiteconnect library is not installed in the backend environment."
-        ) from exc
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=str(api_key).strip())
-    kite.set_access_token(access_token)
-    return ZerodhaClient(kite)
+    return get_broker_client_registry().zerodha(db, settings, user_id=user_id)
 
 
 def schedule_positions_autosync(
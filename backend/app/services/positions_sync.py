@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.clients import AngelOneClient, ZerodhaClient
 from app.models import Position, PositionSnapshot
 from app.services.broker_instruments import resolve_listing_for_broker_symbol
+from app.services.holdings_snapshot import invalidate_holdings_snapshots
 
 
 def _as_float(value: object, default: float | None = None) -> float | None:
@@ -232,6 +233,7 @@ def sync_positions_from_zerodha(db: Session, client: ZerodhaClient) -> int:
         updated += 1
 
     db.commit()
+    invalidate_holdings_snapshots(broker_name="zerodha")
 
     return updated
 
@@ -373,6 +375,7 @@ def sync_positions_from_angelone(db: Session, client: AngelOneClient) -> int:
         updated += 1
 
     db.commit()
+    invalidate_holdings_snapshots(broker_name="angelone")
     return updated
 
 
@@ -0,0 +1,399 @@
+"""Process-wide live quote hub for `/ws/market/ticks`.
+
+Each websocket used to poll the broker on its own every second, so broker
+quote traffic grew with the number of open tabs. The hub keeps one poller
+thread for the whole process:
+
+- subscriptions are grouped by owner (the user whose broker session the
+  socket was opened with); each group's symbols are unioned and quoted once
+  per interval with that owner's client, in batches (quote -> LTP ->
+  per-instrument fallback for a failing batch);
+- each group's fetch runs on its own daemon thread and is abandoned after
+  `fetch_timeout_sec`, so a hung broker call only delays that owner's
+  sockets (the group is skipped until the stuck call returns);
+- only quotes that changed since the previous poll are pushed, and each
+  subscriber receives the subset it asked for (a new subscriber first gets
+  the last known quote for its symbols);
+- every poll also refreshes the `market_quotes` cache, so HTTP quote lookups
+  made while sockets are open do not hit the broker again.
+
+Delivery to sockets is coalescing: a slow socket sees the latest quote per
+symbol rather than a backlog of intermediate ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Hashable
+
+from app.core.config import get_settings
+from app.services.market_data import _map_app_symbol_to_zerodha_symbol
+from app.services.market_quotes import QuoteKey, chunked, prime_quote_cache
+
+PARTIAL_FAILURE_MESSAGE = "Some live quotes failed; showing partial updates."
+
+
+class QuoteSubscription:
+    """One socket's view of the hub: its symbols plus pending (coalesced) rows."""
+
+    def __init__(
+        self,
+        sub_id: int,
+        *,
+        client: Any,
+        loop: asyncio.AbstractEventLoop,
+        owner: Hashable = None,
+    ) -> None:
+        self.id = sub_id
+        self.client = client
+        self.owner = owner
+        self.keys: tuple[QuoteKey, ...] = ()
+        self._loop = loop
+        self._event = asyncio.Event()
+        self._lock = Lock()
+        self._pending: dict[QuoteKey, dict[str, Any]] = {}
+        self._error: str | None = None
+
+    def _push(self, rows: list[dict[str, Any]], error: str | None) -> None:
+        with self._lock:
+            for row in rows:
+                self._pending[(row["exchange"], row["symbol"])] = row
+            if error:
+                self._error = error
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # Event loop already closed; the socket is going away.
+            pass
+
+    async def next_update(self) -> tuple[list[dict[str, Any]], str | None]:
+        """Wait for the next batch of changed quotes (and any error message)."""
+
+        await self._event.wait()
+        self._event.clear()
+        with self._lock:
+            rows = list(self._pending.values())
+            error = self._error
+            self._pending = {}
+            self._error = None
+        return rows, error
+
+
+class _OwnerGroup:
+    """Per-owner poll state: last published rows and the in-flight fetch."""
+
+    __slots__ = ("last", "consecutive_failures", "inflight")
+
+    def __init__(self) -> None:
+        self.last: dict[QuoteKey, dict[str, Any]] = {}
+        self.consecutive_failures = 0
+        self.inflight: Future | None = None
+
+
+class QuoteHub:
+    """Polls the broker once per interval for each owner's subscriptions."""
+
+    def __init__(
+        self,
+        *,
+        poll_interval_sec: float,
+        batch_size: int,
+        fetch_timeout_sec: float = 2.5,
+    ) -> None:
+        self.poll_interval_sec = max(float(poll_interval_sec), 0.05)
+        self.batch_size = max(int(batch_size), 1)
+        self.fetch_timeout_sec = max(float(fetch_timeout_sec), 0.05)
+        self._lock = Lock()
+        self._ids = itertools.count(1)
+        self._subs: dict[int, QuoteSubscription] = {}
+        self._groups: dict[Hashable, _OwnerGroup] = {}
+        self._thread: Thread | None = None
+        self._wake = Event()
+        self._polls = 0
+        self._timeouts = 0
+        self._broker_calls = 0
+        self._quotes_received = 0
+        self._changes_published = 0
+        self._last_poll_ms = 0.0
+        self._last_error: str | None = None
+
+    # Subscription management (called from websocket handlers).
+
+    def subscribe(
+        self,
+        *,
+        client: Any,
+        loop: asyncio.AbstractEventLoop,
+        owner: Hashable = None,
+    ) -> QuoteSubscription:
+        """Register a socket; `owner` groups sockets sharing one broker session."""
+
+        with self._lock:
+            sub = QuoteSubscription(
+                next(self._ids), client=client, loop=loop, owner=owner
+            )
+            self._subs[sub.id] = sub
+            self._groups.setdefault(owner, _OwnerGroup())
+        return sub
+
+    def set_symbols(self, sub: QuoteSubscription, keys: list[QuoteKey]) -> None:
+        """Replace a subscription's symbols; known quotes are sent right away."""
+
+        with self._lock:
+            if sub.id not in self._subs:
+                return
+            sub.keys = tuple(keys)
+            last = self._groups[sub.owner].last
+            known = [last[k] for k in sub.keys if k in last]
+            fresh = any(k not in last for k in sub.keys)
+            self._ensure_running_locked()
+        if known:
+            sub._push(known, None)
+        if fresh:
+            self._wake.set()
+
+    def unsubscribe(self, sub: QuoteSubscription) -> None:
+        with self._lock:
+            self._subs.pop(sub.id, None)
+            if not any(s.owner == sub.owner for s in self._subs.values()):
+                self._groups.pop(sub.owner, None)
+            if not self._subs:
+                self._wake.set()
+
+    def _ensure_running_locked(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._wake.clear()
+        self._thread = Thread(target=self._run, name="quote-hub", daemon=True)
+        self._thread.start()
+
+    # Poller.
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._subs:
+                    self._thread = None
+                    return
+                # Each owner is polled with its own client; the newest socket
+                # is the most likely to hold a current access token.
+                batches: dict[Hashable, tuple[Any, list[QuoteKey]]] = {}
+                for sub in sorted(self._subs.values(), key=lambda s: s.id):
+                    _client, keys = batches.get(sub.owner, (None, []))
+                    batches[sub.owner] = (sub.client, keys + list(sub.keys))
+            started = time.monotonic()
+            self._poll_owners(
+                {
+                    owner: (client, list(dict.fromkeys(keys)))
+                    for owner, (client, keys) in batches.items()
+                    if keys
+                }
+            )
+            elapsed = time.monotonic() - started
+            self._wake.wait(max(self.poll_interval_sec - elapsed, 0.0))
+            self._wake.clear()
+
+    def poll_once(
+        self, client: Any, keys: list[QuoteKey], *, owner: Hashable = None
+    ) -> None:
+        """Fetch quotes for `keys` with `client` and publish changes to `owner`'s sockets."""
+
+        self._poll_owners({owner: (client, keys)})
+
+    def _poll_owners(
+        self, batches: dict[Hashable, tuple[Any, list[QuoteKey]]]
+    ) -> None:
+        started = time.perf_counter()
+        pending: list[tuple[Hashable, _OwnerGroup, list[QuoteKey], Future]] = []
+        with self._lock:
+            for owner, (client, keys) in batches.items():
+                group = self._groups.setdefault(owner, _OwnerGroup())
+                if group.inflight is not None and not group.inflight.done():
+                    # A previous fetch for this owner is still stuck in the
+                    # broker; do not pile another thread on top of it.
+                    continue
+                group.inflight = self._start_fetch(client, keys)
+                pending.append((owner, group, keys, group.inflight))
+
+        deadline = time.monotonic() + self.fetch_timeout_sec
+        for owner, group, keys, future in pending:
+            error: str | None = None
+            try:
+                quotes, partial = future.result(
+                    timeout=max(deadline - time.monotonic(), 0.0)
+                )
+                group.consecutive_failures = 0
+                if partial:
+                    error = PARTIAL_FAILURE_MESSAGE
+            except Exception as exc:
+                if isinstance(exc, FutureTimeout):
+                    exc = TimeoutError(
+                        f"Quote fetch timed out after {self.fetch_timeout_sec:g}s"
+                    )
+                    with self._lock:
+                        self._timeouts += 1
+                quotes = {}
+                group.consecutive_failures += 1
+                self._last_error = str(exc)
+                # Transient broker errors are retried silently; surface persistent
+                # failures to the UI.
+                if group.consecutive_failures >= 3:
+                    error = str(exc)
+            self._publish(owner, group, keys, quotes, error)
+        with self._lock:
+            self._polls += 1
+            self._last_poll_ms = round((time.perf_counter() - started) * 1000.0, 2)
+
+    def _start_fetch(self, client: Any, keys: list[QuoteKey]) -> Future:
+        future: Future = Future()
+
+        def _target() -> None:
+            try:
+                future.set_result(self._fetch(client, keys))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        # Daemon threads: a hung broker call must not block process exit.
+        Thread(target=_target, name="quote-hub-fetch", daemon=True).start()
+        return future
+
+    def _call(self, fn, *args, **kwargs):  # type: ignore[no-untyped-def]
+        with self._lock:
+            self._broker_calls += 1
+        return fn(*args, **kwargs)
+
+    def _fetch(
+        self, client: Any, keys: list[QuoteKey]
+    ) -> tuple[Dict[QuoteKey, dict[str, Any]], bool]:
+        # Quote API expects broker tradingsymbols; map app symbols when configured.
+        back: dict[tuple[str, str], QuoteKey] = {}
+        for exch, sym in keys:
+            back[(exch, _map_app_symbol_to_zerodha_symbol(exch, sym))] = (exch, sym)
+        mapped = list(back)
+
+        raw: dict[tuple[str, str], dict[str, Any]] = {}
+        partial = False
+        # Fetch quotes in batches so that a single bad instrument does not
+        # prevent all subscribers from getting updates.
+        for batch in chunked(mapped, size=self.batch_size):
+            try:
+                raw.update(self._call(client.get_quote_bulk, batch))
+                continue
+            except Exception as exc:
+                partial = True
+                self._last_error = str(exc)
+            try:
+                raw.update(self._call(client.get_ltp_bulk, batch))
+                continue
+            except Exception as exc:
+                self._last_error = str(exc)
+            for exch, broker_sym in batch:
+                try:
+                    ltp = self._call(
+                        client.get_ltp, exchange=exch, tradingsymbol=broker_sym
+                    )
+                except Exception:
+                    continue
+                raw[(exch, broker_sym)] = {"last_price": float(ltp), "prev_close": None}
+
+        out: Dict[QuoteKey, dict[str, Any]] = {}
+        for mapped_key, q in raw.items():
+            orig = back.get(mapped_key)
+            if orig is None:
+                continue
+            try:
+                ltp_f = float(q.get("last_price"))  # type: ignore[arg-type]
+            except Exception:
+                continue
+            prev = q.get("prev_close")
+            try:
+                prev_f = float(prev) if prev is not None else None
+            except Exception:
+                prev_f = None
+            out[orig] = {"last_price": ltp_f, "prev_close": prev_f}
+        return out, partial
+
+    def _publish(
+        self,
+        owner: Hashable,
+        group: _OwnerGroup,
+        keys: list[QuoteKey],
+        quotes: Dict[QuoteKey, dict[str, Any]],
+        error: str | None,
+    ) -> None:
+        if quotes:
+            prime_quote_cache(quotes)
+        with self._lock:
+            last = group.last
+            changed: dict[QuoteKey, dict[str, Any]] = {}
+            for key, q in quotes.items():
+                row = {
+                    "exchange": key[0],
+                    "symbol": key[1],
+                    "ltp": q["last_price"],
+                    "prevClose": q["prev_close"],
+                }
+                if last.get(key) != row:
+                    changed[key] = row
+                last[key] = row
+            # Forget symbols this owner no longer subscribes to.
+            wanted = set(keys)
+            for key in [k for k in last if k not in wanted]:
+                del last[key]
+            subs = [s for s in self._subs.values() if s.owner == owner]
+            self._quotes_received += len(quotes)
+            self._changes_published += len(changed)
+        for sub in subs:
+            rows = [changed[k] for k in sub.keys if k in changed]
+            if rows or error:
+                sub._push(rows, error)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "subscribers": len(self._subs),
+                "owners": len({sub.owner for sub in self._subs.values()}),
+                "symbols": len(
+                    {k for sub in self._subs.values() for k in sub.keys}
+                ),
+                "poll_interval_sec": self.poll_interval_sec,
+                "fetch_timeout_sec": self.fetch_timeout_sec,
+                "polls": self._polls,
+                "fetch_timeouts": self._timeouts,
+                "broker_calls": self._broker_calls,
+                "quotes_received": self._quotes_received,
+                "changes_published": self._changes_published,
+                "last_poll_ms": self._last_poll_ms,
+                "last_error": self._last_error,
+            }
+
+
+_hub: QuoteHub | None = None
+_hub_lock = Lock()
+
+
+def get_quote_hub() -> QuoteHub:
+    """Return the process-wide quote hub, creating it on first use."""
+
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                settings = get_settings()
+                _hub = QuoteHub(
+                    poll_interval_sec=float(settings.quote_hub_poll_interval_sec),
+                    batch_size=int(settings.quote_hub_batch_size),
+                    fetch_timeout_sec=float(
+                        getattr(settings, "quote_hub_fetch_timeout_sec", 2.5)
+                    ),
+                )
+    return _hub
+
+
+__all__ = ["QuoteHub", "QuoteSubscription", "get_quote_hub"]
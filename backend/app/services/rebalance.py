@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.api.positions import list_holdings
 from app.core.config import Settings
-from app.models import Candle, Group, GroupMember, User
+from app.models import Group, GroupMember, User
 from app.pydantic_compat import model_to_dict
 from app.schemas.rebalance import (
     RebalancePreviewRequest,
@@ -17,6 +17,7 @@ from app.schemas.rebalance import (
     RebalancePreviewSummary,
     RebalanceTrade,
 )
+from app.services.market_data import load_latest_closes
 from app.services.rebalance_risk import derive_risk_parity_targets
 from app.services.rebalance_rotation import derive_rotation_targets
 
@@ -61,21 +62,10 @@ def _load_latest_close_prices(
     db: Session,
     pairs: Iterable[Tuple[str, str]],
 ) -> Dict[Tuple[str, str], float]:
-    out: Dict[Tuple[str, str], float] = {}
-    for symbol, exchange in pairs:
-        row: Candle | None = (
-            db.query(Candle)
-            .filter(
-                Candle.symbol == symbol,
-                Candle.exchange == exchange,
-                Candle.timeframe == "1d",
-            )
-            .order_by(Candle.ts.desc())
-            .first()
-        )
-        if row is not None and row.close and row.close > 0:
-            out[(symbol, exchange)] = float(row.close)
-    return out
+    latest = load_latest_closes(db, pairs=pairs, timeframe="1d")
+    return {
+        pair: float(close) for pair, (_ts, close) in latest.items() if close and close > 0
+    }
 
 
 @dataclass(frozen=True)
@@ -3,15 +3,32 @@ from __future__ import annotations
 import hashlib
 import json
 import math
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
+from threading import Lock
 from typing import Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.models import Candle, Group, RiskCovarianceCache, User
+from app.core.config import get_settings
+from app.models import Group, RiskCovarianceCache, User
 from app.schemas.rebalance import RebalanceRiskConfig
+from app.services import portfolio_math
+from app.services.market_data import load_recent_bars_many
+from app.services.portfolio_math import (
+    Matrix,
+    RiskParityResult,
+    correlation_matrix,
+    covariance_matrix,
+    decode_symmetric_matrix,
+    encode_symmetric_matrix,
+    ledoit_wolf_intensity,
+    risk_contribution_shares,
+    shrink_covariance,
+    volatilities,
+)
 
 
 def _norm_symbol(symbol: str) -> str:
@@ -51,32 +68,21 @@ def _json_load(raw: str, default: object) -> object:
         return default
 
 
-def _load_closes(
+def _load_closes_many(
     db: Session,
     *,
-    symbol: str,
-    exchange: str,
+    pairs: Iterable[Tuple[str, str]],
     timeframe: str,
     limit: int,
-) -> List[Tuple[datetime, float]]:
-    rows = (
-        db.query(Candle.ts, Candle.close)
-        .filter(
-            Candle.symbol == symbol,
-            Candle.exchange == exchange,
-            Candle.timeframe == timeframe,
-        )
-        .order_by(Candle.ts.desc())
-        .limit(limit)
-        .all()
-    )
-    out: list[tuple[datetime, float]] = []
-    for ts, close in rows:
-        try:
-            out.append((ts, float(close)))
-        except Exception:
-            continue
-    out.reverse()
+) -> Dict[Tuple[str, str], List[Tuple[datetime, float]]]:
+    """Last `limit` (ts, close) bars per pair, oldest first ([] when none)."""
+
+    pairs = list(pairs)
+    bars = load_recent_bars_many(db, pairs=pairs, timeframe=timeframe, limit=limit)
+    out: dict[tuple[str, str], list[tuple[datetime, float]]] = {}
+    for pair in pairs:
+        cols = bars.get(pair)
+        out[pair] = list(zip(cols.datetimes(), cols.close, strict=True)) if cols else []
     return out
 
 
@@ -138,6 +144,12 @@ def _align_returns(
 
 @dataclass(frozen=True)
 class CovarianceResult:
+    """Covariance estimate for an aligned universe.
+
+    `cov` is the (possibly shrunk) matrix the optimizer uses; `vol` and `corr`
+    describe the sample estimate. `shrinkage` is the applied intensity.
+    """
+
     pairs: List[Tuple[str, str]]
     as_of_ts: datetime
     observations: int
@@ -145,38 +157,88 @@ class CovarianceResult:
     vol: List[float]
     corr: List[List[float]]
     cache_hit: bool
+    shrinkage: float = 0.0
 
 
-def _compute_covariance(
-    returns: List[List[float]],
-) -> Tuple[List[List[float]], List[float], List[List[float]]]:
-    n = len(returns)
-    t = len(returns[0]) if n else 0
-    if n == 0 or t <= 1:
+_CovKey = Tuple[str, str, int, datetime]
+_CovEntry = Tuple[List[Tuple[str, str]], int, Matrix]
+
+_lru: "OrderedDict[_CovKey, _CovEntry]" = OrderedDict()
+_lru_lock = Lock()
+
+
+def _lru_get(key: _CovKey) -> _CovEntry | None:
+    with _lru_lock:
+        entry = _lru.get(key)
+        if entry is not None:
+            _lru.move_to_end(key)
+        return entry
+
+
+def _lru_put(key: _CovKey, entry: _CovEntry) -> None:
+    limit = int(getattr(get_settings(), "risk_covariance_lru_entries", 32) or 0)
+    if limit <= 0:
+        return
+    with _lru_lock:
+        _lru[key] = entry
+        _lru.move_to_end(key)
+        while len(_lru) > limit:
+            _lru.popitem(last=False)
+
+
+def clear_covariance_lru() -> None:
+    with _lru_lock:
+        _lru.clear()
+
+
+def _compute_covariance(returns: List[List[float]]) -> Matrix:
+    try:
+        return covariance_matrix(returns)
+    except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Insufficient returns to compute covariance.",
-        )
+            detail=str(exc),
+        ) from exc
 
-    means = [sum(r) / t for r in returns]
 
-    cov = [[0.0 for _ in range(n)] for _ in range(n)]
-    for i in range(n):
-        for j in range(i, n):
-            s = 0.0
-            for k in range(t):
-                s += (returns[i][k] - means[i]) * (returns[j][k] - means[j])
-            v = s / float(t - 1)
-            cov[i][j] = v
-            cov[j][i] = v
+def _decode_cached_row(row: RiskCovarianceCache) -> _CovEntry | None:
+    symbols = _json_load(row.symbols_json, [])
+    if not isinstance(symbols, list):
+        return None
+    try:
+        pairs = [
+            (str(x.get("symbol")), str(x.get("exchange")))
+            for x in symbols
+            if isinstance(x, dict)
+        ]
+        if row.cov_blob:
+            cov = decode_symmetric_matrix(bytes(row.cov_blob))
+        else:
+            raw = _json_load(row.cov_json, [])
+            if not isinstance(raw, list):
+                return None
+            cov = [[float(v) for v in r] for r in raw]
+    except Exception:
+        return None
+    if not pairs or not cov or len(cov) != len(pairs):
+        return None
+    return pairs, int(row.observations or 0), cov
 
-    vol = [math.sqrt(max(0.0, cov[i][i])) for i in range(n)]
-    corr = [[0.0 for _ in range(n)] for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            denom = (vol[i] * vol[j]) if vol[i] > 0 and vol[j] > 0 else 0.0
-            corr[i][j] = cov[i][j] / denom if denom else (1.0 if i == j else 0.0)
-    return cov, vol, corr
+
+def _shrinkage_intensity(
+    cfg: RebalanceRiskConfig,
+    returns: List[List[float]],
+    cov: Matrix,
+) -> float:
+    method = getattr(cfg, "shrinkage", "none") or "none"
+    explicit = getattr(cfg, "shrinkage_intensity", None)
+    if method == "none":
+        return 0.0
+    if explicit is not None:
+        return float(explicit)
+    if method == "ledoit_wolf":
+        return ledoit_wolf_intensity(returns, cov)
+    return 0.1
 
 
 def get_or_compute_covariance(
@@ -201,169 +263,79 @@ def get_or_compute_covariance(
     uhash = _universe_hash(pairs)
     limit = window_days + 1
 
-    series_by_pair: dict[tuple[str, str], list[tuple[datetime, float]]] = {}
-    for sym, exch in pairs:
-        symbol = _norm_symbol(sym)
-        exchange = _norm_exchange(exch)
-        if not symbol:
-            continue
-        series_by_pair[(symbol, exchange)] = _load_closes(
-            db,
-            symbol=symbol,
-            exchange=exchange,
-            timeframe=cfg.timeframe,
-            limit=limit,
-        )
+    normalized = [(_norm_symbol(sym), _norm_exchange(exch)) for sym, exch in pairs]
+    series_by_pair = _load_closes_many(
+        db,
+        pairs=[(sym, exch) for sym, exch in normalized if sym],
+        timeframe=cfg.timeframe,
+        limit=limit,
+    )
 
     aligned_pairs, returns, as_of_ts = _align_returns(
         series_by_pair,
         min_observations=min_obs,
     )
 
-    cached: RiskCovarianceCache | None = (
-        db.query(RiskCovarianceCache)
-        .filter(
-            RiskCovarianceCache.universe_hash == uhash,
-            RiskCovarianceCache.timeframe == cfg.timeframe,
-            RiskCovarianceCache.window_days == window_days,
-            RiskCovarianceCache.as_of_ts == as_of_ts,
+    key: _CovKey = (uhash, cfg.timeframe, window_days, as_of_ts)
+    entry = _lru_get(key)
+    cache_hit = entry is not None
+    if entry is None:
+        cached: RiskCovarianceCache | None = (
+            db.query(RiskCovarianceCache)
+            .filter(
+                RiskCovarianceCache.universe_hash == uhash,
+                RiskCovarianceCache.timeframe == cfg.timeframe,
+                RiskCovarianceCache.window_days == window_days,
+                RiskCovarianceCache.as_of_ts == as_of_ts,
+            )
+            .one_or_none()
         )
-        .one_or_none()
-    )
-    if cached is not None:
-        symbols = _json_load(cached.symbols_json, [])
-        cov = _json_load(cached.cov_json, [])
-        vol = _json_load(cached.vol_json, [])
-        corr = _json_load(cached.corr_json, [])
-        if (
-            isinstance(symbols, list)
-            and isinstance(cov, list)
-            and isinstance(vol, list)
-            and isinstance(corr, list)
-        ):
-            try:
-                parsed_pairs = [
-                    (str(x.get("symbol")), str(x.get("exchange")))
-                    for x in symbols
-                    if isinstance(x, dict)
-                ]
-                parsed_cov = [[float(v) for v in row] for row in cov]
-                parsed_vol = [float(v) for v in vol]
-                parsed_corr = [[float(v) for v in row] for row in corr]
-                if parsed_pairs and parsed_cov and parsed_vol and parsed_corr:
-                    return CovarianceResult(
-                        pairs=parsed_pairs,
-                        as_of_ts=as_of_ts,
-                        observations=int(cached.observations or 0),
-                        cov=parsed_cov,
-                        vol=parsed_vol,
-                        corr=parsed_corr,
-                        cache_hit=True,
-                    )
-            except Exception:
-                # fall through to recompute
-                pass
-
-    cov, vol, corr = _compute_covariance(returns)
-    symbols_json = [{"symbol": s, "exchange": e} for s, e in aligned_pairs if s and e]
-
-    row = RiskCovarianceCache(
-        universe_hash=uhash,
-        timeframe=cfg.timeframe,
-        window_days=window_days,
-        as_of_ts=as_of_ts,
-        symbols_json=_json_dump(symbols_json),
-        cov_json=_json_dump(cov),
-        vol_json=_json_dump(vol),
-        corr_json=_json_dump(corr),
-        observations=len(returns[0]) if returns else 0,
+        if cached is not None:
+            entry = _decode_cached_row(cached)
+            cache_hit = entry is not None
+
+    if entry is None:
+        cov = _compute_covariance(returns)
+        observations = len(returns[0]) if returns else 0
+        symbols_json = [
+            {"symbol": s, "exchange": e} for s, e in aligned_pairs if s and e
+        ]
+        row = RiskCovarianceCache(
+            universe_hash=uhash,
+            timeframe=cfg.timeframe,
+            window_days=window_days,
+            as_of_ts=as_of_ts,
+            symbols_json=_json_dump(symbols_json),
+            cov_blob=encode_symmetric_matrix(cov),
+            observations=observations,
+        )
+        db.add(row)
+        db.commit()
+        entry = (aligned_pairs, observations, cov)
+    _lru_put(key, entry)
+
+    cached_pairs, observations, sample_cov = entry
+    vol = volatilities(sample_cov)
+    corr = correlation_matrix(sample_cov, vol)
+    intensity = _shrinkage_intensity(cfg, returns, sample_cov)
+    cov = shrink_covariance(
+        sample_cov,
+        method=getattr(cfg, "shrinkage", "none") or "none",
+        intensity=intensity,
     )
-    db.add(row)
-    db.commit()
 
     return CovarianceResult(
-        pairs=aligned_pairs,
+        pairs=list(cached_pairs),
         as_of_ts=as_of_ts,
-        observations=len(returns[0]) if returns else 0,
+        observations=observations,
         cov=cov,
         vol=vol,
         corr=corr,
-        cache_hit=False,
+        cache_hit=cache_hit,
+        shrinkage=float(intensity),
     )
 
 
-def _mat_vec(cov: List[List[float]], w: List[float]) -> List[float]:
-    n = len(w)
-    out = [0.0 for _ in range(n)]
-    for i in range(n):
-        s = 0.0
-        row = cov[i]
-        for j in range(n):
-            s += row[j] * w[j]
-        out[i] = s
-    return out
-
-
-def _project_simplex_bounds(
-    w: List[float],
-    *,
-    min_w: float,
-    max_w: float,
-) -> List[float]:
-    n = len(w)
-    if n == 0:
-        return []
-    if min_w * n > 1.0 + 1e-12:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="min_weight is too high for the number of assets.",
-        )
-    if max_w * n < 1.0 - 1e-12:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="max_weight is too low for the number of assets.",
-        )
-
-    w2 = [float(x) if math.isfinite(float(x)) else 0.0 for x in w]
-    w2 = [max(min(x, max_w), min_w) for x in w2]
-
-    eps = 1e-12
-    for _ in range(200):
-        total = sum(w2)
-        if abs(total - 1.0) <= 1e-12:
-            break
-        if total < 1.0:
-            add = 1.0 - total
-            free = [i for i in range(n) if w2[i] < (max_w - eps)]
-            if not free:
-                break
-            weights = [max(w2[i], eps) for i in free]
-            denom = sum(weights) or float(len(free))
-            for i, base in zip(free, weights, strict=False):
-                w2[i] = min(max_w, w2[i] + add * (base / denom))
-        else:
-            sub = total - 1.0
-            free = [i for i in range(n) if w2[i] > (min_w + eps)]
-            if not free:
-                break
-            weights = [max(w2[i] - min_w, eps) for i in free]
-            denom = sum(weights) or float(len(free))
-            for i, base in zip(free, weights, strict=False):
-                w2[i] = max(min_w, w2[i] - sub * (base / denom))
-
-    total = sum(w2) or 1.0
-    w2 = [x / total for x in w2]
-    return w2
-
-
-@dataclass(frozen=True)
-class RiskParityResult:
-    weights: List[float]
-    converged: bool
-    iterations: int
-    max_rc_error: float
-
-
 def solve_risk_parity_erc(
     cov: List[List[float]],
     *,
@@ -372,47 +344,19 @@ def solve_risk_parity_erc(
     max_iter: int,
     tol: float,
 ) -> RiskParityResult:
-    n = len(cov)
-    if n == 0:
+    try:
+        return portfolio_math.solve_risk_parity_erc(
+            cov,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            max_iter=max_iter,
+            tol=tol,
+        )
+    except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No assets for risk parity.",
-        )
-
-    w = [1.0 / n for _ in range(n)]
-    w = _project_simplex_bounds(w, min_w=min_weight, max_w=max_weight)
-    target_share = 1.0 / n
-
-    converged = False
-    max_err = 1.0
-    iterations = 0
-    for _it in range(1, max_iter + 1):
-        iterations = _it
-        m = _mat_vec(cov, w)
-        rc = [w[i] * m[i] for i in range(n)]
-        total = sum(rc)
-        if total <= 0 or not math.isfinite(total):
-            break
-        shares = [r / total for r in rc]
-        max_err = max(abs(s - target_share) for s in shares)
-        if max_err <= tol:
-            converged = True
-            break
-
-        for i in range(n):
-            s = shares[i]
-            if s > 0:
-                w[i] *= target_share / s
-            else:
-                w[i] *= 1.1
-        w = _project_simplex_bounds(w, min_w=min_weight, max_w=max_weight)
-
-    return RiskParityResult(
-        weights=w,
-        converged=converged,
-        iterations=iterations,
-        max_rc_error=float(max_err),
-    )
+            detail=str(exc),
+        ) from exc
 
 
 @dataclass(frozen=True)
@@ -452,10 +396,7 @@ def derive_risk_parity_targets(
     )
 
     w = rp.weights
-    m = _mat_vec(cov_res.cov, w)
-    rc = [w[i] * m[i] for i in range(len(w))]
-    total_rc = sum(rc) or 1.0
-    rc_share = [r / total_rc for r in rc]
+    rc_share = risk_contribution_shares(cov_res.cov, w)
 
     ann_factor = math.sqrt(252.0)
     derived: list[dict[str, object]] = []
@@ -487,11 +428,18 @@ def derive_risk_parity_targets(
                     "timeframe": cfg.timeframe,
                     "min_weight": float(cfg.min_weight),
                     "max_weight": float(cfg.max_weight),
+                    "shrinkage": cfg.shrinkage,
+                    "shrinkage_intensity": float(cov_res.shrinkage),
                 },
             }
         )
 
     warnings: list[str] = []
+    if cov_res.observations <= len(cov_res.pairs) and cov_res.shrinkage <= 0:
+        warnings.append(
+            "Fewer observations than symbols: the sample covariance is singular; "
+            "consider covariance shrinkage."
+        )
     if not rp.converged:
         warnings.append(
             "Risk parity optimizer did not fully converge; weights are approximate."
@@ -507,6 +455,7 @@ __all__ = [
     "CovarianceResult",
     "RiskParityResult",
     "RiskTargetsDerivation",
+    "clear_covariance_lru",
     "derive_risk_parity_targets",
     "get_or_compute_covariance",
     "solve_risk_parity_erc",
@@ -9,7 +9,6 @@ from sqlalchemy.orm import Session
 
 from app.core.config import Settings
 from app.models import (
-    Candle,
     Group,
     GroupMember,
     ScreenerRun,
@@ -28,6 +27,7 @@ from app.services.alerts_v3_expression import (
     IndicatorAlertError,
     _eval_numeric,
 )
+from app.services.market_data import load_latest_closes, load_recent_bars_many
 from app.services.signal_strategies import (
     load_inputs,
     load_outputs,
@@ -84,49 +84,20 @@ def _load_latest_close_prices(
     db: Session,
     pairs: Iterable[Tuple[str, str]],
 ) -> Dict[Tuple[str, str], float]:
-    out: Dict[Tuple[str, str], float] = {}
-    for symbol, exchange in pairs:
-        row: Candle | None = (
-            db.query(Candle)
-            .filter(
-                Candle.symbol == symbol,
-                Candle.exchange == exchange,
-                Candle.timeframe == "1d",
-            )
-            .order_by(Candle.ts.desc())
-            .first()
-        )
-        if row is not None and row.close and row.close > 0:
-            out[(symbol, exchange)] = float(row.close)
-    return out
+    latest = load_latest_closes(db, pairs=pairs, timeframe="1d")
+    return {
+        pair: float(close) for pair, (_ts, close) in latest.items() if close and close > 0
+    }
 
 
-def _avg_volume_20d(
+def _avg_volumes_20d(
     db: Session,
-    *,
-    symbol: str,
-    exchange: str,
-) -> Optional[float]:
-    rows = (
-        db.query(Candle.volume)
-        .filter(
-            Candle.symbol == symbol,
-            Candle.exchange == exchange,
-            Candle.timeframe == "1d",
-        )
-        .order_by(Candle.ts.desc())
-        .limit(20)
-        .all()
-    )
-    vols = []
-    for (v,) in rows:
-        try:
-            vols.append(float(v))
-        except Exception:
-            continue
-    if not vols:
-        return None
-    return float(sum(vols) / len(vols))
+    pairs: Iterable[Tuple[str, str]],
+) -> Dict[Tuple[str, str], float]:
+    bars = load_recent_bars_many(db, pairs=pairs, timeframe="1d", limit=20)
+    return {
+        pair: float(sum(cols.volume) / len(cols)) for pair, cols in bars.items() if len(cols)
+    }
 
 
 @dataclass(frozen=True)
@@ -293,6 +264,9 @@ def derive_rotation_targets(
     price_map: dict[tuple[str, str], float] = {}
     if cfg.min_price is not None and cfg.min_price > 0:
         price_map = _load_latest_close_prices(db, candidates)
+    volume_map: dict[tuple[str, str], float] = {}
+    if cfg.min_avg_volume_20d is not None and cfg.min_avg_volume_20d > 0:
+        volume_map = _avg_volumes_20d(db, candidates)
 
     eligible: list[tuple[str, str, float]] = []
     for symbol, exchange in candidates:
@@ -302,7 +276,7 @@ def derive_rotation_targets(
                 continue
 
         if cfg.min_avg_volume_20d is not None and cfg.min_avg_volume_20d > 0:
-            avg_vol = _avg_volume_20d(db, symbol=symbol, exchange=exchange)
+            avg_vol = volume_map.get((symbol, exchange))
             if avg_vol is None or avg_vol < float(cfg.min_avg_volume_20d):
                 continue
 
@@ -26,7 +26,11 @@ from app.services.risk_engine import (
     drawdown_state,
     resolve_drawdown_config,
 )
-from app.services.risk_unified_store import get_source_override, read_unified_risk_global
+from app.services.risk_unified_store import (
+    UnifiedRiskGlobal,
+    get_source_override,
+    read_unified_risk_global,
+)
 
 ProvSource = Literal["global", "profile", "source_override", "computed", "default", "unknown"]
 
@@ -97,13 +101,17 @@ def compile_risk_policy(
     scenario: DrawdownState | None = None,
     symbol: str | None = None,
     strategy_id: str | None = None,
+    risk_global: UnifiedRiskGlobal | None = None,
 ) -> dict[str, Any]:
-    """UI-facing "Effective Risk Summary" for the unified risk system."""
+    """UI-facing "Effective Risk Summary" for the unified risk system.
+
+    `risk_global` lets the execute path pass the snapshot it already read.
+    """
 
     now_utc = datetime.now(UTC)
     _ensure_bootstrap_rows(db)
 
-    g = read_unified_risk_global(db)
+    g = risk_global if risk_global is not None else read_unified_risk_global(db)
     baseline_equity = float(g.baseline_equity_inr or 0.0)
 
     # Select the default enabled profile for this product.
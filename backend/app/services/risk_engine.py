@@ -24,8 +24,11 @@ from app.models import (
     SymbolRiskCategory,
     User,
 )
+from app.services.config_cache import cached_config
 from app.services.market_data import load_series
+from app.services.risk_pnl_state import get_pnl_state, pnl_for_day
 from app.services.risk_unified_store import get_source_override
+from app.services.system_events import record_audit_row
 
 logger = logging.getLogger(__name__)
 
@@ -224,31 +227,34 @@ def _ensure_bootstrap_rows(db: Session) -> None:
             pass
 
     # Drawdown thresholds (defaults to 0 => no drawdown gating). Seed app-wide rows.
+    # One lookup for all pairs, and no commit when nothing is missing: this runs on
+    # every order execute.
     try:
-        for prod in ("CNC", "MIS"):
-            for cat in ("LC", "MC", "SC", "ETF"):
-                exists = (
-                    db.query(DrawdownThreshold.id)
-                    .filter(
-                        DrawdownThreshold.user_id.is_(None),
-                        DrawdownThreshold.product == prod,
-                        DrawdownThreshold.category == cat,
-                    )
-                    .first()
-                    is not None
+        existing = {
+            (str(prod), str(cat))
+            for prod, cat in db.query(
+                DrawdownThreshold.product, DrawdownThreshold.category
+            ).filter(DrawdownThreshold.user_id.is_(None))
+        }
+        missing = [
+            (prod, cat)
+            for prod in ("CNC", "MIS")
+            for cat in ("LC", "MC", "SC", "ETF")
+            if (prod, cat) not in existing
+        ]
+        for prod, cat in missing:
+            db.add(
+                DrawdownThreshold(
+                    user_id=None,
+                    product=prod,
+                    category=cat,
+                    caution_pct=0.0,
+                    defense_pct=0.0,
+                    hard_stop_pct=0.0,
                 )
-                if not exists:
-                    db.add(
-                        DrawdownThreshold(
-                            user_id=None,
-                            product=prod,
-                            category=cat,
-                            caution_pct=0.0,
-                            defense_pct=0.0,
-                            hard_stop_pct=0.0,
-                        )
-                    )
-        db.commit()
+            )
+        if missing:
+            db.commit()
     except IntegrityError:
         db.rollback()
     except Exception:
@@ -337,6 +343,24 @@ def pick_risk_profile(
 ) -> RiskProfile | None:
     hint = (product_hint or "").strip().upper()
     product = "MIS" if hint == "MIS" else "CNC" if hint == "CNC" else None
+
+    # The chosen profile id is cached per product; the row itself is a
+    # primary-key load (usually an identity-map hit) in the caller's session.
+    def _pick_id() -> int | None:
+        row = _select_risk_profile(db, product=product)
+        return int(row.id) if row is not None else None
+
+    profile_id = cached_config("risk", ("profile", product), _pick_id)
+    if profile_id is None:
+        return None
+    row = db.get(RiskProfile, profile_id)
+    if row is None or not bool(row.enabled):
+        # Changed by another process since the last version poll.
+        return _select_risk_profile(db, product=product)
+    return row
+
+
+def _select_risk_profile(db: Session, *, product: str | None) -> RiskProfile | None:
     if product is None:
         # No hint: prefer any enabled default profile (CNC first).
         for p in ("CNC", "MIS"):
@@ -459,31 +483,21 @@ def compute_portfolio_pnl_state(
             consecutive_losses=0,
         )
 
-    query = db.query(AnalyticsTrade).join(Order, AnalyticsTrade.entry_order_id == Order.id)
-    if user_id is not None:
-        query = query.filter((Order.user_id == user_id) | (Order.user_id.is_(None)))
-    trades = query.order_by(AnalyticsTrade.closed_at.asc()).all()
-
+    # Cumulative/peak/streak come from the persisted running state (one row
+    # lookup); see services/risk_pnl_state.py.
+    state = get_pnl_state(db, user_id=user_id)
     start_day, end_day = _day_bounds_ist(now_utc)
-    pnl_today = 0.0
-    cumulative = 0.0
-    peak_cum = 0.0
-
-    for t in trades:
-        pnl = float(t.pnl or 0.0)
-        cumulative += pnl
-        if cumulative > peak_cum:
-            peak_cum = cumulative
-        if t.closed_at >= start_day and t.closed_at < end_day:
-            pnl_today += pnl
-
-    streak = 0
-    for t in reversed(trades):
-        pnl = float(t.pnl or 0.0)
-        if pnl < 0:
-            streak += 1
-        else:
-            break
+    pnl_today = pnl_for_day(
+        db,
+        state,
+        user_id=user_id,
+        day=_as_of_date_ist(now_utc),
+        start_utc=start_day,
+        end_utc=end_day,
+    )
+    cumulative = float(state.cumulative_pnl or 0.0)
+    peak_cum = float(state.peak_cumulative_pnl or 0.0)
+    streak = int(state.loss_streak or 0)
 
     equity = base + cumulative
     peak_equity = max(base, base + peak_cum)
@@ -1716,7 +1730,7 @@ def record_decision_log(
         elif alert is not None and alert.price is not None:
             trigger_price = float(alert.price)
 
-        log = AlertDecisionLog(
+        values = dict(
             user_id=user_id,
             alert_id=(alert.id if alert is not None else None),
             order_id=(order.id if order is not None else None),
@@ -1744,8 +1758,7 @@ def record_decision_log(
                 default=str,
             ),
         )
-        db.add(log)
-        db.commit()
+        record_audit_row(db, AlertDecisionLog, values)
     except Exception as exc:
         logger.warning("Failed to record alert decision log: %s", exc)
 
@@ -0,0 +1,392 @@
+"""Persisted running P&L state for the pre-trade drawdown check.
+
+`compute_portfolio_pnl_state` used to load every `AnalyticsTrade` and replay
+the cumulative/peak/streak calculation on each risk decision, so order
+checks got slower as trade history grew. The replay result is now stored per
+scope in `risk_pnl_state` and kept current incrementally:
+
+- `rebuild_trades` appends its new trades to every existing state row via
+  `apply_new_trades` in the same transaction;
+- a new trade that closes before a state's latest trade (out-of-order
+  history) drops that state row;
+- any other ORM or bulk write to trades (and deletes or owner changes of
+  orders) drops all state rows, since it may change any scope's history;
+- a missing row is rebuilt from a full replay on the next lookup.
+
+A risk decision therefore costs one row lookup. `check_pnl_state` compares a
+stored row against a full replay and is the parity harness used by tests.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from threading import Lock
+from typing import Any, Iterator, Sequence
+
+from sqlalchemy import delete, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from app.models import AnalyticsTrade, Order, RiskPnlState
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+_STALE_INFO_KEY = "risk_pnl_state_stale"
+_MAINTAINED_INFO_KEY = "risk_pnl_state_maintained"
+
+_stats_lock = Lock()
+_stats = {
+    "lookups": 0,
+    "rebuilds": 0,
+    "incremental_updates": 0,
+    "trades_applied": 0,
+    "invalidations": 0,
+    "day_fallbacks": 0,
+}
+
+
+def _bump(**deltas: int) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=UTC) if ts.tzinfo is None else ts.astimezone(UTC)
+
+
+def _ist_date(ts: datetime) -> date:
+    return (_as_utc(ts) + IST_OFFSET).date()
+
+
+def scope_for_user(user_id: int | None) -> str:
+    return "all" if user_id is None else f"user:{int(user_id)}"
+
+
+def _user_id_for_scope(scope: str) -> int | None:
+    return None if scope == "all" else int(scope.split(":", 1)[1])
+
+
+@dataclass
+class PnlAccumulator:
+    """Running cumulative/peak/streak/day P&L over trades in close order."""
+
+    trade_count: int = 0
+    cumulative_pnl: float = 0.0
+    peak_cumulative_pnl: float = 0.0
+    loss_streak: int = 0
+    last_trade_id: int | None = None
+    last_closed_at: datetime | None = None
+    last_day: date | None = None
+    last_day_pnl: float = 0.0
+
+    @classmethod
+    def from_row(cls, row: RiskPnlState) -> "PnlAccumulator":
+        return cls(
+            trade_count=int(row.trade_count or 0),
+            cumulative_pnl=float(row.cumulative_pnl or 0.0),
+            peak_cumulative_pnl=float(row.peak_cumulative_pnl or 0.0),
+            loss_streak=int(row.loss_streak or 0),
+            last_trade_id=row.last_trade_id,
+            last_closed_at=row.last_closed_at,
+            last_day=row.last_day,
+            last_day_pnl=float(row.last_day_pnl or 0.0),
+        )
+
+    def follows(self, trade_id: int, closed_at: datetime) -> bool:
+        """Return True when the trade sorts after everything applied so far."""
+
+        if self.last_closed_at is None:
+            return True
+        last = _as_utc(self.last_closed_at)
+        cur = _as_utc(closed_at)
+        return cur > last or (cur == last and int(trade_id) > int(self.last_trade_id or 0))
+
+    def apply(self, trade_id: int, closed_at: datetime, pnl: float) -> None:
+        pnl = float(pnl or 0.0)
+        self.trade_count += 1
+        self.cumulative_pnl += pnl
+        if self.cumulative_pnl > self.peak_cumulative_pnl:
+            self.peak_cumulative_pnl = self.cumulative_pnl
+        self.loss_streak = self.loss_streak + 1 if pnl < 0 else 0
+        day = _ist_date(closed_at)
+        if day == self.last_day:
+            self.last_day_pnl += pnl
+        else:
+            self.last_day = day
+            self.last_day_pnl = pnl
+        self.last_trade_id = int(trade_id)
+        self.last_closed_at = _as_utc(closed_at)
+
+    def write_to(self, row: RiskPnlState) -> None:
+        row.trade_count = self.trade_count
+        row.cumulative_pnl = self.cumulative_pnl
+        row.peak_cumulative_pnl = self.peak_cumulative_pnl
+        row.loss_streak = self.loss_streak
+        row.last_trade_id = self.last_trade_id
+        row.last_closed_at = self.last_closed_at
+        row.last_day = self.last_day
+        row.last_day_pnl = self.last_day_pnl
+
+
+def _scoped_trades_query(db: Session, user_id: int | None):  # type: ignore[no-untyped-def]
+    query = db.query(AnalyticsTrade.id, AnalyticsTrade.closed_at, AnalyticsTrade.pnl).join(
+        Order, AnalyticsTrade.entry_order_id == Order.id
+    )
+    if user_id is not None:
+        query = query.filter((Order.user_id == user_id) | (Order.user_id.is_(None)))
+    return query
+
+
+def replay_pnl(db: Session, *, user_id: int | None) -> PnlAccumulator:
+    """Full replay of the scope's trade history (the pre-state behaviour)."""
+
+    acc = PnlAccumulator()
+    rows = (
+        _scoped_trades_query(db, user_id)
+        .order_by(AnalyticsTrade.closed_at.asc(), AnalyticsTrade.id.asc())
+        .all()
+    )
+    for trade_id, closed_at, pnl in rows:
+        acc.apply(trade_id, closed_at, pnl)
+    return acc
+
+
+def rebuild_pnl_state(db: Session, *, user_id: int | None) -> RiskPnlState:
+    """Recompute a scope's state from its full history and store it.
+
+    If another session stores the same scope concurrently, the computed
+    (unsaved) row is returned instead.
+    """
+
+    scope = scope_for_user(user_id)
+    acc = replay_pnl(db, user_id=user_id)
+    _bump(rebuilds=1)
+    row = db.query(RiskPnlState).filter(RiskPnlState.scope == scope).one_or_none()
+    if row is not None:
+        acc.write_to(row)
+        db.flush()
+        db.info.pop(_STALE_INFO_KEY, None)
+        return row
+    row = RiskPnlState(scope=scope)
+    acc.write_to(row)
+    try:
+        with db.begin_nested():
+            db.add(row)
+            db.flush()
+    except IntegrityError:
+        transient = RiskPnlState(scope=scope)
+        acc.write_to(transient)
+        return transient
+    # A row written after an invalidation is current again; later writes in
+    # this transaction must be able to invalidate it.
+    db.info.pop(_STALE_INFO_KEY, None)
+    return row
+
+
+def get_pnl_state(db: Session, *, user_id: int | None) -> RiskPnlState:
+    """Return the scope's running state, rebuilding it when missing."""
+
+    _bump(lookups=1)
+    row = (
+        db.query(RiskPnlState)
+        .filter(RiskPnlState.scope == scope_for_user(user_id))
+        .one_or_none()
+    )
+    if row is not None:
+        return row
+    return rebuild_pnl_state(db, user_id=user_id)
+
+
+def pnl_for_day(
+    db: Session,
+    state: RiskPnlState,
+    *,
+    user_id: int | None,
+    day: date,
+    start_utc: datetime,
+    end_utc: datetime,
+) -> float:
+    """Realized P&L of the scope on IST `day` (bounds given in UTC)."""
+
+    if state.last_day is None or day > state.last_day:
+        return 0.0
+    if day == state.last_day:
+        return float(state.last_day_pnl or 0.0)
+    # Looking back at an earlier day: sum just that day's trades.
+    _bump(day_fallbacks=1)
+    rows = (
+        _scoped_trades_query(db, user_id)
+        .filter(AnalyticsTrade.closed_at >= start_utc, AnalyticsTrade.closed_at < end_utc)
+        .order_by(AnalyticsTrade.closed_at.asc(), AnalyticsTrade.id.asc())
+        .all()
+    )
+    total = 0.0
+    for _trade_id, _closed_at, pnl in rows:
+        total += float(pnl or 0.0)
+    return total
+
+
+def apply_new_trades(db: Session, trades: Sequence[AnalyticsTrade]) -> None:
+    """Append freshly inserted (flushed) trades to every stored state row."""
+
+    if not trades:
+        return
+    states = db.query(RiskPnlState).all()
+    if not states:
+        return
+    entry_ids = {int(t.entry_order_id) for t in trades}
+    owners = dict(
+        db.query(Order.id, Order.user_id).filter(Order.id.in_(entry_ids)).all()
+    )
+    ordered = sorted(trades, key=lambda t: (_as_utc(t.closed_at), int(t.id)))
+    applied = 0
+    for row in states:
+        scope_user = _user_id_for_scope(row.scope)
+        mine = [
+            t
+            for t in ordered
+            if int(t.entry_order_id) in owners
+            and (
+                scope_user is None
+                or owners[int(t.entry_order_id)] is None
+                or int(owners[int(t.entry_order_id)]) == scope_user
+            )
+        ]
+        if not mine:
+            continue
+        acc = PnlAccumulator.from_row(row)
+        if not acc.follows(int(mine[0].id), mine[0].closed_at):
+            # History was extended in the past; rebuild on next lookup.
+            db.delete(row)
+            _bump(invalidations=1)
+            continue
+        for t in mine:
+            acc.apply(int(t.id), t.closed_at, t.pnl)
+        acc.write_to(row)
+        applied += len(mine)
+    db.flush()
+    _bump(incremental_updates=1, trades_applied=applied)
+
+
+def check_pnl_state(db: Session, *, user_id: int | None) -> dict[str, Any]:
+    """Compare the stored state of a scope with a full replay."""
+
+    scope = scope_for_user(user_id)
+    row = db.query(RiskPnlState).filter(RiskPnlState.scope == scope).one_or_none()
+    expected = replay_pnl(db, user_id=user_id)
+    if row is None:
+        return {"scope": scope, "stored": False, "ok": True, "mismatches": []}
+    stored = PnlAccumulator.from_row(row)
+    mismatches: list[str] = []
+    for field in (
+        "trade_count",
+        "loss_streak",
+        "last_trade_id",
+        "last_day",
+    ):
+        if getattr(stored, field) != getattr(expected, field):
+            mismatches.append(field)
+    for field in ("cumulative_pnl", "peak_cumulative_pnl", "last_day_pnl"):
+        if abs(getattr(stored, field) - getattr(expected, field)) > 1e-6:
+            mismatches.append(field)
+    return {"scope": scope, "stored": True, "ok": not mismatches, "mismatches": mismatches}
+
+
+def invalidate_pnl_state(db: Session) -> None:
+    """Drop all stored states; each is rebuilt on its next lookup."""
+
+    db.execute(delete(RiskPnlState.__table__))
+    _bump(invalidations=1)
+
+
+def get_pnl_state_stats() -> dict[str, Any]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+@contextmanager
+def maintained_trade_writes(db: Session) -> Iterator[Session]:
+    """Mark trade inserts in the block as maintained by the caller.
+
+    Inside the block, ORM inserts of `AnalyticsTrade` do not invalidate the
+    stored states; the caller must pass the new rows to `apply_new_trades`.
+    """
+
+    db.info[_MAINTAINED_INFO_KEY] = True
+    try:
+        yield db
+    finally:
+        db.info.pop(_MAINTAINED_INFO_KEY, None)
+
+
+def _invalidate_from_connection(session: Session | None, connection) -> None:  # type: ignore[no-untyped-def]
+    if session is None:
+        return
+    if session.info.get(_STALE_INFO_KEY):
+        return
+    session.info[_STALE_INFO_KEY] = True
+    connection.execute(delete(RiskPnlState.__table__))
+    _bump(invalidations=1)
+
+
+# Trade or ownership changes made outside `rebuild_trades` cannot be applied
+# incrementally; drop the stored states (once per transaction) so the next
+# lookup replays the full history.
+@event.listens_for(AnalyticsTrade, "after_insert")
+def _invalidate_on_trade_insert(_mapper, connection, target: AnalyticsTrade) -> None:
+    session = object_session(target)
+    if session is not None and session.info.get(_MAINTAINED_INFO_KEY):
+        return
+    _invalidate_from_connection(session, connection)
+
+
+@event.listens_for(AnalyticsTrade, "after_update")
+@event.listens_for(AnalyticsTrade, "after_delete")
+@event.listens_for(Order, "after_delete")
+def _invalidate_on_history_change(_mapper, connection, target: Any) -> None:
+    _invalidate_from_connection(object_session(target), connection)
+
+
+@event.listens_for(Order, "after_update")
+def _invalidate_on_order_owner_change(_mapper, connection, target: Order) -> None:
+    if not inspect(target).attrs.user_id.history.has_changes():
+        return
+    _invalidate_from_connection(object_session(target), connection)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state) -> None:  # type: ignore[no-untyped-def]
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (AnalyticsTrade, Order):
+        return
+    session = orm_execute_state.session
+    if session.info.get(_STALE_INFO_KEY):
+        return
+    session.info[_STALE_INFO_KEY] = True
+    session.execute(delete(RiskPnlState.__table__))
+    _bump(invalidations=1)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_stale_pnl_state(session: Session) -> None:
+    session.info.pop(_STALE_INFO_KEY, None)
+
+
+__all__ = [
+    "PnlAccumulator",
+    "apply_new_trades",
+    "check_pnl_state",
+    "get_pnl_state",
+    "get_pnl_state_stats",
+    "invalidate_pnl_state",
+    "maintained_trade_writes",
+    "pnl_for_day",
+    "rebuild_pnl_state",
+    "replay_pnl",
+    "scope_for_user",
+]
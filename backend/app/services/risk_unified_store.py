@@ -6,6 +6,7 @@ from typing import Literal
 from sqlalchemy.orm import Session
 
 from app.models import RiskGlobalConfig, RiskSourceOverride
+from app.services.config_cache import cached_config
 
 RiskSourceBucket = Literal["TRADINGVIEW", "SIGMATRADER", "MANUAL"]
 RiskProduct = Literal["CNC", "MIS"]
@@ -37,13 +38,16 @@ def get_or_create_risk_global_config(db: Session) -> RiskGlobalConfig:
 
 
 def read_unified_risk_global(db: Session) -> UnifiedRiskGlobal:
-    row = get_or_create_risk_global_config(db)
-    return UnifiedRiskGlobal(
-        enabled=bool(row.enabled),
-        manual_override_enabled=bool(row.manual_override_enabled),
-        baseline_equity_inr=float(row.baseline_equity_inr or 0.0),
-        no_trade_rules=str(getattr(row, "no_trade_rules", "") or ""),
-    )
+    def _load() -> UnifiedRiskGlobal:
+        row = get_or_create_risk_global_config(db)
+        return UnifiedRiskGlobal(
+            enabled=bool(row.enabled),
+            manual_override_enabled=bool(row.manual_override_enabled),
+            baseline_equity_inr=float(row.baseline_equity_inr or 0.0),
+            no_trade_rules=str(getattr(row, "no_trade_rules", "") or ""),
+        )
+
+    return cached_config("risk", "global", _load)
 
 
 def upsert_unified_risk_global(
@@ -0,0 +1,462 @@
+"""Cooperative scheduler for the backend's periodic background work.
+
+Alerts, synthetic GTT, managed risk, holdings exit, data syncs, daily
+snapshots and the AI TM loops used to each own a thread that woke on its own
+timer, most of them every few seconds around the clock. They are now
+`ScheduledTask`s on one `Scheduler`: a single dispatcher thread sleeps until
+the earliest due task (a heap ordered by due time) and hands it to a bounded
+worker pool.
+
+Triggers:
+- `interval_sec`: run every N seconds (fixed rate, measured from the due
+  time). With `market_hours_only` the task sleeps from the session close to
+  the next session open; with `off_hours_interval_sec` it keeps running
+  outside the session at that slower cadence. Sessions come from
+  `resolve_market_session` (the `market_calendar` table, then the holiday
+  list).
+- `daily_at_ist`: run at fixed IST wall-clock times on weekdays (and once
+  at registration when `run_at_start`).
+
+A task is never run concurrently with itself: a due run that finds the
+previous one still going is counted in `skipped_overlap` and rescheduled.
+Every run is delayed by a random jitter of up to `jitter_sec` so tasks that
+share a cadence do not fire in lockstep.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Dict
+
+from app.core.config import get_settings
+from app.core.market_hours import (
+    IST_OFFSET,
+    ResolvedMarketSession,
+    default_market_session,
+    resolve_market_session,
+)
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# How far ahead `MarketClock.next_open` looks for a trading session.
+_MAX_LOOKAHEAD_DAYS = 14
+
+
+def _now_ist_naive(now_utc: datetime) -> datetime:
+    return (now_utc + IST_OFFSET).replace(tzinfo=None)
+
+
+def _ist_to_ts(dt_ist: datetime) -> float:
+    return (dt_ist - IST_OFFSET).replace(tzinfo=UTC).timestamp()
+
+
+class MarketClock:
+    """Resolved market sessions per IST day, cached for `ttl_sec`."""
+
+    def __init__(self, *, exchange: str = "NSE", ttl_sec: float = 3600.0) -> None:
+        self.exchange = str(exchange).upper()
+        self.ttl_sec = float(ttl_sec)
+        self._lock = Lock()
+        self._sessions: Dict[date, tuple[float, ResolvedMarketSession]] = {}
+
+    def session(self, day: date) -> ResolvedMarketSession:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._sessions.get(day)
+            if cached is not None and now - cached[0] < self.ttl_sec:
+                return cached[1]
+        try:
+            with SessionLocal() as db:
+                session = resolve_market_session(db, day=day, exchange=self.exchange)
+        except Exception:
+            # Weekends are resolved before any DB access, so this is a weekday.
+            logger.debug("Market session lookup failed; using defaults.", exc_info=True)
+            return default_market_session(exchange=self.exchange, day=day)
+        with self._lock:
+            if len(self._sessions) > 64:
+                self._sessions.clear()
+            self._sessions[day] = (now, session)
+        return session
+
+    def is_open(self, now_ist: datetime) -> bool:
+        return self.session(now_ist.date()).is_trading_time(now_ist)
+
+    def next_open(self, now_ist: datetime) -> datetime | None:
+        """Start of the next session after `now_ist` (None if none is found)."""
+
+        for offset in range(_MAX_LOOKAHEAD_DAYS + 1):
+            day = now_ist.date() + timedelta(days=offset)
+            session = self.session(day)
+            if not session.is_trading_day() or session.open_time is None:
+                continue
+            opens_at = datetime.combine(day, session.open_time)
+            if opens_at > now_ist:
+                return opens_at
+        return None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+
+@dataclass
+class ScheduledTask:
+    name: str
+    fn: Callable[[], Any]
+    interval_sec: float | None = None
+    daily_at_ist: tuple[tuple[int, int], ...] = ()
+    market_hours_only: bool = False
+    off_hours_interval_sec: float | None = None
+    initial_delay_sec: float = 0.0
+    run_at_start: bool = False
+    jitter_sec: float = 0.0
+
+    runs: int = 0
+    errors: int = 0
+    skipped_overlap: int = 0
+    running: bool = False
+    next_run_at: float | None = None
+    last_started_at: float | None = None
+    last_duration_ms: float | None = None
+    max_duration_ms: float = 0.0
+    last_lag_ms: float | None = None
+    max_lag_ms: float = 0.0
+    last_error: str | None = None
+
+    def trigger(self) -> str:
+        if self.daily_at_ist:
+            times = ",".join(f"{h:02d}:{m:02d}" for h, m in self.daily_at_ist)
+            return f"daily {times} IST"
+        desc = f"every {self.interval_sec:g}s"
+        if self.market_hours_only:
+            desc += " (market hours)"
+        elif self.off_hours_interval_sec:
+            desc += f" ({self.off_hours_interval_sec:g}s off-hours)"
+        return desc
+
+    def as_dict(self) -> dict[str, Any]:
+        def _iso(ts: float | None) -> str | None:
+            return datetime.fromtimestamp(ts, UTC).isoformat() if ts else None
+
+        def _ms(v: float | None) -> float | None:
+            return round(v, 2) if v is not None else None
+
+        return {
+            "trigger": self.trigger(),
+            "running": self.running,
+            "runs": self.runs,
+            "errors": self.errors,
+            "skipped_overlap": self.skipped_overlap,
+            "next_run_at": _iso(self.next_run_at),
+            "last_started_at": _iso(self.last_started_at),
+            "last_duration_ms": _ms(self.last_duration_ms),
+            "max_duration_ms": round(self.max_duration_ms, 2),
+            "last_lag_ms": _ms(self.last_lag_ms),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """Single-dispatcher timer queue feeding a bounded worker pool."""
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 4,
+        clock: MarketClock | None = None,
+        time_fn: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.clock = clock or MarketClock()
+        self._time = time_fn
+        self._cond = Condition()
+        self._heap: list[tuple[float, int, ScheduledTask]] = []
+        self._tasks: Dict[str, ScheduledTask] = {}
+        self._seq = itertools.count()
+        self._stopping = False
+        self._thread: Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self.wakeups = 0
+
+    # -- registration -------------------------------------------------------
+
+    def add_task(self, task: ScheduledTask) -> bool:
+        """Register `task`; a name that is already registered is ignored."""
+
+        if task.interval_sec is None and not task.daily_at_ist:
+            raise ValueError(f"Task {task.name!r} needs interval_sec or daily_at_ist.")
+        with self._cond:
+            if task.name in self._tasks:
+                return False
+            self._tasks[task.name] = task
+        # Trigger computation may query the market calendar; keep it outside
+        # the dispatcher lock.
+        now = self._time()
+        if task.daily_at_ist and not task.run_at_start:
+            due = self._next_due(task, now)
+        else:
+            due = now + max(0.0, float(task.initial_delay_sec))
+            if task.market_hours_only and not self._is_open(due):
+                due = self._next_open_ts(task, due) or due + 86400.0
+        with self._cond:
+            self._push(task, due)
+        return True
+
+    def tasks(self) -> list[ScheduledTask]:
+        with self._cond:
+            return list(self._tasks.values())
+
+    # -- trigger computation ----------------------------------------------
+
+    def _is_open(self, ts: float) -> bool:
+        return self.clock.is_open(_now_ist_naive(datetime.fromtimestamp(ts, UTC)))
+
+    def _jitter(self, task: ScheduledTask, base: float) -> float:
+        jitter = float(task.jitter_sec or 0.0)
+        if task.interval_sec:
+            jitter = min(jitter, 0.1 * float(task.interval_sec))
+        return base + (random.uniform(0.0, jitter) if jitter > 0 else 0.0)
+
+    def _next_due(self, task: ScheduledTask, after: float) -> float:
+        """Due time of the run following one that was due at `after`."""
+
+        if task.daily_at_ist:
+            now_ist = _now_ist_naive(datetime.fromtimestamp(after, UTC))
+            for offset in range(8):
+                day = now_ist.date() + timedelta(days=offset)
+                if day.weekday() >= 5:
+                    continue
+                for hh, mm in sorted(task.daily_at_ist):
+                    at = datetime.combine(day, datetime.min.time()).replace(
+                        hour=hh, minute=mm
+                    )
+                    if at > now_ist:
+                        return self._jitter(task, _ist_to_ts(at))
+            return after + 86400.0
+
+        interval = max(0.01, float(task.interval_sec or 0.0))
+        due = self._jitter(task, after + interval)
+        if not (task.market_hours_only or task.off_hours_interval_sec):
+            return due
+        if self._is_open(due):
+            return due
+        open_ts = self._next_open_ts(task, due)
+        if task.market_hours_only:
+            return open_ts or after + 86400.0
+        slow = self._jitter(task, after + float(task.off_hours_interval_sec or 0.0))
+        return min(slow, open_ts) if open_ts else slow
+
+    def _next_open_ts(self, task: ScheduledTask, ts: float) -> float | None:
+        opens_at = self.clock.next_open(_now_ist_naive(datetime.fromtimestamp(ts, UTC)))
+        return self._jitter(task, _ist_to_ts(opens_at)) if opens_at is not None else None
+
+    def _push(self, task: ScheduledTask, due: float) -> None:
+        task.next_run_at = due
+        heapq.heappush(self._heap, (due, next(self._seq), task))
+        self._cond.notify()
+
+    # -- dispatch -----------------------------------------------------------
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="scheduler"
+            )
+            self._thread = Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, *, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+        if thread is not None:
+            thread.join(timeout=timeout)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self) -> None:  # pragma: no cover - background thread
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - self._time()
+                if delay > 0:
+                    self._cond.wait(timeout=delay)
+                    continue
+                self.wakeups += 1
+            self.run_pending()
+
+    def run_pending(self) -> int:
+        """Dispatch every task that is due now; returns how many were due.
+
+        Runs go to the worker pool once started; before `start()` they run
+        inline on the calling thread.
+        """
+
+        due_tasks: list[tuple[float, ScheduledTask]] = []
+        with self._cond:
+            now = self._time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _seq, task = heapq.heappop(self._heap)
+                due_tasks.append((due, task))
+        for due, task in due_tasks:
+            self._dispatch(task, due)
+        return len(due_tasks)
+
+    def _dispatch(self, task: ScheduledTask, due: float) -> None:
+        executor = self._executor
+        # The task is off the heap, so nobody else computes its next run; a
+        # market-calendar miss can query the DB, so do it outside the lock.
+        now = self._time()
+        nxt = self._next_due(task, due)
+        if nxt <= now:
+            nxt = self._next_due(task, now)
+        with self._cond:
+            if self._stopping:
+                return
+            self._push(task, nxt)
+            if task.running:
+                task.skipped_overlap += 1
+                return
+            task.running = True
+        if executor is None:
+            self._execute(task, due)
+        else:
+            executor.submit(self._execute, task, due)
+
+    def _execute(self, task: ScheduledTask, due: float) -> None:
+        started = self._time()
+        t0 = time.perf_counter()
+        task.last_started_at = started
+        task.last_lag_ms = max(0.0, (started - due) * 1000.0)
+        task.max_lag_ms = max(task.max_lag_ms, task.last_lag_ms)
+        try:
+            task.fn()
+        except Exception as exc:
+            task.errors += 1
+            task.last_error = f"{type(exc).__name__}: {exc}"[:500]
+            logger.exception("Scheduled task %s failed.", task.name)
+        finally:
+            duration = (time.perf_counter() - t0) * 1000.0
+            task.last_duration_ms = duration
+            task.max_duration_ms = max(task.max_duration_ms, duration)
+            task.runs += 1
+            task.running = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            tasks = sorted(self._tasks.values(), key=lambda t: t.name)
+            return {
+                "running": self._thread is not None,
+                "max_workers": self.max_workers,
+                "wakeups": self.wakeups,
+                "tasks": {t.name: t.as_dict() for t in tasks},
+            }
+
+
+_scheduler: Scheduler | None = None
+_scheduler_lock = Lock()
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            settings = get_settings()
+            _scheduler = Scheduler(
+                max_workers=int(getattr(settings, "scheduler_max_workers", 4)),
+                clock=MarketClock(
+                    exchange=str(getattr(settings, "scheduler_market_exchange", "NSE"))
+                ),
+            )
+        return _scheduler
+
+
+def register_task(
+    name: str,
+    fn: Callable[[], Any],
+    *,
+    interval_sec: float | None = None,
+    daily_at_ist: tuple[tuple[int, int], ...] = (),
+    market_hours_only: bool = False,
+    off_hours: bool = False,
+    initial_delay_sec: float = 0.0,
+    run_at_start: bool = False,
+) -> bool:
+    """Add a task to the process scheduler.
+
+    `off_hours=True` keeps an interval task running outside market hours at
+    `scheduler_off_hours_interval_sec` (never faster than `interval_sec`).
+    """
+
+    settings = get_settings()
+    off_hours_interval = None
+    if off_hours and interval_sec is not None:
+        off_hours_interval = max(
+            float(interval_sec),
+            float(getattr(settings, "scheduler_off_hours_interval_sec", 300.0)),
+        )
+    return get_scheduler().add_task(
+        ScheduledTask(
+            name=name,
+            fn=fn,
+            interval_sec=interval_sec,
+            daily_at_ist=daily_at_ist,
+            market_hours_only=market_hours_only,
+            off_hours_interval_sec=off_hours_interval,
+            initial_delay_sec=initial_delay_sec,
+            run_at_start=run_at_start,
+            jitter_sec=float(getattr(settings, "scheduler_jitter_sec", 0.5)),
+        )
+    )
+
+
+def start_scheduler() -> Scheduler:
+    scheduler = get_scheduler()
+    scheduler.start()
+    return scheduler
+
+
+def stop_scheduler() -> None:
+    scheduler = _scheduler
+    if scheduler is not None:
+        scheduler.stop()
+
+
+def get_scheduler_stats() -> dict[str, Any]:
+    scheduler = _scheduler
+    if scheduler is None:
+        return {"running": False, "tasks": {}}
+    return scheduler.stats()
+
+
+__all__ = [
+    "MarketClock",
+    "ScheduledTask",
+    "Scheduler",
+    "get_scheduler",
+    "get_scheduler_stats",
+    "register_task",
+    "start_scheduler",
+    "stop_scheduler",
+]
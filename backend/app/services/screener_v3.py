@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import json
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import UTC, datetime
-from typing import Optional, Set
+from typing import Callable, Optional, Set
 
 from sqlalchemy.orm import Session
 
@@ -268,6 +269,103 @@ def _eval_condition_with_cache(
     return matched, missing, bar_time
 
 
+def _evaluate_target(
+    db: Session,
+    settings: Settings,
+    *,
+    symbol: str,
+    exchange: str,
+    holding,
+    cond_ast: ExprNode,
+    var_map: dict[str, ExprNode],
+    col_asts: dict[str, ExprNode],
+    custom_indicators: CustomIndicatorMap,
+    params: dict[str, object],
+    allow_fetch: bool,
+) -> ScreenerRow:
+    def _value(expr: ExprNode) -> Optional[float]:
+        return _eval_numeric(
+            expr,
+            db=db,
+            settings=settings,
+            cache=cache,
+            holding=holding,
+            params=params,
+            custom_indicators=custom_indicators,
+            allow_fetch=allow_fetch,
+        ).now
+
+    try:
+        cache = CandleCache(
+            db=db,
+            settings=settings,
+            symbol=symbol,
+            exchange=exchange,
+            allow_fetch=allow_fetch,
+        )
+        matched, missing_data, _bar_time = _eval_condition_with_cache(
+            cond_ast,
+            db=db,
+            settings=settings,
+            cache=cache,
+            holding=holding,
+            custom_indicators=custom_indicators,
+            params=params,
+            allow_fetch=allow_fetch,
+        )
+        last_price = None
+        if holding is not None and getattr(holding, "last_price", None) is not None:
+            try:
+                last_price = float(holding.last_price)
+            except Exception:
+                last_price = None
+
+        close_1d = _value(col_asts["close_1d"])
+        if last_price is None and close_1d is not None:
+            last_price = float(close_1d)
+
+        rsi = _value(col_asts["rsi_14_1d"])
+        sma20 = _value(col_asts["sma_20_1d"])
+        sma50 = _value(col_asts["sma_50_1d"])
+
+        var_values: dict[str, Optional[float]] = {}
+        for vname, vexpr in var_map.items():
+            val = _value(vexpr)
+            var_values[vname] = float(val) if val is not None else None
+
+        return ScreenerRow(
+            symbol=symbol,
+            exchange=exchange,
+            matched=matched,
+            missing_data=missing_data,
+            last_price=float(last_price) if last_price is not None else None,
+            rsi_14_1d=float(rsi) if rsi is not None else None,
+            sma_20_1d=float(sma20) if sma20 is not None else None,
+            sma_50_1d=float(sma50) if sma50 is not None else None,
+            variables=var_values,
+        )
+    except Exception as exc:
+        return ScreenerRow(
+            symbol=symbol,
+            exchange=exchange,
+            matched=False,
+            missing_data=True,
+            error=str(exc),
+        )
+
+
+def _row_stats(rows: list[ScreenerRow], *, total: int) -> dict[str, int]:
+    return {
+        "total_symbols": total,
+        "evaluated_symbols": len(rows),
+        "matched_symbols": sum(1 for r in rows if r.matched),
+        "missing_symbols": sum(1 for r in rows if r.missing_data),
+    }
+
+
+BatchCallback = Callable[[list[ScreenerRow], dict[str, int]], None]
+
+
 def evaluate_screener_v3(
     db: Session,
     settings: Settings,
@@ -280,7 +378,19 @@ def evaluate_screener_v3(
     evaluation_cadence: str | None,
     params: dict[str, object] | None = None,
     allow_fetch: bool,
+    on_batch: BatchCallback | None = None,
+    cancel_event: threading.Event | None = None,
 ) -> tuple[list[ScreenerRow], str, dict[str, int]]:
+    """Evaluate the screener over the user's target universe.
+
+    Targets are split into batches of `screener_batch_size`. With more than one
+    batch and `screener_workers > 1` the batches run on a thread pool, each
+    with its own DB session; candles come from the shared candle store.
+    `on_batch` is called from the calling thread with all rows so far (in
+    completion order) after every batch. Setting `cancel_event` stops the run
+    early; the rows evaluated up to that point are returned.
+    """
+
     custom = compile_custom_indicators_for_user(
         db, user_id=user.id, dsl_profile=settings.dsl_profile
     )
@@ -314,147 +424,74 @@ def evaluate_screener_v3(
             holdings_map = {}
 
     col_asts = _build_default_column_asts()
-
-    rows: list[ScreenerRow] = []
-    evaluated = 0
-    matched_count = 0
-    missing_count = 0
     p = {str(k).strip().upper(): v for k, v in (params or {}).items() if str(k).strip()}
-    for symbol, exchange in targets:
-        evaluated += 1
-        holding = holdings_map.get(symbol.upper())
-        try:
-            cache = CandleCache(
-                db=db,
-                settings=settings,
+
+    def _evaluate_batch(
+        batch_db: Session, batch: list[tuple[int, str, str]]
+    ) -> list[tuple[int, ScreenerRow]]:
+        out: list[tuple[int, ScreenerRow]] = []
+        for idx, symbol, exchange in batch:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            row = _evaluate_target(
+                batch_db,
+                settings,
                 symbol=symbol,
                 exchange=exchange,
-                allow_fetch=allow_fetch,
-            )
-            matched, missing_data, _bar_time = _eval_condition_with_cache(
-                cond_ast,
-                db=db,
-                settings=settings,
-                cache=cache,
-                holding=holding,
+                holding=holdings_map.get(symbol.upper()),
+                cond_ast=cond_ast,
+                var_map=var_map,
+                col_asts=col_asts,
                 custom_indicators=custom,
                 params=p,
                 allow_fetch=allow_fetch,
             )
-            last_price = None
-            if holding is not None and getattr(holding, "last_price", None) is not None:
-                try:
-                    last_price = float(holding.last_price)
-                except Exception:
-                    last_price = None
-
-            close_1d = _eval_numeric(
-                col_asts["close_1d"],
-                db=db,
-                settings=settings,
-                cache=cache,
-                holding=holding,
-                params=p,
-                custom_indicators=custom,
-                allow_fetch=allow_fetch,
-            ).now
-
-            if last_price is None and close_1d is not None:
-                last_price = float(close_1d)
-
-            rsi = _eval_numeric(
-                col_asts["rsi_14_1d"],
-                db=db,
-                settings=settings,
-                cache=cache,
-                holding=holding,
-                params=p,
-                custom_indicators=custom,
-                allow_fetch=allow_fetch,
-            ).now
-            sma20 = _eval_numeric(
-                col_asts["sma_20_1d"],
-                db=db,
-                settings=settings,
-                cache=cache,
-                holding=holding,
-                params=p,
-                custom_indicators=custom,
-                allow_fetch=allow_fetch,
-            ).now
-            sma50 = _eval_numeric(
-                col_asts["sma_50_1d"],
-                db=db,
-                settings=settings,
-                cache=cache,
-                holding=holding,
-                params=p,
-                custom_indicators=custom,
-                allow_fetch=allow_fetch,
-            ).now
-
-            var_values: dict[str, Optional[float]] = {}
-            for vname, vexpr in var_map.items():
-                val = _eval_numeric(
-                    vexpr,
-                    db=db,
-                    settings=settings,
-                    cache=cache,
-                    holding=holding,
-                    params=p,
-                    custom_indicators=custom,
-                    allow_fetch=allow_fetch,
-                ).now
-                var_values[vname] = float(val) if val is not None else None
-
-            if matched:
-                matched_count += 1
-            if missing_data:
-                missing_count += 1
-
-            rows.append(
-                ScreenerRow(
-                    symbol=symbol,
-                    exchange=exchange,
-                    matched=matched,
-                    missing_data=missing_data,
-                    last_price=float(last_price) if last_price is not None else None,
-                    rsi_14_1d=float(rsi) if rsi is not None else None,
-                    sma_20_1d=float(sma20) if sma20 is not None else None,
-                    sma_50_1d=float(sma50) if sma50 is not None else None,
-                    variables=var_values,
-                )
-            )
-        except IndicatorAlertError as exc:
-            missing_count += 1
-            rows.append(
-                ScreenerRow(
-                    symbol=symbol,
-                    exchange=exchange,
-                    matched=False,
-                    missing_data=True,
-                    error=str(exc),
-                )
-            )
-        except Exception as exc:
-            missing_count += 1
-            rows.append(
-                ScreenerRow(
-                    symbol=symbol,
-                    exchange=exchange,
-                    matched=False,
-                    missing_data=True,
-                    error=str(exc),
-                )
-            )
+            out.append((idx, row))
+        return out
+
+    def _evaluate_batch_in_worker(
+        batch: list[tuple[int, str, str]],
+    ) -> list[tuple[int, ScreenerRow]]:
+        with SessionLocal() as worker_db:
+            return _evaluate_batch(worker_db, batch)
+
+    batch_size = max(int(settings.screener_batch_size or 0), 1)
+    indexed = [(i, symbol, exchange) for i, (symbol, exchange) in enumerate(targets)]
+    batches = [
+        indexed[i : i + batch_size] for i in range(0, len(indexed), batch_size)
+    ]
+    workers = min(max(int(settings.screener_workers or 0), 1), len(batches) or 1)
+
+    done: list[tuple[int, ScreenerRow]] = []
+
+    def _collect(results: list[tuple[int, ScreenerRow]]) -> None:
+        done.extend(results)
+        if on_batch is not None:
+            rows_so_far = [row for _, row in done]
+            on_batch(rows_so_far, _row_stats(rows_so_far, total=len(targets)))
+
+    if workers <= 1:
+        for batch in batches:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            _collect(_evaluate_batch(db, batch))
+    else:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="screener-v3"
+        ) as pool:
+            futures = [pool.submit(_evaluate_batch_in_worker, b) for b in batches]
+            try:
+                for fut in as_completed(futures):
+                    _collect(fut.result())
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+            finally:
+                for fut in futures:
+                    fut.cancel()
 
-    stats = {
-        "total_symbols": len(targets),
-        "evaluated_symbols": evaluated,
-        "matched_symbols": matched_count,
-        "missing_symbols": missing_count,
-    }
-    return rows, cadence, stats
+    done.sort(key=lambda item: item[0])
+    rows = [row for _, row in done]
+    return rows, cadence, _row_stats(rows, total=len(targets))
 
 
 def create_screener_run(
@@ -495,7 +532,25 @@ def create_screener_run(
     return run
 
 
+_cancel_events: dict[int, threading.Event] = {}
+_cancel_lock = threading.Lock()
+
+
+def _dump_rows(rows: list[ScreenerRow]) -> str:
+    return json.dumps([_model_dump(r) for r in rows], default=str)
+
+
 def _run_screener_in_thread(run_id: int) -> None:  # pragma: no cover
+    with _cancel_lock:
+        cancel = _cancel_events.setdefault(run_id, threading.Event())
+    try:
+        _run_screener(run_id, cancel)
+    finally:
+        with _cancel_lock:
+            _cancel_events.pop(run_id, None)
+
+
+def _run_screener(run_id: int, cancel: threading.Event) -> None:
     settings = get_settings()
     with SessionLocal() as db:
         run = db.get(ScreenerRun, run_id)
@@ -509,6 +564,20 @@ def _run_screener_in_thread(run_id: int) -> None:  # pragma: no cover
             db.add(run)
             db.commit()
             return
+
+        def _persist_batch(rows: list[ScreenerRow], stats: dict[str, int]) -> None:
+            run.evaluated_symbols = stats["evaluated_symbols"]
+            run.matched_symbols = stats["matched_symbols"]
+            run.missing_symbols = stats["missing_symbols"]
+            run.results_json = _dump_rows(rows)
+            db.add(run)
+            db.commit()
+            # Only changed columns are written, so a CANCELLED status set by
+            # the cancel endpoint (possibly from another process) survives and
+            # is picked up here on reload.
+            if run.status == "CANCELLED":
+                cancel.set()
+
         try:
             target = json.loads(run.target_json or "{}")
             include_holdings = bool(target.get("include_holdings"))
@@ -536,17 +605,24 @@ def _run_screener_in_thread(run_id: int) -> None:  # pragma: no cover
                 evaluation_cadence=run.evaluation_cadence,
                 params=params,
                 allow_fetch=False,
+                on_batch=_persist_batch,
+                cancel_event=cancel,
             )
+            db.refresh(run)
             run.evaluation_cadence = cadence
-            run.status = "DONE"
+            if cancel.is_set() or run.status == "CANCELLED":
+                run.status = "CANCELLED"
+            else:
+                run.status = "DONE"
             run.evaluated_symbols = stats["evaluated_symbols"]
             run.matched_symbols = stats["matched_symbols"]
             run.missing_symbols = stats["missing_symbols"]
-            run.results_json = json.dumps([_model_dump(r) for r in rows], default=str)
+            run.results_json = _dump_rows(rows)
             run.finished_at = datetime.now(UTC)
             db.add(run)
             db.commit()
         except Exception as exc:
+            db.rollback()
             run.status = "ERROR"
             run.error = str(exc)
             run.finished_at = datetime.now(UTC)
@@ -555,6 +631,8 @@ def _run_screener_in_thread(run_id: int) -> None:  # pragma: no cover
 
 
 def start_screener_run_async(run_id: int) -> None:
+    with _cancel_lock:
+        _cancel_events.setdefault(run_id, threading.Event())
     t = threading.Thread(
         target=_run_screener_in_thread,
         args=(run_id,),
@@ -562,3 +640,23 @@ def start_screener_run_async(run_id: int) -> None:
         name=f"screener-v3-run-{run_id}",
     )
     t.start()
+
+
+def cancel_screener_run(db: Session, run: ScreenerRun) -> bool:
+    """Mark a RUNNING screener run as cancelled and signal its worker.
+
+    Returns False when the run has already finished. Rows evaluated before the
+    worker notices the cancellation are kept.
+    """
+
+    if run.status != "RUNNING":
+        return False
+    run.status = "CANCELLED"
+    run.finished_at = datetime.now(UTC)
+    db.add(run)
+    db.commit()
+    with _cancel_lock:
+        event = _cancel_events.get(run.id)
+    if event is not None:
+        event.set()
+    return True
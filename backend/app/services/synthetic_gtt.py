@@ -1,27 +1,23 @@
 from __future__ import annotations
 
-import json
 import logging
 from datetime import UTC, datetime
-from threading import Event, Thread
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.clients import AngelOneClient, AngelOneSession, ZerodhaClient
+from app.clients import AngelOneClient, ZerodhaClient
 from app.core.config import Settings, get_settings
-from app.core.crypto import decrypt_token
 from app.core.market_hours import is_market_open_now
 from app.db.session import SessionLocal
-from app.models import BrokerConnection, Order
+from app.models import Order
+from app.services.broker_clients import get_broker_client_registry
 from app.services.broker_instruments import resolve_broker_symbol_and_token
-from app.services.broker_secrets import get_broker_secret
+from app.services.market_quotes import chunked, get_cached_quotes
+from app.services.scheduler import register_task
 
 logger = logging.getLogger(__name__)
 
-_scheduler_started = False
-_scheduler_stop_event = Event()
-
 
 def _now_utc() -> datetime:
     return datetime.now(UTC)
@@ -33,28 +29,7 @@ def _get_zerodha_client(
     *,
     user_id: int,
 ) -> ZerodhaClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "zerodha",
-            BrokerConnection.user_id == user_id,
-        )
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
-    )
-    if conn is None:
-        raise RuntimeError("Zerodha is not connected.")
-
-    api_key = get_broker_secret(db, settings, "zerodha", "api_key", user_id=user_id)
-    if not api_key:
-        raise RuntimeError("Zerodha API key is not configured.")
-
-    from kiteconnect import KiteConnect  # type: ignore[import]
-
-    access_token = decrypt_token(settings, conn.access_token_encrypted)
-    kite = KiteConnect(api_key=api_key)
-    kite.set_access_token(access_token)
-    return ZerodhaClient(kite)
+    return get_broker_client_registry().zerodha(db, settings, user_id=user_id)
 
 
 def _get_angelone_client(
@@ -63,89 +38,188 @@ def _get_angelone_client(
     *,
     user_id: int,
 ) -> AngelOneClient:
-    conn = (
-        db.query(BrokerConnection)
-        .filter(
-            BrokerConnection.broker_name == "angelone",
-            BrokerConnection.user_id == user_id,
-        )
-        .order_by(BrokerConnection.updated_at.desc())
-        .first()
+    return get_broker_client_registry().angelone(db, settings, user_id=user_id)
+
+
+def _instrument_key(order: Order) -> tuple[str, str]:
+    return (
+        (order.exchange or "NSE").strip().upper(),
+        order.symbol.strip().upper(),
     )
-    if conn is None:
-        raise RuntimeError("AngelOne is not connected.")
-
-    api_key = get_broker_secret(db, settings, "angelone", "api_key", user_id=user_id)
-    if not api_key:
-        raise RuntimeError("SmartAPI API key is not configured.")
-
-    raw = decrypt_token(settings, conn.access_token_encrypted)
-    parsed = json.loads(raw) if raw else {}
-    jwt = str(parsed.get("jwt_token") or "")
-    if not jwt:
-        raise RuntimeError("AngelOne session is missing jwt_token.")
-
-    session = AngelOneSession(
-        jwt_token=jwt,
-        refresh_token=str(parsed.get("refresh_token") or "") or None,
-        feed_token=str(parsed.get("feed_token") or "") or None,
-        client_code=str(parsed.get("client_code") or "") or None,
+
+
+def _log_ltp_failure(orders: list[Order], *, broker_name: str, error: str) -> None:
+    logger.info(
+        "Synthetic GTT LTP fetch failed",
+        extra={
+            "extra": {
+                "broker_name": broker_name,
+                "order_ids": [o.id for o in orders],
+                "error": error,
+            }
+        },
     )
-    return AngelOneClient(api_key=api_key, session=session)
 
 
-def _fetch_ltp_from_zerodha(
+def _fetch_ltps_from_zerodha(
     db: Session,
     settings: Settings,
     *,
-    order: Order,
-) -> float:
-    exchange = (order.exchange or "NSE").strip().upper()
-    symbol = order.symbol.strip().upper()
-    if not order.user_id:
-        raise RuntimeError("Order is missing user_id.")
-    client = _get_zerodha_client(db, settings, user_id=order.user_id)
-    return float(client.get_ltp(exchange=exchange, tradingsymbol=symbol))
+    orders: list[Order],
+    batch_size: int,
+) -> dict[int, float]:
+    """Price orders via Zerodha: shared quote cache first, then bulk LTP.
+
+    Returns a map of order id -> LTP for the orders that could be priced.
+    One client is built per user and each batch of distinct instruments
+    costs a single `get_ltp_bulk` call.
+    """
+
+    out: dict[int, float] = {}
+    cached = get_cached_quotes({_instrument_key(o) for o in orders})
+    by_user: dict[int, list[Order]] = {}
+    for order in orders:
+        quote = cached.get(_instrument_key(order))
+        if quote is not None and quote.get("last_price"):
+            out[order.id] = float(quote["last_price"])  # type: ignore[arg-type]
+            continue
+        if order.user_id:
+            by_user.setdefault(int(order.user_id), []).append(order)
+
+    for user_id, group in by_user.items():
+        try:
+            client = _get_zerodha_client(db, settings, user_id=user_id)
+        except Exception as exc:
+            _log_ltp_failure(group, broker_name="zerodha", error=str(exc))
+            continue
+        keys = list(dict.fromkeys(_instrument_key(o) for o in group))
+        prices: dict[tuple[str, str], float] = {}
+        for batch in chunked(keys, size=batch_size):
+            try:
+                quotes = client.get_ltp_bulk(batch)
+            except Exception as exc:
+                _log_ltp_failure(group, broker_name="zerodha", error=str(exc))
+                continue
+            for key, quote in quotes.items():
+                ltp = quote.get("last_price")
+                if ltp:
+                    prices[key] = float(ltp)
+        for order in group:
+            ltp = prices.get(_instrument_key(order))
+            if ltp is not None:
+                out[order.id] = ltp
+    return out
+
+
+def _fetch_ltps_from_angelone(
+    db: Session,
+    settings: Settings,
+    *,
+    orders: list[Order],
+) -> dict[int, float]:
+    """Price orders via AngelOne (no bulk LTP API; one call per instrument)."""
+
+    out: dict[int, float] = {}
+    by_user: dict[int, list[Order]] = {}
+    for order in orders:
+        if order.user_id:
+            by_user.setdefault(int(order.user_id), []).append(order)
+
+    for user_id, group in by_user.items():
+        try:
+            client = _get_angelone_client(db, settings, user_id=user_id)
+        except Exception as exc:
+            _log_ltp_failure(group, broker_name="angelone", error=str(exc))
+            continue
+        prices: dict[tuple[str, str], float] = {}
+        for exchange, symbol in dict.fromkeys(_instrument_key(o) for o in group):
+            try:
+                resolved = resolve_broker_symbol_and_token(
+                    db,
+                    broker_name="angelone",
+                    exchange=exchange,
+                    symbol=symbol,
+                )
+                if resolved is None:
+                    raise RuntimeError(
+                        f"AngelOne instrument mapping missing for {exchange}:{symbol}."
+                    )
+                broker_symbol, token = resolved
+                prices[(exchange, symbol)] = float(
+                    client.get_ltp(
+                        exchange=exchange,
+                        tradingsymbol=broker_symbol,
+                        symboltoken=token,
+                    )
+                )
+            except Exception as exc:
+                _log_ltp_failure(
+                    [o for o in group if _instrument_key(o) == (exchange, symbol)],
+                    broker_name="angelone",
+                    error=str(exc),
+                )
+        for order in group:
+            ltp = prices.get(_instrument_key(order))
+            if ltp is not None:
+                out[order.id] = ltp
+    return out
 
 
-def _fetch_ltp_from_destination_broker(
+def _fetch_ltps_from_destination_brokers(
     db: Session,
     settings: Settings,
     *,
-    order: Order,
-) -> float:
-    exchange = (order.exchange or "NSE").strip().upper()
-    symbol = order.symbol.strip().upper()
-    broker = (order.broker_name or "zerodha").strip().lower()
-    if not order.user_id:
-        raise RuntimeError("Order is missing user_id.")
-
-    if broker == "zerodha":
-        client = _get_zerodha_client(db, settings, user_id=order.user_id)
-        return float(client.get_ltp(exchange=exchange, tradingsymbol=symbol))
-
-    if broker == "angelone":
-        resolved = resolve_broker_symbol_and_token(
-            db,
-            broker_name="angelone",
-            exchange=exchange,
-            symbol=symbol,
-        )
-        if resolved is None:
-            raise RuntimeError(
-                f"AngelOne instrument mapping missing for {exchange}:{symbol}."
+    orders: list[Order],
+    batch_size: int,
+) -> dict[int, float]:
+    by_broker: dict[str, list[Order]] = {}
+    for order in orders:
+        broker = (order.broker_name or "zerodha").strip().lower()
+        by_broker.setdefault(broker, []).append(order)
+
+    out: dict[int, float] = {}
+    for broker, group in by_broker.items():
+        if broker == "zerodha":
+            out.update(
+                _fetch_ltps_from_zerodha(
+                    db, settings, orders=group, batch_size=batch_size
+                )
             )
-        broker_symbol, token = resolved
-        client = _get_angelone_client(db, settings, user_id=order.user_id)
-        return float(
-            client.get_ltp(
-                exchange=exchange,
-                tradingsymbol=broker_symbol,
-                symboltoken=token,
+        elif broker == "angelone":
+            out.update(_fetch_ltps_from_angelone(db, settings, orders=group))
+        else:
+            _log_ltp_failure(
+                group,
+                broker_name=broker,
+                error=f"LTP not supported for broker: {broker}",
             )
+    return out
+
+
+def _fetch_ltps(
+    db: Session,
+    settings: Settings,
+    *,
+    orders: list[Order],
+    poll_brokers_ltp: bool,
+    batch_size: int,
+) -> dict[int, float]:
+    """Price all orders, falling back to the other source for any misses."""
+
+    def _zerodha(group: list[Order]) -> dict[int, float]:
+        return _fetch_ltps_from_zerodha(db, settings, orders=group, batch_size=batch_size)
+
+    def _destination(group: list[Order]) -> dict[int, float]:
+        return _fetch_ltps_from_destination_brokers(
+            db, settings, orders=group, batch_size=batch_size
         )
 
-    raise RuntimeError(f"LTP not supported for broker: {broker}")
+    primary, fallback = (_destination, _zerodha) if poll_brokers_ltp else (_zerodha, _destination)
+    out = primary(orders)
+    missing = [o for o in orders if o.id not in out]
+    if missing:
+        out.update(fallback(missing))
+    return out
 
 
 def _should_trigger(op: str, *, ltp: float, trigger: float) -> bool:
@@ -155,7 +229,12 @@ def _should_trigger(op: str, *, ltp: float, trigger: float) -> bool:
 
 
 def process_synthetic_gtt_once() -> int:
-    """Evaluate and trigger pending synthetic GTT orders (best-effort)."""
+    """Evaluate and trigger pending synthetic GTT orders (best-effort).
+
+    All pending orders are priced in batches, their `last_checked_at` /
+    `last_seen_price` (and the SENDING transition of triggered orders) are
+    written in one transaction, and only triggered orders are executed.
+    """
 
     settings = get_settings()
     if not getattr(settings, "synthetic_gtt_enabled", True):
@@ -164,7 +243,8 @@ def process_synthetic_gtt_once() -> int:
     if not is_market_open_now():
         return 0
 
-    max_per_cycle = int(getattr(settings, "synthetic_gtt_max_per_cycle", 50) or 50)
+    max_per_cycle = int(getattr(settings, "synthetic_gtt_max_per_cycle", 5000) or 5000)
+    batch_size = int(getattr(settings, "synthetic_gtt_ltp_batch_size", 500) or 500)
     poll_brokers_ltp = bool(getattr(settings, "synthetic_gtt_use_broker_ltp", False))
 
     from app.api.orders import execute_order_internal
@@ -185,107 +265,81 @@ def process_synthetic_gtt_once() -> int:
             .limit(max_per_cycle)
             .all()
         )
+        pending = [o for o in pending if o.trigger_price is not None and o.trigger_price > 0]
         if not pending:
             return 0
 
+        ltps = _fetch_ltps(
+            db,
+            settings,
+            orders=pending,
+            poll_brokers_ltp=poll_brokers_ltp,
+            batch_size=batch_size,
+        )
+
+        to_execute: list[int] = []
         for order in pending:
-            if order.trigger_price is None or order.trigger_price <= 0:
+            ltp = ltps.get(order.id)
+            if ltp is None:
                 continue
+            order.last_checked_at = now
+            order.last_seen_price = float(ltp)
+            trigger = float(order.trigger_price)
+            if not order.trigger_operator:
+                order.trigger_operator = ">=" if trigger >= float(ltp) else "<="
+            op = (order.trigger_operator or "<=").strip()
+            if _should_trigger(op, ltp=float(ltp), trigger=trigger):
+                order.status = "SENDING"
+                order.triggered_at = now
+                to_execute.append(order.id)
+        db.commit()
+
+        for order_id in to_execute:
             try:
-                ltp: float
-                if poll_brokers_ltp:
-                    try:
-                        ltp = _fetch_ltp_from_destination_broker(
-                            db,
-                            settings,
-                            order=order,
-                        )
-                    except Exception:
-                        ltp = _fetch_ltp_from_zerodha(db, settings, order=order)
-                else:
-                    try:
-                        ltp = _fetch_ltp_from_zerodha(db, settings, order=order)
-                    except Exception:
-                        ltp = _fetch_ltp_from_destination_broker(
-                            db,
-                            settings,
-                            order=order,
-                        )
-
-                order.last_checked_at = now
-                order.last_seen_price = float(ltp)
-                if not order.trigger_operator:
-                    trigger = float(order.trigger_price)
-                    order.trigger_operator = ">=" if trigger >= float(ltp) else "<="
-                db.add(order)
-                db.commit()
-
-                op = (order.trigger_operator or "<=").strip()
-                if _should_trigger(
-                    op,
-                    ltp=float(ltp),
-                    trigger=float(order.trigger_price),
-                ):
-                    order.status = "SENDING"
-                    order.triggered_at = now
+                execute_order_internal(
+                    order_id,
+                    db=db,
+                    settings=settings,
+                    correlation_id="synthetic-gtt",
+                    auto_dispatch=True,
+                )
+                triggered += 1
+            except HTTPException as exc:
+                order = db.get(Order, order_id)
+                if order is None:
+                    continue
+                db.refresh(order)
+                if order.status in {"WAITING", "SENDING"}:
+                    order.status = "FAILED"
+                    order.error_message = (
+                        exc.detail if isinstance(exc.detail, str) else str(exc.detail)
+                    )
                     db.add(order)
                     db.commit()
-                    try:
-                        execute_order_internal(
-                            order.id,
-                            db=db,
-                            settings=settings,
-                            correlation_id="synthetic-gtt",
-                            auto_dispatch=True,
-                        )
-                        triggered += 1
-                    except HTTPException as exc:
-                        db.refresh(order)
-                        if order.status in {"WAITING", "SENDING"}:
-                            order.status = "FAILED"
-                            order.error_message = (
-                                exc.detail
-                                if isinstance(exc.detail, str)
-                                else str(exc.detail)
-                            )
-                            db.add(order)
-                            db.commit()
             except Exception as exc:
                 logger.info(
-                    "Synthetic GTT evaluation failed",
+                    "Synthetic GTT execution failed",
                     extra={
                         "extra": {
-                            "order_id": order.id,
-                            "broker_name": order.broker_name,
-                            "symbol": order.symbol,
+                            "order_id": order_id,
                             "error": str(exc),
                         }
                     },
                 )
-                continue
 
     return triggered
 
 
-def _loop() -> None:
+def schedule_synthetic_gtt() -> None:
     settings = get_settings()
     interval = int(getattr(settings, "synthetic_gtt_poll_interval_sec", 15) or 15)
-    interval = max(5, interval)
-    while not _scheduler_stop_event.is_set():
-        try:
-            process_synthetic_gtt_once()
-        except Exception:
-            logger.exception("Synthetic GTT loop failed.")
-        _scheduler_stop_event.wait(timeout=interval)
-
-
-def schedule_synthetic_gtt() -> None:
-    global _scheduler_started
-    if _scheduler_started:
-        return
-    _scheduler_started = True
-    thread = Thread(target=_loop, name="synthetic-gtt", daemon=True)
-    thread.start()
+    # A cycle costs one bulk LTP call per batch, so sub-5s intervals are fine.
+    register_task(
+        "synthetic_gtt",
+        process_synthetic_gtt_once,
+        interval_sec=max(1, interval),
+        market_hours_only=True,
+    )
 
 
 __all__ = ["schedule_synthetic_gtt", "process_synthetic_gtt_once"]
@@ -1,12 +1,228 @@
 from __future__ import annotations
 
 import json
+import logging
+import queue
+import time
+from datetime import UTC, datetime
+from threading import Event, Lock, Thread
 from typing import Any, Optional
 
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.db.session import SessionLocal
 from app.models import SystemEvent
 
+logger = logging.getLogger(__name__)
+
+# Events at these levels (and any passed critical=True) skip the buffer.
+_CRITICAL_LEVELS = {"ERROR", "CRITICAL"}
+
+_FLUSHED_FLAG = "system_events_flushed_writes"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session: Session, _flush_context: Any) -> None:
+    session.info[_FLUSHED_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_flushed(session: Session) -> None:
+    session.info.pop(_FLUSHED_FLAG, None)
+
+
+def _has_uncommitted_writes(db: Session) -> bool:
+    return bool(db.new or db.dirty or db.deleted or db.info.get(_FLUSHED_FLAG))
+
+
+class AuditEventSink:
+    """Bounded in-process buffer of audit rows, batch-inserted off the hot path.
+
+    Rows are `(model, values)` pairs queued by `record_audit_row`. A daemon
+    writer drains the queue every `flush_interval_sec` (or as soon as
+    `batch_size` rows are waiting) and inserts each model's rows with one
+    executemany in its own session, so callers no longer pay a commit per
+    audit record. `flush()` drains synchronously from any thread; `shutdown()`
+    stops the writer and flushes what is left.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int = 10000,
+        flush_interval_sec: float = 0.5,
+        batch_size: int = 500,
+    ) -> None:
+        self.flush_interval_sec = max(0.01, float(flush_interval_sec))
+        self.batch_size = max(1, int(batch_size))
+        self._queue: queue.Queue[tuple[type, dict[str, Any]]] = queue.Queue(
+            maxsize=max(1, int(max_queue))
+        )
+        self._write_lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread: Thread | None = None
+        self.buffered = 0
+        self.written = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = Thread(target=self._run, name="audit-event-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, model: type, values: dict[str, Any]) -> bool:
+        """Queue one row; returns False when the buffer is full."""
+
+        try:
+            self._queue.put_nowait((model, values))
+        except queue.Full:
+            self.overflowed += 1
+            return False
+        self.buffered += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _run(self) -> None:  # pragma: no cover - background thread
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval_sec)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit event writer failed to flush.")
+
+    def flush(self) -> int:
+        """Write every queued row now; returns the number of rows written."""
+
+        with self._write_lock:
+            rows: dict[type, list[dict[str, Any]]] = {}
+            n = 0
+            while True:
+                try:
+                    model, values = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                rows.setdefault(model, []).append(values)
+                n += 1
+            if not n:
+                return 0
+            started = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    for model, batch in rows.items():
+                        db.execute(insert(model), batch)
+                    db.commit()
+            except Exception:
+                self.dropped += n
+                logger.exception("Dropped %d buffered audit rows.", n)
+                return 0
+            self.written += n
+            self.flushes += 1
+            self.last_flush_ms = (time.perf_counter() - started) * 1000.0
+            return n
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "buffered": self.buffered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "overflowed": self.overflowed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+_sink: AuditEventSink | None = None
+_sink_lock = Lock()
+
+
+def start_audit_event_sink() -> AuditEventSink | None:
+    """Start the background audit writer (no-op when buffering is disabled)."""
+
+    global _sink
+    settings = get_settings()
+    if not bool(getattr(settings, "audit_buffer_enabled", True)):
+        return None
+    with _sink_lock:
+        if _sink is None:
+            _sink = AuditEventSink(
+                max_queue=int(getattr(settings, "audit_buffer_max_queue", 10000)),
+                flush_interval_sec=float(
+                    getattr(settings, "audit_flush_interval_sec", 0.5)
+                ),
+                batch_size=int(getattr(settings, "audit_flush_batch_size", 500)),
+            )
+            _sink.start()
+        return _sink
+
+
+def stop_audit_event_sink() -> None:
+    """Stop the writer and synchronously persist anything still buffered."""
+
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.shutdown()
+
+
+def flush_audit_events() -> int:
+    """Persist buffered rows now, e.g. before serving an audit listing."""
+
+    sink = _sink
+    return sink.flush() if sink is not None else 0
+
+
+def get_audit_event_sink_stats() -> dict[str, Any]:
+    sink = _sink
+    return {"enabled": sink is not None, **(sink.stats() if sink is not None else {})}
+
+
+def record_audit_row(
+    db: Session,
+    model: type,
+    values: dict[str, Any],
+    *,
+    critical: bool = False,
+) -> Any | None:
+    """Persist an append-only audit row, buffered unless `critical`.
+
+    Returns the committed instance, or None when the row was buffered.
+    Unbuffered rows are added to `db` and committed as before. Audit writes
+    have always committed the caller's session and some callers rely on that
+    for their own pending changes, so a buffered write still commits `db`
+    when it holds uncommitted work (and skips the commit otherwise).
+    """
+
+    values.setdefault("created_at", datetime.now(UTC))
+    sink = _sink
+    if sink is not None and not critical and sink.submit(model, values):
+        if _has_uncommitted_writes(db):
+            db.commit()
+        return None
+    row = model(**values)
+    db.add(row)
+    db.commit()
+    return row
+
 
 def record_system_event(
     db: Session,
@@ -16,20 +232,41 @@ def record_system_event(
     message: str,
     correlation_id: Optional[str] = None,
     details: Optional[dict[str, Any]] = None,
+    critical: bool = False,
 ) -> SystemEvent:
-    """Persist a system event capturing important backend activity."""
-
-    event = SystemEvent(
-        level=level.upper(),
-        category=category,
-        message=message,
-        correlation_id=correlation_id,
-        details=json.dumps(details, ensure_ascii=False) if details else None,
+    """Persist a system event capturing important backend activity.
+
+    Events go through the buffered audit writer when it is running; ERROR
+    events and `critical=True` are written synchronously. Buffered events
+    are returned unsaved (no id).
+    """
+
+    level_u = level.upper()
+    values: dict[str, Any] = {
+        "level": level_u,
+        "category": category,
+        "message": message,
+        "correlation_id": correlation_id,
+        "details": json.dumps(details, ensure_ascii=False) if details else None,
+    }
+    row = record_audit_row(
+        db,
+        SystemEvent,
+        values,
+        critical=critical or level_u in _CRITICAL_LEVELS,
     )
-    db.add(event)
-    db.commit()
-    db.refresh(event)
-    return event
+    if row is None:
+        return SystemEvent(**values)
+    db.refresh(row)
+    return row
 
 
-__all__ = ["record_system_event"]
+__all__ = [
+    "AuditEventSink",
+    "flush_audit_events",
+    "get_audit_event_sink_stats",
+    "record_audit_row",
+    "record_system_event",
+    "start_audit_event_sink",
+    "stop_audit_event_sink",
+]
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.core.config import Settings
 from app.core.crypto import decrypt_token, encrypt_token
 from app.models import BrokerSecret
+from app.services.config_cache import cached_config
 from app.services.webhook_secrets import WEBHOOK_BROKER_NAME
 
 TRADINGVIEW_WEBHOOK_CONFIG_KEY = "tradingview_webhook_config"
@@ -96,6 +97,20 @@ def get_tradingview_webhook_config_with_source(
     source is one of: db_user | db_global | default
     """
 
+    return cached_config(
+        "webhook",
+        ("config", user_id),
+        lambda: _read_config_with_source(db, settings, user_id=user_id),
+        owner=settings,
+    )
+
+
+def _read_config_with_source(
+    db: Session,
+    settings: Settings,
+    *,
+    user_id: int | None,
+) -> tuple[TradingViewWebhookConfig, str]:
     row = _load_config_row(db, user_id=user_id) if user_id is not None else None
     if row is not None:
         source = "db_user"
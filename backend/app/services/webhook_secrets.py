@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.core.config import Settings
 from app.core.crypto import decrypt_token, encrypt_token
 from app.models import BrokerSecret
+from app.services.config_cache import cached_config
 
 TRADINGVIEW_WEBHOOK_SECRET_KEY = "tradingview_webhook_secret"
 WEBHOOK_BROKER_NAME = "webhook"
@@ -23,18 +24,24 @@ def get_tradingview_webhook_secret(
     2) Environment-based secret (ST_TRADINGVIEW_WEBHOOK_SECRET)
     """
 
-    secret = (
-        db.query(BrokerSecret)
-        .filter(
-            BrokerSecret.broker_name == WEBHOOK_BROKER_NAME,
-            BrokerSecret.key == TRADINGVIEW_WEBHOOK_SECRET_KEY,
-            BrokerSecret.user_id.is_(None),
+    def _load() -> Optional[str]:
+        secret = (
+            db.query(BrokerSecret)
+            .filter(
+                BrokerSecret.broker_name == WEBHOOK_BROKER_NAME,
+                BrokerSecret.key == TRADINGVIEW_WEBHOOK_SECRET_KEY,
+                BrokerSecret.user_id.is_(None),
+            )
+            .one_or_none()
         )
-        .one_or_none()
-    )
-    if secret is not None:
+        if secret is None:
+            return None
         return decrypt_token(settings, secret.value_encrypted)
 
+    stored = cached_config("webhook", "secret", _load, owner=settings)
+    if stored is not None:
+        return stored
+
     return settings.tradingview_webhook_secret
 
 
@@ -206,10 +206,12 @@ def test_chat_fetch_holdings(monkeypatch: pytest.MonkeyPatch, fake_kite_mcp) ->
     assert "Top 5 holdings" in body["assistant_message"]
     assert body["decision_id"]
     assert body["tool_calls"] and body["tool_calls"][0]["name"] == "get_holdings"
+    assert set(body["tool_calls"][0]["phase_ms"]) == {"llm", "tools", "db"}
 
     tr = client.get(f"/api/ai/decision-traces/{body['decision_id']}")
     assert tr.status_code == 200
     assert tr.json()["user_message"] == "what are my top 5 holdings?"
+    assert set(tr.json()["final_outcome"]["phase_ms"]) == {"llm", "tools", "db"}
 
 
 def test_chat_stream_emits_events(monkeypatch: pytest.MonkeyPatch, fake_kite_mcp) -> None:
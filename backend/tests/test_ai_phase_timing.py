@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.services.ai_toolcalling.phase_timing import ChatPhaseTimer, gather_with_timeouts
+
+
+def test_phase_timer_offloads_blocking_calls_and_marks_deltas() -> None:
+    async def scenario() -> tuple[ChatPhaseTimer, str, dict[str, int]]:
+        phases = ChatPhaseTimer()
+
+        def blocking() -> str:
+            time.sleep(0.02)
+            return threading.current_thread().name
+
+        worker = await phases.run_blocking(blocking)
+
+        async def llm() -> str:
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        assert await phases.timed("llm", llm) == "ok"
+        first = phases.since_last_mark()
+        return phases, worker, first
+
+    phases, worker, first = asyncio.run(scenario())
+    assert worker.startswith("ai-orch-db")
+    assert first["db"] >= 15 and first["llm"] >= 15 and first["tools"] == 0
+    assert phases.since_last_mark() == {"llm": 0, "tools": 0, "db": 0}
+    assert phases.totals_ms()["db"] == first["db"]
+
+
+def test_gather_with_timeouts_runs_calls_concurrently() -> None:
+    async def slow(tag: str, delay: float) -> str:
+        await asyncio.sleep(delay)
+        return tag
+
+    async def boom() -> str:
+        raise RuntimeError("down")
+
+    async def scenario() -> tuple[dict, float]:
+        start = time.perf_counter()
+        out = await gather_with_timeouts(
+            {
+                "get_holdings": lambda: slow("h", 0.1),
+                "get_positions": lambda: slow("p", 0.1),
+                "get_margins": lambda: slow("m", 5.0),
+                "get_orders": boom,
+            },
+            timeout_sec=0.3,
+        )
+        return out, time.perf_counter() - start
+
+    out, elapsed = asyncio.run(scenario())
+    assert out["get_holdings"] == "h" and out["get_positions"] == "p"
+    assert isinstance(out["get_margins"], asyncio.TimeoutError)
+    assert isinstance(out["get_orders"], RuntimeError)
+    assert elapsed < 1.0
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import AlertDefinition, AlertEvent, Candle, User
+from app.services.alerts_v3 import evaluate_alerts_v3_once, get_alerts_v3_cycle_stats
+from app.services.alerts_v3_dsl import parse_v3_expression
+from app.services.alerts_v3_expression import (
+    CandleCache,
+    EvalMemo,
+    _eval_numeric,
+    eval_condition,
+)
+
+client = TestClient(app)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    from app.services import market_data as md
+
+    def _noop_fetch(*_args, **_kwargs) -> None:  # pragma: no cover
+        return
+
+    md._fetch_and_store_history = _noop_fetch  # type: ignore[attr-defined]
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(17)
+    with SessionLocal() as session:
+        session.add(
+            User(
+                username="cse-user",
+                password_hash="dummy",
+                role="ADMIN",
+                display_name="CSE User",
+            )
+        )
+        for symbol in ("CSEA", "CSEB"):
+            price = 200.0
+            for i in range(80):
+                price = max(1.0, price + rng.gauss(0, 3))
+                session.add(
+                    Candle(
+                        symbol=symbol,
+                        exchange="NSE",
+                        timeframe="1d",
+                        ts=today - timedelta(days=79 - i),
+                        open=price,
+                        high=price + 1.0,
+                        low=price - 1.0,
+                        close=price,
+                        volume=1000.0,
+                    )
+                )
+        session.commit()
+
+
+def _numeric(db, raw: str, *, memo, params=None, custom=None):  # type: ignore[no-untyped-def]
+    settings = get_settings()
+    cache = CandleCache(db, settings, "CSEA", "NSE", allow_fetch=False, memo=memo)
+    return _eval_numeric(
+        parse_v3_expression(raw),
+        db=db,
+        settings=settings,
+        cache=cache,
+        holding=None,
+        params=params or {},
+        custom_indicators=custom or {},
+        allow_fetch=False,
+    )
+
+
+def test_shared_subexpressions_are_evaluated_once_per_symbol() -> None:
+    settings = get_settings()
+    memo = EvalMemo()
+    conditions = [
+        'RSI(close, 14, "1d") > 0 AND SMA(close, 20, "1d") > 0',
+        'RSI(close, 14, "1d") < 50',
+        'SMA(close, 20, "1d") < PRICE("1d")',
+    ]
+    with SessionLocal() as db:
+        for symbol in ("CSEA", "CSEB"):
+            for raw in conditions:
+                node = parse_v3_expression(raw)
+                kwargs = dict(
+                    db=db,
+                    settings=settings,
+                    symbol=symbol,
+                    exchange="NSE",
+                    custom_indicators={},
+                    allow_fetch=False,
+                )
+                shared = eval_condition(node, memo=memo, **kwargs)
+                assert shared == eval_condition(node, **kwargs)
+
+    stats = memo.stats()
+    # Per symbol RSI and SMA are computed once and reused by the second alert
+    # that mentions them; PRICE stores its numeric value and its series.
+    assert stats["deduplicated"] == 4
+    assert stats["evaluations"] == 8
+    assert stats["entries"] == 8
+
+
+def test_parameters_and_custom_bodies_are_part_of_the_key() -> None:
+    memo = EvalMemo()
+    with SessionLocal() as db:
+        short = _numeric(db, 'SMA(close, LEN, "1d")', memo=memo, params={"LEN": 5})
+        long = _numeric(db, 'SMA(close, LEN, "1d")', memo=memo, params={"LEN": 30})
+        assert short.now != long.now
+        assert short.now == _numeric(db, 'SMA(close, 5, "1d")', memo=None).now
+
+        # Two users may define different bodies under the same name.
+        sma_user = {"MYIND": (["N"], parse_v3_expression('SMA(close, N, "1d")'))}
+        ema_user = {"MYIND": (["N"], parse_v3_expression('EMA(close, N, "1d")'))}
+        a = _numeric(db, "MYIND(10)", memo=memo, custom=sma_user)
+        b = _numeric(db, "MYIND(10)", memo=memo, custom=ema_user)
+        assert a.now == _numeric(db, 'SMA(close, 10, "1d")', memo=None).now
+        assert b.now == _numeric(db, 'EMA(close, 10, "1d")', memo=None).now
+
+        before = memo.stats()["deduplicated"]
+        again = _numeric(db, "MYIND(10)", memo=memo, custom=sma_user)
+        assert again.now == a.now
+        assert memo.stats()["deduplicated"] == before + 1
+
+
+def test_cycle_shares_memo_across_alerts_and_reports_stats() -> None:
+    with SessionLocal() as session:
+        user = session.query(User).filter(User.username == "cse-user").one()
+        for name, dsl in (
+            ("rsi-high", 'RSI(close, 14, "1d") > 0'),
+            ("rsi-low", 'RSI(close, 14, "1d") < 101'),
+        ):
+            session.add(
+                AlertDefinition(
+                    user_id=user.id,
+                    name=name,
+                    target_kind="SYMBOL",
+                    target_ref="CSEB",
+                    exchange="NSE",
+                    evaluation_cadence="1m",
+                    variables_json="[]",
+                    condition_dsl=dsl,
+                    trigger_mode="ONCE_PER_BAR",
+                    only_market_hours=False,
+                    enabled=True,
+                )
+            )
+        session.commit()
+
+    evaluate_alerts_v3_once()
+
+    stats = get_alerts_v3_cycle_stats()
+    assert stats["alerts_evaluated"] == 2
+    assert stats["symbol_evaluations"] == 2
+    assert stats["deduplicated"] >= 1
+    with SessionLocal() as session:
+        assert session.query(AlertEvent).filter(AlertEvent.symbol == "CSEB").count() == 2
+
+    res = client.get("/api/alerts-v3/cycle-stats")
+    assert res.status_code == 200
+    assert res.json()["deduplicated"] == stats["deduplicated"]
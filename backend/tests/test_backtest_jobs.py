@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import BacktestRun, User
+from app.services import backtest_jobs
+from app.services.backtest_jobs import (
+    BacktestJobQueue,
+    add_backtest_run,
+    cancel_backtest_run,
+    ensure_backtest_capacity,
+    execute_backtest_run,
+)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _queued_run(owner_id: int | None = None) -> int:
+    with SessionLocal() as db:
+        run = BacktestRun(
+            owner_id=owner_id,
+            kind="SIGNAL",
+            status="QUEUED",
+            config_json=json.dumps({"kind": "SIGNAL", "universe": {}, "config": {}}),
+            progress=0.0,
+        )
+        db.add(run)
+        db.commit()
+        return int(run.id)
+
+
+def _load(run_id: int) -> BacktestRun:
+    with SessionLocal() as db:
+        run = db.get(BacktestRun, run_id)
+        assert run is not None
+        db.expunge(run)
+        return run
+
+
+def test_worker_reports_progress_and_completes(monkeypatch) -> None:
+    seen: list[str] = []
+
+    def fake_run(db, settings, *, kind, universe, config, on_progress):  # noqa: ANN001
+        on_progress(40.0)
+        seen.append(_load(run_id).status)
+        return {"ok": True}
+
+    monkeypatch.setattr(backtest_jobs, "run_backtest", fake_run)
+    run_id = _queued_run()
+    assert execute_backtest_run(run_id) == "COMPLETED"
+    run = _load(run_id)
+    assert seen == ["RUNNING"]
+    assert run.status == "COMPLETED"
+    assert run.progress == 100.0
+    assert json.loads(run.result_json or "{}") == {"ok": True}
+    assert run.started_at is not None and run.finished_at is not None
+
+    # A finished run is never picked up twice.
+    assert execute_backtest_run(run_id) == "COMPLETED"
+
+
+def test_cancel_stops_running_backtest_at_next_progress(monkeypatch) -> None:
+    def fake_run(db, settings, *, kind, universe, config, on_progress):  # noqa: ANN001
+        on_progress(25.0)
+        with SessionLocal() as other:
+            assert cancel_backtest_run(other, other.get(BacktestRun, run_id))
+        on_progress(100.0)
+        raise AssertionError("cancelled run kept going")
+
+    monkeypatch.setattr(backtest_jobs, "run_backtest", fake_run)
+    run_id = _queued_run()
+    assert execute_backtest_run(run_id) == "CANCELLED"
+    run = _load(run_id)
+    assert run.status == "CANCELLED"
+    assert run.progress == 25.0
+
+    failing = _queued_run()
+    monkeypatch.setattr(
+        backtest_jobs,
+        "run_backtest",
+        lambda *a, **k: (_ for _ in ()).throw(ValueError("No candles available.")),
+    )
+    assert execute_backtest_run(failing) == "FAILED"
+    assert _load(failing).error_message == "No candles available."
+
+
+def test_queue_drops_cancelled_queued_job(monkeypatch) -> None:
+    gate = threading.Event()
+    started: list[int] = []
+
+    def fake_run(db, settings, *, kind, universe, config, on_progress):  # noqa: ANN001
+        started.append(1)
+        gate.wait(timeout=5)
+        return None
+
+    monkeypatch.setattr(backtest_jobs, "run_backtest", fake_run)
+    queue = BacktestJobQueue(executor="thread", workers=1)
+    monkeypatch.setattr(backtest_jobs, "_queue", queue)
+    first, second = _queued_run(), _queued_run()
+    queue.submit(first)
+    queue.submit(second)
+    deadline = time.monotonic() + 5
+    while not started and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with SessionLocal() as db:
+        assert cancel_backtest_run(db, db.get(BacktestRun, second))
+        assert not cancel_backtest_run(db, db.get(BacktestRun, second))
+    gate.set()
+    deadline = time.monotonic() + 5
+    while queue.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queue.shutdown()
+
+    assert len(started) == 1
+    assert _load(first).status == "COMPLETED"
+    assert _load(second).status == "CANCELLED"
+    assert queue.stats()["finished"] == {"COMPLETED": 1, "CANCELLED": 1}
+
+
+def test_per_user_active_cap() -> None:
+    with SessionLocal() as db:
+        user = User(username="bt-cap", password_hash="x", role="TRADER")
+        db.add(user)
+        db.commit()
+        owner_id = int(user.id)
+    settings = SimpleNamespace(backtest_max_active_per_user=2)
+    _queued_run(owner_id)
+    with SessionLocal() as db:
+        ensure_backtest_capacity(db, settings, owner_id=owner_id)
+    _queued_run(owner_id)
+    with SessionLocal() as db, pytest.raises(HTTPException) as exc:
+        ensure_backtest_capacity(db, settings, owner_id=owner_id)
+    assert exc.value.status_code == 429
+    with SessionLocal() as db:
+        ensure_backtest_capacity(db, settings, owner_id=owner_id + 1)
+
+
+def test_concurrent_submits_cannot_exceed_cap() -> None:
+    with SessionLocal() as db:
+        user = User(username="bt-cap-race", password_hash="x", role="TRADER")
+        db.add(user)
+        db.commit()
+        owner_id = int(user.id)
+    settings = SimpleNamespace(backtest_max_active_per_user=1)
+    barrier = threading.Barrier(4)
+    outcomes: list[int] = []
+
+    def submit() -> None:
+        with SessionLocal() as db:
+            run = BacktestRun(
+                owner_id=owner_id,
+                kind="SIGNAL",
+                status="QUEUED",
+                config_json="{}",
+                progress=0.0,
+            )
+            barrier.wait(timeout=5)
+            try:
+                add_backtest_run(db, settings, run)
+                outcomes.append(200)
+            except HTTPException as exc:
+                outcomes.append(exc.status_code)
+
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(outcomes) == [200, 429, 429, 429]
+    with SessionLocal() as db:
+        assert db.query(BacktestRun).filter(BacktestRun.owner_id == owner_id).count() == 1
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import time
 from datetime import datetime, timedelta, timezone
 
 from fastapi.testclient import TestClient
@@ -10,13 +11,17 @@ from app.db.base import Base
 from app.db.session import SessionLocal, engine
 from app.main import app  # noqa: F401  # ensure routes are imported
 from app.models import Candle, Group, GroupMember
+from app.services import backtest_jobs
 
 UTC = timezone.utc
 
 client = TestClient(app)
 
+_original_queue: backtest_jobs.BacktestJobQueue | None = None
+
 
 def setup_module() -> None:  # type: ignore[override]
+    global _original_queue
     os.environ.setdefault("ST_ENVIRONMENT", "test")
     get_settings.cache_clear()
     Base.metadata.drop_all(bind=engine)
@@ -29,6 +34,9 @@ def setup_module() -> None:  # type: ignore[override]
         return
 
     md._fetch_and_store_history = _noop_fetch  # type: ignore[attr-defined]
+    # Thread workers share the patched fetcher above (spawned processes would not).
+    _original_queue = backtest_jobs._queue
+    backtest_jobs._queue = backtest_jobs.BacktestJobQueue(executor="thread", workers=2)
 
     now = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
     with SessionLocal() as session:
@@ -96,6 +104,20 @@ def setup_module() -> None:  # type: ignore[override]
         session.commit()
 
 
+def teardown_module() -> None:  # type: ignore[override]
+    if backtest_jobs._queue is not None:
+        backtest_jobs._queue.shutdown()
+    backtest_jobs._queue = _original_queue
+
+
+def _wait_for_run(run: dict, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while run["status"] in {"QUEUED", "RUNNING"} and time.monotonic() < deadline:
+        time.sleep(0.02)
+        run = client.get(f"/api/backtests/runs/{run['id']}").json()
+    return run
+
+
 def test_backtests_runs_roundtrip() -> None:
     now = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
     start = (now - timedelta(days=2)).date().isoformat()
@@ -125,7 +147,7 @@ def test_backtests_runs_roundtrip() -> None:
         },
     )
     assert res.status_code == 200
-    run = res.json()
+    run = _wait_for_run(res.json())
     assert run["kind"] == "SIGNAL"
     assert run["status"] == "COMPLETED"
     assert run["title"] == "test"
@@ -173,7 +195,7 @@ def test_backtests_signal_backtest_basic_metrics() -> None:
         },
     )
     assert res.status_code == 200
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     win = body["result"]["by_window"]["1"]
     assert win["count"] == 2
@@ -217,7 +239,7 @@ def test_backtests_strategy_backtest_entry_exit_single_symbol() -> None:
         },
     )
     assert res.status_code == 200, res.text
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["kind"] == "STRATEGY"
     assert body["status"] == "COMPLETED", body
     result = body["result"]
@@ -268,7 +290,7 @@ def test_backtests_strategy_backtest_equity_dd_trade_exit_reason() -> None:
         },
     )
     assert res.status_code == 200, res.text
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     trades = body["result"]["trades"]
     assert len(trades) == 1
@@ -314,7 +336,7 @@ def test_backtests_strategy_backtest_equity_dd_global_exit_reason() -> None:
         },
     )
     assert res.status_code == 200, res.text
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     trades = body["result"]["trades"]
     assert len(trades) == 1
@@ -372,7 +394,7 @@ def test_backtests_portfolio_target_weights_basic_run() -> None:
         },
     )
     assert res.status_code == 200
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     series = body["result"]["series"]
     assert len(series["dates"]) == 3
@@ -437,7 +459,7 @@ def test_backtests_portfolio_gate_symbol_blocks_rebalances() -> None:
         },
     )
     assert res.status_code == 200, res.text
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     assert body["result"]["meta"]["gate"]["source"] == "SYMBOL"
     series = body["result"]["series"]
@@ -527,7 +549,7 @@ def test_backtests_portfolio_gate_group_index_blocks_on_low_coverage() -> None:
         },
     )
     assert res.status_code == 200, res.text
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     gate = body["result"]["meta"]["gate"]
     assert gate["source"] == "GROUP_INDEX"
@@ -590,7 +612,7 @@ def test_backtests_execution_backtest_costs_reduce_equity() -> None:
         },
     )
     assert base_res.status_code == 200
-    base_body = base_res.json()
+    base_body = _wait_for_run(base_res.json())
     assert base_body["status"] == "COMPLETED", base_body
 
     exec_res = client.post(
@@ -608,7 +630,7 @@ def test_backtests_execution_backtest_costs_reduce_equity() -> None:
         },
     )
     assert exec_res.status_code == 200
-    body = exec_res.json()
+    body = _wait_for_run(exec_res.json())
     assert body["status"] == "COMPLETED", body
     ideal_end = body["result"]["ideal"]["series"]["equity"][-1]
     real_end = body["result"]["realistic"]["series"]["equity"][-1]
@@ -691,7 +713,7 @@ def test_backtests_portfolio_rotation_top_n_momentum() -> None:
         },
     )
     assert res.status_code == 200
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     series = body["result"]["series"]
     assert len(series["dates"]) == 2
@@ -797,7 +819,7 @@ def test_backtests_portfolio_risk_parity_weights_sane() -> None:
         },
     )
     assert res.status_code == 200
-    body = res.json()
+    body = _wait_for_run(res.json())
     assert body["status"] == "COMPLETED", body
     actions = body["result"]["actions"]
     assert actions
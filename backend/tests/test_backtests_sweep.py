@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import Candle
+from app.schemas.backtests_portfolio_strategy import PortfolioStrategyBacktestConfigIn
+from app.schemas.backtests_sweep import SweepBacktestConfigIn
+from app.services import backtest_jobs
+from app.services import backtests_strategy as bs
+from app.services.backtests_data import UniverseSymbolRef
+from app.services.backtests_portfolio_strategy import run_portfolio_strategy_backtest
+from app.services.backtests_sweep import (
+    apply_sweep_params,
+    expand_sweep_variants,
+    run_sweep_backtest,
+)
+
+client = TestClient(app)
+
+_END = datetime(2026, 6, 30)
+_START = _END - timedelta(days=119)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    os.environ.setdefault("ST_ENVIRONMENT", "test")
+    get_settings.cache_clear()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    from app.services import market_data as md
+
+    md._fetch_and_store_history = lambda *_a, **_k: None  # type: ignore[attr-defined]
+    backtest_jobs._queue = backtest_jobs.BacktestJobQueue(executor="thread", workers=1)
+
+    with SessionLocal() as session:
+        for sym, phase in (("SWA", 0.0), ("SWB", 1.7)):
+            for i in range(120):
+                close = 100.0 + 10.0 * math.sin(i / 6.0 + phase) + i * 0.1
+                session.add(
+                    Candle(
+                        symbol=sym,
+                        exchange="NSE",
+                        timeframe="1d",
+                        ts=_START + timedelta(days=i),
+                        open=close - 0.5,
+                        high=close + 1.0,
+                        low=close - 1.0,
+                        close=close,
+                        volume=1000.0 + i,
+                    )
+                )
+        session.commit()
+
+
+def _base_config(**overrides) -> dict:
+    cfg = {
+        "timeframe": "1d",
+        "start_date": (_START + timedelta(days=40)).date().isoformat(),
+        "end_date": _END.date().isoformat(),
+        "entry_dsl": "SMA({fast}) > SMA(20)",
+        "exit_dsl": "SMA({fast}) < SMA(20)",
+        "initial_cash": 100000.0,
+        "charges_model": "BPS",
+        "charges_bps": 0.0,
+        "include_dp_charges": False,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def _sweep(**kwargs) -> SweepBacktestConfigIn:
+    return SweepBacktestConfigIn(
+        base_kind=kwargs.pop("base_kind", "STRATEGY"),
+        base_config=kwargs.pop("base_config", _base_config()),
+        params=kwargs.pop("params", {"fast": [3, 5, 8], "stop_loss_pct": [0.0, 2.0]}),
+        **kwargs,
+    )
+
+
+def test_expand_grid_random_and_validation() -> None:
+    grid = expand_sweep_variants(_sweep())
+    assert len(grid) == 6
+    assert grid[0] == {"fast": 3, "stop_loss_pct": 0.0}
+    assert grid[-1] == {"fast": 8, "stop_loss_pct": 2.0}
+
+    sample = expand_sweep_variants(_sweep(mode="RANDOM", samples=4, seed=7))
+    assert len(sample) == 4
+    assert all(v in grid for v in sample)
+    assert len({tuple(v.items()) for v in sample}) == 4
+    assert sample == expand_sweep_variants(_sweep(mode="RANDOM", samples=4, seed=7))
+
+    cfg = apply_sweep_params(_base_config(), {"fast": 5, "stop_loss_pct": 2.0})
+    assert cfg["entry_dsl"] == "SMA(5) > SMA(20)"
+    assert cfg["stop_loss_pct"] == 2.0
+
+    with pytest.raises(ValueError, match="Unknown sweep parameter"):
+        expand_sweep_variants(_sweep(params={"fast": [3], "bogus": [1]}))
+    with pytest.raises(ValueError, match="placeholders without sweep values"):
+        expand_sweep_variants(_sweep(params={"stop_loss_pct": [1.0]}))
+
+
+def test_strategy_sweep_matches_standalone_runs_and_shares_indicators(
+    monkeypatch,
+) -> None:
+    sym = UniverseSymbolRef(exchange="NSE", symbol="SWA")
+    computed: list[tuple[str, int]] = []
+    real_resolve = bs._resolve_indicator_series
+
+    def _counting_resolve(kind, period, **kwargs):
+        computed.append((kind, period))
+        return real_resolve(kind, period, **kwargs)
+
+    monkeypatch.setattr(bs, "_resolve_indicator_series", _counting_resolve)
+
+    sweep = _sweep(params={"fast": [3, 5], "stop_loss_pct": [0.0, 2.0, 4.0]})
+    with SessionLocal() as db:
+        res = run_sweep_backtest(
+            db, get_settings(), symbols=[sym], config=sweep, workers=1
+        )
+        # SMA(20) and each SMA(fast) are computed once for the whole sweep.
+        assert sorted(computed) == [("MA", 3), ("MA", 5), ("MA", 20)]
+
+        assert res["meta"]["variants"] == 6
+        assert res["meta"]["failed"] == 0
+        returns = [r["metrics"]["total_return_pct"] for r in res["rows"]]
+        assert returns == sorted(returns, reverse=True)
+        assert [r["rank"] for r in res["rows"]] == [1, 2, 3, 4, 5, 6]
+        assert res["best"]["params"] == res["rows"][0]["params"]
+
+        for row in res["rows"]:
+            solo = bs.run_strategy_backtest(
+                db,
+                get_settings(),
+                symbol=sym,
+                config=apply_sweep_params(_base_config(), row["params"]),
+            )
+            assert row["metrics"]["total_return_pct"] == pytest.approx(
+                solo["metrics"]["total_return_pct"]
+            )
+            assert row["metrics"]["trades"] == solo["trade_stats"]["count"]
+
+
+def test_sweep_variants_with_different_end_dates_do_not_share_indicators() -> None:
+    sym = UniverseSymbolRef(exchange="NSE", symbol="SWA")
+    short_end = (_END - timedelta(days=30)).date().isoformat()
+    sweep = _sweep(params={"fast": [5], "end_date": [short_end, _END.date().isoformat()]})
+    with SessionLocal() as db:
+        res = run_sweep_backtest(db, get_settings(), symbols=[sym], config=sweep, workers=1)
+        for row in res["rows"]:
+            solo = bs.run_strategy_backtest(
+                db,
+                get_settings(),
+                symbol=sym,
+                config=apply_sweep_params(_base_config(), row["params"]),
+            )
+            for key in ("total_return_pct", "max_drawdown_pct"):
+                assert row["metrics"][key] == pytest.approx(solo["metrics"][key])
+
+
+def test_sweep_records_unexpected_variant_errors_and_continues(monkeypatch) -> None:
+    from app.services import backtests_sweep as sweep_mod
+
+    real_run = sweep_mod._run_variant
+
+    def _flaky(db, settings, **kwargs):  # type: ignore[no-untyped-def]
+        if kwargs["cfg"].stop_loss_pct == 2.0:
+            raise KeyError("boom")
+        return real_run(db, settings, **kwargs)
+
+    monkeypatch.setattr(sweep_mod, "_run_variant", _flaky)
+    sym = UniverseSymbolRef(exchange="NSE", symbol="SWA")
+    with SessionLocal() as db:
+        res = run_sweep_backtest(db, get_settings(), symbols=[sym], config=_sweep(), workers=1)
+
+    assert res["meta"]["failed"] == 3 and res["meta"]["evaluated"] == 3
+    failed = [r for r in res["rows"] if r["error"] is not None]
+    assert {r["error"] for r in failed} == {"KeyError: 'boom'"}
+    assert all(r["rank"] is None for r in failed)
+    assert res["best"]["params"] == res["rows"][0]["params"]
+    assert res["rows"][0]["rank"] == 1
+
+
+def test_sweep_without_ranked_variants_has_no_best(monkeypatch) -> None:
+    from app.services import backtests_sweep as sweep_mod
+
+    def _unranked(db, settings, **kwargs):  # type: ignore[no-untyped-def]
+        if kwargs["cfg"].stop_loss_pct == 2.0:
+            raise KeyError("boom")
+        return {"trades": 0}
+
+    monkeypatch.setattr(sweep_mod, "_run_variant", _unranked)
+    sym = UniverseSymbolRef(exchange="NSE", symbol="SWA")
+    with SessionLocal() as db:
+        res = run_sweep_backtest(db, get_settings(), symbols=[sym], config=_sweep(), workers=1)
+
+    assert res["meta"]["failed"] == 3
+    assert all(r["rank"] is None for r in res["rows"])
+    assert res["best"] is None
+
+
+def test_sweep_pool_size_is_capped_by_backtest_job_slots(monkeypatch) -> None:
+    from app.services import backtests_sweep as sweep_mod
+
+    monkeypatch.setattr(sweep_mod.os, "cpu_count", lambda: 8)
+    settings = get_settings().model_copy(
+        update={"backtest_workers": 2, "backtest_sweep_workers": 0}
+    )
+    assert sweep_mod._sweep_workers(settings) == 4
+    capped = settings.model_copy(update={"backtest_sweep_workers": 16})
+    assert sweep_mod._sweep_workers(capped) == 4
+    inline = settings.model_copy(update={"backtest_sweep_workers": 1})
+    assert sweep_mod._sweep_workers(inline) == 1
+
+
+def test_portfolio_strategy_sweep_on_process_pool() -> None:
+    symbols = [
+        UniverseSymbolRef(exchange="NSE", symbol="SWA"),
+        UniverseSymbolRef(exchange="NSE", symbol="SWB"),
+    ]
+    base = _base_config(max_open_positions=2, allocation_mode="RANKING")
+    sweep = _sweep(
+        base_kind="PORTFOLIO_STRATEGY",
+        base_config=base,
+        params={"fast": [3, 5], "ranking_window": [5, 10]},
+        rank_by="max_drawdown_pct",
+        rank_order="ASC",
+    )
+    with SessionLocal() as db:
+        res = run_sweep_backtest(
+            db, get_settings(), symbols=symbols, config=sweep, workers=2
+        )
+        assert res["meta"]["workers"] == 2
+        drawdowns = [r["metrics"]["max_drawdown_pct"] for r in res["rows"]]
+        assert drawdowns == sorted(drawdowns)
+
+        best_cfg = PortfolioStrategyBacktestConfigIn.model_validate(res["best"]["config"])
+        solo = run_portfolio_strategy_backtest(
+            db, get_settings(), symbols=symbols, config=best_cfg
+        )
+        assert res["best"]["metrics"]["total_return_pct"] == pytest.approx(
+            solo["metrics"]["total_return_pct"]
+        )
+
+
+def test_sweep_api_runs_as_job_and_rejects_bad_params() -> None:
+    universe = {"mode": "GROUP", "symbols": [{"symbol": "SWA", "exchange": "NSE"}]}
+    bad = client.post(
+        "/api/backtests/runs",
+        json={
+            "kind": "SWEEP",
+            "universe": universe,
+            "config": {
+                "base_kind": "STRATEGY",
+                "base_config": _base_config(),
+                "params": {"fast": [3], "lookback": [10]},
+            },
+        },
+    )
+    assert bad.status_code == 400
+    assert "Unknown sweep parameter: lookback" in bad.text
+
+    res = client.post(
+        "/api/backtests/runs",
+        json={
+            "kind": "SWEEP",
+            "universe": universe,
+            "config": {
+                "base_kind": "STRATEGY",
+                "base_config": _base_config(),
+                "params": {"fast": [3, 5]},
+                "rank_by": "cagr_pct",
+            },
+        },
+    )
+    assert res.status_code == 200, res.text
+    run = res.json()
+    deadline = time.monotonic() + 30.0
+    while run["status"] in {"QUEUED", "RUNNING"} and time.monotonic() < deadline:
+        time.sleep(0.02)
+        run = client.get(f"/api/backtests/runs/{run['id']}").json()
+    assert run["status"] == "COMPLETED", run
+    assert run["progress"] == 100.0
+    assert run["result"]["meta"]["variants"] == 2
+    assert len(run["result"]["rows"]) == 2
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.core.crypto import encrypt_token
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import BrokerConnection, BrokerSecret, User
+from app.services import broker_clients
+from app.services.broker_clients import BrokerClientError, BrokerClientRegistry
+
+
+def setup_module() -> None:  # type: ignore[override]
+    os.environ["ST_CRYPTO_KEY"] = "test-broker-client-registry"
+    get_settings.cache_clear()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+class _FakeKite:
+    built: list["_FakeKite"] = []
+
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+        self.access_token: str | None = None
+        _FakeKite.built.append(self)
+
+    def set_access_token(self, access_token: str) -> None:
+        self.access_token = access_token
+
+
+def _seed(username: str, broker: str, token: str) -> int:
+    settings = get_settings()
+    with SessionLocal() as db:
+        user = User(username=username, password_hash="x", role="ADMIN")
+        db.add(user)
+        db.commit()
+        db.add(
+            BrokerConnection(
+                user_id=user.id,
+                broker_name=broker,
+                broker_user_id=f"{username.upper()}1",
+                access_token_encrypted=encrypt_token(settings, token),
+            )
+        )
+        db.add(
+            BrokerSecret(
+                user_id=user.id,
+                broker_name=broker,
+                key="api_key",
+                value_encrypted=encrypt_token(settings, f"{broker}-key"),
+            )
+        )
+        db.commit()
+        return int(user.id)
+
+
+def test_zerodha_client_is_reused_until_token_rotates(monkeypatch) -> None:
+    monkeypatch.setitem(sys.modules, "kiteconnect", SimpleNamespace(KiteConnect=_FakeKite))
+    _FakeKite.built.clear()
+    user_id = _seed("kite-user", "zerodha", "token-1")
+    registry = BrokerClientRegistry(pool_size=4, timeout_sec=5.0)
+    monkeypatch.setattr(broker_clients, "_registry", registry)
+    settings = get_settings()
+
+    secret_lookups: list[int | None] = []
+    real_get_secret = broker_clients.get_broker_secret
+
+    def _counting_get_secret(*args, **kwargs):
+        secret_lookups.append(kwargs.get("user_id"))
+        return real_get_secret(*args, **kwargs)
+
+    monkeypatch.setattr(broker_clients, "get_broker_secret", _counting_get_secret)
+
+    with SessionLocal() as db:
+        first = registry.zerodha(db, settings, user_id=user_id)
+        second = registry.zerodha(db, settings, user_id=user_id)
+        assert first._kite is second._kite
+        assert first.broker_user_id == "KITE-USER1"
+        assert len(_FakeKite.built) == 1
+        assert secret_lookups == [user_id]
+        assert _FakeKite.built[0].access_token == "token-1"
+
+        conn = db.query(BrokerConnection).filter(BrokerConnection.user_id == user_id).one()
+        conn.access_token_encrypted = encrypt_token(settings, "token-2")
+        db.commit()
+        rotated = registry.zerodha(db, settings, user_id=user_id)
+        assert rotated._kite is not first._kite
+        assert rotated._kite.access_token == "token-2"
+
+        # Changing the API key drops the pooled client.
+        secret = db.query(BrokerSecret).filter(BrokerSecret.user_id == user_id).one()
+        secret.value_encrypted = encrypt_token(settings, "zerodha-key-2")
+        db.commit()
+        assert registry.stats()["clients"] == {}
+        assert registry.zerodha(db, settings, user_id=user_id)._kite.api_key == "zerodha-key-2"
+
+    stats = registry.stats()
+    assert stats["builds"] == 3
+    assert stats["reuses"] == 1
+    assert f"zerodha:{user_id}" in stats["clients"]
+
+
+def test_angelone_clients_share_one_pooled_transport() -> None:
+    user_id = _seed(
+        "angel-user",
+        "angelone",
+        json.dumps({"jwt_token": "jwt-1", "client_code": "C1"}),
+    )
+    registry = BrokerClientRegistry(pool_size=4, timeout_sec=5.0)
+    settings = get_settings()
+    with SessionLocal() as db:
+        a = registry.angelone(db, settings, user_id=user_id)
+        b = registry.angelone(db, settings, user_id=user_id)
+    assert a is not b
+    assert a._client is b._client
+    assert a.session.jwt_token == "jwt-1"
+    assert a.broker_user_id == "ANGEL-USER1"
+    a.close()
+    assert not b._client.is_closed
+
+    # Invalidation (e.g. a token refresh) must not close the transport under
+    # wrappers another thread may still be calling through.
+    transport = b._client
+    assert registry.invalidate(broker_name="angelone") == 1
+    assert not transport.is_closed
+    del a, b
+    gc.collect()
+    assert transport.is_closed
+
+    with SessionLocal() as db, pytest.raises(BrokerClientError) as exc:
+        registry.angelone(db, settings, user_id=user_id + 100)
+    assert exc.value.reason == "not_connected"
+
+
+def test_call_stats_percentiles() -> None:
+    stats = broker_clients.ClientCallStats(window=10)
+    for ms in (10.0, 20.0, 30.0, 40.0):
+        stats.record(ms)
+    stats.record(100.0, error=True)
+    out = stats.as_dict()
+    assert out["calls"] == 5
+    assert out["errors"] == 1
+    assert out["avg_ms"] == 40.0
+    assert out["p50_ms"] == 30.0
+    assert out["max_ms"] == 100.0
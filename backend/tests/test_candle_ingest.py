@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import Candle
+from app.services import market_data as md
+from app.services.candle_ingest import bulk_insert_candles
+from app.services.candle_store import get_candle_store
+
+# Other modules replace md._fetch_and_store_history with a no-op at setup;
+# bind the real implementation at import time.
+_real_fetch_and_store_history = md._fetch_and_store_history
+
+client = TestClient(app)
+
+_TODAY = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _bars(days: range) -> list[dict]:
+    return [
+        {
+            "ts": _TODAY - timedelta(days=d),
+            "open": 100.0 + d,
+            "high": 101.0 + d,
+            "low": 99.0 + d,
+            "close": 100.5 + d,
+            "volume": 1000 + d,
+        }
+        for d in days
+    ]
+
+
+def _closes(symbol: str) -> list[float]:
+    with SessionLocal() as db:
+        return [
+            row[0]
+            for row in db.query(Candle.close)
+            .filter(Candle.symbol == symbol, Candle.timeframe == "1d")
+            .order_by(Candle.ts)
+        ]
+
+
+def test_bulk_insert_skips_stored_bars_and_duplicates() -> None:
+    with SessionLocal() as db:
+        first = bulk_insert_candles(
+            db, symbol="ING", exchange="NSE", timeframe="1d", bars=_bars(range(10, 20))
+        )
+        db.commit()
+    assert (first.received, first.inserted, first.skipped) == (10, 10, 0)
+
+    # Overlapping window with an in-batch duplicate: only the 5 new days land.
+    overlap = _bars(range(5, 15)) + _bars(range(5, 6))
+    with SessionLocal() as db:
+        second = bulk_insert_candles(
+            db, symbol="ING", exchange="NSE", timeframe="1d", bars=overlap
+        )
+        db.commit()
+    assert (second.received, second.inserted, second.skipped) == (11, 5, 6)
+    assert len(_closes("ING")) == 15
+
+
+def test_bulk_insert_invalidates_candle_store_on_commit() -> None:
+    settings = get_settings()
+    store = get_candle_store()
+    with SessionLocal() as db:
+        bulk_insert_candles(
+            db, symbol="INGS", exchange="NSE", timeframe="1d", bars=_bars(range(3, 6))
+        )
+        db.commit()
+        before = store.get(
+            db,
+            settings,
+            symbol="INGS",
+            exchange="NSE",
+            timeframe="1d",
+            start=_TODAY - timedelta(days=30),
+            allow_fetch=False,
+        )
+        assert len(before) == 3
+
+        bulk_insert_candles(
+            db, symbol="INGS", exchange="NSE", timeframe="1d", bars=_bars(range(1, 3))
+        )
+        db.commit()
+        after = store.get(
+            db,
+            settings,
+            symbol="INGS",
+            exchange="NSE",
+            timeframe="1d",
+            start=_TODAY - timedelta(days=30),
+            allow_fetch=False,
+        )
+    assert len(after) == 5
+
+
+class _FakeKite:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def historical_data(self, token, *, from_date, to_date, interval):  # type: ignore[no-untyped-def]
+        self.calls += 1
+        out = []
+        day = from_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= to_date:
+            out.append(
+                {
+                    "date": day,
+                    "open": 10.0,
+                    "high": 11.0,
+                    "low": 9.0,
+                    "close": 10.5,
+                    "volume": 500,
+                }
+            )
+            day += timedelta(days=1)
+        return out
+
+
+def test_fetch_and_store_history_uses_bulk_path(monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    kite = _FakeKite()
+    monkeypatch.setattr(md, "_get_instrument_token", lambda *a, **k: "123")
+    monkeypatch.setattr(md, "_get_kite_client", lambda *a, **k: kite)
+    settings = get_settings()
+
+    with SessionLocal() as db:
+        _real_fetch_and_store_history(
+            db,
+            settings,
+            symbol="INGK",
+            exchange="NSE",
+            base_timeframe="1d",
+            start=_TODAY - timedelta(days=20),
+            end=_TODAY - timedelta(days=10),
+        )
+        # Re-fetching an overlapping window only adds the new tail.
+        _real_fetch_and_store_history(
+            db,
+            settings,
+            symbol="INGK",
+            exchange="NSE",
+            base_timeframe="1d",
+            start=_TODAY - timedelta(days=15),
+            end=_TODAY - timedelta(days=5),
+        )
+    assert kite.calls == 2
+    assert len(_closes("INGK")) == 16
+
+    res = client.get("/api/market/history-fetch")
+    assert res.status_code == 200
+    ingest = res.json()["ingest"]
+    assert ingest["inserted"] >= 16
+    assert ingest["rows_per_sec"] > 0
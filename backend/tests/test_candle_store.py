@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import Candle
+from app.services import candle_store as cs
+from app.services.alerts_v3_dsl import parse_v3_expression
+from app.services.alerts_v3_expression import eval_condition
+
+client = TestClient(app)
+
+
+def _day(offset: int) -> datetime:
+    base = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return base - timedelta(days=offset)
+
+
+def _seed(symbol: str, closes: list[float], *, last_offset: int = 0) -> None:
+    with SessionLocal() as session:
+        n = len(closes)
+        for i, close in enumerate(closes):
+            session.add(
+                Candle(
+                    symbol=symbol,
+                    exchange="NSE",
+                    timeframe="1d",
+                    ts=_day(last_offset + n - 1 - i),
+                    open=close,
+                    high=close,
+                    low=close,
+                    close=close,
+                    volume=1000.0,
+                )
+            )
+        session.commit()
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _store(refresh_seconds: float = 60.0, max_bytes: int = 10 * 1024 * 1024) -> cs.CandleStore:
+    return cs.CandleStore(max_bytes=max_bytes, refresh_seconds=refresh_seconds)
+
+
+def test_candle_store_serves_repeat_reads_from_memory() -> None:
+    _seed("CSA", [10.0, 11.0, 12.0])
+    store = _store()
+    settings = get_settings()
+    start = _day(30)
+    with SessionLocal() as db:
+        a = store.get(db, settings, symbol="CSA", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+        b = store.get(db, settings, symbol="CSA", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+
+    assert a is b
+    assert list(a.column("close")) == [10.0, 11.0, 12.0]
+    stats = store.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_candle_store_appends_only_new_bars_after_refresh_interval() -> None:
+    _seed("CSB", [20.0, 21.0], last_offset=1)
+    store = _store(refresh_seconds=0.0)
+    settings = get_settings()
+    start = _day(30)
+    with SessionLocal() as db:
+        first = store.get(db, settings, symbol="CSB", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+        assert list(first.column("close")) == [20.0, 21.0]
+
+    # Write through a raw connection so no in-process invalidation happens and
+    # the refresh has to discover the new bar incrementally.
+    with engine.begin() as conn:
+        conn.execute(
+            Candle.__table__.insert(),
+            [
+                {
+                    "symbol": "CSB",
+                    "exchange": "NSE",
+                    "timeframe": "1d",
+                    "ts": _day(0),
+                    "open": 22.0,
+                    "high": 22.0,
+                    "low": 22.0,
+                    "close": 22.0,
+                    "volume": 1000.0,
+                }
+            ],
+        )
+
+    with SessionLocal() as db:
+        second = store.get(db, settings, symbol="CSB", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+
+    assert list(second.column("close")) == [20.0, 21.0, 22.0]
+    assert list(first.column("close")) == [20.0, 21.0]
+    stats = store.stats()
+    assert stats["misses"] == 1
+    assert stats["refreshes"] == 1
+
+
+def test_candle_store_invalidates_on_committed_orm_writes() -> None:
+    _seed("CSC", [30.0, 31.0], last_offset=1)
+    settings = get_settings()
+    store = cs.get_candle_store()
+    start = _day(30)
+    with SessionLocal() as db:
+        before = store.get(db, settings, symbol="CSC", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+    assert list(before.column("close")) == [30.0, 31.0]
+
+    _seed("CSC", [32.0])
+
+    with SessionLocal() as db:
+        after = store.get(db, settings, symbol="CSC", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+    assert list(after.column("close")) == [30.0, 31.0, 32.0]
+
+
+def test_candle_store_trims_leading_bars_with_new_lineage() -> None:
+    _seed("CSG", [float(i) for i in range(16)])
+    store = _store(refresh_seconds=0.0)
+    settings = get_settings()
+    kwargs = dict(symbol="CSG", exchange="NSE", timeframe="1d", allow_fetch=False)
+    with SessionLocal() as db:
+        first = store.get(db, settings, start=_day(15), **kwargs)
+        same = store.get(db, settings, start=_day(15), **kwargs)
+        slid = store.get(db, settings, start=_day(14), **kwargs)
+
+    assert len(first) == 16
+    assert same.lineage == first.lineage
+    # No bar older than the requested start is served.
+    assert slid.lineage != first.lineage
+    assert list(slid.column("close")) == [float(i) for i in range(1, 16)]
+
+
+def test_candle_store_evicts_least_recently_used_over_budget() -> None:
+    _seed("CSD", [1.0, 2.0, 3.0])
+    _seed("CSE", [4.0, 5.0, 6.0])
+    store = _store(max_bytes=3 * 48)
+    settings = get_settings()
+    start = _day(30)
+    with SessionLocal() as db:
+        store.get(db, settings, symbol="CSD", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+        store.get(db, settings, symbol="CSE", exchange="NSE", timeframe="1d", start=start, allow_fetch=False)
+
+    stats = store.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_alert_evaluations_share_one_load_per_symbol() -> None:
+    _seed("CSF", [float(100 + i) for i in range(30)])
+    settings = get_settings()
+    store = cs.get_candle_store()
+    expr = parse_v3_expression('RSI(close, 14, "1d") > 10 AND SMA(close, 5, "1d") > 100')
+    misses_before = store.stats()["misses"]
+    with SessionLocal() as db:
+        for _ in range(5):
+            ok, _snapshot, _bar_time = eval_condition(
+                expr,
+                db=db,
+                settings=settings,
+                symbol="CSF",
+                exchange="NSE",
+                custom_indicators={},
+                allow_fetch=False,
+            )
+            assert ok is True
+
+    assert store.stats()["misses"] - misses_before == 1
+
+    res = client.get("/api/market/candle-store")
+    assert res.status_code == 200
+    assert res.json()["entries"] >= 1
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from sqlalchemy import event, text
+
+from app.core.config import get_settings
+from app.core.crypto import encrypt_token
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import ConfigVersion, RiskGlobalConfig, User
+from app.services import config_cache
+from app.services.broker_secrets import get_broker_secret, set_broker_secret
+from app.services.risk_unified_store import read_unified_risk_global
+from app.services.webhook_secrets import (
+    get_tradingview_webhook_secret,
+    set_tradingview_webhook_secret,
+)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    os.environ.setdefault("ST_CRYPTO_KEY", "test-config-cache-crypto-key")
+    get_settings.cache_clear()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with SessionLocal() as session:
+        session.add(User(username="cc-user", password_hash="x", role="TRADER"))
+        session.commit()
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> config_cache.ConfigCache:
+    fresh = config_cache.ConfigCache(poll_interval_sec=3600.0)
+    monkeypatch.setattr(config_cache, "_cache", fresh)
+    return fresh
+
+
+@pytest.fixture
+def statements() -> list[str]:
+    seen: list[str] = []
+
+    def _on_execute(_conn, _cursor, statement, *_args) -> None:  # type: ignore[no-untyped-def]
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    yield seen
+    event.remove(engine, "before_cursor_execute", _on_execute)
+
+
+def _secret_queries(seen: list[str]) -> int:
+    return sum(1 for s in seen if "FROM broker_secrets" in s)
+
+
+def test_reads_are_cached_until_setter_commits(cache, statements) -> None:
+    settings = get_settings()
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.username == "cc-user").one()
+        set_broker_secret(db, settings, "zerodha", "KITE_API_KEY", "k1", user_id=user.id)
+
+        statements.clear()
+        for _ in range(5):
+            assert get_broker_secret(db, settings, "zerodha", "api_key", user.id) == "k1"
+        # Canonical key + first alias on the single miss; then dict lookups.
+        assert _secret_queries(statements) == 2
+        assert cache.stats()["families"]["broker"]["hits"] == 4
+
+        set_broker_secret(db, settings, "zerodha", "KITE_API_KEY", "k2", user_id=user.id)
+        assert get_broker_secret(db, settings, "zerodha", "api_key", user.id) == "k2"
+
+        set_tradingview_webhook_secret(db, settings, "tv-1")
+        assert get_tradingview_webhook_secret(db, settings) == "tv-1"
+        statements.clear()
+        assert get_tradingview_webhook_secret(db, settings) == "tv-1"
+        assert _secret_queries(statements) == 0
+        # A broker-secret write leaves the webhook family cached.
+        assert cache.stats()["families"]["webhook"]["invalidations"] == 1
+
+        version = db.get(ConfigVersion, "broker")
+        assert version is not None and version.version >= 2
+
+
+def test_rollback_keeps_cache_and_direct_row_edits_invalidate(cache) -> None:
+    with SessionLocal() as db:
+        before = read_unified_risk_global(db)  # may create + commit the row
+        invalidations = cache.stats()["families"]["risk"]["invalidations"]
+        row = db.query(RiskGlobalConfig).one()
+        row.baseline_equity_inr = 123.0
+        db.flush()
+        db.rollback()
+        assert cache.stats()["families"]["risk"]["invalidations"] == invalidations
+        assert read_unified_risk_global(db) == before
+
+        db.query(RiskGlobalConfig).update({RiskGlobalConfig.baseline_equity_inr: 456.0})
+        db.commit()
+        assert read_unified_risk_global(db).baseline_equity_inr == 456.0
+
+
+def test_reads_inside_uncommitted_write_are_not_cached(cache) -> None:
+    with SessionLocal() as db:
+        read_unified_risk_global(db)
+        db.query(RiskGlobalConfig).update({RiskGlobalConfig.enabled: True})
+        db.commit()
+        assert read_unified_risk_global(db).enabled is True
+
+        db.query(RiskGlobalConfig).one().enabled = False
+        db.flush()
+        # The writing session sees its own uncommitted value...
+        assert read_unified_risk_global(db).enabled is False
+        db.rollback()
+
+    # ...but it was never cached, so the committed value is served after.
+    with SessionLocal() as db:
+        assert read_unified_risk_global(db).enabled is True
+    assert cache.stats()["families"]["risk"]["bypasses"] == 1
+
+    # Closing without commit/rollback also releases the bypass.
+    db = SessionLocal()
+    db.query(RiskGlobalConfig).one().enabled = False
+    db.flush()
+    db.close()
+    with SessionLocal() as db:
+        assert read_unified_risk_global(db).enabled is True
+        assert read_unified_risk_global(db).enabled is True
+    assert cache.stats()["families"]["risk"]["bypasses"] == 1
+
+
+def test_other_process_writes_are_picked_up_by_version_poll(cache) -> None:
+    settings = get_settings()
+    with SessionLocal() as db:
+        set_tradingview_webhook_secret(db, settings, "before")
+        assert get_tradingview_webhook_secret(db, settings) == "before"
+        cache.poll()  # baseline
+
+        # Simulate another process: raw SQL, no ORM listeners in this one.
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE broker_secrets SET value_encrypted = :v "
+                    "WHERE broker_name = 'webhook' AND key = 'tradingview_webhook_secret'"
+                ),
+                {"v": encrypt_token(settings, "after")},
+            )
+            conn.execute(
+                text("UPDATE config_versions SET version = version + 1 WHERE family = 'webhook'")
+            )
+        assert get_tradingview_webhook_secret(db, settings) == "before"
+        cache.poll()
+        assert get_tradingview_webhook_secret(db, settings) == "after"
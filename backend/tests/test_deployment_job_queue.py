@@ -4,6 +4,8 @@ import json
 from datetime import UTC, datetime
 from uuid import uuid4
 
+from sqlalchemy.dialects import postgresql
+
 from app.core.auth import hash_password
 from app.db.base import Base
 from app.db.session import SessionLocal, engine
@@ -14,11 +16,16 @@ from app.models import (
     StrategyDeploymentState,
     User,
 )
+from app.services import deployment_worker
 from app.services.deployment_jobs import (
+    _runnable_jobs_stmt,
     acquire_deployment_lock,
+    claim_jobs,
     claim_next_job,
     enqueue_job,
+    enqueue_seq,
     requeue_stale_running_jobs,
+    wait_for_enqueued_jobs,
 )
 from app.services.deployment_scheduler import (
     enqueue_due_jobs_once,
@@ -245,3 +252,118 @@ def test_bar_boundary_and_backfill_enqueues_jobs() -> None:
         assert cursor.last_emitted_bar_end_ts == ist_naive_to_utc(
             datetime(2026, 1, 2, 10, 5)
         )
+
+
+def _make_deployment(db, user: User, *, symbol: str, status: str) -> StrategyDeployment:
+    dep = StrategyDeployment(
+        owner_id=user.id,
+        name=f"dep-{symbol.lower()}-{uuid4().hex}",
+        kind="STRATEGY",
+        execution_target="PAPER",
+        enabled=True,
+        broker_name="zerodha",
+        product="CNC",
+        target_kind="SYMBOL",
+        exchange="NSE",
+        symbol=symbol,
+        timeframe="1d",
+        config_json=json.dumps({"kind": "STRATEGY", "config": {"timeframe": "1d"}}),
+    )
+    db.add(dep)
+    db.flush()
+    db.add(StrategyDeploymentState(deployment_id=dep.id, status=status))
+    return dep
+
+
+def _enqueue_window(db, dep: StrategyDeployment, day: int):
+    return enqueue_job(
+        db,
+        deployment_id=dep.id,
+        owner_id=dep.owner_id,
+        kind="WINDOW",
+        dedupe_key=f"DEP:{dep.id}:WINDOW:SELL_OPEN:2026-02-{day:02d}",
+        scheduled_for=datetime(2026, 2, day, 9, 0, tzinfo=UTC),
+        payload={"kind": "WINDOW", "window": "SELL_OPEN"},
+    )
+
+
+def test_batch_claim_is_sharded_and_one_job_per_deployment() -> None:
+    with SessionLocal() as db:
+        db.query(StrategyDeploymentJob).update({"status": "DONE"})
+        user = db.query(User).filter(User.username == "deploy-job-user").one()
+        deps = [_make_deployment(db, user, symbol=s, status="STOPPED") for s in ("INFY", "WIPRO")]
+        for dep in deps:
+            for day in (2, 3):
+                assert _enqueue_window(db, dep, day) is not None
+        db.commit()
+
+    ts = datetime.now(UTC)
+    with SessionLocal() as db:
+        shard = (deps[0].id % 2, 2)
+        claims = claim_jobs(db, worker_id="w1", now=ts, limit=10, shard=shard)
+        db.commit()
+    # Only deployment 0's shard, and only its oldest job while it is RUNNING.
+    assert [c.job.deployment_id for c in claims] == [deps[0].id]
+    assert claims[0].job.scheduled_for.day == 2
+
+    with SessionLocal() as db:
+        again = claim_jobs(db, worker_id="w2", now=ts, limit=10, shard=shard)
+        assert again == []
+        others = claim_jobs(db, worker_id="w2", now=ts, limit=10)
+        assert [c.job.deployment_id for c in others] == [deps[1].id]
+        db.commit()
+
+
+def test_postgres_claim_uses_skip_locked() -> None:
+    stmt = _runnable_jobs_stmt(datetime.now(UTC), (1, 4)).with_for_update(skip_locked=True)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "deployment_id %" in sql
+
+
+def test_enqueue_wakes_workers_only_after_commit() -> None:
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.username == "deploy-job-user").one()
+        dep = _make_deployment(db, user, symbol="HCL", status="STOPPED")
+        db.commit()
+
+        seq = enqueue_seq()
+        _enqueue_window(db, dep, 4)
+        db.rollback()
+        assert wait_for_enqueued_jobs(seq, timeout=0) is False
+
+        _enqueue_window(db, dep, 5)
+        assert wait_for_enqueued_jobs(seq, timeout=0) is False
+        db.commit()
+        assert wait_for_enqueued_jobs(seq, timeout=0) is True
+
+
+def test_run_worker_batch_executes_claimed_jobs_and_records_stats(monkeypatch) -> None:
+    stats = deployment_worker.DeploymentWorkerStats()
+    monkeypatch.setattr(deployment_worker, "_stats", stats)
+    with SessionLocal() as db:
+        db.query(StrategyDeploymentJob).update({"status": "DONE"})
+        user = db.query(User).filter(User.username == "deploy-job-user").one()
+        deps = [_make_deployment(db, user, symbol=s, status="STOPPED") for s in ("ITC", "LT", "SBIN")]
+        for dep in deps:
+            _enqueue_window(db, dep, 6)
+        db.commit()
+
+        ran = deployment_worker.run_worker_batch(db, worker_id="batch-w", batch_size=2)
+        assert ran == 2
+        assert deployment_worker.run_worker_batch(db, worker_id="batch-w", batch_size=2) == 1
+        assert deployment_worker.run_worker_batch(db, worker_id="batch-w", batch_size=2) == 0
+
+        statuses = {
+            j.status
+            for j in db.query(StrategyDeploymentJob).filter(
+                StrategyDeploymentJob.deployment_id.in_([d.id for d in deps])
+            )
+        }
+        assert statuses == {"DONE"}
+
+    out = stats.as_dict()
+    assert out["batches"] == 2
+    assert out["claimed"] == 3
+    assert out["completed"] == 3
+    assert out["failed"] == 0
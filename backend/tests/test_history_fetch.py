@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import engine
+from app.main import app
+from app.services import market_data as md
+from app.services.history_fetch import HistoryFetchScheduler, TokenBucket
+
+client = TestClient(app)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def test_token_bucket_limits_sustained_rate() -> None:
+    bucket = TokenBucket(rate_per_sec=50.0, burst=5)
+    started = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    elapsed = time.monotonic() - started
+    # 5 burst tokens, then 10 more at 50/s => at least ~0.2s.
+    assert elapsed >= 0.18
+    assert bucket.stats()["acquired"] == 15
+
+
+def test_identical_concurrent_requests_share_one_fetch() -> None:
+    scheduler = HistoryFetchScheduler(max_workers=4, rate_per_sec=100.0, burst=10)
+    calls: list[int] = []
+    release = threading.Event()
+
+    def _fetch() -> str:
+        calls.append(1)
+        release.wait(timeout=5)
+        return "done"
+
+    key = ("AAA", "NSE", "1d")
+    results: list[str] = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(scheduler.run(key, ("window", 1), _fetch))
+        )
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert results == ["done"] * 5
+    assert len(calls) == 1
+    stats = scheduler.stats()
+    assert stats["runs"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["locked_keys"] == 0
+
+
+def test_different_symbols_fetch_concurrently_same_symbol_serialises() -> None:
+    scheduler = HistoryFetchScheduler(max_workers=4, rate_per_sec=100.0, burst=10)
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def _fetch(symbol: str) -> None:
+        with lock:
+            active[symbol] = active.get(symbol, 0) + 1
+            active["*"] = active.get("*", 0) + 1
+            for k in (symbol, "*"):
+                peak[k] = max(peak.get(k, 0), active[k])
+        time.sleep(0.05)
+        with lock:
+            active[symbol] -= 1
+            active["*"] -= 1
+
+    jobs = [(s, w) for s in ("AAA", "BBB", "CCC") for w in range(3)]
+    scheduler.map(
+        lambda job: scheduler.run(
+            (job[0], "NSE", "1d"), ("window", job[1]), lambda: _fetch(job[0])
+        ),
+        jobs,
+    )
+
+    assert peak["*"] > 1
+    assert peak["AAA"] == peak["BBB"] == peak["CCC"] == 1
+
+
+def test_ensure_history_many_hydrates_in_parallel(monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    fetched: list[tuple[str, str]] = []
+    threads: set[str] = set()
+
+    def _fake_fetch(db, settings, *, symbol, exchange, base_timeframe, start, end):  # type: ignore[no-untyped-def]
+        if symbol == "BAD":
+            raise md.MarketDataError("no instrument token")
+        threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        fetched.append((symbol, exchange))
+
+    monkeypatch.setattr(md, "_fetch_and_store_history", _fake_fetch)
+    pairs = [(f"HYD{i}", "NSE") for i in range(12)] + [("BAD", "NSE")]
+    end = datetime.now() - timedelta(days=1)
+    hydrated, errors = md.ensure_history_many(
+        get_settings(),
+        pairs,
+        base_timeframe="1d",
+        start=end - timedelta(days=30),
+        end=end,
+        full_window=True,
+    )
+
+    assert hydrated == 12
+    assert errors == ["NSE:BAD: no instrument token"]
+    assert sorted(fetched) == sorted(pairs[:-1])
+    assert len(threads) > 1
+
+    res = client.get("/api/market/history-fetch")
+    assert res.status_code == 200
+    assert res.json()["failures"] >= 1
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import UTC, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import Order, User
+from app.services import holdings_snapshot
+from app.services.holdings_snapshot import (
+    HoldingsSnapshotCache,
+    get_holdings_snapshot_cache,
+)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def teardown_module() -> None:  # type: ignore[override]
+    get_holdings_snapshot_cache().clear()
+
+
+def test_ttl_hits_and_single_flight() -> None:
+    cache = HoldingsSnapshotCache(ttl_sec=60.0, max_fetches_per_min=10)
+    calls: list[int] = []
+    gate = threading.Event()
+
+    def fetch() -> list[str]:
+        calls.append(1)
+        gate.wait(timeout=5)
+        return ["INFY"]
+
+    results: list[list[str]] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get((1, "zerodha"), fetch)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert results == [["INFY"]] * 5
+    assert len(calls) == 1
+    assert cache.get((1, "zerodha"), fetch) == ["INFY"]
+    stats = cache.stats()
+    assert stats["fetches"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["hits"] == 1
+
+
+def test_fetch_budget_serves_stale_snapshot() -> None:
+    cache = HoldingsSnapshotCache(ttl_sec=0.0, max_fetches_per_min=2)
+    counter = iter(range(100))
+
+    def fetch() -> int:
+        return next(counter)
+
+    assert cache.get((1, "zerodha"), fetch) == 0
+    assert cache.get((1, "zerodha"), fetch) == 1
+    # Budget spent: the last snapshot is served without a broker call.
+    assert cache.get((1, "zerodha"), fetch, force=True) == 1
+    assert cache.stats()["stale_served"] == 1
+
+    empty = HoldingsSnapshotCache(ttl_sec=60.0, max_fetches_per_min=1)
+    with pytest.raises(RuntimeError):
+        empty.get((2, "zerodha"), lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    with pytest.raises(HTTPException) as exc:
+        empty.get((2, "zerodha"), fetch)
+    assert exc.value.status_code == 429
+
+
+def test_invalidation_during_fetch_is_not_lost() -> None:
+    cache = HoldingsSnapshotCache(ttl_sec=60.0, max_fetches_per_min=10)
+    counter = iter(range(100))
+
+    def fetch() -> int:
+        value = next(counter)
+        if value == 0:
+            # A fill lands while the broker call is in flight.
+            cache.invalidate(user_id=1)
+        return value
+
+    assert cache.get((1, "zerodha"), fetch) == 0
+    assert cache.get((1, "zerodha"), fetch) == 1
+    assert cache.get((1, "zerodha"), fetch) == 1
+
+
+def test_committed_fill_invalidates_user_snapshot() -> None:
+    cache = get_holdings_snapshot_cache()
+    cache.clear()
+    with SessionLocal() as session:
+        user = User(username="snap-user", password_hash="x", role="ADMIN")
+        session.add(user)
+        session.commit()
+        now = datetime.now(UTC)
+        order = Order(
+            user_id=user.id,
+            broker_name="zerodha",
+            symbol="INFY",
+            exchange="NSE",
+            side="BUY",
+            qty=1,
+            price=1500.0,
+            order_type="LIMIT",
+            product="CNC",
+            gtt=False,
+            status="SENT",
+            mode="AUTO",
+            simulated=False,
+            created_at=now,
+            updated_at=now,
+        )
+        session.add(order)
+        session.commit()
+        user_id = int(user.id)
+
+        versions = iter(range(100))
+        key = (user_id, "zerodha")
+        assert cache.get(key, lambda: next(versions)) == 0
+        assert cache.get(key, lambda: next(versions)) == 0
+
+        order.status = "EXECUTED"
+        session.flush()
+        # Not committed yet: the snapshot stays valid.
+        assert cache.get(key, lambda: next(versions)) == 0
+        session.commit()
+
+    assert holdings_snapshot.invalidate_holdings_snapshots(user_id=user_id + 1) == 0
+    assert cache.get(key, lambda: next(versions)) == 1
+    assert cache.stats()["invalidations"] == 1
@@ -66,3 +66,39 @@ def test_finalizer_does_not_overwrite_performance_fields_on_existing_row(monkeyp
     )
 
     assert called == [False]
+
+
+def test_finalizer_tick_catches_up_a_late_trigger_before_the_deadline(monkeypatch) -> None:
+    runs: list[str] = []
+    events: list[str] = []
+    monkeypatch.setattr(finalizer, "_startup_checked", True)
+    monkeypatch.setattr(
+        finalizer, "_state", {"last_run_ist_date": None, "last_missed_ist_date": None}
+    )
+    monkeypatch.setattr(finalizer, "_as_of_date_ist", lambda _dt: date(2026, 2, 12))
+    monkeypatch.setattr(
+        finalizer,
+        "_finalize_prev_trading_day",
+        lambda *, settings, mode, overwrite_existing: runs.append(mode),
+    )
+    monkeypatch.setattr(
+        finalizer, "record_system_event", lambda *_a, **kw: events.append(kw["message"])
+    )
+
+    # The 08:30 trigger was delayed to 09:05: it still finalizes, once.
+    monkeypatch.setattr(finalizer, "_now_ist_naive", lambda: datetime(2026, 2, 12, 9, 5, 0))
+    finalizer._finalizer_tick()  # noqa: SLF001
+    finalizer._finalizer_tick()  # noqa: SLF001
+    assert runs == ["catch_up"]
+
+    # The deadline tick does not report a miss for a day that ran.
+    monkeypatch.setattr(finalizer, "_now_ist_naive", lambda: datetime(2026, 2, 12, 9, 15, 0))
+    finalizer._finalizer_tick()  # noqa: SLF001
+    assert runs == ["catch_up"] and events == []
+
+    # Past the deadline without a run, the day is reported as missed.
+    monkeypatch.setattr(finalizer, "_as_of_date_ist", lambda _dt: date(2026, 2, 13))
+    monkeypatch.setattr(finalizer, "_now_ist_naive", lambda: datetime(2026, 2, 13, 9, 20, 0))
+    finalizer._finalizer_tick()  # noqa: SLF001
+    assert runs == ["catch_up"]
+    assert events == ["Holdings summary finalization missed window"]
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import math
+import random
+from array import array
+
+import pytest
+
+from app.services import indicator_kernels as k
+from app.services.backtests_strategy import (
+    _compute_rsi_series,
+    _compute_sma_series,
+    _compute_volatility_pct_series,
+    _compute_vwap_series,
+)
+
+NAN = float("nan")
+
+
+# Reference implementations: the window-rescanning versions the kernels replace.
+
+
+def _ref_sma(values, length):
+    out = [NAN] * len(values)
+    for i in range(length - 1, len(values)):
+        window = values[i - length + 1 : i + 1]
+        if all(math.isfinite(v) for v in window):
+            out[i] = sum(window) / length
+    return out
+
+
+def _ref_agg(values, length, fn):
+    out = [NAN] * len(values)
+    for i in range(length - 1, len(values)):
+        window = values[i - length + 1 : i + 1]
+        if all(math.isfinite(v) for v in window):
+            out[i] = fn(window)
+    return out
+
+
+def _ref_std(values, length):
+    out = [NAN] * len(values)
+    for i in range(length - 1, len(values)):
+        window = values[i - length + 1 : i + 1]
+        if all(math.isfinite(v) for v in window):
+            mean = sum(window) / length
+            out[i] = math.sqrt(sum((v - mean) ** 2 for v in window) / (length - 1))
+    return out
+
+
+def _ref_ema(values, length):
+    out = [NAN] * len(values)
+    k_ = 2.0 / (length + 1.0)
+    start = None
+    for i in range(length - 1, len(values)):
+        if all(math.isfinite(v) for v in values[i - length + 1 : i + 1]):
+            start = i
+            break
+    if start is None:
+        return out
+    ema = sum(values[start - length + 1 : start + 1]) / length
+    out[start] = ema
+    for i in range(start + 1, len(values)):
+        v = values[i]
+        ema = NAN if not math.isfinite(v) or not math.isfinite(ema) else v * k_ + ema * (1 - k_)
+        out[i] = ema
+    return out
+
+
+def _ref_strategy_rsi(closes, period):
+    n = len(closes)
+    out = [None] * n
+    if n < period + 1:
+        return out
+    gains = [0.0] * n
+    losses = [0.0] * n
+    for i in range(1, n):
+        d = closes[i] - closes[i - 1]
+        gains[i] = d if d > 0 else 0.0
+        losses[i] = -d if d < 0 else 0.0
+    g = sum(gains[1 : period + 1]) / period
+    lo = sum(losses[1 : period + 1]) / period
+
+    def _rsi(a, b):
+        return 100.0 if b <= 0 else 100.0 - 100.0 / (1.0 + a / b)
+
+    out[period] = _rsi(g, lo)
+    for i in range(period + 1, n):
+        g = (g * (period - 1) + gains[i]) / period
+        lo = (lo * (period - 1) + losses[i]) / period
+        out[i] = _rsi(g, lo)
+    return out
+
+
+def _series(n: int, *, seed: int, gaps: bool) -> list[float]:
+    rng = random.Random(seed)
+    price = 1000.0
+    out = []
+    for i in range(n):
+        price = max(1.0, price + rng.gauss(0, 5))
+        out.append(NAN if gaps and i in {3, 57, 58, 140} else price)
+    return out
+
+
+def _same(a, b, *, rel: float = 0.0) -> None:
+    assert len(a) == len(b)
+    for x, y in zip(a, b, strict=True):
+        if x is None or y is None:
+            assert x is None and y is None
+        elif math.isnan(x) or math.isnan(y):
+            assert math.isnan(x) and math.isnan(y)
+        elif rel:
+            assert x == pytest.approx(y, rel=rel, abs=1e-9)
+        else:
+            assert x == y
+
+
+@pytest.mark.parametrize("gaps", [False, True])
+@pytest.mark.parametrize("length", [1, 2, 5, 14, 50])
+def test_rolling_kernels_match_window_rescans(gaps: bool, length: int) -> None:
+    values = _series(300, seed=length, gaps=gaps)
+
+    _same(k.sma(values, length), _ref_sma(values, length), rel=1e-12)
+    _same(k.rolling_sum(values, length), _ref_agg(values, length, sum), rel=1e-12)
+    _same(k.rolling_max(values, length), _ref_agg(values, length, max))
+    _same(k.rolling_min(values, length), _ref_agg(values, length, min))
+    if length > 1:
+        _same(k.rolling_std(values, length), _ref_std(values, length), rel=1e-9)
+    _same(k.ema(values, length), _ref_ema(values, length))
+
+
+def test_kernels_accept_array_columns() -> None:
+    values = _series(120, seed=7, gaps=False)
+    col = array("d", values)
+    _same(k.sma(col, 10), k.sma(values, 10))
+    _same(k.rsi(col, 14), k.rsi(values, 14))
+    assert k.binary(col, col, "/")[0] == 1.0
+
+
+def test_binary_and_unary_handle_missing_values() -> None:
+    a = [1.0, NAN, 4.0, 6.0]
+    b = [2.0, 1.0, 0.0]
+    _same(k.binary(a, b, "+"), [3.0, NAN, 4.0])
+    _same(k.binary(a, b, "/"), [0.5, NAN, NAN])
+    _same(k.unary(a, "-"), [-1.0, NAN, -4.0, -6.0])
+    with pytest.raises(ValueError):
+        k.binary(a, b, "%")
+
+
+def test_strategy_series_match_previous_implementations() -> None:
+    closes = _series(400, seed=11, gaps=False)
+    highs = [c + 3.0 for c in closes]
+    lows = [c - 3.0 for c in closes]
+    vols = [float(1000 + (i % 17) * 10) for i in range(len(closes))]
+
+    _same(_compute_rsi_series(closes, 14), _ref_strategy_rsi(closes, 14))
+    _same(
+        _compute_sma_series(closes, 20),
+        [None if math.isnan(v) else v for v in _ref_sma(closes, 20)],
+        rel=1e-12,
+    )
+
+    ref_vol: list[float | None] = [None] * len(closes)
+    for i in range(20, len(closes)):
+        rets = [math.log(closes[j] / closes[j - 1]) for j in range(i - 19, i + 1)]
+        mean = sum(rets) / len(rets)
+        ref_vol[i] = math.sqrt(sum((r - mean) ** 2 for r in rets) / (len(rets) - 1)) * 100.0
+    _same(_compute_volatility_pct_series(closes, 20), ref_vol, rel=1e-9)
+
+    ref_vwap: list[float | None] = [None] * len(closes)
+    for i in range(9, len(closes)):
+        num = sum((highs[j] + lows[j] + closes[j]) / 3.0 * vols[j] for j in range(i - 9, i + 1))
+        ref_vwap[i] = num / sum(vols[i - 9 : i + 1])
+    _same(_compute_vwap_series(highs, lows, closes, vols, 10), ref_vwap, rel=1e-12)
+
+
+def test_rolling_std_stays_accurate_over_long_series() -> None:
+    values = [100_000.0 + math.sin(i / 7.0) for i in range(20_000)]
+    got = k.rolling_std(values, 30)
+    ref = _ref_std(values[-200:], 30)
+    _same(got[-171:], ref[-171:], rel=1e-9)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+import random
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import Candle
+from app.services import indicator_kernels as k
+from app.services.alerts_v3_dsl import parse_v3_expression
+from app.services.alerts_v3_expression import CandleCache, _eval_numeric
+from app.services.candle_columns import CandleColumns
+from app.services.candle_store import CandleSeries
+from app.services.indicator_state import (
+    AtrStepper,
+    EmaStepper,
+    IndicatorStateStore,
+    RsiStepper,
+    SupertrendStepper,
+    get_indicator_state_store,
+    hlc_step,
+    source_step,
+)
+
+client = TestClient(app)
+
+NAN = float("nan")
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _bars(n: int, *, seed: int, gaps: bool = False) -> list[tuple[float, float, float]]:
+    rng = random.Random(seed)
+    price = 500.0
+    out = []
+    for i in range(n):
+        price = max(1.0, price + rng.gauss(0, 4))
+        h = price + abs(rng.gauss(0, 2))
+        lo = price - abs(rng.gauss(0, 2))
+        if gaps and i in {2, 40, 41}:
+            out.append((NAN, NAN, NAN))
+        else:
+            out.append((h, lo, price))
+    return out
+
+
+def _same(a: list[float], b: list[float]) -> None:
+    assert len(a) == len(b)
+    for x, y in zip(a, b, strict=True):
+        assert (math.isnan(x) and math.isnan(y)) or x == y
+
+
+def test_steppers_match_series_kernels_exactly() -> None:
+    for gaps in (False, True):
+        bars = _bars(200, seed=3, gaps=gaps)
+        highs = [b[0] for b in bars]
+        lows = [b[1] for b in bars]
+        closes = [b[2] for b in bars]
+
+        ema = EmaStepper(12)
+        _same([ema.step(c) for c in closes], k.ema(closes, 12))
+        rsi = RsiStepper(14)
+        _same([rsi.step(c) for c in closes], k.rsi(closes, 14))
+        atr = AtrStepper(14)
+        _same([atr.step(h, lo, c) for h, lo, c in bars], k.atr(highs, lows, closes, 14))
+
+        st = SupertrendStepper(10, 3.0)
+        got = [st.step(h, lo, c) for h, lo, c in bars]
+        hl2 = [
+            (h + lo) / 2.0 if math.isfinite(h) and math.isfinite(lo) else NAN
+            for h, lo in zip(highs, lows, strict=True)
+        ]
+        line, direction = k.supertrend(
+            highs=highs, lows=lows, closes=closes, source=hl2, length=10, multiplier=3.0
+        )
+        _same([g[0] for g in got], line)
+        _same([g[1] for g in got], direction)
+
+
+def _columns(bars: list[tuple[float, float, float]]) -> CandleColumns:
+    start = datetime(2024, 1, 1)
+    return CandleColumns.from_tuples(
+        (start + timedelta(days=i), c, h, lo, c, 100.0)
+        for i, (h, lo, c) in enumerate(bars)
+    )
+
+
+def test_store_advances_state_for_appended_bars() -> None:
+    bars = _bars(120, seed=5)
+    full = _columns(bars)
+    store = IndicatorStateStore(max_entries=10)
+    key = ("NSE", "X", "1d", "RSI", "close", 14)
+    factory = lambda: RsiStepper(14)  # noqa: E731
+    step = source_step("close")
+
+    first = CandleSeries(full.slice(0, 100))
+    store.evaluate(key, first, factory=factory, step=step)
+    assert store.stats()["rebuilds"] == 1
+
+    # Same lineage: bars appended and the previous last (live) bar replaced.
+    second = CandleSeries(full.slice(0, 110), lineage=first.lineage)
+    now, prev = store.evaluate(key, second, factory=factory, step=step)
+    expected = k.rsi(list(full.close[:110]), 14)
+    assert now == expected[-1]
+    assert prev == expected[-2]
+    stats = store.stats()
+    assert stats["incremental"] == 1
+    # Only the bars after the committed one were stepped.
+    assert stats["bars_stepped"] == 100 + 11
+
+    # A new lineage (full reload) rebuilds from scratch.
+    third = CandleSeries(full.slice(0, 110))
+    store.evaluate(key, third, factory=factory, step=step)
+    assert store.stats()["rebuilds"] == 2
+
+
+def test_store_evaluates_live_bar_without_committing_it() -> None:
+    bars = _bars(60, seed=9)
+    full = _columns(bars)
+    store = IndicatorStateStore(max_entries=10)
+    key = ("NSE", "Y", "1d", "ATR", 14)
+    factory = lambda: AtrStepper(14)  # noqa: E731
+
+    first = CandleSeries(full)
+    store.evaluate(key, first, factory=factory, step=hlc_step)
+
+    # The live bar changes in place; the result must reflect the new values.
+    revised = list(bars)
+    h, lo, c = revised[-1]
+    revised[-1] = (h + 10.0, lo, c + 5.0)
+    second = CandleSeries(_columns(revised), lineage=first.lineage)
+    now, prev = store.evaluate(key, second, factory=factory, step=hlc_step)
+
+    expected = k.atr(
+        [b[0] for b in revised], [b[1] for b in revised], [b[2] for b in revised], 14
+    )
+    assert now == expected[-1]
+    assert prev == expected[-2]
+    assert store.stats()["incremental"] == 1
+
+
+def test_alert_indicators_stream_and_match_full_recompute() -> None:
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    bars = _bars(80, seed=21)
+    with SessionLocal() as session:
+        for i, (h, lo, c) in enumerate(bars):
+            session.add(
+                Candle(
+                    symbol="STREAM",
+                    exchange="NSE",
+                    timeframe="1d",
+                    ts=today - timedelta(days=len(bars) - 1 - i),
+                    open=c,
+                    high=h,
+                    low=lo,
+                    close=c,
+                    volume=1000.0,
+                )
+            )
+        session.commit()
+
+    settings = get_settings()
+    legacy = settings.model_copy(update={"alerts_v3_incremental_indicators": False})
+    store = get_indicator_state_store()
+    exprs = [
+        'EMA(close, 10, "1d")',
+        'RSI(CLOSE("1d"), 14, "1d")',
+        'ATR(14, "1d")',
+        'SUPERTREND_LINE(10, 3, "1d")',
+        'SUPERTREND_DIR(10, 3, "1d")',
+    ]
+    with SessionLocal() as db:
+        for raw in exprs:
+            node = parse_v3_expression(raw)
+            results = []
+            for cfg in (settings, settings, legacy):
+                cache = CandleCache(db, cfg, "STREAM", "NSE", allow_fetch=False)
+                results.append(
+                    _eval_numeric(
+                        node,
+                        db=db,
+                        settings=cfg,
+                        cache=cache,
+                        holding=None,
+                        params={},
+                        custom_indicators={},
+                        allow_fetch=False,
+                    )
+                )
+            streamed, again, full = results
+            assert streamed.now is not None
+            assert (streamed.now, streamed.prev) == (full.now, full.prev), raw
+            assert (again.now, again.prev) == (full.now, full.prev), raw
+
+    assert store.stats()["incremental"] >= len(exprs)
+    res = client.get("/api/market/indicator-state")
+    assert res.status_code == 200
+    assert res.json()["entries"] >= 4
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import BrokerInstrument, Listing, Security
+from app.services import instruments_sync
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+class _FakeKite:
+    def __init__(self, by_exchange: dict[str, list[dict]]) -> None:
+        self.by_exchange = by_exchange
+
+    def instruments(self, exchange: str) -> list[dict]:
+        if exchange not in self.by_exchange:
+            raise RuntimeError("exchange unavailable")
+        return self.by_exchange[exchange]
+
+
+def _kite_row(exchange: str, symbol: str, token: int, isin: str | None, name: str) -> dict:
+    return {
+        "exchange": exchange,
+        "tradingsymbol": symbol,
+        "instrument_token": token,
+        "isin": isin or "",
+        "name": name,
+    }
+
+
+def _seed_existing() -> None:
+    with SessionLocal() as session:
+        sec = Security(isin="INE009A01021", name=None, active=True)
+        session.add(sec)
+        session.flush()
+        infy = Listing(exchange="NSE", symbol="INFY", name=None, security_id=sec.id, active=True)
+        old = Listing(exchange="NSE", symbol="OLDCO", name="Old Co", active=True)
+        session.add_all([infy, old])
+        session.flush()
+        session.add_all(
+            [
+                BrokerInstrument(
+                    listing_id=infy.id,
+                    broker_name="zerodha",
+                    exchange="NSE",
+                    broker_symbol="INFY",
+                    instrument_token="408065",
+                    isin=None,
+                    active=True,
+                ),
+                BrokerInstrument(
+                    listing_id=old.id,
+                    broker_name="zerodha",
+                    exchange="NSE",
+                    broker_symbol="OLDCO",
+                    instrument_token="1",
+                    active=True,
+                ),
+                BrokerInstrument(
+                    listing_id=old.id,
+                    broker_name="zerodha",
+                    exchange="BSE",
+                    broker_symbol="OLDCO",
+                    instrument_token="2",
+                    active=True,
+                ),
+            ]
+        )
+        session.commit()
+
+
+def test_zerodha_sync_applies_only_the_diff(monkeypatch) -> None:
+    _seed_existing()
+    master = {
+        "NSE": [
+            _kite_row("NSE", "INFY", 408065, "INE009A01021", "INFOSYS"),
+            _kite_row("NSE", "TCS", 2953217, "INE467B01029", "TATA CONSULTANCY"),
+            _kite_row("NSE", "NIFTY 50", 256265, None, "NIFTY 50"),
+        ],
+        # BSE master cannot be fetched: its instruments must stay active.
+    }
+    monkeypatch.setattr(
+        instruments_sync, "_get_kite_client", lambda _db, _settings: _FakeKite(master)
+    )
+
+    with SessionLocal() as session:
+        result = instruments_sync.sync_zerodha_instrument_master(session, get_settings())
+
+    assert result["processed"] == 3
+    assert result["securities"] == {"inserted": 1, "updated": 1}
+    assert result["listings"] == {"inserted": 2, "updated": 1}
+    assert result["instruments"]["inserted"] == 2
+    assert result["instruments"]["updated"] == 1
+    assert result["instruments"]["deactivated"] == 1
+    assert {"load", "diff", "securities", "listings", "broker_instruments", "fetch"} <= set(
+        result["timings_ms"]
+    )
+
+    with SessionLocal() as session:
+        infy = session.query(Listing).filter(Listing.symbol == "INFY").one()
+        assert infy.name == "INFOSYS"
+        assert session.get(Security, infy.security_id).name == "INFOSYS"
+        tcs = session.query(Listing).filter(Listing.symbol == "TCS").one()
+        tcs_bi = (
+            session.query(BrokerInstrument)
+            .filter(BrokerInstrument.instrument_token == "2953217")
+            .one()
+        )
+        assert tcs_bi.listing_id == tcs.id
+        assert tcs_bi.isin == "INE467B01029"
+        infy_bi = (
+            session.query(BrokerInstrument)
+            .filter(BrokerInstrument.instrument_token == "408065")
+            .one()
+        )
+        assert infy_bi.isin == "INE009A01021"
+        by_token = {
+            bi.instrument_token: bi.active
+            for bi in session.query(BrokerInstrument).filter(
+                BrokerInstrument.broker_name == "zerodha"
+            )
+        }
+        assert by_token["1"] is False
+        assert by_token["2"] is True
+
+    # Re-running the same master writes nothing.
+    with SessionLocal() as session:
+        again = instruments_sync.sync_zerodha_instrument_master(session, get_settings())
+    assert again["securities"] == {"inserted": 0, "updated": 0}
+    assert again["listings"] == {"inserted": 0, "updated": 0}
+    assert again["instruments"] == {
+        "inserted": 0,
+        "updated": 0,
+        "deactivated": 0,
+        "unchanged": 3,
+    }
+
+
+def _serve_smartapi_payload(monkeypatch, payload: list[dict]) -> None:
+    class _Resp:
+        def raise_for_status(self) -> None:
+            return None
+
+        def json(self):
+            return payload
+
+    class _Client:
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc) -> None:
+            return None
+
+        def get(self, _url):
+            return _Resp()
+
+    monkeypatch.setattr(instruments_sync.httpx, "Client", _Client)
+
+
+def test_smartapi_sync_reuses_canonical_symbol_by_isin(monkeypatch) -> None:
+    payload = [
+        {
+            "exch_seg": "NSE",
+            "symbol": "TCS-EQ",
+            "token": "11536",
+            "isin": "INE467B01029",
+            "name": "TCS",
+        },
+        {
+            "exch_seg": "NSE",
+            "symbol": "NEWCO-EQ",
+            "token": "99999",
+            "isin": "",
+            "name": "NEWCO",
+        },
+        {"exch_seg": "NFO", "symbol": "NIFTY24FUT", "token": "5", "name": "NIFTY"},
+    ]
+    _serve_smartapi_payload(monkeypatch, payload)
+
+    with SessionLocal() as session:
+        result = instruments_sync.sync_smartapi_instrument_master(
+            session, get_settings(), url="http://example.invalid/master.json"
+        )
+    assert result["processed"] == 2
+    assert result["instruments"]["inserted"] == 2
+
+    with SessionLocal() as session:
+        rows = {
+            bi.broker_symbol: session.get(Listing, bi.listing_id).symbol
+            for bi in session.query(BrokerInstrument).filter(
+                BrokerInstrument.broker_name == "angelone"
+            )
+        }
+    assert rows == {"TCS-EQ": "TCS", "NEWCO-EQ": "NEWCO"}
+
+
+def test_smartapi_sync_without_usable_rows_keeps_instruments_active(monkeypatch) -> None:
+    payload = [
+        {"exch_seg": "NFO", "symbol": "NIFTY24FUT", "token": "5", "name": "NIFTY"},
+        {"exch_seg": "NSE", "symbol": "", "token": "11536", "name": "TCS"},
+        {"exchange_segment": "NSE", "symbol": "INFY-EQ", "token": "1594"},
+    ]
+    _serve_smartapi_payload(monkeypatch, payload)
+
+    with SessionLocal() as session:
+        before = (
+            session.query(BrokerInstrument)
+            .filter(BrokerInstrument.broker_name == "angelone", BrokerInstrument.active.is_(True))
+            .count()
+        )
+        result = instruments_sync.sync_smartapi_instrument_master(
+            session, get_settings(), url="http://example.invalid/master.json"
+        )
+    assert before > 0
+    assert result["processed"] == 0
+    assert result["instruments"]["deactivated"] == 0
+    assert result["timings_ms"]["total"] >= result["timings_ms"]["fetch"]
+
+    with SessionLocal() as session:
+        after = (
+            session.query(BrokerInstrument)
+            .filter(BrokerInstrument.broker_name == "angelone", BrokerInstrument.active.is_(True))
+            .count()
+        )
+    assert after == before
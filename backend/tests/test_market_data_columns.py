@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import Candle
+from app.services.backtests_data import UniverseSymbolRef, load_eod_close_matrix
+from app.services.market_data import (
+    history_extend_segments,
+    load_latest_closes,
+    load_recent_bars_many,
+    load_series,
+    load_series_columns,
+    load_series_columns_many,
+)
+
+_START = datetime(2024, 1, 1)
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _insert_minutes(symbol: str, *, days: int, start: datetime = _START) -> int:
+    """Insert 375 one-minute bars per weekday via Core executemany."""
+
+    rows: list[dict] = []
+    day = start
+    price = 100.0
+    while day < start + timedelta(days=days):
+        if day.weekday() < 5:
+            ts = day.replace(hour=9, minute=15)
+            for i in range(375):
+                price += 0.05 if (i % 7) < 4 else -0.05
+                rows.append(
+                    {
+                        "symbol": symbol,
+                        "exchange": "NSE",
+                        "timeframe": "1m",
+                        "ts": ts + timedelta(minutes=i),
+                        "open": price,
+                        "high": price + 0.2,
+                        "low": price - 0.2,
+                        "close": price + 0.1,
+                        "volume": float(100 + i),
+                    }
+                )
+        day += timedelta(days=1)
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 20_000):
+            conn.execute(Candle.__table__.insert(), rows[i : i + 20_000])
+    return len(rows)
+
+
+def _insert_daily(symbol: str, closes: list[float]) -> None:
+    with SessionLocal() as session:
+        for i, close in enumerate(closes):
+            session.add(
+                Candle(
+                    symbol=symbol,
+                    exchange="NSE",
+                    timeframe="1d",
+                    ts=_START + timedelta(days=i),
+                    open=close - 1.0,
+                    high=close + 1.0,
+                    low=close - 2.0,
+                    close=close,
+                    volume=1000.0,
+                )
+            )
+        session.commit()
+
+
+@pytest.mark.parametrize("timeframe", ["1m", "5m", "15m", "1h", "1d", "1mo", "1y"])
+def test_load_series_columns_matches_dict_path(timeframe: str) -> None:
+    symbol = f"COLPAR{timeframe.upper()}"
+    _insert_minutes(symbol, days=10)
+    _insert_daily(symbol, [100.0 + i for i in range(60)])
+    settings = get_settings()
+    kwargs = dict(
+        symbol=symbol,
+        exchange="NSE",
+        timeframe=timeframe,
+        start=_START,
+        end=_START + timedelta(days=90),
+        allow_fetch=False,
+    )
+
+    with SessionLocal() as db:
+        rows = load_series(db, settings, **kwargs)
+        cols = load_series_columns(db, settings, **kwargs)
+
+    assert rows
+    assert cols.to_rows() == rows
+    assert cols.datetimes() == [r["ts"] for r in rows]
+    assert cols.dates() == [r["ts"].date() for r in rows]
+
+
+def test_eod_close_matrix_reads_columnar_series() -> None:
+    _insert_daily("COLEOD", [50.0, 51.0, 0.0, 53.0])
+    settings = get_settings()
+    with SessionLocal() as db:
+        dates, matrix, missing = load_eod_close_matrix(
+            db,
+            settings,
+            symbols=[
+                UniverseSymbolRef(exchange="NSE", symbol="COLEOD"),
+                UniverseSymbolRef(exchange="NSE", symbol="COLNONE"),
+            ],
+            start=_START,
+            end=_START + timedelta(days=10),
+            allow_fetch=False,
+        )
+
+    # Non-positive closes are skipped, matching the dict-based loader.
+    assert dates == [(_START + timedelta(days=i)).date() for i in (0, 1, 3)]
+    assert matrix["NSE:COLEOD"] == [50.0, 51.0, 53.0]
+    assert missing == ["NSE:COLNONE"]
+
+
+@pytest.mark.parametrize("timeframe", ["1d", "5m", "1mo"])
+def test_load_series_columns_many_matches_per_symbol(timeframe: str) -> None:
+    symbols = [f"BULK{timeframe.upper()}{i}" for i in range(3)]
+    for i, symbol in enumerate(symbols):
+        _insert_minutes(symbol, days=3 + i)
+        _insert_daily(symbol, [100.0 + i + d for d in range(40)])
+    settings = get_settings()
+    pairs = [(s, "NSE") for s in symbols] + [("BULKNONE", "NSE")]
+    window = dict(
+        timeframe=timeframe,
+        start=_START,
+        end=_START + timedelta(days=60),
+        allow_fetch=False,
+    )
+
+    with SessionLocal() as db:
+        bulk = load_series_columns_many(db, settings, pairs=pairs, **window)
+        for symbol, exchange in pairs:
+            single = load_series_columns(
+                db, settings, symbol=symbol, exchange=exchange, **window
+            )
+            assert bulk[(symbol, exchange)].to_rows() == single.to_rows()
+
+    assert len(bulk[("BULKNONE", "NSE")]) == 0
+
+
+def test_latest_closes_and_recent_bars_use_bulk_queries() -> None:
+    symbols = [f"BULKLAST{i}" for i in range(30)]
+    for i, symbol in enumerate(symbols):
+        _insert_daily(symbol, [10.0 * (i + 1) + d for d in range(25)])
+    pairs = [(s, "NSE") for s in symbols] + [("BULKLASTNONE", "NSE")]
+
+    statements: list[str] = []
+
+    def _count(*_args) -> None:  # type: ignore[no-untyped-def]
+        statements.append("x")
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        with SessionLocal() as db:
+            latest = load_latest_closes(db, pairs=pairs)
+            recent = load_recent_bars_many(db, pairs=pairs, timeframe="1d", limit=20)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert len(statements) == 2
+    assert latest[("BULKLAST0", "NSE")] == (_START + timedelta(days=24), 34.0)
+    assert latest[("BULKLAST29", "NSE")][1] == 324.0
+    assert ("BULKLASTNONE", "NSE") not in latest and ("BULKLASTNONE", "NSE") not in recent
+    cols = recent[("BULKLAST1", "NSE")]
+    assert list(cols.close) == [20.0 + d for d in range(5, 25)]
+    assert cols.datetimes()[-1] == _START + timedelta(days=24)
+
+
+def test_history_extend_segments_match_stored_bounds() -> None:
+    now = datetime(2026, 10, 16, 12, 0)
+    start, end = datetime(2026, 1, 1), datetime(2026, 12, 31)
+    stored = (datetime(2026, 3, 1), datetime(2026, 10, 1))
+    sec = timedelta(seconds=1)
+
+    assert history_extend_segments(None, start=start, end=end, now=now) == [(start, now)]
+    assert history_extend_segments(stored, start=start, end=end, now=now) == [
+        (start, stored[0] - sec),
+        (stored[1] + sec, now),
+    ]
+    covered = (start, now)
+    assert history_extend_segments(covered, start=start, end=end, now=now) == []
+    assert history_extend_segments(None, start=now, end=end, now=now) == []
+
+
+@pytest.mark.skipif(
+    not os.getenv("ST_RUN_BENCHMARKS"),
+    reason="set ST_RUN_BENCHMARKS=1 to run the columnar series benchmark",
+)
+def test_benchmark_columns_vs_dicts_on_two_years_of_minutes() -> None:
+    bars = _insert_minutes("COLBENCH", days=730, start=datetime(2022, 1, 1))
+    settings = get_settings()
+    kwargs = dict(
+        symbol="COLBENCH",
+        exchange="NSE",
+        timeframe="1m",
+        start=datetime(2022, 1, 1),
+        end=datetime(2024, 1, 1),
+        allow_fetch=False,
+    )
+
+    def _measure(loader):  # type: ignore[no-untyped-def]
+        with SessionLocal() as db:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            result = loader(db, settings, **kwargs)
+            elapsed = time.perf_counter() - t0
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return result, elapsed, retained, peak
+
+    rows, dict_s, dict_mem, dict_peak = _measure(load_series)
+    del rows
+    cols, col_s, col_mem, col_peak = _measure(load_series_columns)
+
+    print(
+        f"\n{bars} x 1m bars: dicts {dict_s:.2f}s retained={dict_mem / 1e6:.1f}MB "
+        f"peak={dict_peak / 1e6:.1f}MB | columns {col_s:.2f}s "
+        f"retained={col_mem / 1e6:.1f}MB peak={col_peak / 1e6:.1f}MB "
+        f"(arrays={cols.nbytes() / 1e6:.1f}MB)"
+    )
+    assert len(cols) == bars
+    assert col_mem < dict_mem / 4
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.services.portfolio_math import (
+    covariance_matrix,
+    decode_symmetric_matrix,
+    encode_symmetric_matrix,
+    ledoit_wolf_intensity,
+    risk_contribution_shares,
+    shrink_covariance,
+    solve_risk_parity_erc,
+)
+
+
+def _returns(n: int, t: int, seed: int = 7) -> list[list[float]]:
+    rng = random.Random(seed)
+    return [[rng.gauss(0.0, 0.01 * (i + 1)) for _ in range(t)] for i in range(n)]
+
+
+def _naive_cov(returns: list[list[float]]) -> list[list[float]]:
+    n, t = len(returns), len(returns[0])
+    means = [sum(r) / t for r in returns]
+    return [
+        [
+            sum((returns[i][k] - means[i]) * (returns[j][k] - means[j]) for k in range(t))
+            / (t - 1)
+            for j in range(n)
+        ]
+        for i in range(n)
+    ]
+
+
+def test_covariance_matches_naive_formula() -> None:
+    rets = _returns(6, 50)
+    cov = covariance_matrix(rets)
+    expected = _naive_cov(rets)
+    for i in range(6):
+        for j in range(6):
+            assert cov[i][j] == pytest.approx(expected[i][j], rel=1e-12, abs=1e-18)
+            assert cov[i][j] == cov[j][i]
+
+    with pytest.raises(ValueError):
+        covariance_matrix([[0.01]])
+
+
+def test_matrix_blob_round_trip() -> None:
+    cov = covariance_matrix(_returns(5, 30))
+    blob = encode_symmetric_matrix(cov)
+    assert len(blob) == 8 + 8 * (5 * 6 // 2)
+    assert decode_symmetric_matrix(blob) == cov
+
+    with pytest.raises(ValueError):
+        decode_symmetric_matrix(blob[:-8])
+    with pytest.raises(ValueError):
+        decode_symmetric_matrix(b"JSON" + blob[4:])
+
+
+def test_ledoit_wolf_intensity_matches_definition() -> None:
+    rets = _returns(4, 40)
+    n, t = len(rets), len(rets[0])
+    x = [[v - sum(r) / t for v in r] for r in rets]
+    s = [[sum(x[i][k] * x[j][k] for k in range(t)) / t for j in range(n)] for i in range(n)]
+    mu = sum(s[i][i] for i in range(n)) / n
+    d2 = sum((s[i][j] - (mu if i == j else 0.0)) ** 2 for i in range(n) for j in range(n)) / n
+    b2 = sum(
+        sum((x[i][k] * x[j][k] - s[i][j]) ** 2 for i in range(n) for j in range(n)) / n
+        for k in range(t)
+    ) / (t * t)
+
+    got = ledoit_wolf_intensity(rets)
+    assert got == pytest.approx(min(b2, d2) / d2, rel=1e-9)
+    assert 0.0 <= got <= 1.0
+
+
+def test_shrinkage_targets() -> None:
+    cov = covariance_matrix(_returns(3, 40))
+    assert shrink_covariance(cov, method="none", intensity=0.5) is cov
+
+    diag = shrink_covariance(cov, method="diagonal", intensity=1.0)
+    assert [diag[i][i] for i in range(3)] == [cov[i][i] for i in range(3)]
+    assert diag[0][1] == 0.0 and diag[1][2] == 0.0
+
+    lw = shrink_covariance(cov, method="ledoit_wolf", intensity=1.0)
+    mu = sum(cov[i][i] for i in range(3)) / 3
+    assert [lw[i][i] for i in range(3)] == pytest.approx([mu] * 3)
+
+
+def test_erc_equalizes_risk_contributions() -> None:
+    cov = covariance_matrix(_returns(5, 120))
+    rp = solve_risk_parity_erc(cov, min_weight=0.0, max_weight=1.0, max_iter=2000, tol=1e-10)
+    assert rp.converged
+    assert sum(rp.weights) == pytest.approx(1.0)
+    for share in risk_contribution_shares(cov, rp.weights):
+        assert share == pytest.approx(0.2, abs=1e-8)
+    # Lower-volatility assets receive larger weights.
+    assert rp.weights[0] > rp.weights[-1]
+
+    with pytest.raises(ValueError):
+        solve_risk_parity_erc(cov, min_weight=0.5, max_weight=1.0, max_iter=10, tol=1e-6)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.services import market_quotes
+from app.services.quote_hub import PARTIAL_FAILURE_MESSAGE, QuoteHub
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.prices: dict[tuple[str, str], float] = {}
+        self.quote_calls = 0
+        self.ltp_calls = 0
+        self.fail_quote_for: set[tuple[str, str]] = set()
+
+    def get_quote_bulk(self, instruments):
+        self.quote_calls += 1
+        if any(k in self.fail_quote_for for k in instruments):
+            raise RuntimeError("bad instrument")
+        return {
+            k: {"last_price": self.prices[k], "prev_close": 100.0}
+            for k in instruments
+            if k in self.prices
+        }
+
+    def get_ltp_bulk(self, instruments):
+        self.ltp_calls += 1
+        return {
+            k: {"last_price": self.prices[k], "prev_close": None}
+            for k in instruments
+            if k in self.prices
+        }
+
+    def get_ltp(self, *, exchange, tradingsymbol):  # pragma: no cover - unused
+        return self.prices[(exchange, tradingsymbol)]
+
+
+def teardown_function() -> None:  # type: ignore[override]
+    with market_quotes._cache_lock:
+        market_quotes._cache.clear()
+
+
+def _drain(sub):
+    async def _next():
+        return await asyncio.wait_for(sub.next_update(), timeout=1.0)
+
+    return sub._loop.run_until_complete(_next())
+
+
+def test_hub_polls_once_for_all_subscribers_and_sends_only_changes() -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        hub = QuoteHub(poll_interval_sec=60.0, batch_size=50)
+        fake = FakeClient()
+        fake.prices = {("NSE", "INFY"): 1500.0, ("NSE", "TCS"): 3500.0}
+
+        a = hub.subscribe(client=fake, loop=loop)
+        b = hub.subscribe(client=fake, loop=loop)
+        # Set symbols without starting the background poller.
+        a.keys = (("NSE", "INFY"), ("NSE", "TCS"))
+        b.keys = (("NSE", "TCS"),)
+
+        keys = [("NSE", "INFY"), ("NSE", "TCS")]
+        hub.poll_once(fake, keys)
+        assert fake.quote_calls == 1
+
+        rows_a, err_a = _drain(a)
+        rows_b, err_b = _drain(b)
+        assert err_a is None and err_b is None
+        assert {r["symbol"] for r in rows_a} == {"INFY", "TCS"}
+        assert [r["symbol"] for r in rows_b] == ["TCS"]
+        assert rows_b[0]["ltp"] == 3500.0
+        assert rows_b[0]["prevClose"] == 100.0
+
+        # Only INFY moves: TCS subscriber gets nothing.
+        fake.prices[("NSE", "INFY")] = 1501.0
+        hub.poll_once(fake, keys)
+        assert fake.quote_calls == 2
+        rows_a, _ = _drain(a)
+        assert [r["symbol"] for r in rows_a] == ["INFY"]
+        assert not b._event.is_set()
+
+        # The shared HTTP quote cache is fed by the hub.
+        cached = market_quotes._cache[("NSE", "INFY")][1]
+        assert cached["last_price"] == 1501.0
+
+        stats = hub.stats()
+        assert stats["subscribers"] == 2
+        assert stats["polls"] == 2
+        assert stats["broker_calls"] == 2
+        assert stats["changes_published"] == 3
+    finally:
+        loop.close()
+
+
+def test_hub_falls_back_to_ltp_for_failing_batch_and_flags_partial() -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        hub = QuoteHub(poll_interval_sec=60.0, batch_size=1)
+        fake = FakeClient()
+        fake.prices = {("NSE", "AAA"): 10.0, ("NSE", "BBB"): 20.0}
+        fake.fail_quote_for = {("NSE", "BBB")}
+
+        sub = hub.subscribe(client=fake, loop=loop)
+        sub.keys = (("NSE", "AAA"), ("NSE", "BBB"))
+        hub.poll_once(fake, list(sub.keys))
+
+        rows, error = _drain(sub)
+        assert error == PARTIAL_FAILURE_MESSAGE
+        by_sym = {r["symbol"]: r for r in rows}
+        assert by_sym["AAA"]["prevClose"] == 100.0
+        assert by_sym["BBB"]["ltp"] == 20.0
+        assert by_sym["BBB"]["prevClose"] is None
+        assert fake.quote_calls == 2
+        assert fake.ltp_calls == 1
+    finally:
+        loop.close()
+
+
+def test_new_subscriber_receives_last_known_quotes() -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        hub = QuoteHub(poll_interval_sec=60.0, batch_size=50)
+        fake = FakeClient()
+        fake.prices = {("NSE", "INFY"): 1500.0}
+
+        first = hub.subscribe(client=fake, loop=loop)
+        first.keys = (("NSE", "INFY"),)
+        hub.poll_once(fake, [("NSE", "INFY")])
+
+        late = hub.subscribe(client=fake, loop=loop)
+        hub.set_symbols(late, [("NSE", "INFY")])
+        rows, _ = _drain(late)
+        assert rows[0]["ltp"] == 1500.0
+
+        hub.unsubscribe(first)
+        hub.unsubscribe(late)
+        assert hub.stats()["subscribers"] == 0
+    finally:
+        loop.close()
+
+
+def test_hub_polls_each_owner_with_its_own_client() -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        hub = QuoteHub(poll_interval_sec=60.0, batch_size=50)
+        alice, bob = FakeClient(), FakeClient()
+        alice.prices = {("NSE", "INFY"): 1500.0}
+        bob.prices = {("NSE", "INFY"): 1499.0, ("NSE", "TCS"): 3500.0}
+
+        a = hub.subscribe(client=alice, loop=loop, owner=1)
+        b = hub.subscribe(client=bob, loop=loop, owner=2)
+        a.keys = (("NSE", "INFY"),)
+        b.keys = (("NSE", "INFY"), ("NSE", "TCS"))
+        hub._poll_owners({1: (alice, list(a.keys)), 2: (bob, list(b.keys))})
+
+        assert alice.quote_calls == 1 and bob.quote_calls == 1
+        rows_a, _ = _drain(a)
+        rows_b, _ = _drain(b)
+        assert [r["ltp"] for r in rows_a] == [1500.0]
+        assert {r["symbol"]: r["ltp"] for r in rows_b} == {"INFY": 1499.0, "TCS": 3500.0}
+        assert hub.stats()["owners"] == 2
+    finally:
+        loop.close()
+
+
+def test_hung_broker_call_times_out_and_skips_owner_until_it_returns() -> None:
+    loop = asyncio.new_event_loop()
+    release = threading.Event()
+    try:
+        hub = QuoteHub(poll_interval_sec=60.0, batch_size=50, fetch_timeout_sec=0.05)
+        stuck = FakeClient()
+        stuck.prices = {("NSE", "INFY"): 1500.0}
+        stuck.get_quote_bulk = lambda instruments: release.wait(5.0) and {}  # type: ignore[method-assign]
+
+        sub = hub.subscribe(client=stuck, loop=loop, owner=7)
+        sub.keys = (("NSE", "INFY"),)
+        t0 = time.monotonic()
+        hub.poll_once(stuck, list(sub.keys), owner=7)
+        hub.poll_once(stuck, list(sub.keys), owner=7)
+        assert time.monotonic() - t0 < 1.0
+        assert hub.stats()["fetch_timeouts"] == 1
+        assert not sub._event.is_set()
+    finally:
+        release.set()
+        loop.close()
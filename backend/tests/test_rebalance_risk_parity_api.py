@@ -172,3 +172,22 @@ def test_risk_parity_preview_derives_weights_and_uses_cache(monkeypatch) -> None
     assert res2.status_code == 200, res2.text
     derived2 = res2.json()["results"][0].get("derived_targets") or []
     assert any(bool(d.get("cache_hit")) for d in derived2)
+
+    # With the in-process LRU cleared the packed DB row is reused, and
+    # shrinkage is applied on top of the cached sample covariance.
+    from app.models import RiskCovarianceCache
+    from app.services.rebalance_risk import clear_covariance_lru
+
+    clear_covariance_lru()
+    with SessionLocal() as session:
+        rows = session.query(RiskCovarianceCache).all()
+        assert len(rows) == 1
+        assert rows[0].cov_blob
+
+    payload["risk"]["shrinkage"] = "diagonal"
+    payload["risk"]["shrinkage_intensity"] = 0.5
+    res3 = client.post("/api/rebalance/preview", json=payload)
+    assert res3.status_code == 200, res3.text
+    derived3 = res3.json()["results"][0].get("derived_targets") or []
+    assert all(bool(d.get("cache_hit")) for d in derived3)
+    assert derived3[0]["config"]["shrinkage_intensity"] == 0.5
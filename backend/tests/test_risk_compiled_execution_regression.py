@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import json
 import os
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any, Dict, List
 from uuid import uuid4
@@ -235,3 +237,88 @@ def test_execute_calls_compiler_on_success_path(monkeypatch: Any) -> None:
     assert resp.status_code == 200
     assert called["n"] >= 1
     assert broker.calls, "Expected broker placement call"
+
+
+def test_execute_records_stage_trace_and_latency_stats(monkeypatch: Any) -> None:
+    _seed_base_v2_config(hard_stop_pct=50.0)  # NORMAL
+    order_id = _create_waiting_order_via_webhook()
+
+    from app.api import orders as orders_api
+    from app.services import order_execution_trace as trace_mod
+
+    broker = _SpyBroker()
+
+    def _fake_get_client(db: Any, settings: Any, user_id: int | None = None) -> _SpyBroker:
+        return broker
+
+    monkeypatch.setattr(orders_api, "_get_zerodha_client", _fake_get_client)
+    monkeypatch.setattr(trace_mod, "_stats", trace_mod.OrderExecutionStats())
+
+    resp = client.post(f"/api/orders/{order_id}/execute")
+    assert resp.status_code == 200
+    assert broker.calls
+
+    # Risk sizing is committed once before the broker call, so the stored
+    # order matches what was sent.
+    with SessionLocal() as session:
+        stored = session.get(Order, order_id)
+        assert stored is not None
+        assert int(stored.qty) == int(broker.calls[0]["quantity"])
+
+    trace = client.get(f"/api/orders/{order_id}/execution-trace").json()
+    assert trace["outcome"] == "SENT"
+    assert {"policy", "risk", "sizing", "broker_place", "persistence"} <= set(trace["stages"])
+    assert 0 < trace["broker_ack_ms"] <= trace["total_ms"]
+    place = next(s for s in trace["spans"] if s["stage"] == "broker_place")
+    risk = next(s for s in trace["spans"] if s["stage"] == "risk")
+    assert risk["start_ms"] < place["start_ms"]
+
+    stats = client.get("/api/orders/execution-stats").json()
+    assert stats["outcomes"] == {"SENT": 1}
+    assert stats["execute_to_broker"]["count"] == 1
+    assert stats["execute"]["p99_ms"] >= stats["execute"]["p50_ms"] > 0
+    assert "broker_place" in stats["stages"]
+
+
+def test_trace_waits_for_callers_open_transaction() -> None:
+    order_id = _create_waiting_order_via_webhook()
+
+    from app.api import orders as orders_api
+    from app.services.order_execution_trace import OrderExecutionTrace
+
+    trace = OrderExecutionTrace(order_id)
+    trace.finish("http_400")
+    with SessionLocal() as db:
+        # Flushed but uncommitted write on the same row, as left behind by an
+        # execute that raised before committing.
+        db.get(Order, order_id).error_message = "uncommitted"
+        db.flush()
+        t0 = time.monotonic()
+        orders_api._best_effort_store_execution_trace(db, trace)
+        assert time.monotonic() - t0 < 1.0
+        db.rollback()
+
+    with SessionLocal() as session:
+        stored = session.get(Order, order_id)
+        assert stored is not None
+        assert stored.error_message != "uncommitted"
+        assert json.loads(stored.execution_trace_json or "{}")["outcome"] == "http_400"
+
+
+def test_webhook_to_broker_latency_includes_queue_time() -> None:
+    from app.services.order_execution_trace import OrderExecutionStats, OrderExecutionTrace
+
+    trace = OrderExecutionTrace(1)
+    trace.origin_at = trace.started_at - timedelta(milliseconds=250)
+    with trace.span("broker_place"):
+        pass
+    trace.mark_broker_ack()
+    trace.finish("SENT")
+    assert trace.webhook_to_broker_ms is not None
+    assert trace.webhook_to_broker_ms >= 250.0
+
+    stats = OrderExecutionStats()
+    stats.record(trace)
+    out = stats.as_dict()
+    assert out["webhook_to_broker"]["count"] == 1
+    assert out["webhook_to_broker"]["p50_ms"] >= 250.0
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import os
+from datetime import UTC, datetime, timedelta
+
+from app.api.risk_engine import rebuild_risk_pnl_state
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import AnalyticsTrade, Order, RiskPnlState, User
+from app.services.analytics import rebuild_trades
+from app.services.risk_engine import compute_portfolio_pnl_state
+from app.services.risk_pnl_state import check_pnl_state, replay_pnl
+
+_T0 = datetime(2026, 3, 2, 4, 0, tzinfo=UTC)  # 09:30 IST
+
+
+def setup_module() -> None:  # type: ignore[override]
+    os.environ["ST_TRADINGVIEW_WEBHOOK_SECRET"] = "pnl-state-secret"
+    get_settings.cache_clear()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def setup_function() -> None:  # type: ignore[override]
+    with SessionLocal() as session:
+        session.query(AnalyticsTrade).delete()
+        session.query(Order).delete()
+        session.query(RiskPnlState).delete()
+        session.commit()
+
+
+def _user_id(username: str) -> int:
+    with SessionLocal() as session:
+        user = session.query(User).filter(User.username == username).one_or_none()
+        if user is None:
+            user = User(username=username, password_hash="x", role="ADMIN")
+            session.add(user)
+            session.commit()
+        return int(user.id)
+
+
+def _order(symbol: str, side: str, price: float, at: datetime, user_id: int | None) -> Order:
+    return Order(
+        user_id=user_id,
+        symbol=symbol,
+        exchange="NSE",
+        side=side,
+        qty=10,
+        price=price,
+        order_type="LIMIT",
+        product="CNC",
+        gtt=False,
+        status="EXECUTED",
+        mode="AUTO",
+        simulated=False,
+        created_at=at,
+        updated_at=at,
+    )
+
+
+def _seed_round_trips(pnls: list[float], *, start: datetime, user_id: int | None, tag: str) -> None:
+    """Seed one BUY/SELL pair per P&L value, one hour apart."""
+
+    with SessionLocal() as session:
+        for i, pnl in enumerate(pnls):
+            at = start + timedelta(hours=i)
+            symbol = f"{tag}{i}"
+            session.add(_order(symbol, "BUY", 100.0, at, user_id))
+            session.add(_order(symbol, "SELL", 100.0 + pnl / 10.0, at + timedelta(minutes=30), user_id))
+        session.commit()
+
+
+def _state(user_id: int | None, now: datetime):
+    with SessionLocal() as session:
+        out = compute_portfolio_pnl_state(
+            session, user_id=user_id, baseline_equity=100_000.0, now_utc=now
+        )
+        session.commit()
+        return out
+
+
+def _assert_parity(user_id: int | None) -> None:
+    with SessionLocal() as session:
+        result = check_pnl_state(session, user_id=user_id)
+        assert result["ok"], result
+
+
+def test_incremental_state_matches_full_replay() -> None:
+    uid = _user_id("pnl-alice")
+    _seed_round_trips([500.0, -200.0, 300.0], start=_T0, user_id=uid, tag="A")
+    with SessionLocal() as session:
+        assert rebuild_trades(session) == 3
+
+    first = _state(uid, _T0 + timedelta(hours=6))
+    assert first.equity == 100_600.0
+    assert first.peak_equity == 100_600.0
+    assert first.pnl_today == 600.0
+    assert first.consecutive_losses == 0
+
+    # Next day: two losses appended through rebuild_trades (incremental path).
+    next_day = _T0 + timedelta(days=1)
+    _seed_round_trips([-400.0, -100.0], start=next_day, user_id=uid, tag="B")
+    with SessionLocal() as session:
+        assert rebuild_trades(session) == 2
+        row = session.query(RiskPnlState).filter(RiskPnlState.scope == f"user:{uid}").one()
+        assert row.trade_count == 5
+
+    second = _state(uid, next_day + timedelta(hours=6))
+    assert second.equity == 100_100.0
+    assert second.peak_equity == 100_600.0
+    assert second.pnl_today == -500.0
+    assert second.consecutive_losses == 2
+    assert round(second.drawdown_pct, 6) == round(500.0 / 100_600.0 * 100.0, 6)
+    _assert_parity(uid)
+
+    # Looking back at the first day uses a day-scoped query.
+    back = _state(uid, _T0 + timedelta(hours=6))
+    assert back.pnl_today == 600.0
+    # A later day with no trades has no P&L today.
+    assert _state(uid, _T0 + timedelta(days=5)).pnl_today == 0.0
+
+
+def test_scopes_follow_user_filter_and_unowned_trades() -> None:
+    alice = _user_id("pnl-alice")
+    bob = _user_id("pnl-bob")
+    _seed_round_trips([100.0], start=_T0, user_id=alice, tag="A")
+    _seed_round_trips([-50.0], start=_T0 + timedelta(hours=2), user_id=bob, tag="B")
+    with SessionLocal() as session:
+        rebuild_trades(session)
+
+    # Materialize all three scopes, then append an unowned trade that counts
+    # towards every scope.
+    assert _state(alice, _T0).equity == 100_100.0
+    assert _state(bob, _T0).equity == 99_950.0
+    assert _state(None, _T0).equity == 100_050.0
+
+    _seed_round_trips([20.0], start=_T0 + timedelta(hours=4), user_id=None, tag="N")
+    with SessionLocal() as session:
+        assert rebuild_trades(session) == 1
+
+    assert _state(alice, _T0).equity == 100_120.0
+    assert _state(bob, _T0).equity == 99_970.0
+    assert _state(None, _T0).equity == 100_070.0
+    for uid in (alice, bob, None):
+        _assert_parity(uid)
+
+
+def test_rebuild_endpoint_only_touches_the_callers_scope() -> None:
+    alice = _user_id("pnl-alice")
+    bob = _user_id("pnl-bob")
+    _seed_round_trips([100.0], start=_T0, user_id=alice, tag="A")
+    _seed_round_trips([-50.0], start=_T0 + timedelta(hours=2), user_id=bob, tag="B")
+    with SessionLocal() as session:
+        rebuild_trades(session)
+    _state(alice, _T0)
+    _state(bob, _T0)
+
+    with SessionLocal() as session:
+        caller = session.get(User, alice)
+        out = rebuild_risk_pnl_state(db=session, user=caller)
+        scopes = {r.scope for r in session.query(RiskPnlState).all()}
+
+    assert out["scope"] == f"user:{alice}"
+    assert out["cumulative_pnl"] == 100.0
+    assert scopes == {f"user:{alice}", f"user:{bob}"}
+
+
+def test_out_of_order_and_external_writes_fall_back_to_rebuild() -> None:
+    uid = _user_id("pnl-alice")
+    _seed_round_trips([100.0, 200.0], start=_T0 + timedelta(days=1), user_id=uid, tag="A")
+    with SessionLocal() as session:
+        rebuild_trades(session)
+    assert _state(uid, _T0).equity == 100_300.0
+
+    # A trade that closed before the latest stored one drops the state row.
+    _seed_round_trips([-1000.0], start=_T0, user_id=uid, tag="EARLY")
+    with SessionLocal() as session:
+        rebuild_trades(session)
+        assert session.query(RiskPnlState).count() == 0
+    out = _state(uid, _T0 + timedelta(days=1))
+    assert out.equity == 99_300.0
+    assert out.consecutive_losses == 0
+    _assert_parity(uid)
+
+    # Bulk deletes bypass the incremental path and invalidate all states.
+    with SessionLocal() as session:
+        session.query(AnalyticsTrade).delete()
+        session.commit()
+        assert session.query(RiskPnlState).count() == 0
+        assert replay_pnl(session, user_id=uid).trade_count == 0
+    assert _state(uid, _T0).equity == 100_000.0
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from datetime import UTC, date, datetime
+
+from fastapi.testclient import TestClient
+
+from app.core.market_hours import (
+    IST_OFFSET,
+    ResolvedMarketSession,
+    default_market_session,
+)
+from app.main import app
+from app.services import scheduler as scheduler_mod
+from app.services.scheduler import MarketClock, ScheduledTask, Scheduler
+
+
+def _ist_ts(*args: int) -> float:
+    return (datetime(*args) - IST_OFFSET).replace(tzinfo=UTC).timestamp()
+
+
+def _ist(ts: float) -> datetime:
+    return (datetime.fromtimestamp(ts, UTC) + IST_OFFSET).replace(tzinfo=None)
+
+
+class _WeekdayClock(MarketClock):
+    """Default 09:15-15:30 sessions on weekdays, no DB."""
+
+    def session(self, day: date) -> ResolvedMarketSession:
+        if day.weekday() >= 5:
+            return ResolvedMarketSession(
+                exchange="NSE",
+                date=day,
+                session_type="CLOSED",
+                open_time=None,
+                close_time=None,
+                proxy_close_time=None,
+                preferred_sell_window=(None, None),
+                preferred_buy_window=(None, None),
+                mis_force_flatten_window=(None, None),
+            )
+        return default_market_session(exchange="NSE", day=day)
+
+
+class _FakeTime:
+    def __init__(self, ts: float) -> None:
+        self.ts = ts
+
+    def __call__(self) -> float:
+        return self.ts
+
+
+def _scheduler(now: _FakeTime) -> Scheduler:
+    return Scheduler(max_workers=1, clock=_WeekdayClock(), time_fn=now)
+
+
+def test_interval_tasks_run_inline_and_record_errors() -> None:
+    # Friday 2026-10-16, 10:00 IST.
+    now = _FakeTime(_ist_ts(2026, 10, 16, 10, 0))
+    sched = _scheduler(now)
+    calls: list[float] = []
+
+    def _boom() -> None:
+        raise RuntimeError("broker down")
+
+    sched.add_task(ScheduledTask(name="ok", fn=lambda: calls.append(now.ts), interval_sec=5))
+    sched.add_task(ScheduledTask(name="bad", fn=_boom, interval_sec=5))
+    assert not sched.add_task(ScheduledTask(name="ok", fn=lambda: None, interval_sec=1))
+
+    assert sched.run_pending() == 2
+    now.ts += 2
+    assert sched.run_pending() == 0
+    now.ts += 4
+    assert sched.run_pending() == 2
+
+    stats = sched.stats()["tasks"]
+    assert len(calls) == 2
+    assert stats["ok"]["runs"] == 2 and stats["ok"]["errors"] == 0
+    assert stats["ok"]["last_lag_ms"] == 1000.0
+    assert stats["bad"]["errors"] == 2
+    assert stats["bad"]["last_error"] == "RuntimeError: broker down"
+
+
+def test_market_hours_tasks_sleep_until_next_session() -> None:
+    # Friday 15:29:58 IST: the next 5s tick falls after the close.
+    now = _FakeTime(_ist_ts(2026, 10, 16, 15, 29, 58))
+    sched = _scheduler(now)
+    gated = ScheduledTask(
+        name="gated", fn=lambda: None, interval_sec=5, market_hours_only=True
+    )
+    slow = ScheduledTask(
+        name="slow", fn=lambda: None, interval_sec=5, off_hours_interval_sec=300
+    )
+    sched.add_task(gated)
+    sched.add_task(slow)
+    sched.run_pending()
+    now.ts += 5
+    sched.run_pending()
+
+    # 15:30:03 is still inside the 15:30 minute, then Monday's open.
+    now.ts += 60
+    sched.run_pending()
+    assert _ist(gated.next_run_at) == datetime(2026, 10, 19, 9, 15)
+    assert slow.next_run_at - now.ts <= 300
+
+    # A gated task registered over the weekend waits for Monday's open.
+    now.ts = _ist_ts(2026, 10, 17, 12, 0)
+    late = ScheduledTask(
+        name="late", fn=lambda: None, interval_sec=5, market_hours_only=True
+    )
+    sched.add_task(late)
+    assert _ist(late.next_run_at) == datetime(2026, 10, 19, 9, 15)
+
+    # The off-hours cadence never overshoots the next open.
+    now.ts = _ist_ts(2026, 10, 19, 9, 13)
+    assert _ist(sched._next_due(slow, now.ts)) == datetime(2026, 10, 19, 9, 15)
+
+
+def test_daily_trigger_and_overlap_prevention() -> None:
+    now = _FakeTime(_ist_ts(2026, 10, 16, 16, 0))
+    sched = _scheduler(now)
+    daily = ScheduledTask(name="daily", fn=lambda: None, daily_at_ist=((15, 30), (17, 0)))
+    sched.add_task(daily)
+    assert _ist(daily.next_run_at) == datetime(2026, 10, 16, 17, 0)
+    now.ts = daily.next_run_at
+    sched.run_pending()
+    assert daily.runs == 1
+    assert _ist(daily.next_run_at) == datetime(2026, 10, 19, 15, 30)
+
+    busy = ScheduledTask(name="busy", fn=lambda: None, interval_sec=1)
+    sched.add_task(busy)
+    busy.running = True
+    sched.run_pending()
+    assert busy.skipped_overlap == 1 and busy.runs == 0
+    assert busy.next_run_at == now.ts + 1
+
+
+def test_system_scheduler_endpoint(monkeypatch) -> None:
+    now = _FakeTime(_ist_ts(2026, 10, 16, 10, 0))
+    sched = _scheduler(now)
+    sched.add_task(ScheduledTask(name="alerts_v3", fn=lambda: None, interval_sec=15))
+    sched.run_pending()
+    monkeypatch.setattr(scheduler_mod, "_scheduler", sched)
+
+    with TestClient(app) as client:
+        res = client.get("/system/scheduler")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["running"] is False
+    task = body["tasks"]["alerts_v3"]
+    assert task["runs"] == 1 and task["errors"] == 0
+    assert task["trigger"] == "every 15s"
+    assert task["last_duration_ms"] is not None and task["last_lag_ms"] == 0.0
+
+
+def test_next_due_is_computed_outside_the_dispatch_lock() -> None:
+    now = _FakeTime(_ist_ts(2026, 10, 16, 10, 0))
+    sched = _scheduler(now)
+    held: list[bool] = []
+    real_session = sched.clock.session
+
+    def _session(day: date) -> ResolvedMarketSession:
+        held.append(sched._cond._is_owned())  # type: ignore[attr-defined]
+        return real_session(day)
+
+    sched.clock.session = _session  # type: ignore[method-assign]
+    sched.add_task(
+        ScheduledTask(name="gated", fn=lambda: None, interval_sec=5, market_hours_only=True)
+    )
+    sched.run_pending()
+    now.ts += 5
+    sched.run_pending()
+    assert held and not any(held)
+
+
+def test_daily_snapshot_tick_catches_up_after_a_late_dispatch(monkeypatch) -> None:
+    from app.services import holdings_summary_daily_snapshots as snaps
+
+    captured: list[datetime] = []
+    monkeypatch.setattr(
+        snaps,
+        "_run_capture_for_all_users",
+        lambda *, settings, as_of_date, run_at_ist: captured.append(run_at_ist),
+    )
+    monkeypatch.setattr(
+        snaps, "_state", {"last_1530_ist_date": None, "last_1700_ist_date": None}
+    )
+    clock = {"ts": _ist_ts(2026, 10, 16, 15, 34)}
+
+    class _Now(datetime):
+        @classmethod
+        def now(cls, tz=None):  # type: ignore[no-untyped-def, override]
+            return datetime.fromtimestamp(clock["ts"], tz)
+
+    monkeypatch.setattr(snaps, "datetime", _Now)
+
+    # Dispatched four minutes late: still captured, once.
+    snaps._daily_snapshot_tick()
+    snaps._daily_snapshot_tick()
+    assert [t.time().isoformat() for t in captured] == ["15:34:00"]
+
+    # A 17:00 run that lags past its slot still overwrites the 15:30 one.
+    clock["ts"] = _ist_ts(2026, 10, 16, 17, 6)
+    snaps._daily_snapshot_tick()
+    assert len(captured) == 2
+
+    # Next day, 15:30 was missed entirely: the 17:00 run covers both.
+    clock["ts"] = _ist_ts(2026, 10, 19, 17, 2)
+    snaps._daily_snapshot_tick()
+    snaps._daily_snapshot_tick()
+    assert len(captured) == 3
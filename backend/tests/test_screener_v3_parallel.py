@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import Candle, Group, GroupMember, ScreenerRun, User
+from app.services.screener_v3 import (
+    _run_screener,
+    create_screener_run,
+    evaluate_screener_v3,
+)
+
+client = TestClient(app)
+
+SYMBOLS = [f"PAR{i:02d}" for i in range(30)]
+
+
+def setup_module() -> None:  # type: ignore[override]
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    from app.core.auth import hash_password
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    with SessionLocal() as session:
+        user = User(
+            username="screener-par",
+            password_hash=hash_password("password"),
+            role="TRADER",
+            display_name="Screener Parallel",
+        )
+        session.add(user)
+        session.flush()
+        group = Group(owner_id=user.id, name="par-universe", kind="WATCHLIST")
+        session.add(group)
+        session.flush()
+        for n, symbol in enumerate(SYMBOLS):
+            session.add(GroupMember(group_id=group.id, symbol=symbol, exchange="NSE"))
+            # Even symbols trend up, odd symbols trend down.
+            step = 1.0 if n % 2 == 0 else -1.0
+            for i in range(60):
+                close = 200.0 + step * i
+                session.add(
+                    Candle(
+                        symbol=symbol,
+                        exchange="NSE",
+                        timeframe="1d",
+                        ts=today - timedelta(days=59 - i),
+                        open=close,
+                        high=close + 1.0,
+                        low=close - 1.0,
+                        close=close,
+                        volume=1000.0,
+                    )
+                )
+        session.commit()
+
+
+def _user_and_group(db) -> tuple[User, int]:  # type: ignore[no-untyped-def]
+    user = db.query(User).filter(User.username == "screener-par").one()
+    group = db.query(Group).filter(Group.name == "par-universe").one()
+    return user, group.id
+
+
+def _evaluate(settings, **kwargs):  # type: ignore[no-untyped-def]
+    with SessionLocal() as db:
+        user, group_id = _user_and_group(db)
+        return evaluate_screener_v3(
+            db,
+            settings,
+            user=user,
+            include_holdings=False,
+            group_ids=[group_id],
+            variables=[],
+            condition_dsl='PRICE("1d") > SMA(close, 20, "1d")',
+            evaluation_cadence=None,
+            allow_fetch=False,
+            **kwargs,
+        )
+
+
+def test_parallel_batches_match_serial_run() -> None:
+    base = get_settings()
+    serial = base.model_copy(update={"screener_workers": 1, "screener_batch_size": 4})
+    parallel = base.model_copy(update={"screener_workers": 3, "screener_batch_size": 4})
+
+    batches: list[int] = []
+    rows_serial, _, stats_serial = _evaluate(serial)
+    rows_parallel, _, stats_parallel = _evaluate(
+        parallel, on_batch=lambda rows, _stats: batches.append(len(rows))
+    )
+
+    assert [r.symbol for r in rows_parallel] == SYMBOLS
+    assert rows_parallel == rows_serial
+    assert stats_parallel == stats_serial
+    assert stats_parallel["matched_symbols"] == 15
+    # One callback per batch, each seeing every row finished so far.
+    assert batches == [4, 8, 12, 16, 20, 24, 28, 30]
+
+
+def test_cancel_event_stops_remaining_batches() -> None:
+    settings = get_settings().model_copy(
+        update={"screener_workers": 2, "screener_batch_size": 2}
+    )
+    cancel = threading.Event()
+    rows, _, stats = _evaluate(
+        settings, on_batch=lambda _rows, _stats: cancel.set(), cancel_event=cancel
+    )
+    assert 0 < len(rows) < len(SYMBOLS)
+    assert stats["evaluated_symbols"] == len(rows)
+    assert stats["total_symbols"] == len(SYMBOLS)
+
+
+def _create_run(db) -> ScreenerRun:  # type: ignore[no-untyped-def]
+    user, group_id = _user_and_group(db)
+    return create_screener_run(
+        db,
+        user=user,
+        include_holdings=False,
+        group_ids=[group_id],
+        variables_json="[]",
+        condition_dsl='PRICE("1d") > SMA(close, 20, "1d")',
+        evaluation_cadence="1d",
+        total_symbols=len(SYMBOLS),
+    )
+
+
+def test_background_run_persists_rows_and_pages() -> None:
+    with SessionLocal() as db:
+        run_id = _create_run(db).id
+    _run_screener(run_id, threading.Event())
+
+    with SessionLocal() as db:
+        run = db.get(ScreenerRun, run_id)
+        assert run is not None
+        assert run.status == "DONE"
+        assert run.evaluated_symbols == len(SYMBOLS)
+        assert len(json.loads(run.results_json)) == len(SYMBOLS)
+
+    client.post(
+        "/api/auth/login", json={"username": "screener-par", "password": "password"}
+    )
+    page = client.get(f"/api/screener-v3/runs/{run_id}/rows?offset=5&limit=10")
+    assert page.status_code == 200
+    assert [r["symbol"] for r in page.json()] == SYMBOLS[5:15]
+    matched = client.get(f"/api/screener-v3/runs/{run_id}/rows?matched_only=1")
+    assert len(matched.json()) == 15
+
+
+def test_cancel_endpoint_marks_run_and_worker_keeps_status() -> None:
+    with SessionLocal() as db:
+        run_id = _create_run(db).id
+
+    client.post(
+        "/api/auth/login", json={"username": "screener-par", "password": "password"}
+    )
+    res = client.post(f"/api/screener-v3/runs/{run_id}/cancel")
+    assert res.status_code == 200
+    assert res.json()["status"] == "CANCELLED"
+    assert client.post(f"/api/screener-v3/runs/{run_id}/cancel").status_code == 400
+
+    # A worker that was already running sees the cancelled status on its next
+    # batch write and does not flip the run back to DONE.
+    _run_screener(run_id, threading.Event())
+    with SessionLocal() as db:
+        run = db.get(ScreenerRun, run_id)
+        assert run is not None
+        assert run.status == "CANCELLED"
+        assert run.finished_at is not None
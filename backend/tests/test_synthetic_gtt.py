@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import os
+from datetime import UTC, datetime, timedelta
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models import Order, User
+from app.services import market_quotes, synthetic_gtt
+
+
+def setup_module() -> None:  # type: ignore[override]
+    os.environ["ST_TRADINGVIEW_WEBHOOK_SECRET"] = "synthetic-gtt-secret"
+    get_settings.cache_clear()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Prices must come from the fake broker, not quotes cached by other tests.
+    with market_quotes._cache_lock:
+        market_quotes._cache.clear()
+
+
+class _FakeZerodha:
+    def __init__(self, prices: dict[tuple[str, str], float]) -> None:
+        self.prices = prices
+        self.bulk_calls: list[list[tuple[str, str]]] = []
+
+    def get_ltp_bulk(self, instruments):
+        self.bulk_calls.append(list(instruments))
+        return {
+            k: {"last_price": self.prices[k], "prev_close": None}
+            for k in instruments
+            if k in self.prices
+        }
+
+    def get_ltp(self, *, exchange, tradingsymbol):  # pragma: no cover - must not be used
+        raise AssertionError("per-order LTP call")
+
+
+def _seed_orders() -> tuple[int, dict[str, list[int]]]:
+    now = datetime.now(UTC)
+    ids: dict[str, list[int]] = {"hit": [], "miss": []}
+    with SessionLocal() as session:
+        user = User(username="gtt-user", password_hash="x", role="ADMIN")
+        session.add(user)
+        session.commit()
+        specs = [
+            # (symbol, trigger, operator) with INFY=1500, TCS=3500, SBIN=800.
+            ("INFY", 1490.0, ">=", "hit"),
+            ("INFY", 1400.0, "<=", "miss"),
+            ("TCS", 3600.0, ">=", "miss"),
+            ("TCS", 3550.0, "<=", "hit"),
+            ("SBIN", 790.0, "<=", "miss"),
+        ]
+        for i, (symbol, trigger, op, bucket) in enumerate(specs):
+            order = Order(
+                user_id=user.id,
+                broker_name="zerodha",
+                symbol=symbol,
+                exchange="NSE",
+                side="BUY",
+                qty=1,
+                price=trigger,
+                trigger_price=trigger,
+                trigger_operator=op,
+                order_type="LIMIT",
+                product="CNC",
+                gtt=True,
+                synthetic_gtt=True,
+                armed_at=now,
+                status="WAITING",
+                mode="AUTO",
+                simulated=False,
+                created_at=now + timedelta(seconds=i),
+                updated_at=now,
+            )
+            session.add(order)
+            session.flush()
+            ids[bucket].append(order.id)
+        session.commit()
+        return int(user.id), ids
+
+
+def test_synthetic_gtt_batches_ltp_and_executes_only_triggered(monkeypatch) -> None:
+    _user_id, ids = _seed_orders()
+    fake = _FakeZerodha(
+        {("NSE", "INFY"): 1500.0, ("NSE", "TCS"): 3500.0, ("NSE", "SBIN"): 800.0}
+    )
+    built: list[int] = []
+
+    def _fake_client(_db, _settings, *, user_id):
+        built.append(user_id)
+        return fake
+
+    executed: list[int] = []
+
+    def _fake_execute(order_id, **_kwargs):
+        executed.append(order_id)
+
+    monkeypatch.setattr(synthetic_gtt, "is_market_open_now", lambda: True)
+    monkeypatch.setattr(synthetic_gtt, "_get_zerodha_client", _fake_client)
+    monkeypatch.setattr("app.api.orders.execute_order_internal", _fake_execute)
+
+    triggered = synthetic_gtt.process_synthetic_gtt_once()
+
+    assert triggered == 2
+    assert sorted(executed) == sorted(ids["hit"])
+    # One client and one bulk LTP call for three distinct instruments.
+    assert len(built) == 1
+    assert len(fake.bulk_calls) == 1
+    assert sorted(fake.bulk_calls[0]) == [("NSE", "INFY"), ("NSE", "SBIN"), ("NSE", "TCS")]
+
+    with SessionLocal() as session:
+        for order_id in ids["hit"]:
+            order = session.get(Order, order_id)
+            assert order.status == "SENDING"
+            assert order.triggered_at is not None
+        for order_id in ids["miss"]:
+            order = session.get(Order, order_id)
+            assert order.status == "WAITING"
+            assert order.last_checked_at is not None
+            assert order.last_seen_price in {1500.0, 3500.0, 800.0}
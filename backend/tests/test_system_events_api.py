@@ -10,6 +10,7 @@ from app.db.base import Base
 from app.db.session import SessionLocal, engine
 from app.main import app
 from app.models import SystemEvent
+from app.services import system_events
 from app.services.system_events import record_system_event
 
 client = TestClient(app)
@@ -74,3 +75,44 @@ def test_cleanup_system_events_removes_older_than_retention() -> None:
     messages = [r["message"] for r in remaining]
     assert "old" not in messages
     assert "new" in messages
+
+
+def test_buffered_sink_defers_writes_until_flush(monkeypatch) -> None:
+    sink = system_events.AuditEventSink(max_queue=2, flush_interval_sec=60.0)
+    monkeypatch.setattr(system_events, "_sink", sink)
+
+    def _messages() -> set[str]:
+        with SessionLocal() as session:
+            return {m for (m,) in session.query(SystemEvent.message)}
+
+    with SessionLocal() as session:
+        ev = record_system_event(session, level="INFO", category="test", message="buffered-1")
+        assert ev.id is None
+        # The caller's own pending work is still committed by the audit call.
+        session.add(SystemEvent(level="INFO", category="test", message="caller-pending"))
+        record_system_event(session, level="WARNING", category="test", message="buffered-2")
+        # Buffer is full (max_queue=2): this one falls back to a direct write.
+        record_system_event(session, level="INFO", category="test", message="overflow")
+        # ERROR events bypass the buffer.
+        err = record_system_event(session, level="ERROR", category="test", message="critical")
+        assert err.id is not None
+
+    seen = _messages()
+    assert {"caller-pending", "overflow", "critical"} <= seen
+    assert "buffered-1" not in seen and "buffered-2" not in seen
+
+    # Listing endpoints flush pending rows first, keeping event order by time.
+    rows = client.get("/api/system-events/?category=test&limit=50").json()
+    msgs = [r["message"] for r in rows]
+    assert msgs.index("buffered-2") < msgs.index("buffered-1")
+    stats = client.get("/api/system-events/buffer").json()
+    assert stats["enabled"] is True
+    assert stats["written"] == 2
+    assert stats["overflowed"] == 1
+    assert stats["queued"] == 0
+
+    with SessionLocal() as session:
+        record_system_event(session, level="INFO", category="test", message="at-shutdown")
+    monkeypatch.setattr(system_events, "_sink", None)
+    sink.shutdown()
+    assert "at-shutdown" in _messages()
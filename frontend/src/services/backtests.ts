@@ -1,5 +1,11 @@
-export type BacktestKind = 'SIGNAL' | 'PORTFOLIO' | 'PORTFOLIO_STRATEGY' | 'EXECUTION' | 'STRATEGY'
-export type BacktestStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED'
+export type BacktestKind = 'SIGNAL' | 'PORTFOLIO' | 'PORTFOLIO_STRATEGY' | 'EXECUTION' | 'STRATEGY' | 'SWEEP'
+export type BacktestStatus =
+  | 'PENDING'
+  | 'QUEUED'
+  | 'RUNNING'
+  | 'COMPLETED'
+  | 'FAILED'
+  | 'CANCELLED'
 
 export type UniverseSymbol = {
   symbol: string
@@ -22,6 +28,7 @@ export type BacktestRun = {
   config: Record<string, unknown>
   result?: Record<string, unknown> | null
   error_message?: string | null
+  progress?: number | null
   started_at?: string | null
   finished_at?: string | null
   created_at: string
@@ -48,7 +55,25 @@ async function readApiError(res: Response): Promise<string> {
   }
 }
 
-export async function createBacktestRun(payload: {
+const ACTIVE_STATUSES = new Set(['PENDING', 'QUEUED', 'RUNNING'])
+
+// Backtests run as background jobs: poll the run until it leaves
+// QUEUED/RUNNING, reporting progress (0-100) along the way.
+export async function waitForBacktestRun(
+  run: BacktestRun,
+  opts?: { intervalMs?: number; onProgress?: (run: BacktestRun) => void },
+): Promise<BacktestRun> {
+  const intervalMs = opts?.intervalMs ?? 1000
+  let current = run
+  while (ACTIVE_STATUSES.has(String(current.status))) {
+    opts?.onProgress?.(current)
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    current = await getBacktestRun(current.id)
+  }
+  return current
+}
+
+export async function submitBacktestRun(payload: {
   kind: BacktestKind
   title?: string | null
   universe: BacktestUniverse
@@ -68,6 +93,30 @@ export async function createBacktestRun(payload: {
   return (await res.json()) as BacktestRun
 }
 
+export async function createBacktestRun(
+  payload: {
+    kind: BacktestKind
+    title?: string | null
+    universe: BacktestUniverse
+    config: Record<string, unknown>
+  },
+  opts?: { onProgress?: (run: BacktestRun) => void },
+): Promise<BacktestRun> {
+  const run = await submitBacktestRun(payload)
+  return waitForBacktestRun(run, { onProgress: opts?.onProgress })
+}
+
+export async function cancelBacktestRun(id: number): Promise<BacktestRun> {
+  const res = await fetch(`/api/backtests/runs/${id}/cancel`, { method: 'POST' })
+  if (!res.ok) {
+    const detail = await readApiError(res)
+    throw new Error(
+      `Failed to cancel backtest run (${res.status})${detail ? `: ${detail}` : ''}`,
+    )
+  }
+  return (await res.json()) as BacktestRun
+}
+
 export async function listBacktestRuns(params?: {
   kind?: BacktestKind
   limit?: number
@@ -15,7 +15,7 @@ export type ScreenerRow = {
 
 export type ScreenerRun = {
   id: number
-  status: 'RUNNING' | 'DONE' | 'ERROR'
+  status: 'RUNNING' | 'DONE' | 'ERROR' | 'CANCELLED'
   evaluation_cadence: string
   total_symbols: number
   evaluated_symbols: number
@@ -115,6 +115,35 @@ export async function listScreenerRuns(params?: {
   return (await res.json()) as ScreenerRun[]
 }
 
+export async function listScreenerRunRows(
+  runId: number,
+  params?: { offset?: number; limit?: number; matchedOnly?: boolean },
+): Promise<ScreenerRow[]> {
+  const url = new URL(`/api/screener-v3/runs/${runId}/rows`, window.location.origin)
+  if (params?.offset != null) url.searchParams.set('offset', String(params.offset))
+  if (params?.limit != null) url.searchParams.set('limit', String(params.limit))
+  if (params?.matchedOnly) url.searchParams.set('matched_only', '1')
+  const res = await fetch(url.toString())
+  if (!res.ok) {
+    const detail = await readApiError(res)
+    throw new Error(
+      `Failed to load screener rows (${res.status})${detail ? `: ${detail}` : ''}`,
+    )
+  }
+  return (await res.json()) as ScreenerRow[]
+}
+
+export async function cancelScreenerRun(runId: number): Promise<ScreenerRun> {
+  const res = await fetch(`/api/screener-v3/runs/${runId}/cancel`, { method: 'POST' })
+  if (!res.ok) {
+    const detail = await readApiError(res)
+    throw new Error(
+      `Failed to cancel run (${res.status})${detail ? `: ${detail}` : ''}`,
+    )
+  }
+  return (await res.json()) as ScreenerRun
+}
+
 export async function deleteScreenerRun(runId: number): Promise<void> {
   const res = await fetch(`/api/screener-v3/runs/${runId}`, { method: 'DELETE' })
   if (!res.ok && res.status !== 204) {